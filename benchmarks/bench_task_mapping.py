@@ -0,0 +1,125 @@
+"""
+Benchmark del mapeo de filas a tareas ("Proceso Activo") con 100k filas.
+
+Compara el camino anterior (un diccionario por fila + una dataclass Task con
+__dict__ por fila, todas retenidas en una lista) con el actual (filas nativas
+leídas por índice a través de ColumnMap y una única Task __slots__ para la fila
+ganadora).
+
+Uso (desde la raíz del proyecto, con config.ini presente):
+    python -m benchmarks.bench_task_mapping [--rows 100000]
+"""
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+
+from src.models import Task
+from src.strategies.active_processes import ActiveProcessStrategy
+
+COLUMNS = ('SysTaskNum', 'TaskDescription', 'Function', 'TaskType', 'Duracion', 'StartedOn',
+           'LastActivityOn', 'ProgressPercent', 'SchedDesc', 'SubmitUser', 'TaskStatus', 'ActivityMsg')
+
+class FakeRow(tuple):
+    """Imita pyodbc.Row: una tupla que expone `cursor_description`."""
+    cursor_description = tuple((name, None, None, None, None, None, True) for name in COLUMNS)
+
+@dataclass
+class LegacyTask:
+    """Réplica de la dataclass Task original (con __dict__ por instancia)."""
+    task_id: str
+    task_description: str
+    start_time: datetime
+    submit_user: str
+    sched_desc: Optional[str] = None
+    task_type: Optional[str] = None
+    run_procedure: Optional[str] = None
+    param_maint_program: Optional[str] = None
+    function_id: Optional[str] = None
+    duration_minutes: Optional[int] = None
+    last_activity_on: Optional[datetime] = None
+    progress_percent: Optional[float] = None
+    task_status: Optional[str] = None
+    activity_msg: Optional[str] = None
+
+def make_rows(count: int):
+    rnd = random.Random(42)
+    now = datetime(2025, 6, 1, 12, 0, 0)
+    rows = []
+    for i in range(count):
+        duration = rnd.randint(0, 600)
+        rows.append(FakeRow((
+            i, f"Tarea {i % 50}", f"Erp.Rpt.Func{i % 20}", "Process", duration,
+            now - timedelta(minutes=duration), now, float(rnd.randint(0, 100)),
+            "Immediate Run Request", "manager", "ACTIVE", "Procesando"
+        )))
+    return rows
+
+def legacy_process(rows):
+    """Camino anterior: dict(zip(...)) por fila y una LegacyTask por fila."""
+    columns = [column[0] for column in rows[0].cursor_description]
+    raw = [dict(zip(columns, row)) for row in rows]
+    tasks = []
+    longest = None
+    for row in raw:
+        task = LegacyTask(
+            task_id=str(row.get('SysTaskNum')),
+            task_description=row.get('TaskDescription'),
+            start_time=row.get('StartedOn'),
+            submit_user=row.get('SubmitUser'),
+            function_id=row.get('Function'),
+            task_type=row.get('TaskType'),
+            duration_minutes=row.get('Duracion'),
+            last_activity_on=row.get('LastActivityOn'),
+            progress_percent=float(row['ProgressPercent']) if row.get('ProgressPercent') is not None else None,
+            sched_desc=row.get('SchedDesc'),
+            task_status=row.get('TaskStatus'),
+            activity_msg=row.get('ActivityMsg')
+        )
+        tasks.append(task)
+        if task.duration_minutes is not None:
+            if longest is None or task.duration_minutes > longest.duration_minutes:
+                longest = task
+    return len(tasks), longest
+
+def current_process(rows):
+    """Camino actual: filas nativas leídas por índice, Task solo para la ganadora."""
+    statistics = ActiveProcessStrategy().process_raw_tasks(iter(rows))
+    return statistics.total_tasks, statistics.longest_running_task
+
+def measure(label, func, rows):
+    tracemalloc.start()
+    started = time.perf_counter()
+    total, longest = func(rows)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<10} filas={total:>8}  tiempo={elapsed * 1000:8.1f} ms  "
+          f"({elapsed / total * 1e6:5.2f} µs/fila)  pico de memoria={peak / 1024:10.1f} KiB  "
+          f"({peak / total:6.1f} B/fila)")
+    return total, longest, elapsed, peak
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args(argv)
+
+    sample = Task(task_id="1", task_description="x", start_time=datetime.now(), submit_user="u")
+    legacy_sample = LegacyTask(task_id="1", task_description="x", start_time=datetime.now(), submit_user="u")
+    print(f"Tamaño por instancia: Task(__slots__)={sys.getsizeof(sample)} B, "
+          f"dataclass={sys.getsizeof(legacy_sample) + sys.getsizeof(legacy_sample.__dict__)} B (objeto + __dict__)")
+
+    rows = make_rows(args.rows)
+    legacy_total, legacy_longest, legacy_time, legacy_peak = measure("anterior", legacy_process, rows)
+    total, longest, elapsed, peak = measure("actual", current_process, rows)
+
+    assert legacy_total == total
+    assert legacy_longest.task_id == longest.task_id
+    print(f"Mejora: {legacy_time / elapsed:.1f}x en tiempo, {legacy_peak / max(peak, 1):.1f}x en memoria pico.")
+
+if __name__ == "__main__":
+    main()
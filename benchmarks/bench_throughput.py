@@ -0,0 +1,230 @@
+"""
+Benchmark de rendimiento de las estrategias y del ciclo de monitoreo completo.
+
+Mide, para cada tamaño de backlog, sobre una carga sintética y determinista (ver workload.py):
+- estrategia_activos:  ActiveProcessStrategy.process_raw_tasks
+- estrategia_mandados: SubmittedTaskStrategy.process_raw_tasks
+- ciclo:               TaskMonitorService.run_monitoring con ambas estrategias, un executor
+                       en memoria y un observador que no hace nada (recorrido completo)
+- ciclo_detalle:       igual, pero el observador pide el detalle de todas las tareas
+                       (el camino de los umbrales por tarea, el histórico y las líneas base)
+
+Reporta filas/segundo (mejor de --repeat ejecuciones) y la memoria pico del procesamiento
+(tracemalloc, en una ejecución aparte para no distorsionar los tiempos). Las filas de entrada
+se generan antes de medir y no cuentan en la memoria pico.
+
+Con --save-baseline guarda los resultados como línea base; en las siguientes ejecuciones
+compara contra ella y termina con código 1 si algún caso es más lento (o usa más memoria)
+que la línea base más la tolerancia. La línea base depende de la máquina: genérala en la
+misma máquina en la que se comparará.
+
+La configuración se genera en un directorio temporal; no se usa el config.ini del proyecto.
+Con 1.000.000 de filas por categoría el proceso necesita ~1 GB de memoria (las filas de entrada).
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.bench_throughput
+    python -m benchmarks.bench_throughput --sizes 10,1000,100000,1000000 --save-baseline
+    python -m benchmarks.bench_throughput --tolerance 0.2
+"""
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from src.core.monitor import TaskMonitorService
+from src.strategies.active_processes import ActiveProcessStrategy
+from src.strategies.submitted_tasks import SubmittedTaskStrategy
+from src.utils.config_manager import ConfigManager
+
+from benchmarks.workload import InMemoryExecutor, NoOpObserver, WorkloadGenerator
+
+DEFAULT_SIZES = (10, 1_000, 10_000, 100_000)
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# Configuración fija: recorrido completo, secuencial y sin lote, para medir el procesamiento en Python
+BENCHMARK_CONFIG = """[Monitoring]
+max_tasks_limit = 100
+check_interval_seconds = 60
+long_running_task_threshold_minutes = 0
+parallel_strategies = false
+batch_queries = false
+summary_mode = false
+incremental_mode = false
+"""
+
+class Result(NamedTuple):
+    case: str
+    rows: int
+    best_seconds: float
+    peak_bytes: int
+
+    @property
+    def key(self) -> str:
+        return f"{self.case}/{self.rows}"
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.best_seconds if self.best_seconds > 0 else float("inf")
+
+def use_benchmark_config(directory: str):
+    path = os.path.join(directory, "config.ini")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(BENCHMARK_CONFIG)
+    ConfigManager._config_path = path
+    ConfigManager._load_config()
+
+def time_best(func: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def peak_memory(func: Callable[[], object]) -> int:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+def build_cases(generator: WorkloadGenerator, size: int) -> Dict[str, Callable[[], object]]:
+    """Prepara las filas de un tamaño y retorna las funciones a medir por caso."""
+    active_rows = generator.active_rows(size)
+    submitted_rows = generator.submitted_rows(size)
+    active, submitted = ActiveProcessStrategy(), SubmittedTaskStrategy()
+
+    executor = InMemoryExecutor()
+    executor.register_strategy(active, active_rows)
+    executor.register_strategy(submitted, submitted_rows)
+
+    def monitor(task_detail: bool) -> TaskMonitorService:
+        service = TaskMonitorService(executor, [submitted, active])
+        service.add_observer(NoOpObserver(task_detail=task_detail))
+        return service
+
+    cycle, cycle_detail = monitor(False), monitor(True)
+    return {
+        "estrategia_activos": lambda: active.process_raw_tasks(iter(active_rows)),
+        "estrategia_mandados": lambda: submitted.process_raw_tasks(iter(submitted_rows)),
+        "ciclo": cycle.run_monitoring,
+        "ciclo_detalle": cycle_detail.run_monitoring,
+    }
+
+# Filas procesadas por caso: el ciclo recorre las dos categorías
+ROWS_PER_SIZE = {"estrategia_activos": 1, "estrategia_mandados": 1, "ciclo": 2, "ciclo_detalle": 2}
+
+def run(sizes: List[int], repeat: int, seed: int, measure_memory: bool) -> List[Result]:
+    generator = WorkloadGenerator(seed=seed)
+    results = []
+    for size in sizes:
+        cases = build_cases(generator, size)
+        for case, func in cases.items():
+            best = time_best(func, repeat)
+            peak = peak_memory(func) if measure_memory else 0
+            result = Result(case, size * ROWS_PER_SIZE[case], best, peak)
+            results.append(result)
+            print(f"{case:<20} filas={result.rows:>9}  mejor={best * 1000:10.2f} ms  "
+                  f"{result.rows_per_second:>12,.0f} filas/s  pico={peak / 1024:10.1f} KiB", flush=True)
+        del cases
+    return results
+
+def load_baseline(path: str) -> Optional[dict]:
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def save_baseline(path: str, results: List[Result], seed: int):
+    data = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "seed": seed,
+        "results": {r.key: {"rows_per_second": r.rows_per_second, "peak_bytes": r.peak_bytes} for r in results},
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+    print(f"Línea base guardada en '{path}'.")
+
+def compare(results: List[Result], baseline: dict, tolerance: float, min_peak_bytes: int = 64 * 1024) -> List[str]:
+    """
+    Retorna las regresiones: casos más lentos que la línea base por más de `tolerance`
+    (fracción), o con memoria pico mayor por más de `tolerance` (ignorando picos menores
+    a `min_peak_bytes`, donde el ruido del intérprete domina).
+    """
+    regressions = []
+    reference = baseline.get("results", {})
+    for result in results:
+        previous = reference.get(result.key)
+        if previous is None:
+            continue
+        speed_ratio = result.rows_per_second / previous["rows_per_second"]
+        if speed_ratio < 1 - tolerance:
+            regressions.append(f"{result.key}: {result.rows_per_second:,.0f} filas/s vs "
+                               f"{previous['rows_per_second']:,.0f} en la línea base ({speed_ratio - 1:+.0%})")
+        previous_peak = previous.get("peak_bytes") or 0
+        if result.peak_bytes and previous_peak and max(result.peak_bytes, previous_peak) >= min_peak_bytes:
+            memory_ratio = result.peak_bytes / previous_peak
+            if memory_ratio > 1 + tolerance:
+                regressions.append(f"{result.key}: pico de memoria {result.peak_bytes / 1024:,.1f} KiB vs "
+                                   f"{previous_peak / 1024:,.1f} KiB en la línea base ({memory_ratio - 1:+.0%})")
+    return regressions
+
+def parse_sizes(value: str) -> List[int]:
+    sizes = [int(part.replace("_", "")) for part in value.split(",") if part.strip()]
+    if not sizes or any(size <= 0 for size in sizes):
+        raise argparse.ArgumentTypeError("Los tamaños deben ser enteros positivos separados por coma.")
+    return sizes
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=parse_sizes, default=list(DEFAULT_SIZES),
+                        help="Tamaños de backlog separados por coma (ej. 10,1000,1000000).")
+    parser.add_argument("--repeat", type=int, default=5, help="Ejecuciones por caso; se reporta la mejor.")
+    parser.add_argument("--seed", type=int, default=42, help="Semilla de la carga sintética.")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Archivo JSON de la línea base.")
+    parser.add_argument("--save-baseline", action="store_true", help="Guarda los resultados como nueva línea base.")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Fracción de empeoramiento tolerada antes de reportar una regresión.")
+    parser.add_argument("--no-memory", action="store_true", help="No mide la memoria pico (más rápido).")
+    args = parser.parse_args(argv)
+
+    # El monitor registra cada ciclo en INFO: se silencia para no medir el logging
+    logging.getLogger().setLevel(logging.WARNING)
+    print(f"Python {platform.python_version()} ({platform.machine()}), semilla {args.seed}, "
+          f"mejor de {args.repeat} ejecuciones.")
+    with tempfile.TemporaryDirectory() as directory:
+        use_benchmark_config(directory)
+        results = run(args.sizes, args.repeat, args.seed, not args.no_memory)
+
+    if args.save_baseline:
+        save_baseline(args.baseline, results, args.seed)
+        return 0
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        print(f"Sin línea base en '{args.baseline}' (usa --save-baseline para crearla).")
+        return 0
+    if baseline.get("seed") != args.seed:
+        print(f"Advertencia: la línea base se generó con la semilla {baseline.get('seed')}.")
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"{len(regressions)} regresión(es) respecto de la línea base (tolerancia {args.tolerance:.0%}):")
+        for regression in regressions:
+            print(f"  - {regression}")
+        return 1
+    print(f"Sin regresiones respecto de la línea base (tolerancia {args.tolerance:.0%}).")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
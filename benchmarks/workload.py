@@ -0,0 +1,175 @@
+"""
+Carga de trabajo sintética y determinista de Epicor para los benchmarks.
+
+Genera filas con la forma de los queries de "Proceso Activo" (Ice.SysTask) y de
+"Mandado a Someter" (Ice.SysAgentTask):
+- Funciones con distribución sesgada (Zipf): unas pocas funciones concentran la mayoría
+  de las tareas, como en un servidor real (MRP, reportes frecuentes, etc.).
+- Duraciones log-normales (la mayoría cortas, una cola larga de tareas de horas).
+- Nulos en ProgressPercent, Function, SchedDesc, ParamMaintProgram y Duracion.
+- La misma semilla y el mismo tamaño producen siempre las mismas filas.
+
+Las filas son tuplas que exponen `cursor_description`, igual que pyodbc.Row, así que las
+estrategias recorren el mismo camino (ColumnMap por índice) que contra SQL Server.
+"""
+import itertools
+import math
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from src.core.interfaces import IDatabaseExecutor, ITaskObserver, ITaskProcessingStrategy
+from src.models import Task, TaskStatistics
+from src.utils.sql import Query, QueryLike, as_query
+
+ACTIVE_COLUMNS = ('SysTaskNum', 'TaskDescription', 'Function', 'TaskType', 'Duracion', 'StartedOn',
+                  'LastActivityOn', 'ProgressPercent', 'SchedDesc', 'SubmitUser', 'TaskStatus', 'ActivityMsg')
+SUBMITTED_COLUMNS = ('AgentSchedNum', 'SchedDesc', 'TaskDesc', 'TaskType', 'RunProcedure',
+                     'SubmittedOn', 'SubmitUser', 'ParamMaintProgram')
+
+# Momento fijo de referencia: las fechas no dependen de cuándo se ejecuta el benchmark
+REFERENCE_NOW = datetime(2025, 6, 2, 9, 30, 0)
+
+def _description(columns: Sequence[str]) -> tuple:
+    return tuple((name, None, None, None, None, None, True) for name in columns)
+
+class ActiveRow(tuple):
+    """Fila de "Proceso Activo" con la interfaz de pyodbc.Row (`cursor_description`)."""
+    __slots__ = ()
+    cursor_description = _description(ACTIVE_COLUMNS)
+
+class SubmittedRow(tuple):
+    """Fila de "Mandado a Someter" con la interfaz de pyodbc.Row (`cursor_description`)."""
+    __slots__ = ()
+    cursor_description = _description(SUBMITTED_COLUMNS)
+
+_FUNCTION_PREFIXES = ("Erp.Rpt.", "Erp.Proc.", "Erp.Internal.", "Ice.Proc.", "Erp.UIProc.")
+_SCHEDULES = ("Nocturno", "Cada 15 minutos", "Cierre mensual", "Semanal")
+_TASK_TYPES = ("Process", "Report", "Export")
+_TASK_TYPE_CUM_WEIGHTS = (80, 95, 100)
+_ACTIVITY_MESSAGES = (None, "Procesando", "Generando reporte", "Esperando bloqueo", "Enviando correo")
+
+def _zipf_cum_weights(n: int, exponent: float) -> List[float]:
+    return list(itertools.accumulate(1 / (rank ** exponent) for rank in range(1, n + 1)))
+
+class WorkloadGenerator:
+    """
+    Generador determinista de filas sintéticas.
+    `functions` es el número de funciones distintas y `skew` el exponente de Zipf
+    (1.1 = la función más frecuente aparece ~15% de las veces con 300 funciones).
+    """
+    def __init__(self, seed: int = 42, functions: int = 300, skew: float = 1.1, users: int = 40):
+        self.seed = seed
+        self._functions = [f"{_FUNCTION_PREFIXES[i % len(_FUNCTION_PREFIXES)]}Func{i:03d}" for i in range(functions)]
+        self._cum_weights = _zipf_cum_weights(functions, skew)
+        self._users = [f"usuario{i:02d}" for i in range(users)]
+        # Las fechas se derivan de minutos enteros: se reutiliza un datetime por valor
+        self._datetimes: Dict[int, datetime] = {}
+
+    def _minutes_ago(self, minutes: int) -> datetime:
+        value = self._datetimes.get(minutes)
+        if value is None:
+            value = self._datetimes[minutes] = REFERENCE_NOW - timedelta(minutes=minutes)
+        return value
+
+    def _rng(self, kind: str, count: int) -> random.Random:
+        # Una secuencia independiente por tipo y tamaño: agregar un tamaño no altera los demás
+        return random.Random(f"{self.seed}:{kind}:{count}")
+
+    def _pick_functions(self, rnd: random.Random, count: int) -> List[str]:
+        return rnd.choices(self._functions, cum_weights=self._cum_weights, k=count)
+
+    def active_rows(self, count: int) -> List[ActiveRow]:
+        """Filas del query de "Proceso Activo" (tareas en ejecución)."""
+        rnd = self._rng("active", count)
+        functions = self._pick_functions(rnd, count)
+        rows = []
+        for i in range(count):
+            function_id = functions[i]
+            duration = None if rnd.random() < 0.01 else min(int(rnd.lognormvariate(math.log(6), 1.3)), 4320)
+            started_on = self._minutes_ago(duration) if duration is not None else None
+            last_activity = self._minutes_ago(min(duration, rnd.randint(0, 10))) if duration is not None else None
+            rows.append(ActiveRow((
+                100000 + i,
+                function_id.rsplit(".", 1)[-1],
+                None if rnd.random() < 0.08 else function_id,
+                rnd.choices(_TASK_TYPES, cum_weights=_TASK_TYPE_CUM_WEIGHTS)[0],
+                duration,
+                started_on,
+                last_activity,
+                None if rnd.random() < 0.4 else float(rnd.randint(0, 100)),
+                "Immediate Run Request" if rnd.random() < 0.7 else (None if rnd.random() < 0.1 else rnd.choice(_SCHEDULES)),
+                rnd.choice(self._users),
+                "ACTIVE",
+                rnd.choice(_ACTIVITY_MESSAGES),
+            )))
+        return rows
+
+    def submitted_rows(self, count: int) -> List[SubmittedRow]:
+        """Filas del query de "Mandado a Someter" (solicitudes en cola)."""
+        rnd = self._rng("submitted", count)
+        functions = self._pick_functions(rnd, count)
+        rows = []
+        for i in range(count):
+            function_id = functions[i]
+            waiting = min(int(rnd.expovariate(1 / 3)), 1440)
+            rows.append(SubmittedRow((
+                200000 + i,
+                "Immediate Run Request",
+                function_id.rsplit(".", 1)[-1],
+                rnd.choices(_TASK_TYPES, cum_weights=_TASK_TYPE_CUM_WEIGHTS)[0],
+                function_id,
+                None if rnd.random() < 0.005 else self._minutes_ago(waiting),
+                rnd.choice(self._users),
+                None if rnd.random() < 0.3 else function_id.replace(".", "/") + ".dll",
+            )))
+        return rows
+
+class InMemoryExecutor(IDatabaseExecutor):
+    """
+    Executor que responde cada query registrado con filas en memoria (sin red ni driver).
+    Un query no registrado es un error: así el benchmark no mide por accidente otro camino.
+    """
+    def __init__(self):
+        self._results: Dict[Query, List[Any]] = {}
+
+    def register(self, query: QueryLike, rows: List[Any]):
+        self._results[as_query(query)] = rows
+
+    def register_strategy(self, strategy: ITaskProcessingStrategy, rows: List[Any]):
+        """Registra las filas que devuelve el query completo de la estrategia."""
+        self.register(strategy.get_tasks_query(), rows)
+
+    def _rows(self, query: QueryLike) -> List[Any]:
+        query = as_query(query)
+        try:
+            return self._results[query]
+        except KeyError:
+            raise RuntimeError(f"Query no registrado en el executor en memoria: {query.sql.strip()[:80]}...") from None
+
+    def execute_query(self, query: QueryLike) -> List[dict]:
+        rows = self._rows(query)
+        if not rows:
+            return []
+        columns = [column[0] for column in rows[0].cursor_description]
+        return [dict(zip(columns, row)) for row in rows]
+
+    def iter_rows(self, query: QueryLike, chunk_size: Optional[int] = None) -> Iterator[Any]:
+        # Generador (con close()), como el executor real: el monitor lo cierra con closing()
+        yield from self._rows(query)
+
+class NoOpObserver(ITaskObserver):
+    """Observador que no hace nada; con `task_detail` pide el detalle de todas las tareas."""
+    def __init__(self, task_detail: bool = False):
+        self._task_detail = task_detail
+        self.updates = 0
+
+    @property
+    def requires_task_detail(self) -> bool:
+        return self._task_detail
+
+    def update(self, statistics: TaskStatistics):
+        self.updates += 1
+
+    def notify_long_running_task(self, task: Task, category: str):
+        pass
@@ -1,66 +1,383 @@
 # main.py
+import argparse
 import logging
-# import time  # <--- YA NO NECESITAMOS IMPORTAR TIME
-from src.database.db_executor import PyODBCExecutor
-from src.observers.slack_notifier import SlackNotifier
-from src.strategies.submitted_tasks import SubmittedTaskStrategy
-from src.strategies.active_processes import ActiveProcessStrategy
+import os
+from typing import Dict, List, Optional
+from src.core.interfaces import IDatabaseExecutor, ITaskObserver, ITaskProcessingStrategy
 from src.core.monitor import TaskMonitorService
-from src.utils.config_manager import ConfigManager
+from src.core.multi_instance import MonitoredInstance, MultiInstanceMonitor
+from src.core.plugins import OBSERVERS, STRATEGIES
+from src.core.scheduler import AdaptiveIntervalPolicy, AdaptivePollingScheduler, PollingScheduler
+from src.core.alert_state import AlertStateTracker, InMemoryStateStore, SQLiteStateStore
+from src.core.baselines import BaselineEngine
+from src.core.progress import ProgressTracker
+from src.core.metrics import MetricsRegistry, MonitorMetrics
+from src.utils.config_manager import ConfigManager, InstanceSettings
+from src.strategies.filters import describe_filters
+from src.utils import tracing
+
+# Los módulos con dependencias pesadas u opcionales (pyodbc, requests, la grabación de capturas,
+# el servidor HTTP de métricas, cProfile) se importan solo en la función que los necesita,
+# para que una ejecución de un solo ciclo arranque rápido.
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def main():
+DEFAULT_STRATEGIES = ["submitted", "active"] # [Plugins] strategies por defecto
+DEFAULT_OBSERVERS = ["slack"]                # [Plugins] observers por defecto
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Monitoreo de tareas Epicor con alertas a Slack.")
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Mantiene el proceso activo y ejecuta el monitoreo en el intervalo configurado en [Monitoring]."
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="ARCHIVO",
+        help="Perfila un ciclo con cProfile y guarda el resultado en ARCHIVO (y un resumen en ARCHIVO.txt). "
+             "Con --daemon se perfila solo el primer ciclo."
+    )
+    capture = parser.add_mutually_exclusive_group()
+    capture.add_argument(
+        "--record",
+        metavar="ARCHIVO",
+        help="Graba los resultados de cada query (con su momento y latencia) en ARCHIVO para reproducirlos con --replay."
+    )
+    capture.add_argument(
+        "--replay",
+        metavar="ARCHIVO",
+        help="Reproduce una captura de --record en lugar de consultar SQL Server y termina al agotarla. "
+             "Las notificaciones solo se registran en el log (no se envían a Slack)."
+    )
+    parser.add_argument(
+        "--replay-speed",
+        type=float,
+        default=1.0,
+        metavar="X",
+        help="Velocidad de --replay: 1 = tiempo real (por defecto), 2 = el doble, 0 = tan rápido como sea posible."
+    )
+    return parser.parse_args(argv)
+
+def get_check_interval_seconds(config_manager: ConfigManager) -> float:
+    """
+    Obtiene el intervalo de monitoreo para el modo residente.
+    Usa 'check_interval_seconds' y, si no existe, 'check_interval_minutes' (ver MonitoringSettings).
+    """
+    return config_manager.monitoring().check_interval_seconds
+
+def instance_capture_path(path: str, instance_name: str) -> str:
+    """Archivo de captura de una instancia: su nombre antes de las extensiones (captura.PROD.jsonl.gz)."""
+    directory, filename = os.path.split(path)
+    stem, dot, extensions = filename.partition(".")
+    return os.path.join(directory, f"{stem}.{instance_name}{dot}{extensions}")
+
+def build_db_executor(args, instance: Optional[InstanceSettings] = None) -> IDatabaseExecutor:
+    """
+    Crea el executor de base de datos: el de SQL Server (opcionalmente grabando sus
+    resultados con --record) o, con --replay, uno que reproduce una captura sin driver ODBC.
+    Con `instance` se usa la cadena de conexión de su sección y una captura propia.
+    """
+    section = instance.section if instance is not None else "Database"
+    def capture_path(path: str) -> str:
+        return instance_capture_path(path, instance.name) if instance is not None else path
+
+    if args.replay:
+        from src.database.replay import ReplayExecutor
+        return ReplayExecutor(capture_path(args.replay), speed=args.replay_speed)
+    from src.database.db_executor import PyODBCExecutor # Requiere pyodbc; no se carga al reproducir
+    db_executor = PyODBCExecutor(section)
+    if args.record:
+        from src.database.replay import RecordingExecutor
+        db_executor = RecordingExecutor(db_executor, capture_path(args.record))
+    return db_executor
+
+def build_strategies(config_manager: ConfigManager, instance: Optional[InstanceSettings] = None) -> List[ITaskProcessingStrategy]:
+    """
+    Crea las estrategias de [Plugins] `strategies` (o las de la instancia, si las indica).
+    Cada nombre se resuelve con el registro de plugins: "submitted", "active", una ruta
+    "paquete.modulo:Clase" o un entry point de 'epicor_monitor.strategies'.
+    """
+    names = list(instance.strategies) if instance is not None and instance.strategies else \
+        config_manager.get_list("Plugins", "strategies", DEFAULT_STRATEGIES)
+    if not names:
+        raise ValueError("No hay estrategias configuradas en [Plugins] strategies.")
+    return [STRATEGIES.create(name) for name in names]
+
+def build_observers(config_manager: ConfigManager, replaying: bool) -> List[ITaskObserver]:
+    """
+    Crea los notificadores de [Plugins] `observers` ("slack", "log", una ruta
+    "paquete.modulo:Clase" o un entry point de 'epicor_monitor.observers').
+    Al reproducir una captura solo se registran en el log.
+    """
+    names = ["log"] if replaying else config_manager.get_list("Plugins", "observers", DEFAULT_OBSERVERS)
+    return [OBSERVERS.create(name) for name in names]
+
+def run_replay(run_cycle, db_executors: List[IDatabaseExecutor]):
+    """Ejecuta ciclos hasta agotar las capturas (o hasta que un ciclo ya no consuma resultados)."""
+    def pending() -> int:
+        return sum(db_executor.pending() for db_executor in db_executors)
+
+    def served() -> int:
+        return sum(db_executor.served for db_executor in db_executors)
+
+    cycles = 0
+    while pending():
+        served_before = served()
+        run_cycle()
+        cycles += 1
+        if served() == served_before:
+            logging.warning(f"El ciclo no coincidió con ningún query de la captura ({pending()} "
+                            "resultado(s) sin usar). ¿Cambió la configuración de [Monitoring] o las estrategias?")
+            break
+    logging.info(f"Reproducción finalizada: {cycles} ciclo(s), {served()} resultado(s) servidos.")
+
+def build_alert_tracker(config_manager: ConfigManager, daemon: bool):
+    """
+    Crea el deduplicador de alertas según [Alerts].
+    En modo residente (y al reproducir una captura) el estado vive en memoria; en
+    ejecuciones de un solo ciclo se guarda en un archivo SQLite para sobrevivir entre ejecuciones.
+    """
+    if not config_manager.get_bool("Alerts", "deduplicate", True):
+        return None
+    if daemon:
+        store = InMemoryStateStore()
+    else:
+        try:
+            path = config_manager.get_setting("Alerts", "state_store_path")
+        except KeyError:
+            path = "monitor_state.db"
+        store = SQLiteStateStore(path)
+    return AlertStateTracker(store, renotify_minutes=config_manager.get_float("Alerts", "renotify_minutes", 60))
+
+def build_history_recorder(config_manager: ConfigManager):
+    """Crea el registro histórico según [History], o None si está deshabilitado."""
+    if not config_manager.get_bool("History", "enabled", False):
+        return None
+    from src.core.history_store import HistoryStore
+    from src.observers.history_recorder import HistoryRecorder
+    try:
+        path = config_manager.get_setting("History", "path")
+    except KeyError:
+        path = "monitor_history.db"
+    store = HistoryStore(
+        path,
+        raw_retention_days=config_manager.get_float("History", "raw_retention_days", 7),
+        minute_retention_days=config_manager.get_float("History", "minute_retention_days", 30),
+        hour_retention_days=config_manager.get_float("History", "hour_retention_days", 730)
+    )
+    return HistoryRecorder(store)
+
+def build_baseline_engine(config_manager: ConfigManager, in_memory: bool = False):
+    """
+    Crea el motor de líneas base de duración según [Baselines], o None si está deshabilitado.
+    El estado se guarda en SQLite para conservar lo aprendido entre ejecuciones; con
+    `in_memory` (reproducción de una captura) se aprende desde cero sin tocar ese archivo.
+    """
+    if not config_manager.get_bool("Baselines", "enabled", False):
+        return None
+    if in_memory:
+        store = InMemoryStateStore()
+    else:
+        try:
+            path = config_manager.get_setting("Baselines", "state_store_path")
+        except KeyError:
+            path = "monitor_baselines.db"
+        store = SQLiteStateStore(path)
+    return BaselineEngine(
+        store,
+        min_samples=config_manager.get_int("Baselines", "min_samples", 20),
+        quantile=config_manager.get_float("Baselines", "quantile", 0.99),
+        z_threshold=config_manager.get_float("Baselines", "z_threshold", 3.0),
+        min_excess_minutes=config_manager.get_float("Baselines", "min_excess_minutes", 10),
+        max_baselines=config_manager.get_int("Baselines", "max_baselines", 1000)
+    )
+
+def build_progress_tracker(config_manager: ConfigManager, daemon: bool, replaying: bool):
+    """
+    Crea el seguimiento de progreso para detectar tareas estancadas según [Progress], o None
+    si está deshabilitado. Con --daemon (o al reproducir una captura) las lecturas viven en
+    memoria; en ejecuciones de un solo ciclo se guardan en SQLite para compararlas con las
+    del ciclo siguiente. Al reproducir, los ciclos no respetan el intervalo real: solo se
+    exige `stall_cycles` y no `min_stall_minutes`.
+    """
+    if not config_manager.get_bool("Progress", "enabled", False):
+        return None
+    if daemon or replaying:
+        store = InMemoryStateStore()
+    else:
+        try:
+            path = config_manager.get_setting("Progress", "state_store_path")
+        except KeyError:
+            path = "monitor_progress.db"
+        store = SQLiteStateStore(path)
+    return ProgressTracker(
+        store,
+        stall_cycles=config_manager.get_int("Progress", "stall_cycles", 6),
+        min_stall_minutes=0 if replaying else config_manager.get_float("Progress", "min_stall_minutes", 15),
+        window_samples=config_manager.get_int("Progress", "window_samples", 12),
+        max_tasks=config_manager.get_int("Progress", "max_tasks", 5000)
+    )
+
+def configure_tracing(config_manager: ConfigManager):
+    """Habilita los spans de tiempos en JSON según [Tracing] (archivo `path` o, si está vacío, stderr)."""
+    try:
+        path = config_manager.get_setting("Tracing", "path")
+    except KeyError:
+        path = None
+    tracing.configure(config_manager.get_bool("Tracing", "enabled", False), path or None)
+
+def build_metrics(config_manager: ConfigManager, db_executors: Dict[Optional[str], IDatabaseExecutor], daemon: bool):
+    """
+    Crea las métricas y el servidor /metrics según [Metrics].
+    `db_executors` mapea cada instancia a su executor (la clave es None con una sola base de datos);
+    con varias instancias, los eventos del pool llevan la etiqueta `epicor_instance`.
+    Retorna (MonitorMetrics, MetricsServer), o (None, None) si está deshabilitado.
+    Solo tiene sentido en modo residente: un proceso de un solo ciclo no vive para ser consultado.
+    """
+    if not config_manager.get_bool("Metrics", "enabled", False):
+        return None, None
+    if not daemon:
+        logging.warning("[Metrics] solo se expone en modo residente (--daemon). Se omite.")
+        return None, None
+    registry = MetricsRegistry()
+    pooled = {name: db_executor for name, db_executor in db_executors.items() if hasattr(db_executor, "pool_stats")}
+    multi_instance = None not in db_executors
+    pool_events = registry.counter("epicor_monitor_pool_events", "Eventos del pool de conexiones a la base de datos.",
+                                   ["epicor_instance", "event"] if multi_instance else ["event"])
+
+    def collect_pool_stats(_registry: MetricsRegistry):
+        for name, db_executor in pooled.items():
+            labels = {"epicor_instance": name} if multi_instance else {}
+            for event, value in db_executor.pool_stats().as_dict().items():
+                pool_events.set_total(value, event=event, **labels)
+
+    if pooled:
+        registry.add_collector(collect_pool_stats)
+    try:
+        host = config_manager.get_setting("Metrics", "host")
+    except KeyError:
+        host = "127.0.0.1"
+    from src.core.metrics_server import MetricsServer
+    server = MetricsServer(registry, host, config_manager.get_int("Metrics", "port", 9464))
+    server.start()
+    return MonitorMetrics(registry), server
+
+def main(argv=None):
     """
     Función principal para inicializar y ejecutar el servicio de monitoreo.
-    Diseñada para ser ejecutada una vez por un programador de tareas.
+    Por defecto ejecuta un único ciclo (pensado para un programador de tareas).
+    Con --daemon mantiene el servicio activo y ejecuta el ciclo periódicamente.
     """
-    logging.info("Iniciando aplicación de monitoreo de tareas Epicor para Programador de Tareas...")
+    args = parse_args(argv)
+    if args.replay:
+        mode = f"reproducción de '{args.replay}'"
+    else:
+        mode = "modo residente" if args.daemon else "Programador de Tareas"
+    logging.info(f"Iniciando aplicación de monitoreo de tareas Epicor ({mode})...")
 
+    db_executors: Dict[Optional[str], IDatabaseExecutor] = {}
+    task_monitor = None
+    metrics_server = None
     try:
         # 1. Inicializar el manejador de configuración (Singleton)
         config_manager = ConfigManager()
+        configure_tracing(config_manager)
+        # Con secciones [Instance.<nombre>] se monitorean varias bases de datos; sin ellas, la de [Database]
+        instances = config_manager.instances()
 
-        # 2. Inicializar el ejecutor de base de datos
-        db_executor = PyODBCExecutor()
-        logging.info("Executor de base de datos inicializado.")
-
-        # 3. Inicializar los observadores (notificadores)
-        slack_notifier = SlackNotifier()
-        logging.info("Slack Notifier inicializado.")
+        # 2. Inicializar el ejecutor de base de datos (uno por instancia, cada uno con su pool)
+        if instances:
+            for instance in instances:
+                db_executors[instance.name] = build_db_executor(args, instance)
+            logging.info(f"Executors de base de datos inicializados para {len(instances)} instancia(s).")
+        else:
+            db_executors[None] = build_db_executor(args)
+            logging.info("Executor de base de datos inicializado.")
 
-        # 4. Inicializar las estrategias de procesamiento de tareas
-        strategies = [
-            SubmittedTaskStrategy(),
-            ActiveProcessStrategy()
-        ]
-        logging.info(f"Estrategias de tareas cargadas: {[s.category_name for s in strategies]}.")
+        # 3. Inicializar los observadores (notificadores); al reproducir una captura solo se registran en el log
+        replaying = args.replay is not None
+        notifiers = build_observers(config_manager, replaying)
+        logging.info(f"Notificadores inicializados: {[n.__class__.__name__ for n in notifiers]}.")
 
-        # 5. Inicializar el servicio de monitoreo e inyectar dependencias
-        task_monitor = TaskMonitorService(db_executor=db_executor, strategies=strategies)
-        logging.info("TaskMonitorService inicializado.")
+        # 4. Inicializar el servicio de monitoreo con sus estrategias e inyectar dependencias
+        metrics, metrics_server = build_metrics(config_manager, db_executors, args.daemon)
+        alert_tracker = build_alert_tracker(config_manager, args.daemon or replaying)
+        baselines = build_baseline_engine(config_manager, in_memory=replaying)
+        progress = build_progress_tracker(config_manager, args.daemon, replaying)
+        if instances:
+            # El deduplicador, las líneas base, el progreso y las métricas se comparten; las claves llevan la instancia
+            task_monitor = MultiInstanceMonitor(
+                [MonitoredInstance(instance.name, db_executors[instance.name], build_strategies(config_manager, instance),
+                                   instance.timeout_seconds) for instance in instances],
+                alert_tracker=alert_tracker, baselines=baselines, metrics=metrics, progress=progress)
+        else:
+            strategies = build_strategies(config_manager)
+            logging.info(f"Estrategias de tareas cargadas: {[s.category_name for s in strategies]}.")
+            task_monitor = TaskMonitorService(db_executor=db_executors[None], strategies=strategies,
+                                              alert_tracker=alert_tracker, baselines=baselines, metrics=metrics,
+                                              progress=progress)
+        logging.info(f"{task_monitor.__class__.__name__} inicializado. Filtros de [Filters]: "
+                     f"{describe_filters(config_manager.task_filters())}.")
 
-        # 6. Registrar los observadores en el monitor
-        task_monitor.add_observer(slack_notifier)
+        # 5. Registrar los observadores en el monitor
+        for notifier in notifiers:
+            task_monitor.add_observer(notifier)
+        # Al reproducir no se escribe el histórico: las muestras quedarían con la fecha de hoy
+        history_recorder = None if replaying else build_history_recorder(config_manager)
+        if history_recorder is not None:
+            task_monitor.add_observer(history_recorder)
         logging.info("Observadores registrados en el monitor.")
 
-        # *** CAMBIO CLAVE: Ejecutar la lógica de monitoreo una vez ***
-        task_monitor.run_monitoring()
-        logging.info("Ciclo de monitoreo completado. La aplicación se cerrará.")
+        run_cycle = task_monitor.run_monitoring
+        if args.profile:
+            if instances:
+                logging.warning("cProfile solo mide el hilo principal: con varias instancias el perfil "
+                                "no incluye sus ciclos, que se ejecutan en el pool de hilos.")
+            elif config_manager.monitoring().parallel_strategies:
+                logging.warning("cProfile solo mide el hilo principal: con parallel_strategies = true "
+                                "el perfil no incluye las estrategias ejecutadas en el pool de hilos.")
+            # En modo residente solo se perfila el primer ciclo
+            from src.utils.profiling import profile_first_call
+            run_cycle = profile_first_call(run_cycle, args.profile)
 
-        # Ya no necesitamos check_interval_minutes aquí, el Programador de Tareas lo manejará.
-        # check_interval_minutes = int(config_manager.get_setting("Monitoring", "check_interval_minutes"))
-        # check_interval_seconds = check_interval_minutes * 60
-        # logging.info(f"El monitoreo se ejecutará cada {check_interval_minutes} minuto(s).")
-        # while True:
-        #     task_monitor.run_monitoring()
-        #     logging.info(f"Siguiente chequeo en {check_interval_minutes} minuto(s)...")
-        #     time.sleep(check_interval_seconds)
+        if replaying:
+            run_replay(run_cycle, list(db_executors.values()))
+        elif args.daemon:
+            # El servicio, la configuración y el executor se reutilizan entre ciclos
+            if config_manager.monitoring().adaptive_polling:
+                # Cada categoría tiene su propio intervalo, ajustado según su última consulta
+                scheduler = AdaptivePollingScheduler(run_cycle, task_monitor.category_names, AdaptiveIntervalPolicy.from_config,
+                                                     policy_version=lambda: ConfigManager.snapshot().version)
+            else:
+                scheduler = PollingScheduler(run_cycle, get_check_interval_seconds(config_manager))
+            scheduler.install_signal_handlers()
+            scheduler.run_forever()
+            logging.info("Monitoreo residente finalizado. La aplicación se cerrará.")
+        else:
+            # Ejecutar la lógica de monitoreo una vez; el Programador de Tareas maneja la repetición
+            run_cycle()
+            logging.info("Ciclo de monitoreo completado. La aplicación se cerrará.")
 
     except Exception as e:
         logging.critical(f"Un error crítico ha ocurrido durante la ejecución: {e}", exc_info=True)
         # Considera enviar una notificación de Slack aquí para errores críticos
         # slack_notifier.notify_critical_error(f"Error crítico en el monitoreo: {e}")
+    finally:
+        # Entrega las notificaciones pendientes y cierra las conexiones antes de salir
+        if metrics_server is not None:
+            metrics_server.close()
+        if task_monitor is not None:
+            try:
+                task_monitor.shutdown()
+            except Exception as e:
+                # Los executors se cierran igual: no se dejan conexiones abiertas
+                logging.error(f"Error al detener el monitor: {e}")
+        for db_executor in db_executors.values():
+            try:
+                db_executor.close()
+            except Exception as e:
+                logging.error(f"Error al cerrar el executor de base de datos: {e}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
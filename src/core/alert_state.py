@@ -0,0 +1,144 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Optional
+from ..core.interfaces import IAlertStateStore
+from ..models import Task, TaskStatistics
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+class InMemoryStateStore(IAlertStateStore):
+    """Almacén de estado en memoria, para el modo residente (--daemon)."""
+    def __init__(self):
+        self._states: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            state = self._states.get(key)
+            return dict(state) if state is not None else None
+
+    def set(self, key: str, state: dict):
+        with self._lock:
+            self._states[key] = dict(state)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._states.pop(key, None)
+
+    def keys(self, prefix: str = "") -> Iterable[str]:
+        with self._lock:
+            return [key for key in self._states if key.startswith(prefix)]
+
+class SQLiteStateStore(IAlertStateStore):
+    """
+    Almacén de estado persistente en un archivo SQLite, para ejecuciones de un solo ciclo
+    (Programador de Tareas), donde el estado debe sobrevivir entre procesos.
+    """
+    def __init__(self, path: str):
+        self._path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS alert_state ("
+            " key TEXT PRIMARY KEY,"
+            " state TEXT NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT state FROM alert_state WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key: str, state: dict):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO alert_state (key, state, updated_at) VALUES (?, ?, ?)",
+                (key, json.dumps(state), time.time())
+            )
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM alert_state WHERE key = ?", (key,))
+
+    def keys(self, prefix: str = "") -> Iterable[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key FROM alert_state WHERE substr(key, 1, ?) = ?", (len(prefix), prefix)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class AlertStateTracker:
+    """
+    Decide si una notificación representa un cambio de estado, para no repetir la misma
+    alerta en cada ciclo.
+
+    - Por categoría: se notifica si el límite se cruza o se libera, o si cambia la tarea
+      de mayor duración.
+    - Por tarea: se notifica cuando una tarea supera por primera vez su umbral de duración.
+    - En ambos casos, un estado sin cambios se vuelve a notificar tras `renotify_minutes`
+      (0 = nunca).
+    """
+    _CATEGORY_PREFIX = "category:"
+    _TASK_PREFIX = "task:"
+
+    def __init__(self, store: IAlertStateStore, renotify_minutes: float = 60):
+        self._store = store
+        self._renotify_seconds = renotify_minutes * 60
+
+    def _renotify_due(self, state: dict, now: float) -> bool:
+        return bool(self._renotify_seconds) and now - state.get("notified_at", 0) >= self._renotify_seconds
+
+    def should_notify_statistics(self, statistics: TaskStatistics) -> bool:
+        """Retorna True (y registra el nuevo estado) si las estadísticas deben notificarse."""
+        key = f"{self._CATEGORY_PREFIX}{statistics.category_name}"
+        longest = statistics.longest_running_task
+        current = {
+            "over_limit": statistics.over_limit,
+            "longest_task_id": longest.task_id if longest is not None else None,
+        }
+        now = time.time()
+        previous = self._store.get(key)
+        if previous is not None:
+            changed = (
+                previous.get("over_limit") != current["over_limit"]
+                # Solo una tarea destacada distinta es una transición; que desaparezca no lo es
+                or (current["longest_task_id"] is not None
+                    and previous.get("longest_task_id") != current["longest_task_id"])
+            )
+            if not changed and not self._renotify_due(previous, now):
+                return False
+        current["notified_at"] = now
+        self._store.set(key, current)
+        return True
+
+    def should_notify_task(self, category: str, task: Task) -> bool:
+        """Retorna True (y lo registra) si la tarea acaba de superar su umbral o toca recordarla."""
+        key = f"{self._TASK_PREFIX}{category}:{task.task_id}"
+        now = time.time()
+        previous = self._store.get(key)
+        if previous is not None and not self._renotify_due(previous, now):
+            return False
+        self._store.set(key, {"notified_at": now})
+        return True
+
+    def retain_tasks(self, category: str, task_ids: Iterable[str]):
+        """
+        Olvida las tareas de la categoría que ya no superan su umbral (o terminaron),
+        para que vuelvan a notificarse si lo superan de nuevo.
+        """
+        prefix = f"{self._TASK_PREFIX}{category}:"
+        keep = {f"{prefix}{task_id}" for task_id in task_ids}
+        for key in self._store.keys(prefix):
+            if key not in keep:
+                self._store.delete(key)
+
+    def close(self):
+        self._store.close()
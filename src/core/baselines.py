@@ -0,0 +1,263 @@
+import logging
+import math
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+from ..core.interfaces import IAlertStateStore
+from ..models import Task
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+class RunningStats:
+    """Media y varianza en streaming (algoritmo de Welford): O(1) por observación, combinable."""
+    __slots__ = ("count", "mean", "m2")
+
+    def __init__(self, count: int = 0, mean: float = 0.0, m2: float = 0.0):
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+
+    def add(self, value: float):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def merge(self, other: "RunningStats"):
+        """Combina otro acumulador (fórmula paralela de Chan et al.)."""
+        if other.count == 0:
+            return
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta * delta * self.count * other.count / total
+        self.count = total
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def stddev(self) -> float:
+        return math.sqrt(self.variance)
+
+class QuantileSketch:
+    """
+    Sketch de cuantiles con error relativo acotado (al estilo DDSketch).
+
+    Cada valor positivo cae en el bucket ceil(log_gamma(x)), con gamma = (1 + a) / (1 - a):
+    cualquier cuantil se estima con error relativo <= `relative_accuracy`. Los sketches
+    se combinan sumando buckets. La memoria se acota a `max_bins` buckets: si se excede,
+    se colapsan los buckets más bajos (la precisión de las colas altas, P95/P99, se mantiene).
+    """
+    __slots__ = ("relative_accuracy", "max_bins", "_gamma_log", "bins", "zero_count", "count")
+
+    def __init__(self, relative_accuracy: float = 0.01, max_bins: int = 512):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("La precisión relativa del sketch debe estar entre 0 y 1.")
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self._gamma_log = math.log((1 + relative_accuracy) / (1 - relative_accuracy))
+        self.bins: Dict[int, int] = {}
+        self.zero_count = 0 # Valores <= 0 (ej. tareas de menos de un minuto)
+        self.count = 0
+
+    def add(self, value: float):
+        self.count += 1
+        if value <= 0:
+            self.zero_count += 1
+            return
+        index = math.ceil(math.log(value) / self._gamma_log)
+        self.bins[index] = self.bins.get(index, 0) + 1
+        if len(self.bins) > self.max_bins:
+            self._collapse()
+
+    def _collapse(self):
+        indexes = sorted(self.bins)
+        excess = len(indexes) - self.max_bins
+        target = indexes[excess]
+        self.bins[target] += sum(self.bins.pop(index) for index in indexes[:excess])
+
+    def merge(self, other: "QuantileSketch"):
+        for index, count in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        while len(self.bins) > self.max_bins:
+            self._collapse()
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estima el cuantil `q` (0..1), o None si el sketch está vacío."""
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if rank < seen:
+                # Punto medio (en escala relativa) del bucket (gamma^(i-1), gamma^i]
+                return 2 * math.exp(index * self._gamma_log) / (1 + math.exp(self._gamma_log))
+        return 2 * math.exp(max(self.bins) * self._gamma_log) / (1 + math.exp(self._gamma_log))
+
+class DurationBaseline:
+    """Línea base de duraciones (minutos) de una función: media/varianza y cuantiles."""
+    __slots__ = ("stats", "sketch")
+
+    def __init__(self, relative_accuracy: float = 0.01, max_bins: int = 512):
+        self.stats = RunningStats()
+        self.sketch = QuantileSketch(relative_accuracy, max_bins)
+
+    def add(self, duration_minutes: float):
+        self.stats.add(duration_minutes)
+        self.sketch.add(duration_minutes)
+
+    def to_state(self) -> dict:
+        return {
+            "count": self.stats.count, "mean": self.stats.mean, "m2": self.stats.m2,
+            "zero_count": self.sketch.zero_count,
+            "bins": [[index, count] for index, count in self.sketch.bins.items()],
+        }
+
+    @classmethod
+    def from_state(cls, state: dict, relative_accuracy: float = 0.01, max_bins: int = 512) -> "DurationBaseline":
+        baseline = cls(relative_accuracy, max_bins)
+        baseline.stats = RunningStats(state["count"], state["mean"], state["m2"])
+        baseline.sketch.zero_count = state["zero_count"]
+        baseline.sketch.bins = {int(index): count for index, count in state["bins"]}
+        baseline.sketch.count = state["count"]
+        return baseline
+
+@dataclass
+class DurationAnomaly:
+    """Tarea cuya duración actual es atípica para su función."""
+    task: Task
+    baseline_key: str
+    samples: int
+    mean: float
+    stddev: float
+    p50: float
+    p95: float
+    p99: float
+    threshold: float # Duración (minutos) a partir de la cual la tarea se considera atípica
+
+    def describe(self) -> str:
+        return (f"Duración actual: {self.task.duration_minutes} min. Línea base de '{self.baseline_key}' "
+                f"({self.samples} ejecuciones): media {self.mean:.1f} ± {self.stddev:.1f} min, "
+                f"P50 {self.p50:.0f}, P95 {self.p95:.0f}, P99 {self.p99:.0f} min.")
+
+class BaselineEngine:
+    """
+    Aprende la duración normal de cada función de Epicor y marca las tareas atípicas.
+
+    - Una tarea aporta una observación cuando termina (deja de aparecer entre las activas):
+      su última duración observada. Así las tareas largas no pesan más por verse en más ciclos.
+    - Una tarea activa es atípica si su función tiene al menos `min_samples` ejecuciones y su
+      duración supera el cuantil `quantile`, por al menos `min_excess_minutes`, y su z-score
+      (desviaciones sobre la media) es al menos `z_threshold`.
+    - La clave de la línea base es la función (function_id) o, si no tiene, la descripción.
+    - La memoria se acota a `max_baselines` líneas base (se descartan las menos usadas) y el
+      estado se persiste en un IAlertStateStore para que las ejecuciones de un solo ciclo
+      también aprendan.
+    """
+    _BASELINE_PREFIX = "baseline:"
+    _ACTIVE_PREFIX = "active:"
+
+    def __init__(self, store: IAlertStateStore, min_samples: int = 20, quantile: float = 0.99,
+                 z_threshold: float = 3.0, min_excess_minutes: float = 10, max_baselines: int = 1000,
+                 relative_accuracy: float = 0.01, max_bins: int = 512):
+        self._store = store
+        self._min_samples = min_samples
+        self._quantile = quantile
+        self._z_threshold = z_threshold
+        self._min_excess_minutes = min_excess_minutes
+        self._max_baselines = max_baselines
+        self._relative_accuracy = relative_accuracy
+        self._max_bins = max_bins
+        self._baselines: "OrderedDict[str, DurationBaseline]" = OrderedDict()
+        self._dirty = set()
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        for key in self._store.keys(self._BASELINE_PREFIX):
+            state = self._store.get(key)
+            if state is None:
+                continue
+            try:
+                baseline = DurationBaseline.from_state(state, self._relative_accuracy, self._max_bins)
+            except (KeyError, TypeError, ValueError) as e:
+                logging.warning(f"Línea base inválida '{key}' descartada: {e}")
+                continue
+            self._baselines[key[len(self._BASELINE_PREFIX):]] = baseline
+        while len(self._baselines) > self._max_baselines:
+            self._evict()
+        logging.info(f"{len(self._baselines)} línea(s) base de duración cargadas.")
+
+    def _evict(self):
+        key, _ = self._baselines.popitem(last=False)
+        self._dirty.discard(key)
+        self._store.delete(f"{self._BASELINE_PREFIX}{key}")
+
+    @staticmethod
+    def baseline_key(category: str, task: Task) -> str:
+        return f"{category}|{task.function_id or task.task_description}"
+
+    def _observe_finished(self, key: str, duration_minutes: float):
+        baseline = self._baselines.get(key)
+        if baseline is None:
+            baseline = self._baselines[key] = DurationBaseline(self._relative_accuracy, self._max_bins)
+            if len(self._baselines) > self._max_baselines:
+                self._evict()
+        else:
+            self._baselines.move_to_end(key)
+        baseline.add(duration_minutes)
+        self._dirty.add(key)
+
+    def _check(self, key: str, task: Task) -> Optional[DurationAnomaly]:
+        baseline = self._baselines.get(key)
+        if baseline is None or baseline.stats.count < self._min_samples:
+            return None
+        threshold = baseline.sketch.quantile(self._quantile) + self._min_excess_minutes
+        if task.duration_minutes <= threshold:
+            return None
+        stddev = baseline.stats.stddev
+        if stddev > 0 and (task.duration_minutes - baseline.stats.mean) / stddev < self._z_threshold:
+            return None
+        return DurationAnomaly(
+            task=task, baseline_key=key, samples=baseline.stats.count, mean=baseline.stats.mean, stddev=stddev,
+            p50=baseline.sketch.quantile(0.5), p95=baseline.sketch.quantile(0.95),
+            p99=baseline.sketch.quantile(0.99), threshold=threshold
+        )
+
+    def observe(self, category: str, tasks: Iterable[Task]) -> List[DurationAnomaly]:
+        """
+        Registra las tareas activas de la categoría en este ciclo: las que terminaron desde el
+        ciclo anterior alimentan su línea base. Retorna las tareas activas atípicas.
+        """
+        current: Dict[str, Tuple[str, float]] = {}
+        anomalies: List[DurationAnomaly] = []
+        with self._lock:
+            active_key = f"{self._ACTIVE_PREFIX}{category}"
+            previous = self._store.get(active_key) or {}
+            for task in tasks:
+                if task.duration_minutes is None:
+                    continue
+                key = self.baseline_key(category, task)
+                current[task.task_id] = (key, task.duration_minutes)
+                anomaly = self._check(key, task)
+                if anomaly is not None:
+                    anomalies.append(anomaly)
+            for task_id, (key, duration_minutes) in previous.items():
+                if task_id not in current:
+                    self._observe_finished(key, duration_minutes)
+            self._store.set(active_key, current)
+            for key in self._dirty:
+                self._store.set(f"{self._BASELINE_PREFIX}{key}", self._baselines[key].to_state())
+            self._dirty.clear()
+        return anomalies
+
+    def close(self):
+        self._store.close()
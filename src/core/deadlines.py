@@ -0,0 +1,42 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future, FIRST_COMPLETED, wait
+from typing import Callable, Dict, Optional, Set
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def wait_with_deadlines(futures: Dict[Future, str], timeout_for: Callable[[str], float],
+                        in_flight: Dict[str, float], in_flight_lock: threading.Lock, kind: str) -> Set[Future]:
+    """
+    Espera los trabajos enviados a un pool de hilos, cada uno con su tiempo de espera.
+
+    `futures` asocia cada trabajo con su nombre (categoría o instancia) e `in_flight` con el
+    inicio (monotonic) de los que ya están en ejecución. El tiempo de espera de un trabajo en
+    ejecución se mide desde su inicio real; el de uno que sigue en la cola del pool, desde su
+    envío. Los que exceden su tiempo en la cola se cancelan (así no se acumulan ni se repiten
+    en el ciclo siguiente); los que lo exceden en ejecución se dejan de esperar.
+    Retorna solo los trabajos que terminaron a tiempo.
+    """
+    submitted_at = time.monotonic()
+    finished: Set[Future] = set()
+    pending = set(futures)
+    while pending:
+        poll_seconds = min(1.0, min(timeout_for(futures[future]) for future in pending))
+        done, pending = wait(pending, timeout=poll_seconds, return_when=FIRST_COMPLETED)
+        finished |= done
+        now = time.monotonic()
+        for future in list(pending):
+            name = futures[future]
+            timeout_seconds = timeout_for(name)
+            with in_flight_lock:
+                started_at = in_flight.get(name)
+            if started_at is None:
+                # Aún en la cola del pool: el plazo corre desde el envío
+                if now - submitted_at > timeout_seconds and future.cancel():
+                    logging.error(f"Tiempo de espera agotado ({timeout_seconds}s) para {kind} '{name}' antes de iniciar. Se cancela.")
+                    pending.discard(future)
+            elif now - started_at > timeout_seconds:
+                logging.error(f"Tiempo de espera agotado ({timeout_seconds}s) para {kind} '{name}'.")
+                pending.discard(future)
+    return finished
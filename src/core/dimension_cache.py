@@ -0,0 +1,95 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from ..core.interfaces import IDatabaseExecutor
+from ..utils.sql import IN_LIST_SIZES, Query, padded_in_list
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+class Dimension(NamedTuple):
+    """
+    Tabla de consulta de Epicor (ej. Ice.SysAgentSched) que se lee por clave entera.
+    `query` retorna la clave en la columna 'DimKey' y contiene '{keys}' donde van los
+    marcadores '?' de la lista IN (...). Una clave puede tener varias filas o ninguna.
+    """
+    name: str
+    query: str
+
+class DimensionCacheStats(NamedTuple):
+    hits: int
+    misses: int
+
+class DimensionCache:
+    """
+    Caché en memoria de las tablas de consulta (programaciones y parámetros de las tareas),
+    para que los queries principales solo lean Ice.SysTask / Ice.SysAgentTask sin JOIN.
+
+    - Las filas de cada clave se piden en bloque (IN de hasta `chunk_size` claves), solo para
+      las claves que no están en caché o cuyo TTL venció: se refresca de forma incremental.
+      Las listas se completan a unos pocos tamaños fijos (ver padded_in_list) para reutilizar
+      las sentencias preparadas.
+    - Las claves sin filas también se guardan (como en un LEFT JOIN sin coincidencia), con un
+      TTL corto para ver pronto los parámetros que Epicor inserta después de crear la tarea.
+    - Cada tabla guarda a lo sumo `max_entries` claves; se descartan las usadas hace más tiempo.
+    """
+    _NEGATIVE_TTL_SECONDS = 60
+
+    def __init__(self, ttl_seconds: float = 3600, max_entries: int = 10000, chunk_size: int = 500):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._chunk_size = min(chunk_size, IN_LIST_SIZES[-1])
+        self._lock = threading.Lock()
+        # tabla -> clave -> (filas, vencimiento en time.monotonic()); el orden es el de uso (LRU)
+        self._entries: Dict[str, "OrderedDict[int, Tuple[List[dict], float]]"] = {}
+
+    def _fetch(self, executor: IDatabaseExecutor, dimension: Dimension, keys: List[int]) -> Dict[int, List[dict]]:
+        rows_by_key: Dict[int, List[dict]] = {key: [] for key in keys}
+        for start in range(0, len(keys), self._chunk_size):
+            chunk = keys[start:start + self._chunk_size]
+            marks, params = padded_in_list(chunk)
+            query = Query(dimension.query.format(keys=marks), params)
+            for row in executor.execute_query(query):
+                key = int(row["DimKey"])
+                if key in rows_by_key:
+                    rows_by_key[key].append(row)
+        return rows_by_key
+
+    def lookup(self, executor: IDatabaseExecutor, dimension: Dimension,
+               keys: Iterable[Any]) -> Tuple[Dict[int, List[dict]], DimensionCacheStats]:
+        """
+        Retorna las filas de `dimension` de cada clave (lista vacía si no tiene) y cuántas
+        claves se resolvieron desde la caché. Las claves None se ignoran.
+        """
+        wanted = {int(key) for key in keys if key is not None}
+        now = time.monotonic()
+        found: Dict[int, List[dict]] = {}
+        with self._lock:
+            entries = self._entries.setdefault(dimension.name, OrderedDict())
+            for key in wanted:
+                entry = entries.get(key)
+                if entry is not None and entry[1] > now:
+                    entries.move_to_end(key)
+                    found[key] = entry[0]
+        missing = sorted(wanted - found.keys())
+        if missing:
+            fetched = self._fetch(executor, dimension, missing)
+            with self._lock:
+                entries = self._entries.setdefault(dimension.name, OrderedDict())
+                for key, rows in fetched.items():
+                    ttl = self.ttl_seconds if rows else min(self.ttl_seconds, self._NEGATIVE_TTL_SECONDS)
+                    entries[key] = (rows, now + ttl)
+                    entries.move_to_end(key)
+                while len(entries) > self.max_entries:
+                    entries.popitem(last=False)
+            found.update(fetched)
+        return found, DimensionCacheStats(hits=len(wanted) - len(missing), misses=len(missing))
+
+    def clear(self, dimension: Optional[str] = None):
+        """Descarta la caché de una tabla (o de todas)."""
+        with self._lock:
+            if dimension is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(dimension, None)
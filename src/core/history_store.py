@@ -0,0 +1,204 @@
+import logging
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+MINUTE = 60
+HOUR = 3600
+DAY = 86400
+
+class CategorySample(NamedTuple):
+    """Estado de una categoría en un ciclo de monitoreo."""
+    ts: int
+    category: str
+    total_tasks: int
+    over_limit: bool
+    longest_minutes: Optional[int]
+
+class TaskSample(NamedTuple):
+    """Duración observada de una tarea activa en un ciclo de monitoreo."""
+    ts: int
+    category: str
+    task_id: str
+    function_id: str
+    duration_minutes: int
+
+class SeriesPoint(NamedTuple):
+    """Un punto de una serie agregada: inicio del intervalo, promedio, mínimo, máximo y muestras."""
+    bucket: datetime
+    avg: float
+    min: float
+    max: float
+    samples: int
+
+# Agregados por categoría (profundidad de cola) y por función (duración), por minuto y por hora.
+# Las tablas de rollup se actualizan en la misma transacción que las muestras crudas (UPSERT),
+# así que las consultas sobre rangos largos leen pocas filas ya agregadas.
+_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS category_samples (
+        category TEXT NOT NULL, ts INTEGER NOT NULL, total_tasks INTEGER NOT NULL,
+        over_limit INTEGER NOT NULL, longest_minutes INTEGER,
+        PRIMARY KEY (category, ts)) WITHOUT ROWID""",
+    """CREATE TABLE IF NOT EXISTS task_samples (
+        category TEXT NOT NULL, ts INTEGER NOT NULL, task_id TEXT NOT NULL,
+        function_id TEXT NOT NULL, duration_minutes INTEGER NOT NULL,
+        PRIMARY KEY (category, ts, task_id)) WITHOUT ROWID""",
+    """CREATE TABLE IF NOT EXISTS category_rollup (
+        resolution INTEGER NOT NULL, category TEXT NOT NULL, bucket INTEGER NOT NULL,
+        samples INTEGER NOT NULL, sum_total INTEGER NOT NULL, min_total INTEGER NOT NULL,
+        max_total INTEGER NOT NULL, over_limit_samples INTEGER NOT NULL,
+        PRIMARY KEY (resolution, category, bucket)) WITHOUT ROWID""",
+    """CREATE TABLE IF NOT EXISTS duration_rollup (
+        resolution INTEGER NOT NULL, category TEXT NOT NULL, function_id TEXT NOT NULL,
+        bucket INTEGER NOT NULL, samples INTEGER NOT NULL, sum_duration INTEGER NOT NULL,
+        min_duration INTEGER NOT NULL, max_duration INTEGER NOT NULL,
+        PRIMARY KEY (resolution, category, function_id, bucket)) WITHOUT ROWID""",
+    "CREATE INDEX IF NOT EXISTS ix_category_samples_ts ON category_samples (ts)",
+    "CREATE INDEX IF NOT EXISTS ix_task_samples_ts ON task_samples (ts)",
+    "CREATE INDEX IF NOT EXISTS ix_category_rollup_bucket ON category_rollup (resolution, bucket)",
+    "CREATE INDEX IF NOT EXISTS ix_duration_rollup_bucket ON duration_rollup (resolution, bucket)",
+)
+
+_UPSERT_CATEGORY_ROLLUP = """
+    INSERT INTO category_rollup (resolution, category, bucket, samples, sum_total, min_total, max_total, over_limit_samples)
+    VALUES (?, ?, ?, 1, ?, ?, ?, ?)
+    ON CONFLICT (resolution, category, bucket) DO UPDATE SET
+        samples = samples + 1,
+        sum_total = sum_total + excluded.sum_total,
+        min_total = MIN(min_total, excluded.min_total),
+        max_total = MAX(max_total, excluded.max_total),
+        over_limit_samples = over_limit_samples + excluded.over_limit_samples"""
+
+_UPSERT_DURATION_ROLLUP = """
+    INSERT INTO duration_rollup (resolution, category, function_id, bucket, samples, sum_duration, min_duration, max_duration)
+    VALUES (?, ?, ?, ?, 1, ?, ?, ?)
+    ON CONFLICT (resolution, category, function_id, bucket) DO UPDATE SET
+        samples = samples + 1,
+        sum_duration = sum_duration + excluded.sum_duration,
+        min_duration = MIN(min_duration, excluded.min_duration),
+        max_duration = MAX(max_duration, excluded.max_duration)"""
+
+class HistoryStore:
+    """
+    Histórico embebido (SQLite en modo WAL) de las estadísticas de cada ciclo.
+
+    Guarda muestras crudas por categoría (total de tareas) y por tarea (duración), y mantiene
+    agregados por minuto y por hora que se actualizan al escribir. La compactación por
+    retención borra primero las muestras crudas, luego los agregados por minuto y por
+    último los agregados por hora, de modo que los meses de historia ocupan pocas filas.
+
+    Las escrituras se hacen por lotes con `write()`: una transacción por lote.
+    """
+    def __init__(self, path: str, raw_retention_days: float = 7, minute_retention_days: float = 30,
+                 hour_retention_days: float = 730):
+        self._path = path
+        self._retention = {
+            "raw": raw_retention_days * DAY,
+            MINUTE: minute_retention_days * DAY,
+            HOUR: hour_retention_days * DAY,
+        }
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in _SCHEMA:
+            self._conn.execute(statement)
+
+    def write(self, category_samples: Sequence[CategorySample], task_samples: Sequence[TaskSample]):
+        """Escribe un lote de muestras y actualiza sus agregados en una sola transacción."""
+        if not category_samples and not task_samples:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO category_samples (category, ts, total_tasks, over_limit, longest_minutes)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    [(s.category, s.ts, s.total_tasks, int(s.over_limit), s.longest_minutes) for s in category_samples]
+                )
+                self._conn.executemany(_UPSERT_CATEGORY_ROLLUP, [
+                    (resolution, s.category, s.ts - s.ts % resolution, s.total_tasks, s.total_tasks, s.total_tasks,
+                     int(s.over_limit))
+                    for s in category_samples for resolution in (MINUTE, HOUR)
+                ])
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO task_samples (category, ts, task_id, function_id, duration_minutes)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    [(s.category, s.ts, s.task_id, s.function_id, s.duration_minutes) for s in task_samples]
+                )
+                self._conn.executemany(_UPSERT_DURATION_ROLLUP, [
+                    (resolution, s.category, s.function_id, s.ts - s.ts % resolution, s.duration_minutes,
+                     s.duration_minutes, s.duration_minutes)
+                    for s in task_samples for resolution in (MINUTE, HOUR)
+                ])
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def compact(self, now: Optional[float] = None) -> int:
+        """Borra las muestras y agregados más antiguos que su retención. Retorna las filas borradas."""
+        now = time.time() if now is None else now
+        deleted = 0
+        with self._lock:
+            raw_cutoff = int(now - self._retention["raw"])
+            deleted += self._conn.execute("DELETE FROM category_samples WHERE ts < ?", (raw_cutoff,)).rowcount
+            deleted += self._conn.execute("DELETE FROM task_samples WHERE ts < ?", (raw_cutoff,)).rowcount
+            for resolution in (MINUTE, HOUR):
+                cutoff = int(now - self._retention[resolution])
+                for table in ("category_rollup", "duration_rollup"):
+                    deleted += self._conn.execute(
+                        f"DELETE FROM {table} WHERE resolution = ? AND bucket < ?", (resolution, cutoff)
+                    ).rowcount
+        if deleted:
+            logging.info(f"Histórico compactado: {deleted} fila(s) fuera de retención eliminadas.")
+        return deleted
+
+    def _pick_resolution(self, since: float, until: float) -> int:
+        # Por minuto hasta 2 días (si aún se conserva); por hora para rangos mayores
+        minute_available = time.time() - since <= self._retention[MINUTE]
+        return MINUTE if until - since <= 2 * DAY and minute_available else HOUR
+
+    @staticmethod
+    def _range(since: datetime, until: Optional[datetime]) -> Tuple[int, int]:
+        return int(since.timestamp()), int((until or datetime.now()).timestamp())
+
+    def queue_depth(self, category: str, since: datetime, until: Optional[datetime] = None,
+                    resolution: Optional[int] = None) -> List[SeriesPoint]:
+        """
+        Total de tareas de la categoría entre `since` y `until` (por defecto, ahora),
+        agregado por minuto o por hora (`resolution` = 60 o 3600; por defecto según el rango).
+        Ejemplo: store.queue_depth("Proceso Activo", datetime.now() - timedelta(hours=24)).
+        """
+        start, end = self._range(since, until)
+        resolution = resolution or self._pick_resolution(start, end)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT bucket, CAST(sum_total AS REAL) / samples, min_total, max_total, samples"
+                " FROM category_rollup WHERE resolution = ? AND category = ? AND bucket BETWEEN ? AND ?"
+                " ORDER BY bucket",
+                (resolution, category, start - start % resolution, end)
+            ).fetchall()
+        return [SeriesPoint(datetime.fromtimestamp(row[0]), *row[1:]) for row in rows]
+
+    def duration_trend(self, category: str, function_id: str, since: datetime, until: Optional[datetime] = None,
+                       resolution: Optional[int] = None) -> List[SeriesPoint]:
+        """Duración (minutos) de las tareas activas de una función, agregada por minuto o por hora."""
+        start, end = self._range(since, until)
+        resolution = resolution or self._pick_resolution(start, end)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT bucket, CAST(sum_duration AS REAL) / samples, min_duration, max_duration, samples"
+                " FROM duration_rollup WHERE resolution = ? AND category = ? AND function_id = ?"
+                " AND bucket BETWEEN ? AND ? ORDER BY bucket",
+                (resolution, category, function_id, start - start % resolution, end)
+            ).fetchall()
+        return [SeriesPoint(datetime.fromtimestamp(row[0]), *row[1:]) for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
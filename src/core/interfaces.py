@@ -1,6 +1,10 @@
+import inspect
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from functools import lru_cache
+from typing import Any, Callable, Collection, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 from ..models import Task, TaskStatistics
+from ..utils.row_mapping import ColumnMap
+from ..utils.sql import QueryLike
 
 # --- Interfaces para el monitoreo y notificación (Patrón Observador) ---
 
@@ -22,6 +26,52 @@ class ITaskObserver(ABC):
         """
         pass
 
+    def notify_task_anomaly(self, task: Task, category: str, description: str):
+        """
+        Notifica una tarea cuya duración es atípica para su función (según su línea base).
+        Por defecto se trata como una tarea de larga duración.
+        """
+        self.notify_long_running_task(task, category)
+
+    def notify_stalled_task(self, task: Task, category: str, description: str):
+        """
+        Notifica una tarea activa cuyo progreso y última actividad no cambian desde hace
+        varios ciclos (ver ProgressTracker). Por defecto se trata como una tarea de larga duración.
+        """
+        self.notify_long_running_task(task, category)
+
+    @property
+    def requires_task_detail(self) -> bool:
+        """
+        Indica si el observador necesita el detalle de todas las tareas (TaskStatistics.tasks).
+        Si ningún observador lo necesita, el monitor puede usar el modo resumen,
+        que calcula el conteo y la tarea destacada directamente en SQL.
+        """
+        return False
+
+    @property
+    def receives_every_cycle(self) -> bool:
+        """
+        Indica si el observador debe recibir `update` en cada ciclo, aunque la deduplicación
+        de alertas determine que el estado no cambió (ej. un registro histórico).
+        """
+        return False
+
+    def attach_metrics(self, metrics: Any):
+        """
+        Llamado al registrar el observador en un monitor con métricas habilitadas (MonitorMetrics),
+        para que registre las propias (ej. la entrega de sus notificaciones). Puede llamarse
+        una vez por monitor con la misma instancia. Opcional.
+        """
+        pass
+
+    def close(self):
+        """
+        Llamado al detener el monitor: el observador debe entregar los envíos pendientes
+        y liberar sus recursos. Opcional.
+        """
+        pass
+
 class ITaskMonitor(ABC):
     """
     Interfaz para el Sujeto (monitor de tareas) que observa el estado de las tareas.
@@ -37,8 +87,42 @@ class ITaskMonitor(ABC):
         pass
 
     @abstractmethod
-    def run_monitoring(self):
-        """Ejecuta el ciclo de monitoreo de tareas."""
+    def run_monitoring(self, categories: Optional[Collection[str]] = None) -> Dict[str, TaskStatistics]:
+        """
+        Ejecuta el ciclo de monitoreo de tareas de todas las categorías, o solo de `categories`.
+        Retorna las estadísticas de cada categoría procesada sin errores.
+        """
+        pass
+
+# --- Interfaces para el estado de las alertas (deduplicación) ---
+
+class IAlertStateStore(ABC):
+    """
+    Interfaz para un almacén clave-valor del último estado notificado,
+    usado para enviar alertas solo cuando el estado cambia.
+    """
+    @abstractmethod
+    def get(self, key: str) -> Optional[dict]:
+        """Retorna el estado guardado para la clave, o None si no existe."""
+        pass
+
+    @abstractmethod
+    def set(self, key: str, state: dict):
+        """Guarda (o reemplaza) el estado de la clave."""
+        pass
+
+    @abstractmethod
+    def delete(self, key: str):
+        """Elimina el estado de la clave, si existe."""
+        pass
+
+    @abstractmethod
+    def keys(self, prefix: str = "") -> Iterable[str]:
+        """Retorna las claves guardadas que comienzan con `prefix`."""
+        pass
+
+    def close(self):
+        """Libera los recursos del almacén. Opcional."""
         pass
 
 # --- Interfaces para la ejecución de queries (Inyección de Dependencias) ---
@@ -48,11 +132,50 @@ class IDatabaseExecutor(ABC):
     Interfaz para la ejecución de queries SQL contra una base de datos.
     """
     @abstractmethod
-    def execute_query(self, query: str) -> List[dict]:
+    def execute_query(self, query: QueryLike) -> List[dict]:
         """
         Ejecuta un query SQL SELECT y devuelve una lista de diccionarios.
         Cada diccionario representa una fila y mapea nombres de columna a valores.
+        El query puede ser texto o un Query con marcadores '?' y sus parámetros.
+        """
+        pass
+
+    @property
+    def fetch_chunk_size(self) -> int:
+        """
+        Filas por bloque al leer en streaming cuando no se indica `chunk_size`. Las estrategias
+        también resuelven las tablas de consulta en bloques de este tamaño (ver `resolve_dimensions`).
+        """
+        return 500
+
+    def iter_query(self, query: QueryLike, chunk_size: Optional[int] = None) -> Iterator[dict]:
         """
+        Ejecuta un query SQL SELECT y produce las filas (diccionarios) de forma perezosa.
+        Las implementaciones pueden leer del servidor por bloques de `chunk_size` filas
+        para mantener la memoria acotada; por defecto se materializa el resultado completo.
+        El generador debe cerrarse (o consumirse por completo) para liberar la conexión.
+        """
+        yield from self.execute_query(query)
+
+    def iter_rows(self, query: QueryLike, chunk_size: Optional[int] = None) -> Iterator[Any]:
+        """
+        Igual que `iter_query`, pero las implementaciones pueden producir las filas nativas
+        del driver (ej. pyodbc.Row) para evitar crear un diccionario por fila. El monitor solo
+        lo usa con las estrategias que las aceptan (`accepts_native_rows`), que resuelven las
+        columnas con `ColumnMap.from_row` sobre la primera fila.
+        """
+        yield from self.iter_query(query, chunk_size)
+
+    def execute_batch(self, queries: List[QueryLike]) -> List[List[dict]]:
+        """
+        Ejecuta varios queries SELECT y devuelve un conjunto de resultados por query,
+        en el mismo orden. Las implementaciones pueden enviarlos en un único lote;
+        por defecto se ejecutan uno por uno.
+        """
+        return [self.execute_query(query) for query in queries]
+
+    def close(self):
+        """Libera los recursos del executor (ej. conexiones abiertas). Opcional."""
         pass
 
 # --- Interfaces para las estrategias de procesamiento de tareas (Patrón Estrategia) ---
@@ -67,17 +190,144 @@ class ITaskProcessingStrategy(ABC):
         """Retorna el nombre de la categoría de tareas que maneja esta estrategia."""
         pass
 
+    @property
+    def instance_name(self) -> Optional[str]:
+        """
+        Retorna la instancia (base de datos) que consulta la estrategia cuando se monitorean
+        varias, o None con una sola base de datos. Ver InstanceStrategy.
+        """
+        return None
+
+    # Si es True, el monitor entrega a la estrategia las filas nativas del driver (ej. pyodbc.Row,
+    # ver `IDatabaseExecutor.iter_rows`), que debe leer con `ColumnMap`. Por defecto recibe
+    # diccionarios, como los de `iter_query`.
+    accepts_native_rows: bool = False
+
     @abstractmethod
-    def get_tasks_query(self) -> str:
+    def get_tasks_query(self) -> QueryLike:
         """
         Retorna el query SQL específico para obtener las tareas de esta categoría.
+        Los valores (estados, filtros de [Filters]) van como parámetros de un Query, no en el
+        texto, para que el executor reutilice la sentencia preparada entre ciclos.
         """
         pass
 
     @abstractmethod
-    def process_raw_tasks(self, raw_tasks_data: List[dict]) -> TaskStatistics:
+    def process_raw_tasks(self, raw_tasks_data: Iterable[Any], include_tasks: bool = False) -> TaskStatistics:
         """
         Procesa los datos brutos de las tareas obtenidas de la base de datos
         y calcula las estadísticas para esta categoría.
+        `raw_tasks_data` puede ser un generador: se recorre una sola vez.
+        Las filas son diccionarios, o filas nativas del driver si `accepts_native_rows` (ver `ColumnMap`).
+        Con `include_tasks` se llena TaskStatistics.tasks con el detalle de cada tarea.
+        """
+        pass
+
+    def get_summary_query(self) -> Optional[QueryLike]:
+        """
+        Retorna un query de resumen que calcula en SQL el total de tareas y la tarea
+        destacada, devolviendo a lo sumo una fila sin importar el volumen de tareas.
+        Retorna None si la estrategia no soporta el modo resumen.
+        """
+        return None
+
+    def process_summary(self, raw_summary_data: Iterable[Any]) -> TaskStatistics:
+        """
+        Procesa el resultado de `get_summary_query` y produce las mismas estadísticas
+        que `process_raw_tasks` sobre el conjunto completo (sin el detalle de tareas).
+        """
+        raise NotImplementedError(f"La estrategia '{self.category_name}' no soporta el modo resumen.")
+
+    # --- Tablas de consulta en caché (opcional) ---
+
+    def get_base_tasks_query(self) -> Optional[QueryLike]:
+        """
+        Retorna el query de las tareas solo sobre su tabla principal, sin los JOIN a las tablas
+        de consulta (programaciones y parámetros), incluyendo las claves para resolverlas con
+        `resolve_dimensions`. Retorna None si la estrategia no lo soporta.
         """
-        pass
\ No newline at end of file
+        return None
+
+    def resolve_dimensions(self, raw_rows: Iterable[Any],
+                           lookup: Callable[[Any, Iterable[Any]], Dict[int, List[dict]]],
+                           chunk_size: int = 500) -> Iterator[dict]:
+        """
+        Completa las filas de `get_base_tasks_query` con las columnas de las tablas de consulta
+        y produce filas con las mismas columnas que las de `get_tasks_query`, que se procesan
+        con `process_raw_tasks`. Las filas se leen en bloques de `chunk_size`: las claves de
+        cada bloque se resuelven juntas con `lookup(dimension, claves)` (ver DimensionCache),
+        así la memoria no crece con el total de filas.
+        """
+        raise NotImplementedError(f"La estrategia '{self.category_name}' no soporta la caché de tablas de consulta.")
+
+    # --- Modo incremental (opcional) ---
+
+    def get_delta_query(self, watermark: Any) -> Optional[QueryLike]:
+        """
+        Retorna el query del modo incremental. Con `watermark` None retorna todas las tareas
+        activas (resincronización completa); en otro caso, solo las filas nuevas o modificadas
+        desde la marca de agua. Cada fila incluye la columna 'Watermark'.
+        Retorna None si la estrategia no soporta el modo incremental.
+        """
+        return None
+
+    def get_active_keys_query(self) -> Optional[QueryLike]:
+        """
+        Retorna un query liviano con solo las claves de las tareas activas (columna 'TaskKey'),
+        usado para podar del índice las tareas que terminaron.
+        """
+        return None
+
+    def get_min_duration_keys_query(self) -> Optional[QueryLike]:
+        """
+        Retorna un query liviano con las claves (columna 'TaskKey') de las tareas activas que
+        cumplen todos los filtros de [Filters], incluida la duración mínima. El índice no
+        filtra por duración (una tarea la alcanza sin cambiar en la base de datos), así que
+        las estadísticas incrementales se restringen a estas claves en cada ciclo.
+        Retorna None si no hay duración mínima configurada o la estrategia no lo soporta.
+        """
+        return None
+
+    def read_delta_rows(self, raw_rows: Iterable[Any]) -> Iterator[Tuple[str, Optional[Task], Any]]:
+        """
+        Convierte las filas de `get_delta_query` en tuplas (clave, tarea, watermark).
+        La tarea es None si la fila corresponde a una tarea que ya terminó.
+        """
+        raise NotImplementedError(f"La estrategia '{self.category_name}' no soporta el modo incremental.")
+
+    def read_active_keys(self, raw_rows: Iterable[Any]) -> Set[str]:
+        """Lee las claves retornadas por `get_active_keys_query`."""
+        keys: Set[str] = set()
+        columns: Optional[ColumnMap] = None
+        for row in raw_rows:
+            if columns is None:
+                columns = ColumnMap.from_row(row, ('TaskKey',))
+            keys.add(str(columns.get(row, 'TaskKey')))
+        return keys
+
+    def delta_rank(self, task: Task) -> Optional[Any]:
+        """
+        Retorna el criterio de orden de la tarea destacada en el índice incremental
+        (el menor valor gana). None si la tarea no compite (ej. sin duración).
+        """
+        raise NotImplementedError(f"La estrategia '{self.category_name}' no soporta el modo incremental.")
+
+@lru_cache(maxsize=None)
+def _supports_include_tasks(strategy_class: type) -> bool:
+    try:
+        parameters = inspect.signature(strategy_class.process_raw_tasks).parameters
+    except (TypeError, ValueError):
+        return False
+    return "include_tasks" in parameters or any(
+        parameter.kind is inspect.Parameter.VAR_KEYWORD for parameter in parameters.values())
+
+def process_raw_tasks(strategy: ITaskProcessingStrategy, raw_tasks_data: Iterable[Any],
+                      include_tasks: bool = False) -> TaskStatistics:
+    """
+    Llama a `strategy.process_raw_tasks` pasando `include_tasks` solo si hace falta y la
+    estrategia lo acepta: las estrategias anteriores definen `process_raw_tasks(raw_tasks_data)`
+    y producen estadísticas sin el detalle de tareas.
+    """
+    if include_tasks and _supports_include_tasks(type(strategy)):
+        return strategy.process_raw_tasks(raw_tasks_data, include_tasks=True)
+    return strategy.process_raw_tasks(raw_tasks_data)
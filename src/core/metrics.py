@@ -0,0 +1,276 @@
+import bisect
+import logging
+import math
+import threading
+from typing import Callable, Dict, List, Sequence, Tuple
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class _Metric:
+    """Familia de métricas con etiquetas. Cada combinación de valores de etiqueta es una serie."""
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"Etiquetas inválidas para '{self.name}': {sorted(labels)} (se esperaba {list(self.labelnames)})")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels_text(self, key: Tuple[str, ...], extra: Sequence[Tuple[str, str]] = ()) -> str:
+        pairs = list(zip(self.labelnames, key)) + list(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# TYPE {self.name} {self.type_name}", f"# HELP {self.name} {_escape(self.documentation)}"]
+        with self._lock:
+            lines.extend(self._samples())
+        return lines
+
+class Counter(_Metric):
+    """Contador monótono (OpenMetrics: la muestra se publica como <nombre>_total)."""
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def set_total(self, value: float, **labels):
+        """Publica un total acumulado por otro componente (ej. los contadores del pool)."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def _samples(self) -> List[str]:
+        return [f"{self.name}_total{self._labels_text(key)} {_format_value(value)}" for key, value in self._values.items()]
+
+class Gauge(_Metric):
+    """Valor instantáneo."""
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def remove(self, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values.pop(key, None)
+
+    def _samples(self) -> List[str]:
+        return [f"{self.name}{self._labels_text(key)} {_format_value(value)}" for key, value in self._values.items()]
+
+class Histogram(_Metric):
+    """Histograma acumulativo con buckets fijos (segundos por defecto)."""
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self._buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], List] = {} # clave -> [conteos por bucket (+Inf al final), suma]
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        position = bisect.bisect_left(self._buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self._buckets) + 1), 0.0]
+            series[0][position] += 1
+            series[1] += value
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for key, (counts, total) in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self._buckets + (math.inf,), counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{self._labels_text(key, [('le', _format_value(bound))])} {cumulative}")
+            lines.append(f"{self.name}_count{self._labels_text(key)} {cumulative}")
+            lines.append(f"{self.name}_sum{self._labels_text(key)} {_format_value(total)}")
+        return lines
+
+class MetricsRegistry:
+    """
+    Registro de métricas del monitor en formato OpenMetrics.
+
+    Las métricas se actualizan durante el ciclo; `publish()` (al final de cada ciclo)
+    ejecuta los recolectores registrados y genera el texto que se sirve en /metrics.
+    Las lecturas de /metrics solo devuelven ese texto en caché: nunca consultan la base
+    de datos ni recalculan nada, así que la frecuencia de scraping no agrega carga.
+    """
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[["MetricsRegistry"], None]] = []
+        self._lock = threading.Lock()
+        self._snapshot = b"# EOF\n"
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"La métrica '{metric.name}' ya está registrada con otro tipo o etiquetas.")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[["MetricsRegistry"], None]):
+        """Registra una función que actualiza métricas externas (ej. el pool) antes de cada publicación."""
+        self._collectors.append(collector)
+
+    def render(self) -> bytes:
+        lines: List[str] = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            lines.extend(metric.render())
+        lines.append("# EOF")
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+    def publish(self):
+        """Actualiza el snapshot que se sirve en /metrics."""
+        for collector in self._collectors:
+            try:
+                collector(self)
+            except Exception as e:
+                logging.error(f"Error en el recolector de métricas: {e}")
+        self._snapshot = self.render()
+
+    def snapshot(self) -> bytes:
+        """Retorna el último snapshot publicado (sin recalcular)."""
+        return self._snapshot
+
+class MonitorMetrics:
+    """Métricas de TaskMonitorService: estadísticas por categoría y tiempos internos del ciclo."""
+    def __init__(self, registry: MetricsRegistry):
+        self.registry = registry
+        self._tasks = registry.gauge("epicor_monitor_tasks", "Tareas en ejecución por categoría.", ["category"])
+        self._over_limit = registry.gauge("epicor_monitor_over_limit", "1 si la categoría excede max_tasks_limit.", ["category"])
+        self._longest = registry.gauge("epicor_monitor_longest_task_minutes",
+                                       "Duración (minutos) de la tarea de mayor duración.", ["category"])
+        self._stalled = registry.gauge("epicor_monitor_stalled_tasks",
+                                       "Tareas activas sin avance de progreso ni de actividad (ver [Progress]).", ["category"])
+        self._query_seconds = registry.histogram("epicor_monitor_query_duration_seconds",
+                                                 "Tiempo hasta la primera fila (ejecución del query).", ["category"])
+        self._processing_seconds = registry.histogram("epicor_monitor_processing_duration_seconds",
+                                                      "Tiempo de lectura y procesamiento de las filas.", ["category"])
+        self._rows = registry.counter("epicor_monitor_rows_fetched", "Filas leídas de la base de datos.", ["category"])
+        self._dimension_hits = registry.counter("epicor_monitor_dimension_cache_hits",
+                                                "Claves resueltas desde la caché de tablas de consulta.", ["table"])
+        self._dimension_misses = registry.counter("epicor_monitor_dimension_cache_misses",
+                                                  "Claves leídas de la base de datos (nuevas o vencidas).", ["table"])
+        self._strategy_failures = registry.counter("epicor_monitor_strategy_failures",
+                                                   "Ciclos fallidos por categoría.", ["category"])
+        self._notification_seconds = registry.histogram("epicor_monitor_notification_duration_seconds",
+                                                        "Tiempo de cada llamada a un observador.", ["observer"])
+        self._notification_failures = registry.counter("epicor_monitor_notification_failures",
+                                                       "Llamadas a observadores que lanzaron una excepción.", ["observer"])
+        self._delivery_seconds = registry.histogram("epicor_monitor_delivery_duration_seconds",
+                                                    "Latencia de cada intento de entrega de una notificación.", ["channel"])
+        self._delivery_attempts = registry.counter(
+            "epicor_monitor_delivery_attempts",
+            "Intentos de entrega por resultado (sent, rate_limited, server_error, timeout, network_error, rejected).",
+            ["channel", "outcome"])
+        self._delivery_retries = registry.counter("epicor_monitor_delivery_retries",
+                                                  "Entregas fallidas reprogramadas para un reintento.", ["channel"])
+        self._delivery_dropped = registry.counter("epicor_monitor_delivery_dropped",
+                                                  "Notificaciones descartadas sin entregar.", ["channel"])
+        self._outbox_messages = registry.gauge("epicor_monitor_outbox_messages",
+                                               "Notificaciones pendientes en el outbox.", ["channel"])
+        self._cycle_seconds = registry.histogram("epicor_monitor_cycle_duration_seconds", "Duración de cada ciclo completo.")
+        self._last_cycle = registry.gauge("epicor_monitor_last_cycle_timestamp_seconds",
+                                          "Fin del último ciclo (epoch, segundos).")
+
+    def record_statistics(self, statistics) -> None:
+        category = statistics.category_name
+        self._tasks.set(statistics.total_tasks, category=category)
+        self._over_limit.set(1 if statistics.over_limit else 0, category=category)
+        longest = statistics.longest_running_task
+        if longest is not None and longest.duration_minutes is not None:
+            self._longest.set(longest.duration_minutes, category=category)
+        else:
+            self._longest.remove(category=category)
+
+    def record_stalled(self, category: str, count: int):
+        self._stalled.set(count, category=category)
+
+    def observe_query(self, category: str, seconds: float, rows: int):
+        self._query_seconds.observe(seconds, category=category)
+        self._rows.inc(rows, category=category)
+
+    def observe_processing(self, category: str, seconds: float):
+        self._processing_seconds.observe(seconds, category=category)
+
+    def observe_dimension_lookup(self, table: str, hits: int, misses: int):
+        self._dimension_hits.inc(hits, table=table)
+        self._dimension_misses.inc(misses, table=table)
+
+    def strategy_failed(self, category: str):
+        self._strategy_failures.inc(category=category)
+
+    def observe_notification(self, observer: str, seconds: float, failed: bool):
+        self._notification_seconds.observe(seconds, observer=observer)
+        if failed:
+            self._notification_failures.inc(observer=observer)
+
+    def observe_delivery(self, channel: str, seconds: float, outcome: str):
+        self._delivery_seconds.observe(seconds, channel=channel)
+        self._delivery_attempts.inc(channel=channel, outcome=outcome)
+
+    def delivery_retried(self, channel: str):
+        self._delivery_retries.inc(channel=channel)
+
+    def delivery_dropped(self, channel: str):
+        self._delivery_dropped.inc(channel=channel)
+
+    def watch_outbox(self, channel: str, pending_count: Callable[[], int]):
+        """Publica la profundidad del outbox del canal en cada publicación (ver MetricsRegistry.publish)."""
+        self.registry.add_collector(lambda _registry: self._outbox_messages.set(pending_count(), channel=channel))
+
+    def cycle_finished(self, seconds: float, finished_at: float):
+        self._cycle_seconds.observe(seconds)
+        self._last_cycle.set(finished_at)
+        self.registry.publish()
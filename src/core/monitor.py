@@ -1,11 +1,29 @@
+import contextvars
 import logging
-from typing import List
-from ..core.interfaces import ITaskMonitor, ITaskObserver, IDatabaseExecutor, ITaskProcessingStrategy
+import threading
+import time
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Collection, Dict, Iterable, Iterator, List, Optional, Tuple
+from ..core.interfaces import ITaskMonitor, ITaskObserver, IDatabaseExecutor, ITaskProcessingStrategy, process_raw_tasks
 from ..models import TaskStatistics, Task
-from ..utils.config_manager import ConfigManager # Para obtener límites y umbrales
+from .task_index import ActiveTaskIndex
+from .alert_state import AlertStateTracker
+from .thresholds import ThresholdIndex
+from .baselines import BaselineEngine
+from .progress import ProgressTracker
+from .dimension_cache import Dimension, DimensionCache
+from .deadlines import wait_with_deadlines
+from .metrics import MonitorMetrics
+from ..utils.config_manager import ConfigManager, MonitoringSettings # Para obtener límites y umbrales
+from ..utils import tracing
+from ..utils.tracing import span
+from ..utils.sql import QueryLike
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+BATCH_METRICS_CATEGORY = "(lote)" # Etiqueta de las métricas del query combinado del modo lote
+
 class TaskMonitorService(ITaskMonitor):
     """
     Servicio principal de monitoreo de tareas.
@@ -14,22 +32,51 @@ class TaskMonitorService(ITaskMonitor):
     Utiliza el patrón de Inyección de Dependencias para el executor de base de datos
     y las estrategias de procesamiento.
     """
-    def __init__(self, db_executor: IDatabaseExecutor, strategies: List[ITaskProcessingStrategy]):
+    def __init__(self, db_executor: IDatabaseExecutor, strategies: List[ITaskProcessingStrategy],
+                 alert_tracker: Optional[AlertStateTracker] = None, baselines: Optional[BaselineEngine] = None,
+                 metrics: Optional[MonitorMetrics] = None, progress: Optional[ProgressTracker] = None):
         self._observers: List[ITaskObserver] = []
         self._db_executor = db_executor
         self._strategies = strategies
-        self._max_tasks_limit = int(ConfigManager().get_setting("Monitoring", "max_tasks_limit"))
-        # Puedes añadir un umbral de duración aquí si quieres una alerta específica por tiempo.
-        # Por ejemplo, notificar una tarea individual si dura más de 60 minutos,
-        # independientemente del número total de tareas.
-        # self._long_running_task_threshold_minutes = int(ConfigManager().get_setting("Monitoring", "long_running_task_threshold_minutes"))
+        # Si se indica, los observadores solo se notifican ante cambios de estado
+        self._alert_tracker = alert_tracker
+        # Si se indica, se aprende la duración normal de cada función y se alertan las atípicas
+        self._baselines = baselines
+        # Si se indica, se registran métricas del ciclo (ver MetricsServer para exponerlas)
+        self._metrics = metrics
+        # Si se indica, se siguen el progreso y la actividad de cada tarea para detectar las estancadas
+        self._progress = progress
+        # Umbrales y modos tipados de [Monitoring]; se renuevan al inicio de cada ciclo si
+        # config.ini cambió, sin reiniciar el servicio (ver run_monitoring).
+        self._settings: MonitoringSettings = ConfigManager.monitoring()
+        # Umbrales de larga duración por tarea, precompilados por versión de la configuración
+        self._thresholds = ThresholdIndex.from_snapshot(ConfigManager.snapshot())
+        self._thresholds_version = ConfigManager.snapshot().version
+        # Modo paralelo opcional: cada estrategia se ejecuta en un pool acotado de hilos.
+        # El tamaño del pool se fija al crearlo; cambiarlo requiere reiniciar.
+        self._max_workers = self._settings.max_parallel_strategies
+        self._worker_pool: Optional[ThreadPoolExecutor] = None
+        self._in_flight_lock = threading.Lock()
+        self._in_flight: Dict[str, float] = {} # category_name -> inicio (monotonic) de la ejecución en curso
+        # Modo incremental: índice en memoria por categoría y consultas por marca de agua
+        self._task_indexes: Dict[str, ActiveTaskIndex] = {}
+        # Caché de tablas de consulta (programaciones y parámetros) para los queries sin JOIN
+        self._dimensions = DimensionCache(ttl_seconds=self._settings.dimension_cache_ttl_minutes * 60,
+                                          max_entries=self._settings.dimension_cache_max_entries)
         logging.info("TaskMonitorService inicializado con %d estrategias.", len(strategies))
 
 
+    @property
+    def category_names(self) -> List[str]:
+        """Categorías monitoreadas, una por estrategia."""
+        return [strategy.category_name for strategy in self._strategies]
+
     def add_observer(self, observer: ITaskObserver):
         """Registra un nuevo observador."""
         if observer not in self._observers:
             self._observers.append(observer)
+            if self._metrics is not None:
+                observer.attach_metrics(self._metrics)
             logging.info(f"Observador '{observer.__class__.__name__}' añadido.")
 
     def remove_observer(self, observer: ITaskObserver):
@@ -38,48 +85,462 @@ class TaskMonitorService(ITaskMonitor):
             self._observers.remove(observer)
             logging.info(f"Observador '{observer.__class__.__name__}' eliminado.")
 
-    def _notify_observers(self, statistics: TaskStatistics):
-        """Notifica a todos los observadores sobre nuevas estadísticas."""
+    def _call_observer(self, observer: ITaskObserver, action: str, call: Callable[[], None]):
+        """Ejecuta una notificación aislando sus errores y midiendo su duración."""
+        observer_name = observer.__class__.__name__
+        started = time.perf_counter()
+        failed = False
+        try:
+            with span("observer", observer=observer_name, action=action):
+                call()
+        except Exception as e:
+            failed = True
+            logging.error(f"Error al {action} al observador '{observer_name}': {e}")
+        if self._metrics is not None:
+            self._metrics.observe_notification(observer_name, time.perf_counter() - started, failed)
+
+    def _notify_observers(self, statistics: TaskStatistics, state_changed: bool = True):
+        """
+        Notifica a los observadores sobre nuevas estadísticas.
+        Si el estado no cambió (deduplicación), solo a los que reciben todos los ciclos.
+        """
         for observer in self._observers:
-            try:
-                observer.update(statistics)
-            except Exception as e:
-                logging.error(f"Error al notificar al observador '{observer.__class__.__name__}': {e}")
+            if not state_changed and not observer.receives_every_cycle:
+                continue
+            self._call_observer(observer, "notificar", lambda: observer.update(statistics))
 
     def _notify_long_running_task_to_observers(self, task: Task, category: str):
         """Notifica a los observadores sobre una tarea de larga duración individual."""
         for observer in self._observers:
+            self._call_observer(observer, "notificar tarea de larga duración",
+                                lambda: observer.notify_long_running_task(task, category))
+
+    def _observers_require_task_detail(self) -> bool:
+        return any(observer.requires_task_detail for observer in self._observers)
+
+    def _requires_task_detail(self) -> bool:
+        """
+        Las tareas individuales se leen si algún observador las necesita, hay umbrales por tarea,
+        líneas base o detección de tareas estancadas.
+        """
+        return (self._thresholds.enabled or self._baselines is not None or self._progress is not None
+                or self._observers_require_task_detail())
+
+    def _refresh_settings(self):
+        """Toma el snapshot de configuración vigente; recompila los umbrales solo si cambió."""
+        snapshot = ConfigManager.snapshot()
+        self._settings = ConfigManager.monitoring()
+        if snapshot.version != self._thresholds_version:
             try:
-                observer.notify_long_running_task(task, category)
-            except Exception as e:
-                logging.error(f"Error al notificar tarea de larga duración al observador '{observer.__class__.__name__}': {e}")
+                self._thresholds = ThresholdIndex.from_snapshot(snapshot)
+            except (KeyError, ValueError) as e:
+                logging.error(f"Umbrales de larga duración inválidos; se mantienen los anteriores: {e}")
+            self._thresholds_version = snapshot.version
+        self._dimensions.ttl_seconds = self._settings.dimension_cache_ttl_minutes * 60
+        self._dimensions.max_entries = self._settings.dimension_cache_max_entries
+        if not self._settings.dimension_cache:
+            self._dimensions.clear()
 
-    def run_monitoring(self):
+    def _plan_query(self, strategy: ITaskProcessingStrategy) -> Tuple[QueryLike, Callable[[Iterable[Any]], TaskStatistics]]:
         """
-        Ejecuta el ciclo de monitoreo de tareas para cada estrategia.
+        Elige el query de la estrategia y la función que procesa su resultado.
+        Usa el modo resumen (conteo y tarea destacada calculados en SQL, O(1) filas)
+        cuando está habilitado, la estrategia lo soporta y no se necesita el detalle por
+        tarea (observadores o umbrales por tarea); en otro caso recorre el conjunto completo.
+        Con `dimension_cache`, el conjunto completo se lee sin JOIN a las tablas de consulta,
+        que se resuelven desde DimensionCache.
         """
-        logging.info("Iniciando ciclo de monitoreo de tareas...")
-        for strategy in self._strategies:
-            category_name = strategy.category_name
-            logging.info(f"Monitoreando tareas para la categoría: '{category_name}'")
+        include_tasks = self._requires_task_detail()
+        if self._settings.summary_mode and not include_tasks:
+            summary_query = strategy.get_summary_query()
+            if summary_query is not None:
+                return summary_query, strategy.process_summary
+        if self._settings.dimension_cache:
+            base_query = strategy.get_base_tasks_query()
+            if base_query is not None:
+                lookup = lambda dimension, keys: self._lookup_dimension(strategy.category_name, dimension, keys)
+                chunk_size = self._db_executor.fetch_chunk_size
+                return base_query, lambda rows: process_raw_tasks(
+                    strategy, strategy.resolve_dimensions(rows, lookup, chunk_size), include_tasks)
+        return strategy.get_tasks_query(), lambda rows: process_raw_tasks(strategy, rows, include_tasks)
+
+    def _lookup_dimension(self, category_name: str, dimension: Dimension, keys: Iterable[Any]) -> Dict[int, List[dict]]:
+        """Resuelve las claves de una tabla de consulta desde la caché; las faltantes se leen en bloque."""
+        with span("dimensions", category=category_name, table=dimension.name) as lookup_span:
+            rows_by_key, stats = self._dimensions.lookup(self._db_executor, dimension, keys)
+            lookup_span.set(hits=stats.hits, misses=stats.misses)
+        if self._metrics is not None:
+            self._metrics.observe_dimension_lookup(dimension.name, stats.hits, stats.misses)
+        return rows_by_key
+
+    def _iter_rows(self, strategy: ITaskProcessingStrategy, query: QueryLike) -> Iterable[Any]:
+        """
+        Ejecuta el query en streaming; con métricas habilitadas, mide y cuenta las filas.
+        Las filas nativas del driver solo se entregan a las estrategias que las aceptan
+        (`accepts_native_rows`); las demás reciben diccionarios.
+        """
+        if strategy.accepts_native_rows:
+            rows = self._db_executor.iter_rows(query)
+        else:
+            rows = self._db_executor.iter_query(query)
+        if self._metrics is None:
+            return rows
+        return self._measured_rows(strategy.category_name, rows)
+
+    def _measured_rows(self, category_name: str, rows: Iterable[Any]) -> Iterator[Any]:
+        """
+        Tiempo hasta la primera fila (ejecución del query) y desde ahí hasta agotar el resultado
+        (lectura de filas y su procesamiento, que ocurre al ritmo del consumidor).
+        """
+        started = time.perf_counter()
+        first_row_at = None
+        count = 0
+        try:
+            for row in rows:
+                if first_row_at is None:
+                    first_row_at = time.perf_counter()
+                count += 1
+                yield row
+        finally:
+            finished = time.perf_counter()
+            if first_row_at is None:
+                first_row_at = finished
+            self._metrics.observe_query(category_name, first_row_at - started, count)
+            self._metrics.observe_processing(category_name, finished - first_row_at)
+            close = getattr(rows, "close", None)
+            if close is not None:
+                close()
+
+    def _uses_incremental_mode(self, strategy: ITaskProcessingStrategy) -> bool:
+        return self._settings.incremental_mode and strategy.get_active_keys_query() is not None
+
+    def _apply_delta(self, strategy: ITaskProcessingStrategy, index: ActiveTaskIndex, query: QueryLike):
+        with closing(self._iter_rows(strategy, query)) as rows:
+            for key, task, watermark in strategy.read_delta_rows(rows):
+                if task is None:
+                    index.remove(key)
+                else:
+                    index.upsert(key, task)
+                index.advance_watermark(watermark)
+
+    def _resync_index(self, strategy: ITaskProcessingStrategy, index: ActiveTaskIndex):
+        """Reconstruye el índice de la categoría con todas sus tareas activas."""
+        index.reset()
+        self._apply_delta(strategy, index, strategy.get_delta_query(None))
+        logging.info(f"Índice de '{strategy.category_name}' resincronizado: {len(index)} tareas activas.")
+
+    def _refresh_index(self, strategy: ITaskProcessingStrategy) -> TaskStatistics:
+        """
+        Actualiza el índice en memoria de la categoría y calcula sus estadísticas.
+        Cada ciclo lee solo las filas nuevas o modificadas desde la marca de agua y las claves
+        activas (query liviano) para podar las tareas terminadas. Cada `full_resync_cycles`
+        ciclos se hace una resincronización completa; si aparecen claves activas que el índice
+        no conoce, en el mismo ciclo, y tras un error, en el siguiente.
+        La duración mínima de [Filters] se aplica aparte, con las claves que ya la cumplen.
+        """
+        category_name = strategy.category_name
+        index = self._task_indexes.get(category_name)
+        if index is None:
+            index = self._task_indexes[category_name] = ActiveTaskIndex(strategy.delta_rank)
+        if self._settings.full_resync_cycles and index.cycles_since_resync >= self._settings.full_resync_cycles:
+            index.needs_resync = True
+
+        try:
+            if index.needs_resync:
+                self._resync_index(strategy, index)
+            else:
+                self._apply_delta(strategy, index, strategy.get_delta_query(index.watermark))
+                with closing(self._iter_rows(strategy, strategy.get_active_keys_query())) as rows:
+                    active_keys = strategy.read_active_keys(rows)
+                unknown_keys = index.retain(active_keys)
+                if unknown_keys:
+                    # El índice está incompleto: se resincroniza ya para no reportar un conteo erróneo
+                    logging.info(f"{len(unknown_keys)} tarea(s) de '{category_name}' no vistas por la marca de agua. Se resincroniza el índice.")
+                    self._resync_index(strategy, index)
+                else:
+                    index.cycles_since_resync += 1
+        except Exception:
+            # El índice pudo quedar a medio actualizar: se reconstruye en el siguiente ciclo
+            index.needs_resync = True
+            raise
+
+        # Con duración mínima en [Filters], solo cuentan las tareas que ya la alcanzaron
+        min_duration_query = strategy.get_min_duration_keys_query()
+        if min_duration_query is None:
+            keys = None
+            total_tasks = len(index)
+        else:
+            with closing(self._iter_rows(strategy, min_duration_query)) as rows:
+                keys = {key for key in strategy.read_active_keys(rows) if key in index}
+            total_tasks = len(keys)
+        return TaskStatistics(
+            category_name=category_name,
+            total_tasks=total_tasks,
+            over_limit=total_tasks > self._settings.max_tasks_limit,
+            longest_running_task=index.longest(keys),
+            tasks=index.tasks(keys) if self._requires_task_detail() else None,
+            instance_name=strategy.instance_name
+        )
+
+    def _monitor_strategy(self, strategy: ITaskProcessingStrategy,
+                          prefetched: Optional[Tuple[Callable[[Iterable[Any]], TaskStatistics], List[dict]]] = None
+                          ) -> Optional[TaskStatistics]:
+        """
+        Ejecuta el query, el procesamiento y la notificación de una estrategia.
+        Si `prefetched` viene informado (modo lote), contiene la función de procesamiento
+        y las filas ya obtenidas, y no se consulta la base de datos.
+        Los errores quedan aislados a la estrategia que los produjo: en ese caso retorna None.
+        """
+        category_name = strategy.category_name
+        logging.info(f"Monitoreando tareas para la categoría: '{category_name}'")
+        with span("strategy", category=category_name) as strategy_span:
             try:
-                query = strategy.get_tasks_query()
-                raw_data = self._db_executor.execute_query(query)
-                statistics = strategy.process_raw_tasks(raw_data)
-
-                # Notificar siempre sobre las estadísticas (reporte periódico o alerta de límite)
-                self._notify_observers(statistics)
-
-                # Opcional: Notificar específicamente si la tarea de mayor duración excede un umbral de tiempo
-                # Esto sería una alerta adicional a la del "over_limit"
-                # if statistics.longest_running_task and statistics.longest_running_task.duration_minutes is not None:
-                #     if statistics.longest_running_task.duration_minutes > self._long_running_task_threshold_minutes:
-                #         self._notify_long_running_task_to_observers(
-                #             statistics.longest_running_task,
-                #             category_name
-                #         )
-                #         logging.warning(f"Alerta: Tarea de larga duración detectada en '{category_name}': {statistics.longest_running_task.task_description}")
+                # El span "process" incluye el mapeo de filas y las estadísticas; en streaming también
+                # contiene los spans db.execute y db.fetch, que se leen al ritmo del procesamiento
+                if prefetched is None and self._uses_incremental_mode(strategy):
+                    with span("process", category=category_name, mode="incremental"):
+                        statistics = self._refresh_index(strategy)
+                elif prefetched is None:
+                    query, process = self._plan_query(strategy)
+                    # Las filas se consumen en streaming; closing() libera la conexión aunque falle el procesamiento
+                    with span("process", category=category_name, mode="streaming"), \
+                            closing(self._iter_rows(strategy, query)) as rows:
+                        statistics = process(rows)
+                else:
+                    process, raw_data = prefetched
+                    started = time.perf_counter()
+                    with span("process", category=category_name, mode="batch", rows=len(raw_data)):
+                        statistics = process(raw_data)
+                    if self._metrics is not None:
+                        self._metrics.observe_processing(category_name, time.perf_counter() - started)
+                strategy_span.set(total_tasks=statistics.total_tasks, over_limit=statistics.over_limit)
+                if self._metrics is not None:
+                    self._metrics.record_statistics(statistics)
+
+                # Notificar las estadísticas (reporte periódico o alerta de límite); con deduplicación,
+                # solo cuando el estado de la categoría cambió o venció el intervalo de recordatorio
+                state_changed = self._alert_tracker is None or self._alert_tracker.should_notify_statistics(statistics)
+                if not state_changed:
+                    logging.info(f"Sin cambios de estado en '{category_name}'. No se notifica.")
+                self._notify_observers(statistics, state_changed)
+
+                # Opcional: Notificar específicamente las tareas que exceden su umbral de tiempo
+                # Esto es una alerta adicional a la del "over_limit"
+                with span("thresholds", category=category_name):
+                    self._check_long_running_task(statistics)
+                with span("baselines", category=category_name):
+                    self._check_duration_anomalies(statistics)
+                with span("progress", category=category_name):
+                    self._check_stalled_tasks(statistics)
+                return statistics
 
             except Exception as e:
+                strategy_span.set(error=type(e).__name__)
                 logging.error(f"Error al procesar la categoría '{category_name}': {e}")
-        logging.info("Ciclo de monitoreo de tareas finalizado.")
\ No newline at end of file
+                if self._metrics is not None:
+                    self._metrics.strategy_failed(category_name)
+                return None
+
+    def _check_long_running_task(self, statistics: TaskStatistics):
+        """
+        Compara cada tarea activa con su umbral (por función, programación o tipo de tarea)
+        y notifica las `long_running_top_n` que más lo exceden. Con deduplicación, cada tarea
+        se notifica solo la primera vez que supera su umbral (o al vencer el recordatorio).
+        """
+        if not self._thresholds.enabled:
+            return
+        category_name = statistics.category_name
+        if statistics.tasks is not None:
+            tasks = statistics.tasks
+        else:
+            # Estrategias que no entregan el detalle por tarea: solo se evalúa la destacada
+            tasks = [statistics.longest_running_task] if statistics.longest_running_task is not None else []
+        worst, offender_ids = self._thresholds.offenders(tasks, self._settings.long_running_top_n)
+        if len(offender_ids) > len(worst):
+            logging.info(f"{len(offender_ids)} tareas superan su umbral en '{category_name}'; "
+                            f"se notifican las {len(worst)} de mayor exceso.")
+        for task in worst:
+            if self._alert_tracker is None or self._alert_tracker.should_notify_task(category_name, task):
+                self._notify_long_running_task_to_observers(task, category_name)
+                logging.warning(f"Alerta: Tarea de larga duración detectada en '{category_name}': {task.task_description}")
+        if self._alert_tracker is not None:
+            self._alert_tracker.retain_tasks(category_name, offender_ids)
+
+    def _check_duration_anomalies(self, statistics: TaskStatistics):
+        """Actualiza las líneas base con las tareas del ciclo y notifica las de duración atípica."""
+        if self._baselines is None or statistics.tasks is None:
+            return
+        category_name = statistics.category_name
+        anomalies = self._baselines.observe(category_name, statistics.tasks)
+        # Clave de deduplicación separada de las alertas por umbral
+        alert_category = f"{category_name}#anomalia"
+        for anomaly in anomalies:
+            if self._alert_tracker is None or self._alert_tracker.should_notify_task(alert_category, anomaly.task):
+                description = anomaly.describe()
+                logging.warning(f"Duración atípica en '{category_name}': {anomaly.task.task_description}. {description}")
+                for observer in self._observers:
+                    self._call_observer(observer, "notificar duración atípica",
+                                        lambda: observer.notify_task_anomaly(anomaly.task, category_name, description))
+        if self._alert_tracker is not None:
+            self._alert_tracker.retain_tasks(alert_category, [anomaly.task.task_id for anomaly in anomalies])
+
+    def _check_stalled_tasks(self, statistics: TaskStatistics):
+        """Registra el progreso de las tareas del ciclo y notifica las que no avanzan."""
+        if self._progress is None or statistics.tasks is None:
+            return
+        category_name = statistics.category_name
+        estimates = self._progress.observe(category_name, statistics.tasks)
+        stalled = [estimate for estimate in estimates if estimate.stalled]
+        if self._metrics is not None:
+            self._metrics.record_stalled(category_name, len(stalled))
+        longest = statistics.longest_running_task
+        for estimate in estimates:
+            if longest is not None and estimate.task.task_id == longest.task_id and estimate.eta_minutes is not None:
+                logging.info(f"Tarea destacada de '{category_name}' al {estimate.task.progress_percent:.0f}%: "
+                             f"{estimate.rate_per_minute:.2f}%/min, fin estimado en {estimate.eta_minutes:.0f} min.")
+        # Clave de deduplicación separada de las alertas por umbral y por duración atípica
+        alert_category = f"{category_name}#estancada"
+        for estimate in stalled:
+            if self._alert_tracker is None or self._alert_tracker.should_notify_task(alert_category, estimate.task):
+                description = estimate.describe()
+                logging.warning(f"Tarea estancada en '{category_name}': {estimate.task.task_description}. {description}")
+                for observer in self._observers:
+                    self._call_observer(observer, "notificar tarea estancada",
+                                        lambda: observer.notify_stalled_task(estimate.task, category_name, description))
+        if self._alert_tracker is not None:
+            self._alert_tracker.retain_tasks(alert_category, [estimate.task.task_id for estimate in stalled])
+
+    def _monitor_strategy_in_worker(self, strategy: ITaskProcessingStrategy, prefetched=None) -> Optional[TaskStatistics]:
+        """Envoltorio para el pool de hilos: registra el inicio real para medir el timeout."""
+        with self._in_flight_lock:
+            self._in_flight[strategy.category_name] = time.monotonic()
+        try:
+            return self._monitor_strategy(strategy, prefetched)
+        finally:
+            with self._in_flight_lock:
+                self._in_flight.pop(strategy.category_name, None)
+
+    def _get_worker_pool(self) -> ThreadPoolExecutor:
+        # El pool se reutiliza entre ciclos (modo residente)
+        if self._worker_pool is None:
+            self._worker_pool = ThreadPoolExecutor(max_workers=self._max_workers,
+                                                   thread_name_prefix="monitor-strategy")
+        return self._worker_pool
+
+    def _fetch_batch(self, strategies: List[ITaskProcessingStrategy]) -> Optional[Dict[str, Tuple[Callable, List[dict]]]]:
+        """
+        Combina los queries de todas las estrategias en un único lote (un viaje de red)
+        y asigna cada conjunto de resultados a su estrategia.
+        Retorna None si el lote falla; en ese caso el ciclo continúa estrategia por estrategia
+        para que el error quede aislado a la categoría que lo produjo.
+        """
+        try:
+            plans = [self._plan_query(strategy) for strategy in strategies]
+            started = time.perf_counter()
+            with span("batch", strategies=len(plans)):
+                result_sets = self._db_executor.execute_batch([query for query, _ in plans])
+            if self._metrics is not None:
+                self._metrics.observe_query(BATCH_METRICS_CATEGORY, time.perf_counter() - started,
+                                            sum(len(rows) for rows in result_sets))
+        except Exception as e:
+            logging.error(f"Error al ejecutar el lote de queries, se ejecutarán por separado: {e}")
+            return None
+        return {
+            strategy.category_name: (process, rows)
+            for strategy, (_, process), rows in zip(strategies, plans, result_sets)
+        }
+
+    def _run_strategies_parallel(self, strategies: List[ITaskProcessingStrategy],
+                                 prefetched: Dict[str, Tuple[Callable, List[dict]]]) -> Dict[str, TaskStatistics]:
+        """
+        Ejecuta las estrategias de forma concurrente. La latencia del ciclo queda
+        determinada por la categoría más lenta y no por la suma de todas.
+        Una estrategia que excede `strategy_timeout_seconds` se deja de esperar (o se cancela si
+        aún no salió de la cola del pool); si sigue en ejecución en el siguiente ciclo, se omite
+        para no solaparla consigo misma.
+        Retorna las estadísticas de las estrategias que terminaron a tiempo.
+        """
+        worker_pool = self._get_worker_pool()
+        futures = {}
+        for strategy in strategies:
+            with self._in_flight_lock:
+                still_running = strategy.category_name in self._in_flight
+            if still_running:
+                logging.warning(f"La categoría '{strategy.category_name}' sigue en ejecución desde un ciclo anterior. Se omite.")
+                continue
+            # Copia el contexto para que los spans del hilo conserven el identificador del ciclo
+            future = worker_pool.submit(contextvars.copy_context().run, self._monitor_strategy_in_worker,
+                                        strategy, prefetched.get(strategy.category_name))
+            futures[future] = strategy
+
+        timeout_seconds = self._settings.strategy_timeout_seconds
+        finished = wait_with_deadlines({future: strategy.category_name for future, strategy in futures.items()},
+                                       lambda _: timeout_seconds, self._in_flight, self._in_flight_lock, "la categoría")
+        statistics: Dict[str, TaskStatistics] = {}
+        for future, strategy in futures.items():
+            # Las que excedieron el tiempo de espera (o se cancelaron en la cola) no aportan estadísticas
+            if future in finished and future.exception() is None and future.result() is not None:
+                statistics[strategy.category_name] = future.result()
+        return statistics
+
+    def run_monitoring(self, categories: Optional[Collection[str]] = None) -> Dict[str, TaskStatistics]:
+        """
+        Ejecuta el ciclo de monitoreo de tareas para cada estrategia (o solo para las de
+        `categories`, ver AdaptivePollingScheduler) y retorna las estadísticas de cada
+        categoría procesada sin errores.
+        """
+        cycle_started = time.perf_counter()
+        strategies = self._strategies if categories is None else [
+            strategy for strategy in self._strategies if strategy.category_name in categories]
+        statistics: Dict[str, TaskStatistics] = {}
+        # Con varias instancias, el ciclo de cada una conserva el identificador del ciclo general
+        with tracing.cycle(tracing.current_cycle_id()) as cycle_id, span("cycle", strategies=len(strategies)):
+            logging.info(f"Iniciando ciclo de monitoreo de tareas (ciclo {cycle_id})...")
+            # Recarga en caliente: si config.ini cambió, el ciclo completo usa el snapshot nuevo
+            with span("config"):
+                ConfigManager.reload_if_changed()
+                self._refresh_settings()
+            prefetched: Dict[str, Tuple[Callable, List[dict]]] = {}
+            # Las estrategias en modo incremental usan sus propios queries y no entran en el lote
+            batch_strategies = [s for s in strategies if not self._uses_incremental_mode(s)]
+            if self._settings.batch_queries and len(batch_strategies) > 1:
+                prefetched = self._fetch_batch(batch_strategies) or {}
+
+            if self._settings.parallel_strategies and len(strategies) > 1:
+                statistics = self._run_strategies_parallel(strategies, prefetched)
+            else:
+                for strategy in strategies:
+                    result = self._monitor_strategy(strategy, prefetched.get(strategy.category_name))
+                    if result is not None:
+                        statistics[strategy.category_name] = result
+        if self._metrics is not None:
+            # Publica el snapshot que sirve /metrics hasta el próximo ciclo
+            self._metrics.cycle_finished(time.perf_counter() - cycle_started, time.time())
+        logging.info(f"Ciclo de monitoreo de tareas finalizado ({time.perf_counter() - cycle_started:.3f}s).")
+        return statistics
+
+    def shutdown(self, release_shared: bool = True):
+        """
+        Libera los recursos del servicio (pool de hilos del modo paralelo) y cierra
+        los observadores, que entregan sus notificaciones pendientes.
+        Con `release_shared` en False solo se detiene el pool de hilos: los observadores,
+        el deduplicador, las líneas base y el seguimiento de progreso compartidos entre instancias los cierra
+        MultiInstanceMonitor una sola vez.
+        """
+        if self._worker_pool is not None:
+            # No esperamos a estrategias colgadas: sus hilos terminan cuando termine su query
+            self._worker_pool.shutdown(wait=False)
+            self._worker_pool = None
+        if not release_shared:
+            return
+        for observer in self._observers:
+            try:
+                observer.close()
+            except Exception as e:
+                logging.error(f"Error al cerrar el observador '{observer.__class__.__name__}': {e}")
+        if self._alert_tracker is not None:
+            self._alert_tracker.close()
+        if self._baselines is not None:
+            self._baselines.close()
+        if self._progress is not None:
+            self._progress.close()
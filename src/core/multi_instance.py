@@ -0,0 +1,155 @@
+import contextvars
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Collection, Dict, List, Optional
+from ..core.interfaces import ITaskMonitor, ITaskObserver, IDatabaseExecutor, ITaskProcessingStrategy
+from ..models import TaskStatistics
+from .alert_state import AlertStateTracker
+from .baselines import BaselineEngine
+from .deadlines import wait_with_deadlines
+from .progress import ProgressTracker
+from .metrics import MonitorMetrics
+from .monitor import TaskMonitorService
+from ..strategies.instance import InstanceStrategy
+from ..utils import tracing
+from ..utils.tracing import span
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+@dataclass
+class MonitoredInstance:
+    """Una base de datos Epicor monitoreada: su executor (con su propio pool) y sus estrategias."""
+    name: str
+    db_executor: IDatabaseExecutor
+    strategies: List[ITaskProcessingStrategy]
+    timeout_seconds: float = 120.0
+
+class MultiInstanceMonitor(ITaskMonitor):
+    """
+    Monitor de varias bases de datos Epicor desde un solo proceso.
+
+    Cada instancia tiene su propio TaskMonitorService (y, a través de su executor, su propio
+    pool de conexiones); sus estrategias se etiquetan con el nombre de la instancia (ver
+    InstanceStrategy). Los observadores, el deduplicador de alertas, las líneas base, el
+    seguimiento de progreso y las métricas se comparten: las claves de cada instancia no se mezclan.
+
+    En cada ciclo las instancias se consultan en paralelo, una por hilo. Una instancia que
+    excede su `timeout_seconds` se deja de esperar para no retrasar a las demás; si sigue
+    en ejecución en el siguiente ciclo, se omite para no solaparla consigo misma.
+    """
+    def __init__(self, instances: List[MonitoredInstance], alert_tracker: Optional[AlertStateTracker] = None,
+                 baselines: Optional[BaselineEngine] = None, metrics: Optional[MonitorMetrics] = None,
+                 progress: Optional[ProgressTracker] = None):
+        names = [instance.name for instance in instances]
+        if len(set(names)) != len(names):
+            raise ValueError(f"Nombres de instancia duplicados: {names}")
+        self._instances = instances
+        self._monitors: Dict[str, TaskMonitorService] = {
+            instance.name: TaskMonitorService(
+                db_executor=instance.db_executor,
+                strategies=[InstanceStrategy(strategy, instance.name) for strategy in instance.strategies],
+                alert_tracker=alert_tracker, baselines=baselines, metrics=metrics, progress=progress)
+            for instance in instances
+        }
+        self._observers: List[ITaskObserver] = []
+        self._alert_tracker = alert_tracker
+        self._baselines = baselines
+        self._progress = progress
+        # Un hilo por instancia: una base de datos lenta no ocupa el turno de las demás
+        self._worker_pool = ThreadPoolExecutor(max_workers=max(1, len(instances)), thread_name_prefix="monitor-instance")
+        self._in_flight_lock = threading.Lock()
+        self._in_flight: Dict[str, float] = {} # instancia -> inicio (monotonic) de la ejecución en curso
+        logging.info(f"MultiInstanceMonitor inicializado con {len(instances)} instancia(s): {names}.")
+
+    @property
+    def category_names(self) -> List[str]:
+        """Categorías de todas las instancias (ej. "[PROD] Proceso Activo")."""
+        return [name for monitor in self._monitors.values() for name in monitor.category_names]
+
+    def add_observer(self, observer: ITaskObserver):
+        """Registra un observador en todas las instancias."""
+        if observer not in self._observers:
+            self._observers.append(observer)
+            for monitor in self._monitors.values():
+                monitor.add_observer(observer)
+
+    def remove_observer(self, observer: ITaskObserver):
+        """Elimina un observador de todas las instancias."""
+        if observer in self._observers:
+            self._observers.remove(observer)
+            for monitor in self._monitors.values():
+                monitor.remove_observer(observer)
+
+    def _run_instance(self, instance: MonitoredInstance,
+                      categories: Optional[Collection[str]] = None) -> Dict[str, TaskStatistics]:
+        """Ejecuta el ciclo de una instancia registrando su inicio real para medir el timeout."""
+        with self._in_flight_lock:
+            self._in_flight[instance.name] = time.monotonic()
+        try:
+            with span("instance", instance=instance.name):
+                return self._monitors[instance.name].run_monitoring(categories)
+        except Exception as e:
+            logging.error(f"Error en el ciclo de la instancia '{instance.name}': {e}")
+            return {}
+        finally:
+            with self._in_flight_lock:
+                self._in_flight.pop(instance.name, None)
+
+    def run_monitoring(self, categories: Optional[Collection[str]] = None) -> Dict[str, TaskStatistics]:
+        """
+        Ejecuta el ciclo de monitoreo de todas las instancias en paralelo (o solo de las
+        categorías indicadas, con el nombre de su instancia). Retorna cuando terminan todas
+        o cuando las pendientes exceden su tiempo de espera, con las estadísticas de las
+        categorías que terminaron a tiempo.
+        """
+        cycle_started = time.perf_counter()
+        instances = self._instances if categories is None else [
+            instance for instance in self._instances
+            if any(name in categories for name in self._monitors[instance.name].category_names)]
+        statistics: Dict[str, TaskStatistics] = {}
+        with tracing.cycle() as cycle_id, span("instances", instances=len(instances)):
+            logging.info(f"Iniciando ciclo de {len(instances)} instancia(s) (ciclo {cycle_id})...")
+            futures = {}
+            timeouts = {instance.name: instance.timeout_seconds for instance in instances}
+            for instance in instances:
+                with self._in_flight_lock:
+                    still_running = instance.name in self._in_flight
+                if still_running:
+                    logging.warning(f"La instancia '{instance.name}' sigue en ejecución desde un ciclo anterior. Se omite.")
+                    continue
+                # Copia el contexto para que los spans del hilo conserven el identificador del ciclo
+                future = self._worker_pool.submit(contextvars.copy_context().run, self._run_instance, instance, categories)
+                futures[future] = instance
+
+            finished = wait_with_deadlines({future: instance.name for future, instance in futures.items()},
+                                           lambda name: timeouts[name], self._in_flight, self._in_flight_lock,
+                                           "la instancia")
+            for future in futures:
+                if future in finished:
+                    statistics.update(future.result())
+        logging.info(f"Ciclo de {len(instances)} instancia(s) finalizado ({time.perf_counter() - cycle_started:.3f}s).")
+        return statistics
+
+    def shutdown(self):
+        """
+        Detiene los monitores de cada instancia y cierra una sola vez los observadores,
+        el deduplicador, las líneas base y el seguimiento de progreso compartidos. Los executors los cierra quien los creó.
+        """
+        # No esperamos a instancias colgadas: sus hilos terminan cuando termine su query
+        self._worker_pool.shutdown(wait=False)
+        for monitor in self._monitors.values():
+            monitor.shutdown(release_shared=False)
+        for observer in self._observers:
+            try:
+                observer.close()
+            except Exception as e:
+                logging.error(f"Error al cerrar el observador '{observer.__class__.__name__}': {e}")
+        if self._alert_tracker is not None:
+            self._alert_tracker.close()
+        if self._baselines is not None:
+            self._baselines.close()
+        if self._progress is not None:
+            self._progress.close()
@@ -0,0 +1,100 @@
+import importlib
+import logging
+from typing import Dict, Generic, List, Mapping, Type, TypeVar
+from .interfaces import ITaskObserver, ITaskProcessingStrategy
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+T = TypeVar("T")
+
+STRATEGY_ENTRY_POINT_GROUP = "epicor_monitor.strategies"
+OBSERVER_ENTRY_POINT_GROUP = "epicor_monitor.observers"
+
+def import_object(path: str):
+    """Importa un objeto desde "paquete.modulo:Nombre" o "paquete.modulo.Nombre"."""
+    module_name, separator, attribute = path.partition(":")
+    if not separator:
+        module_name, _, attribute = path.rpartition(".")
+    if not module_name or not attribute:
+        raise ValueError(f"Ruta inválida '{path}': se esperaba 'paquete.modulo:Clase'.")
+    try:
+        module = importlib.import_module(module_name)
+    except ImportError as e:
+        raise ValueError(f"No se pudo importar '{module_name}': {e}") from e
+    try:
+        return getattr(module, attribute)
+    except AttributeError:
+        raise ValueError(f"El módulo '{module_name}' no define '{attribute}'.") from None
+
+def _entry_points(group: str):
+    from importlib import metadata # Se carga solo si se busca un plugin instalado
+    entry_points = metadata.entry_points()
+    if hasattr(entry_points, "select"):
+        return entry_points.select(group=group)
+    return entry_points.get(group, []) # Python < 3.10
+
+class PluginRegistry(Generic[T]):
+    """
+    Registro de componentes enchufables (estrategias u observadores) por nombre.
+
+    Un nombre se resuelve, en orden, como:
+    - un componente incluido en el proyecto (ej. "active", "slack"),
+    - una ruta "paquete.modulo:Clase" (o "paquete.modulo.Clase") importable,
+    - un entry point del grupo del registro, declarado por un paquete instalado, ej.:
+          [project.entry-points."epicor_monitor.strategies"]
+          inventario = "mi_paquete.estrategias:InventoryStrategy"
+
+    El módulo de cada componente se importa al resolverlo, no al iniciar la aplicación:
+    las dependencias pesadas (requests, pyodbc, etc.) solo se cargan si se usan.
+    Los componentes se crean sin argumentos y leen su configuración de ConfigManager.
+    """
+    def __init__(self, kind: str, group: str, base: Type[T], builtins: Mapping[str, str]):
+        self._kind = kind
+        self._group = group
+        self._base = base
+        self._builtins = {name.lower(): path for name, path in builtins.items()}
+        self._resolved: Dict[str, Type[T]] = {}
+
+    @property
+    def builtin_names(self) -> List[str]:
+        return sorted(self._builtins)
+
+    def _load(self, name: str):
+        path = self._builtins.get(name.lower())
+        if path is not None:
+            return import_object(path)
+        if ":" in name or "." in name:
+            return import_object(name)
+        for entry_point in _entry_points(self._group):
+            if entry_point.name == name:
+                return entry_point.load()
+        raise ValueError(f"Nombre de {self._kind} desconocido: '{name}'. Valores válidos: {self.builtin_names}, "
+                         f"una ruta 'paquete.modulo:Clase' o un entry point del grupo '{self._group}'.")
+
+    def resolve(self, name: str) -> Type[T]:
+        """Retorna la clase registrada con `name`, importando su módulo la primera vez."""
+        name = name.strip()
+        cls = self._resolved.get(name)
+        if cls is None:
+            cls = self._load(name)
+            if not isinstance(cls, type) or not issubclass(cls, self._base):
+                raise ValueError(f"'{name}' no es válido como {self._kind}: "
+                                 f"debe ser una subclase de {self._base.__name__}.")
+            self._resolved[name] = cls
+        return cls
+
+    def create(self, name: str) -> T:
+        """Crea una instancia del componente registrado con `name`."""
+        return self.resolve(name)()
+
+STRATEGIES: PluginRegistry[ITaskProcessingStrategy] = PluginRegistry(
+    "estrategia", STRATEGY_ENTRY_POINT_GROUP, ITaskProcessingStrategy, {
+        "submitted": "src.strategies.submitted_tasks:SubmittedTaskStrategy",
+        "active": "src.strategies.active_processes:ActiveProcessStrategy",
+    })
+
+OBSERVERS: PluginRegistry[ITaskObserver] = PluginRegistry(
+    "observador", OBSERVER_ENTRY_POINT_GROUP, ITaskObserver, {
+        "slack": "src.observers.slack_notifier:SlackNotifier",
+        "log": "src.observers.log_notifier:LogNotifier",
+    })
@@ -0,0 +1,137 @@
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Iterable, List, NamedTuple, Optional
+from ..core.interfaces import IAlertStateStore
+from ..models import Task
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+class ProgressSample(NamedTuple):
+    """Lectura de una tarea en un ciclo: momento (epoch), ProgressPercent y LastActivityOn."""
+    observed_at: float
+    progress: Optional[float]
+    last_activity: Optional[str] # ISO 8601; se guarda como texto para persistirlo en JSON
+
+@dataclass
+class ProgressEstimate:
+    """Avance de una tarea activa según sus lecturas recientes."""
+    task: Task
+    rate_per_minute: Optional[float] # Puntos porcentuales por minuto en la ventana (None sin dos lecturas de progreso)
+    eta_minutes: Optional[float]     # Minutos estimados para llegar al 100% (None si no avanza)
+    unchanged_cycles: int            # Ciclos consecutivos sin cambios de progreso ni de actividad
+    unchanged_minutes: float         # Tiempo (al menos) desde el último cambio observado
+    stalled: bool
+
+    def describe(self) -> str:
+        task = self.task
+        progress = f"{task.progress_percent:.0f}%" if task.progress_percent is not None else "sin dato"
+        last_activity = task.last_activity_on.strftime('%Y-%m-%d %H:%M:%S') if task.last_activity_on else "sin dato"
+        text = (f"Sin avance desde hace al menos {self.unchanged_minutes:.0f} min ({self.unchanged_cycles} ciclos): "
+                f"progreso {progress}, última actividad {last_activity}.")
+        if task.activity_msg:
+            text += f" Mensaje: '{task.activity_msg}'."
+        return text
+
+class ProgressTracker:
+    """
+    Detecta tareas estancadas comparando su progreso y su última actividad entre ciclos.
+
+    - Por cada tarea activa se guardan sus últimas `window_samples` lecturas (un buffer
+      circular), de las que se estiman el ritmo de avance y el tiempo restante (ETA).
+    - Una tarea está estancada si ni ProgressPercent ni LastActivityOn cambiaron en
+      `stall_cycles` ciclos consecutivos y han pasado al menos `min_stall_minutes` desde
+      el último cambio. Así una tarea detenida en 42% durante una hora se detecta aunque
+      no sea la de mayor duración.
+    - Las tareas sin ninguno de los dos datos (ej. solicitudes en cola) no se siguen.
+    - Las tareas que terminaron (dejan de aparecer entre las activas) se olvidan en el mismo
+      ciclo, y cada categoría sigue a lo sumo `max_tasks` tareas: la memoria queda acotada.
+    - El estado se guarda en un IAlertStateStore para que las ejecuciones de un solo ciclo
+      (Programador de Tareas) también acumulen lecturas.
+    """
+    _PREFIX = "progress:"
+
+    def __init__(self, store: IAlertStateStore, stall_cycles: int = 6, min_stall_minutes: float = 15,
+                 window_samples: int = 12, max_tasks: int = 5000):
+        if stall_cycles < 1:
+            raise ValueError("stall_cycles debe ser al menos 1.")
+        self._store = store
+        self._stall_cycles = stall_cycles
+        self._min_stall_seconds = min_stall_minutes * 60
+        self._window_samples = max(2, window_samples)
+        self._max_tasks = max_tasks
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _sample(task: Task, now: float) -> Optional[ProgressSample]:
+        if task.progress_percent is None and task.last_activity_on is None:
+            return None
+        last_activity = task.last_activity_on.isoformat() if task.last_activity_on is not None else None
+        return ProgressSample(now, task.progress_percent, last_activity)
+
+    @staticmethod
+    def _rate(samples: Deque[ProgressSample]) -> Optional[float]:
+        """Ritmo de avance entre la lectura de progreso más antigua y la más reciente de la ventana."""
+        readings = [sample for sample in samples if sample.progress is not None]
+        if len(readings) < 2:
+            return None
+        first, last = readings[0], readings[-1]
+        minutes = (last.observed_at - first.observed_at) / 60
+        if minutes <= 0:
+            return None
+        return (last.progress - first.progress) / minutes
+
+    def observe(self, category: str, tasks: Iterable[Task], now: Optional[float] = None) -> List[ProgressEstimate]:
+        """
+        Registra la lectura de cada tarea activa de la categoría en este ciclo y retorna la
+        estimación de avance de las tareas seguidas. Olvida las tareas que ya no están activas.
+        """
+        now = time.time() if now is None else now
+        key = f"{self._PREFIX}{category}"
+        estimates: List[ProgressEstimate] = []
+        with self._lock:
+            previous = self._store.get(key) or {}
+            current: Dict[str, dict] = {}
+            skipped = 0
+            for task in tasks:
+                sample = self._sample(task, now)
+                if sample is None:
+                    continue
+                if len(current) >= self._max_tasks:
+                    skipped += 1
+                    continue
+                state = previous.get(task.task_id)
+                samples: Deque[ProgressSample] = deque(
+                    (ProgressSample(*values) for values in state["samples"]) if state else (),
+                    maxlen=self._window_samples)
+                last = samples[-1] if samples else None
+                if last is None or last.progress != sample.progress or last.last_activity != sample.last_activity:
+                    unchanged_cycles, changed_at = 0, now
+                else:
+                    unchanged_cycles, changed_at = state["unchanged_cycles"] + 1, state["changed_at"]
+                samples.append(sample)
+                current[task.task_id] = {
+                    "samples": [list(values) for values in samples],
+                    "unchanged_cycles": unchanged_cycles,
+                    "changed_at": changed_at,
+                }
+
+                rate = self._rate(samples)
+                eta = (100 - task.progress_percent) / rate if rate and rate > 0 and task.progress_percent is not None else None
+                estimates.append(ProgressEstimate(
+                    task=task, rate_per_minute=rate, eta_minutes=eta, unchanged_cycles=unchanged_cycles,
+                    unchanged_minutes=(now - changed_at) / 60,
+                    stalled=unchanged_cycles >= self._stall_cycles and now - changed_at >= self._min_stall_seconds,
+                ))
+            if skipped:
+                logging.warning(f"'{category}' tiene más de {self._max_tasks} tareas activas: "
+                                f"{skipped} no se siguen para detectar estancamientos.")
+            # Las tareas que no están en `current` terminaron: se descartan al reemplazar el estado
+            if current or previous:
+                self._store.set(key, current)
+        return estimates
+
+    def close(self):
+        self._store.close()
@@ -0,0 +1,235 @@
+import logging
+import signal
+import threading
+import time
+from typing import Any, Callable, Collection, Dict, Iterable, List, Optional, Tuple
+from ..models import TaskStatistics
+from ..utils.config_manager import ConfigManager
+from .thresholds import ThresholdIndex
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+class PollingScheduler:
+    """
+    Programador interno para el modo residente (daemon).
+    Ejecuta un ciclo de trabajo cada `interval_seconds` dentro del mismo proceso,
+    evitando el costo de arranque (imports, configuración, descifrado, conexión)
+    en cada ejecución.
+
+    Los ciclos nunca se solapan: se ejecutan en un único hilo y, si un ciclo dura
+    más que el intervalo, el siguiente comienza inmediatamente después de que
+    termine el anterior (los ciclos atrasados no se acumulan).
+    """
+    def __init__(self, cycle: Callable[[], None], interval_seconds: float):
+        if interval_seconds <= 0:
+            raise ValueError("El intervalo de monitoreo debe ser mayor que cero.")
+        self._cycle = cycle
+        self._interval_seconds = interval_seconds
+        self._stop_event = threading.Event()
+        self._cycle_lock = threading.Lock()
+
+    @property
+    def interval_seconds(self) -> float:
+        return self._interval_seconds
+
+    def stop(self):
+        """Solicita la detención del programador. El ciclo en curso termina normalmente."""
+        self._stop_event.set()
+
+    def is_stopped(self) -> bool:
+        return self._stop_event.is_set()
+
+    def install_signal_handlers(self):
+        """
+        Registra SIGTERM y SIGINT para detener el programador de forma ordenada.
+        Solo puede llamarse desde el hilo principal.
+        """
+        def _handle_signal(signum, frame):
+            logging.info(f"Señal {signal.Signals(signum).name} recibida. Deteniendo el monitoreo...")
+            self.stop()
+
+        signal.signal(signal.SIGTERM, _handle_signal)
+        signal.signal(signal.SIGINT, _handle_signal)
+
+    def run_once(self) -> bool:
+        """
+        Ejecuta un ciclo si no hay otro en curso.
+        Retorna False si el ciclo se omitió porque el anterior sigue ejecutándose.
+        """
+        if not self._cycle_lock.acquire(blocking=False):
+            logging.warning("El ciclo de monitoreo anterior sigue en ejecución. Se omite este ciclo.")
+            return False
+        try:
+            self._cycle()
+        except Exception as e:
+            # Un ciclo fallido no debe detener el servicio residente
+            logging.error(f"Error no controlado en el ciclo de monitoreo: {e}", exc_info=True)
+        finally:
+            self._cycle_lock.release()
+        return True
+
+    def run_forever(self, max_cycles: Optional[int] = None):
+        """
+        Ejecuta ciclos a intervalos fijos hasta que se llame a `stop()`.
+        El intervalo se mide entre inicios de ciclo (no entre el fin de uno y el inicio del siguiente).
+        """
+        logging.info(f"Modo residente iniciado. Intervalo de monitoreo: {self._interval_seconds} segundo(s).")
+        cycles = 0
+        next_run = time.monotonic()
+        while not self._stop_event.is_set():
+            self.run_once()
+            cycles += 1
+            if max_cycles is not None and cycles >= max_cycles:
+                break
+
+            next_run += self._interval_seconds
+            now = time.monotonic()
+            if next_run < now:
+                # El ciclo tardó más que el intervalo: no intentamos "recuperar" ciclos perdidos
+                logging.warning("El ciclo de monitoreo excedió el intervalo configurado.")
+                next_run = now
+            # wait() retorna inmediatamente si se solicita la detención
+            self._stop_event.wait(next_run - now)
+        logging.info("Modo residente detenido.")
+
+class AdaptiveIntervalPolicy:
+    """
+    Calcula el intervalo hasta la próxima consulta de una categoría a partir de sus últimas
+    estadísticas (valores de [Monitoring], ver `from_config`):
+    - Presión: si el total se acerca a `max_tasks_limit` (al menos `pressure_ratio` del límite)
+      o una tarea se acerca a su umbral de duración (`pressure_ratio` del umbral), se consulta
+      cada `min_interval_seconds`.
+    - Sin tareas: el intervalo se multiplica por `backoff_factor` en cada ciclo vacío, hasta
+      `max_interval_seconds`.
+    - En otro caso, y cuando no hay estadísticas (ej. el query falló), se usa el intervalo base.
+    """
+    def __init__(self, base_seconds: float, min_seconds: float, max_seconds: float, backoff_factor: float = 2.0,
+                 pressure_ratio: float = 0.8, max_tasks_limit: int = 0, thresholds: Optional[ThresholdIndex] = None):
+        if min_seconds <= 0 or max_seconds < min_seconds:
+            raise ValueError("Se requiere 0 < min_interval_seconds <= max_interval_seconds.")
+        self.min_seconds = min_seconds
+        self.max_seconds = max_seconds
+        self.base_seconds = min(max(base_seconds, min_seconds), max_seconds)
+        self._backoff_factor = max(1.0, backoff_factor)
+        self._pressure_ratio = pressure_ratio
+        self._max_tasks_limit = max_tasks_limit
+        self._thresholds = thresholds
+
+    @classmethod
+    def from_config(cls) -> "AdaptiveIntervalPolicy":
+        """Construye la política con el snapshot de configuración vigente."""
+        snapshot = ConfigManager.snapshot()
+        settings = ConfigManager.monitoring()
+        return cls(settings.check_interval_seconds, settings.min_interval_seconds, settings.max_interval_seconds,
+                   settings.backoff_factor, settings.pressure_ratio, settings.max_tasks_limit,
+                   ThresholdIndex.from_snapshot(snapshot))
+
+    def _near_threshold(self, statistics: TaskStatistics) -> bool:
+        if self._thresholds is None or not self._thresholds.enabled:
+            return False
+        if statistics.tasks is not None:
+            tasks = statistics.tasks
+        else:
+            tasks = [statistics.longest_running_task] if statistics.longest_running_task is not None else []
+        return self._thresholds.max_ratio(tasks) >= self._pressure_ratio
+
+    def next_interval(self, previous: Optional[float], statistics: Optional[TaskStatistics]) -> Tuple[float, str]:
+        """Retorna el próximo intervalo (segundos) de la categoría y el motivo, para el log."""
+        if statistics is None:
+            return self.base_seconds, "sin estadísticas"
+        if statistics.over_limit or (self._max_tasks_limit > 0
+                                     and statistics.total_tasks >= self._pressure_ratio * self._max_tasks_limit):
+            return self.min_seconds, f"{statistics.total_tasks} tareas, cerca del límite de {self._max_tasks_limit}"
+        if self._near_threshold(statistics):
+            return self.min_seconds, "una tarea se acerca a su umbral de duración"
+        if statistics.total_tasks == 0:
+            interval = max(previous or self.base_seconds, self.base_seconds) * self._backoff_factor
+            return min(interval, self.max_seconds), "sin tareas"
+        return self.base_seconds, f"{statistics.total_tasks} tareas"
+
+class AdaptivePollingScheduler(PollingScheduler):
+    """
+    Programador del modo residente con un calendario independiente por categoría: cada una
+    se consulta según su propio intervalo, que AdaptiveIntervalPolicy ajusta con sus últimas
+    estadísticas (rápido ante una cola que crece, cada vez más lento mientras esté vacía).
+
+    En cada vuelta se ejecutan en un solo ciclo las categorías vencidas (y las que vencen
+    dentro de `coalesce_seconds`, para aprovechar el modo lote). Como en PollingScheduler,
+    los ciclos no se solapan y los atrasados no se acumulan. `cycle` recibe las categorías
+    a consultar y retorna sus estadísticas (ver ITaskMonitor.run_monitoring).
+
+    `policy` construye la política tras cada ciclo (recarga en caliente). Si se indica
+    `policy_version` (ej. la versión del snapshot de configuración), la política solo se
+    reconstruye cuando esa versión cambia.
+    """
+    def __init__(self, cycle: Callable[[Optional[Collection[str]]], Dict[str, TaskStatistics]],
+                 categories: Iterable[str], policy: Callable[[], AdaptiveIntervalPolicy],
+                 coalesce_seconds: float = 1.0, policy_version: Optional[Callable[[], Any]] = None):
+        self._policy_factory = policy
+        self._policy_version = policy_version
+        self._built_version = policy_version() if policy_version is not None else None
+        self._policy = policy()
+        super().__init__(cycle, self._policy.base_seconds)
+        self._categories = list(categories)
+        self._coalesce_seconds = coalesce_seconds
+        self._intervals: Dict[str, float] = {category: self._policy.base_seconds for category in self._categories}
+        self._next_run: Dict[str, float] = {}
+
+    def intervals(self) -> Dict[str, float]:
+        """Intervalo vigente (segundos) de cada categoría."""
+        return dict(self._intervals)
+
+    def _refresh_policy(self):
+        # Recarga en caliente: los límites y umbrales nuevos se aplican desde el siguiente ciclo
+        if self._policy_version is not None:
+            version = self._policy_version()
+            if version == self._built_version:
+                return # Sin cambios: no se recompilan los umbrales
+            self._built_version = version
+        try:
+            self._policy = self._policy_factory()
+        except (KeyError, ValueError) as e:
+            logging.error(f"Configuración del sondeo adaptativo inválida; se mantiene la anterior: {e}")
+
+    def _run_categories(self, categories: List[str]) -> Dict[str, TaskStatistics]:
+        if not self._cycle_lock.acquire(blocking=False):
+            logging.warning("El ciclo de monitoreo anterior sigue en ejecución. Se omite este ciclo.")
+            return {}
+        try:
+            return self._cycle(categories) or {}
+        except Exception as e:
+            # Un ciclo fallido no debe detener el servicio residente
+            logging.error(f"Error no controlado en el ciclo de monitoreo: {e}", exc_info=True)
+            return {}
+        finally:
+            self._cycle_lock.release()
+
+    def run_forever(self, max_cycles: Optional[int] = None):
+        """
+        Ejecuta ciclos con las categorías vencidas hasta que se llame a `stop()`.
+        Cada intervalo se mide desde el inicio del ciclo en que se consultó la categoría.
+        """
+        logging.info(f"Modo residente adaptativo iniciado para {len(self._categories)} categoría(s): intervalo base "
+                     f"{self._policy.base_seconds}s, entre {self._policy.min_seconds}s y {self._policy.max_seconds}s.")
+        cycles = 0
+        started = time.monotonic()
+        self._next_run = {category: started for category in self._categories}
+        while not self._stop_event.is_set() and self._categories:
+            started = time.monotonic()
+            due = [category for category, next_run in self._next_run.items()
+                   if next_run <= started + self._coalesce_seconds]
+            if due:
+                statistics = self._run_categories(due)
+                self._refresh_policy()
+                for category in due:
+                    interval, reason = self._policy.next_interval(self._intervals.get(category), statistics.get(category))
+                    if interval != self._intervals.get(category):
+                        logging.info(f"Intervalo de '{category}': {interval:g}s ({reason}).")
+                    self._intervals[category] = interval
+                    self._next_run[category] = started + interval
+                cycles += 1
+                if max_cycles is not None and cycles >= max_cycles:
+                    break
+            # wait() retorna inmediatamente si se solicita la detención
+            self._stop_event.wait(max(0.0, min(self._next_run.values()) - time.monotonic()))
+        logging.info("Modo residente detenido.")
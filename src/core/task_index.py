@@ -0,0 +1,116 @@
+import copy
+import heapq
+import itertools
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+from ..models import Task
+
+class ActiveTaskIndex:
+    """
+    Índice en memoria de las tareas activas de una categoría, para el modo incremental.
+
+    Guarda cada tarea por su clave (SysTaskNum / AgentSchedNum) junto con una marca de agua
+    (watermark) del último cambio leído, de modo que cada ciclo solo consulte las filas
+    nuevas o modificadas. El total y la tarea destacada se mantienen de forma incremental:
+    un heap con borrado perezoso entrega la tarea con menor `rank` en O(log n) por cambio.
+
+    Las duraciones (duration_minutes) se "envejecen" al leerlas con el tiempo transcurrido
+    desde que se obtuvo la fila, ya que no cambian en la base de datos sin actividad.
+    """
+    def __init__(self, rank: Callable[[Task], Optional[Any]]):
+        self._rank = rank
+        self._tasks: Dict[str, Task] = {}
+        self._fetched_at: Dict[str, float] = {}  # clave -> time.monotonic() de la lectura
+        self._versions: Dict[str, int] = {}       # clave -> versión vigente en el heap
+        self._heap: List[Tuple[Any, int, str]] = []
+        self._counter = itertools.count()
+        self.watermark: Any = None
+        self.cycles_since_resync = 0
+        self.needs_resync = True
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._tasks
+
+    def reset(self):
+        """Vacía el índice antes de una resincronización completa."""
+        self._tasks.clear()
+        self._fetched_at.clear()
+        self._versions.clear()
+        self._heap.clear()
+        self.watermark = None
+        self.cycles_since_resync = 0
+        self.needs_resync = False
+
+    def advance_watermark(self, value: Any):
+        if value is not None and (self.watermark is None or value > self.watermark):
+            self.watermark = value
+
+    def upsert(self, key: str, task: Task):
+        """Inserta o reemplaza una tarea."""
+        self._tasks[key] = task
+        self._fetched_at[key] = time.monotonic()
+        rank = self._rank(task)
+        if rank is None:
+            self._versions.pop(key, None)
+            return
+        version = next(self._counter)
+        self._versions[key] = version
+        heapq.heappush(self._heap, (rank, version, key))
+        # Evita que las entradas obsoletas hagan crecer el heap indefinidamente
+        if len(self._heap) > 2 * len(self._tasks) + 64:
+            self._heap = [entry for entry in self._heap if self._versions.get(entry[2]) == entry[1]]
+            heapq.heapify(self._heap)
+
+    def remove(self, key: str):
+        """Elimina una tarea terminada (si estaba en el índice)."""
+        self._tasks.pop(key, None)
+        self._fetched_at.pop(key, None)
+        self._versions.pop(key, None)
+
+    def retain(self, active_keys: Set[str]) -> Set[str]:
+        """
+        Poda las tareas que ya no están activas en la base de datos.
+        Retorna las claves activas que el índice aún no conoce.
+        """
+        for key in [key for key in self._tasks if key not in active_keys]:
+            self.remove(key)
+        return {key for key in active_keys if key not in self._tasks}
+
+    def _aged(self, key: str, now: float) -> Task:
+        task = self._tasks[key]
+        if task.duration_minutes is None:
+            return task
+        elapsed_minutes = int((now - self._fetched_at[key]) // 60)
+        if elapsed_minutes <= 0:
+            return task
+        aged = copy.copy(task)
+        aged.duration_minutes = task.duration_minutes + elapsed_minutes
+        return aged
+
+    def longest(self, keys: Optional[Set[str]] = None) -> Optional[Task]:
+        """
+        Retorna la tarea destacada (menor `rank`), descartando entradas obsoletas del heap.
+        Con `keys`, solo entre esas claves (recorrido lineal, sin el heap).
+        """
+        if keys is not None:
+            candidates = [(rank, self._versions[key], key) for key, rank in
+                          ((key, self._rank(self._tasks[key])) for key in keys if key in self._tasks)
+                          if rank is not None]
+            return self._aged(min(candidates)[2], time.monotonic()) if candidates else None
+        while self._heap:
+            _, version, key = self._heap[0]
+            if self._versions.get(key) == version:
+                return self._aged(key, time.monotonic())
+            heapq.heappop(self._heap)
+        return None
+
+    def tasks(self, keys: Optional[Set[str]] = None) -> List[Task]:
+        """Retorna las tareas del índice (con la duración envejecida); con `keys`, solo esas."""
+        now = time.monotonic()
+        return [self._aged(key, now) for key in self._tasks if keys is None or key in keys]
+
+    def keys(self) -> Iterable[str]:
+        return self._tasks.keys()
@@ -0,0 +1,127 @@
+import heapq
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+from ..models import Task
+from ..utils.config_manager import ConfigSnapshot
+
+# Secciones de config.ini con umbrales por atributo de la tarea, en orden de precedencia
+THRESHOLD_SECTIONS: Tuple[Tuple[str, str], ...] = (
+    ("Thresholds.function_id", "function_id"),
+    ("Thresholds.sched_desc", "sched_desc"),
+    ("Thresholds.task_type", "task_type"),
+)
+
+class _DimensionIndex:
+    """
+    Umbrales de un atributo (ej. function_id), precompilados para buscar en O(1).
+
+    Las claves exactas van a un diccionario. Las claves terminadas en '*' son prefijos:
+    se agrupan por longitud, de modo que una búsqueda solo prueba un corte del valor
+    por cada longitud distinta configurada (el prefijo más largo gana).
+    Las comparaciones no distinguen mayúsculas (configparser ya normaliza las claves).
+    """
+    __slots__ = ("_exact", "_prefixes", "_prefix_lengths")
+
+    def __init__(self, entries: Mapping[str, int]):
+        self._exact: Dict[str, int] = {}
+        self._prefixes: Dict[str, int] = {}
+        for key, minutes in entries.items():
+            key = key.strip().lower()
+            if key.endswith("*"):
+                self._prefixes[key[:-1]] = minutes
+            else:
+                self._exact[key] = minutes
+        self._prefix_lengths = sorted({len(prefix) for prefix in self._prefixes}, reverse=True)
+
+    def __bool__(self) -> bool:
+        return bool(self._exact or self._prefixes)
+
+    def lookup(self, value: Optional[str]) -> Optional[int]:
+        if not value:
+            return None
+        value = value.strip().lower()
+        minutes = self._exact.get(value)
+        if minutes is not None:
+            return minutes
+        for length in self._prefix_lengths:
+            if length <= len(value):
+                minutes = self._prefixes.get(value[:length])
+                if minutes is not None:
+                    return minutes
+        return None
+
+class ThresholdIndex:
+    """
+    Umbrales de larga duración por tarea.
+
+    Cada tarea se compara con el umbral más específico que le corresponda:
+    primero por función (function_id), luego por descripción de la programación
+    (sched_desc), luego por tipo de tarea (task_type) y, si ninguno aplica, con
+    el umbral general `long_running_task_threshold_minutes` (0 = sin umbral).
+    """
+    def __init__(self, default_minutes: int = 0,
+                 dimensions: Optional[Iterable[Tuple[str, Mapping[str, int]]]] = None):
+        self._default_minutes = default_minutes
+        self._dimensions: List[Tuple[str, _DimensionIndex]] = []
+        for attribute, entries in dimensions or ():
+            index = _DimensionIndex(entries)
+            if index: # Las secciones vacías no agregan búsquedas
+                self._dimensions.append((attribute, index))
+
+    @classmethod
+    def from_snapshot(cls, snapshot: ConfigSnapshot) -> "ThresholdIndex":
+        """Construye el índice a partir de [Monitoring] y las secciones [Thresholds.*]."""
+        dimensions = []
+        for section, attribute in THRESHOLD_SECTIONS:
+            if section in snapshot.sections:
+                dimensions.append((attribute, {
+                    key: snapshot.get_int(section, key) for key in snapshot.sections[section]
+                }))
+        default_minutes = snapshot.monitoring.long_running_task_threshold_minutes if snapshot.monitoring else 0
+        return cls(default_minutes, dimensions)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._default_minutes or self._dimensions)
+
+    def threshold_for(self, task: Task) -> Optional[int]:
+        """Retorna el umbral (minutos) aplicable a la tarea, o None si no tiene."""
+        for attribute, index in self._dimensions:
+            minutes = index.lookup(getattr(task, attribute))
+            if minutes is not None:
+                return minutes or None # Un umbral 0 excluye explícitamente a la tarea
+        return self._default_minutes or None
+
+    def max_ratio(self, tasks: Iterable[Task]) -> float:
+        """
+        Retorna la mayor proporción duración/umbral entre las tareas con umbral (1.0 = la
+        tarea alcanzó su umbral), o 0.0 si ninguna tiene duración y umbral.
+        """
+        ratio = 0.0
+        for task in tasks:
+            if task.duration_minutes is None:
+                continue
+            threshold = self.threshold_for(task)
+            if threshold is not None:
+                ratio = max(ratio, task.duration_minutes / threshold)
+        return ratio
+
+    def offenders(self, tasks: Iterable[Task], top_n: int = 0) -> Tuple[List[Task], List[str]]:
+        """
+        Retorna las tareas que superan su umbral, de mayor a menor exceso (minutos por
+        encima del umbral), y los task_id de todas las que lo superan.
+        Con `top_n` > 0 solo se retornan las `top_n` peores, seleccionadas con un heap
+        acotado (O(n log top_n)) en lugar de ordenar todas.
+        """
+        candidates = []
+        for position, task in enumerate(tasks):
+            if task.duration_minutes is None:
+                continue
+            threshold = self.threshold_for(task)
+            if threshold is not None and task.duration_minutes > threshold:
+                # La posición desempata sin comparar objetos Task
+                candidates.append((task.duration_minutes - threshold, -position, task))
+        if top_n > 0:
+            selected = heapq.nlargest(top_n, candidates)
+        else:
+            selected = sorted(candidates, reverse=True)
+        return [task for _, _, task in selected], [task.task_id for _, _, task in candidates]
@@ -0,0 +1,228 @@
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from typing import Any, Callable, Deque, Dict
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+@dataclass
+class PoolStats:
+    """Contadores del pool de conexiones (acumulados desde su creación)."""
+    hits: int = 0        # Conexiones reutilizadas desde el pool (login evitado)
+    misses: int = 0      # Conexiones nuevas creadas porque no había una libre
+    waits: int = 0       # Veces que se esperó a que se liberara una conexión
+    reconnects: int = 0  # Conexiones reemplazadas por estar caídas o inválidas
+    recycled: int = 0    # Conexiones cerradas por tiempo de vida o inactividad
+    statement_hits: int = 0    # Queries ejecutados con una sentencia ya preparada en la conexión
+    statement_misses: int = 0  # Queries que prepararon su sentencia (primera vez en la conexión)
+
+    def as_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+class PooledConnection:
+    """
+    Envoltorio de una conexión del pool con sus marcas de tiempo y sus sentencias
+    preparadas (cursores por texto de query, del más antiguo al más reciente en uso),
+    que se descartan junto con la conexión.
+    """
+    __slots__ = ("connection", "created_at", "last_used_at", "statements")
+
+    def __init__(self, connection: Any):
+        now = time.monotonic()
+        self.connection = connection
+        self.created_at = now
+        self.last_used_at = now
+        self.statements: "OrderedDict[str, Any]" = OrderedDict()
+
+class ConnectionPool:
+    """
+    Pool acotado de conexiones DB-API, seguro para uso desde varios hilos.
+
+    - Reutiliza conexiones para evitar un login completo por query.
+    - Valida de forma económica: solo ejecuta un ping ('SELECT 1') si la conexión
+      lleva más de `validation_interval_seconds` sin usarse.
+    - Recicla conexiones que superan `max_lifetime_seconds` o `idle_timeout_seconds`.
+    """
+    def __init__(self, connect: Callable[[], Any], max_size: int = 4,
+                 max_lifetime_seconds: float = 1800, idle_timeout_seconds: float = 300,
+                 validation_interval_seconds: float = 30, acquire_timeout_seconds: float = 30,
+                 validation_query: str = "SELECT 1"):
+        if max_size < 1:
+            raise ValueError("El tamaño del pool debe ser al menos 1.")
+        self._connect = connect
+        self._max_size = max_size
+        self._max_lifetime_seconds = max_lifetime_seconds
+        self._idle_timeout_seconds = idle_timeout_seconds
+        self._validation_interval_seconds = validation_interval_seconds
+        self._acquire_timeout_seconds = acquire_timeout_seconds
+        self._validation_query = validation_query
+
+        self._idle: Deque[PooledConnection] = deque()
+        self._size = 0  # Conexiones abiertas (libres + en uso)
+        self._closed = False
+        self._condition = threading.Condition()
+        self._stats = PoolStats()
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size
+
+    def stats(self) -> PoolStats:
+        """Retorna una copia de los contadores del pool."""
+        with self._condition:
+            return PoolStats(**self._stats.as_dict())
+
+    def acquire(self) -> PooledConnection:
+        """
+        Obtiene una conexión del pool, creando una nueva si hay capacidad.
+        Si el pool está lleno espera hasta `acquire_timeout_seconds`.
+        """
+        deadline = time.monotonic() + self._acquire_timeout_seconds
+        waited = False
+        while True:
+            with self._condition:
+                if self._closed:
+                    raise ConnectionError("El pool de conexiones está cerrado.")
+                if self._idle:
+                    pooled = self._idle.pop()  # LIFO: la conexión más reciente está "más caliente"
+                elif self._size < self._max_size:
+                    self._size += 1
+                    self._stats.misses += 1
+                    pooled = None
+                else:
+                    if not waited:
+                        self._stats.waits += 1
+                        waited = True
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise ConnectionError(
+                            f"Tiempo de espera agotado ({self._acquire_timeout_seconds}s) al obtener una conexión del pool."
+                        )
+                    self._condition.wait(remaining)
+                    continue
+
+            if pooled is None:
+                return self._create()
+
+            # Validación fuera del lock para no bloquear a otros hilos
+            if self._is_usable(pooled):
+                with self._condition:
+                    self._stats.hits += 1
+                return pooled
+            self._close_quietly(pooled)
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+
+    def release(self, pooled: PooledConnection, discard: bool = False):
+        """
+        Devuelve una conexión al pool. Con `discard=True` (o si el pool está cerrado)
+        la conexión se cierra en lugar de reutilizarse.
+        """
+        pooled.last_used_at = time.monotonic()
+        with self._condition:
+            if not discard and not self._closed and not self._is_expired(pooled, pooled.last_used_at):
+                self._idle.append(pooled)
+                self._condition.notify()
+                return
+            self._size -= 1
+            if not discard and not self._closed:
+                self._stats.recycled += 1
+            self._condition.notify()
+        self._close_quietly(pooled)
+
+    def record_statement(self, hit: bool):
+        """Cuenta un query ejecutado con (hit) o sin una sentencia preparada reutilizada."""
+        with self._condition:
+            if hit:
+                self._stats.statement_hits += 1
+            else:
+                self._stats.statement_misses += 1
+
+    def replace(self, pooled: PooledConnection) -> PooledConnection:
+        """
+        Cierra una conexión caída y abre otra en su lugar sin liberar el cupo del pool.
+        Se usa para reconectar de forma transparente tras perder el enlace.
+        """
+        self._close_quietly(pooled)
+        with self._condition:
+            self._stats.reconnects += 1
+        # Si la reconexión falla, _create() libera el cupo
+        return self._create()
+
+    @contextmanager
+    def connection(self):
+        """Context manager que obtiene y devuelve una conexión del pool."""
+        pooled = self.acquire()
+        discard = False
+        try:
+            yield pooled
+        except Exception:
+            # Ante cualquier error la conexión podría quedar en un estado inconsistente
+            discard = True
+            raise
+        finally:
+            self.release(pooled, discard=discard)
+
+    def close(self):
+        """Cierra todas las conexiones libres e impide nuevas adquisiciones."""
+        with self._condition:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._condition.notify_all()
+        for pooled in idle:
+            self._close_quietly(pooled)
+
+    def _create(self) -> PooledConnection:
+        try:
+            return PooledConnection(self._connect())
+        except Exception:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+
+    def _is_expired(self, pooled: PooledConnection, now: float) -> bool:
+        if self._max_lifetime_seconds and now - pooled.created_at > self._max_lifetime_seconds:
+            return True
+        if self._idle_timeout_seconds and now - pooled.last_used_at > self._idle_timeout_seconds:
+            return True
+        return False
+
+    def _is_usable(self, pooled: PooledConnection) -> bool:
+        now = time.monotonic()
+        if self._is_expired(pooled, now):
+            logging.debug("Conexión del pool reciclada por tiempo de vida o inactividad.")
+            with self._condition:
+                self._stats.recycled += 1
+            return False
+        if getattr(pooled.connection, "closed", False):
+            with self._condition:
+                self._stats.reconnects += 1
+            return False
+        if now - pooled.last_used_at < self._validation_interval_seconds:
+            return True
+        try:
+            cursor = pooled.connection.cursor()
+            cursor.execute(self._validation_query)
+            cursor.fetchall()
+            cursor.close()
+            return True
+        except Exception as e:
+            logging.warning(f"Conexión del pool inválida, se reemplazará: {e}")
+            with self._condition:
+                self._stats.reconnects += 1
+            return False
+
+    @staticmethod
+    def _close_quietly(pooled: PooledConnection):
+        pooled.statements.clear() # Los cursores se cierran con la conexión
+        try:
+            pooled.connection.close()
+        except Exception:
+            pass
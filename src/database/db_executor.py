@@ -1,28 +1,63 @@
 import pyodbc
-from typing import List, Dict
+from contextlib import closing
+from typing import Any, Callable, Dict, Iterator, List, Optional, TypeVar
 from ..core.interfaces import IDatabaseExecutor
 from ..utils.config_manager import ConfigManager # Para obtener la cadena de conexión
+from .connection_pool import ConnectionPool, PoolStats, PooledConnection
+from ..utils.sql import Query, QueryLike, as_query, join_batch
+from ..utils.tracing import record_span, span
 import logging
+import time
 
 # Configuración básica de logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+T = TypeVar("T")
+
+# SQLSTATE que indican que el enlace con el servidor se perdió y vale la pena reconectar
+CONNECTION_LOST_SQLSTATES = {"08S01", "08S02", "08003", "08007", "HYT01"}
+
 class PyODBCExecutor(IDatabaseExecutor):
     """
     Implementación de IDatabaseExecutor usando pyodbc para conectar a SQL Server.
     Obtiene la cadena de conexión de forma segura a través de ConfigManager.
+    Reutiliza las conexiones mediante un pool acotado para evitar un login por query.
+
+    Los queries con parámetros ('?', ver Query) se ejecutan con un cursor por texto de query
+    guardado en cada conexión (hasta `statement_cache_size`): pyodbc reutiliza la sentencia
+    preparada si el cursor vuelve a ejecutar el mismo texto, y SQL Server reutiliza su plan.
+
+    `section` indica la sección de config.ini con la cadena de conexión: [Database] o, con
+    varias bases de datos, una [Instance.<nombre>]. Los valores del pool que la sección no
+    define se toman de [Database].
     """
-    def __init__(self):
-        self.connection_string = ConfigManager().get_setting("Database", "database_connection_string")
-        logging.info("Cadena de conexión de base de datos cargada.")
+    def __init__(self, section: str = "Database"):
+        config_manager = ConfigManager()
+        self.connection_string = config_manager.get_setting(section, "database_connection_string")
+        logging.info(f"Cadena de conexión de base de datos cargada ([{section}]).")
         #logging.info(f"Cadena de conexión de base de datos cargada: {self.connection_string}") # Descomentar solo para pruebas
 
+        def pool_setting(get, key, default):
+            return get(section, key, get("Database", key, default))
+
+        self._pool = ConnectionPool(
+            self._get_connection,
+            max_size=pool_setting(config_manager.get_int, "pool_size", 4),
+            max_lifetime_seconds=pool_setting(config_manager.get_float, "pool_max_lifetime_seconds", 1800),
+            idle_timeout_seconds=pool_setting(config_manager.get_float, "pool_idle_timeout_seconds", 300),
+            validation_interval_seconds=pool_setting(config_manager.get_float, "pool_validation_interval_seconds", 30),
+            acquire_timeout_seconds=pool_setting(config_manager.get_float, "pool_acquire_timeout_seconds", 30)
+        )
+        self._fetch_chunk_size = pool_setting(config_manager.get_int, "fetch_chunk_size", 500)
+        self._statement_cache_size = pool_setting(config_manager.get_int, "statement_cache_size", 16)
+
     def _get_connection(self):
         """
         Establece y retorna una nueva conexión a la base de datos.
         """
         try:
-            conn = pyodbc.connect(self.connection_string)
+            with span("db.connect"):
+                conn = pyodbc.connect(self.connection_string)
             logging.debug("Conexión a la base de datos establecida.")
             return conn
         except pyodbc.Error as ex:
@@ -31,37 +66,236 @@ class PyODBCExecutor(IDatabaseExecutor):
             logging.error(f"Error al conectar a la base de datos (SQLSTATE: {sqlstate}): {ex}")
             raise ConnectionError(f"No se pudo conectar a la base de datos: {ex}") from ex
 
-    def execute_query(self, query: str) -> List[Dict]:
+    @staticmethod
+    def _is_connection_lost(ex: pyodbc.Error) -> bool:
+        return bool(ex.args) and ex.args[0] in CONNECTION_LOST_SQLSTATES
+
+    def pool_stats(self) -> PoolStats:
+        """Retorna los contadores del pool (hits, misses, waits, reconnects, recycled)."""
+        return self._pool.stats()
+
+    def close(self):
+        """Cierra las conexiones del pool."""
+        self._pool.close()
+        logging.info(f"Pool de conexiones cerrado. Estadísticas: {self.pool_stats().as_dict()}")
+
+    def _cursor(self, pooled: PooledConnection, query: Query):
         """
-        Ejecuta un query SQL SELECT y devuelve los resultados como una lista de diccionarios.
-        Cada diccionario representa una fila y mapea nombres de columna a valores.
+        Retorna un cursor para el query: el que ya lo preparó en esta conexión, si lo hay.
+        Los queries sin parámetros no se preparan y usan un cursor nuevo.
         """
-        results: List[Dict] = []
-        conn = None # Inicializa conn para asegurar que esté definida
-        try:
-            conn = self._get_connection()
-            cursor = conn.cursor()
-            cursor.execute(query)
+        if not query.params or not self._statement_cache_size:
+            return pooled.connection.cursor()
+        cursor = pooled.statements.pop(query.sql, None)
+        self._pool.record_statement(hit=cursor is not None)
+        return cursor if cursor is not None else pooled.connection.cursor()
 
+    def _release_cursor(self, pooled: PooledConnection, query: Query, cursor, reusable: bool):
+        """
+        Guarda el cursor para el siguiente uso del mismo query en la conexión, o lo cierra.
+        Solo se guarda si su resultado se leyó completo (no deja la conexión ocupada).
+        """
+        if reusable and query.params and self._statement_cache_size:
+            pooled.statements[query.sql] = cursor
+            while len(pooled.statements) > self._statement_cache_size:
+                _, cursor = pooled.statements.popitem(last=False)
+                cursor.close()
+            return
+        cursor.close()
+
+    @staticmethod
+    def _execute(cursor, query: Query):
+        if query.params:
+            cursor.execute(query.sql, query.params)
+        else:
+            cursor.execute(query.sql)
+
+    def _fetch_all(self, pooled: PooledConnection, query: Query) -> List[Dict]:
+        cursor = self._cursor(pooled, query)
+        reusable = False
+        try:
+            with span("db.execute"):
+                self._execute(cursor, query)
             columns = [column[0] for column in cursor.description] # Obtiene los nombres de las columnas
-            logging.debug(f"Query ejecutado: {query[:100]}...") # Loguea solo el inicio del query
+            logging.debug(f"Query ejecutado: {query.sql[:100]}...") # Loguea solo el inicio del query
+            with span("db.fetch") as fetch_span:
+                rows = cursor.fetchall()
+                fetch_span.set(rows=len(rows))
+            reusable = True
+            with span("db.map_rows", rows=len(rows)):
+                return [dict(zip(columns, row)) for row in rows]
+        finally:
+            self._release_cursor(pooled, query, cursor, reusable)
 
-            for row in cursor.fetchall():
-                results.append(dict(zip(columns, row)))
-            logging.debug(f"Query ejecutado exitosamente. Se encontraron {len(results)} filas.")
+    def _fetch_result_sets(self, pooled: PooledConnection, batch: Query) -> List[List[Dict]]:
+        cursor = self._cursor(pooled, batch)
+        reusable = False
+        try:
+            with span("db.execute", batch=True):
+                self._execute(cursor, batch)
+            logging.debug(f"Lote ejecutado: {batch.sql[:100]}...")
+            result_sets: List[List[Dict]] = []
+            fetch_seconds = map_seconds = 0.0
+            while True:
+                # Los conjuntos sin columnas (ej. conteos de filas) no corresponden a ningún SELECT
+                if cursor.description is not None:
+                    columns = [column[0] for column in cursor.description]
+                    started = time.perf_counter()
+                    rows = cursor.fetchall()
+                    fetched = time.perf_counter()
+                    result_sets.append([dict(zip(columns, row)) for row in rows])
+                    fetch_seconds += fetched - started
+                    map_seconds += time.perf_counter() - fetched
+                started = time.perf_counter()
+                more = cursor.nextset()
+                fetch_seconds += time.perf_counter() - started
+                if not more:
+                    break
+            rows_total = sum(len(rs) for rs in result_sets)
+            record_span("db.fetch", fetch_seconds, rows=rows_total, result_sets=len(result_sets))
+            record_span("db.map_rows", map_seconds, rows=rows_total)
+            reusable = True
+            return result_sets
+        finally:
+            self._release_cursor(pooled, batch, cursor, reusable)
+
+    def _run(self, query: Query, work: Callable[[PooledConnection], T]) -> T:
+        """
+        Ejecuta `work(conexion_del_pool)` con una conexión del pool.
+        Si el enlace con el servidor se perdió, reconecta y reintenta una vez.
+        """
+        pooled = self._pool.acquire()
+        discard = False
+        try:
+            try:
+                return work(pooled)
+            except pyodbc.Error as ex:
+                if not self._is_connection_lost(ex):
+                    raise
+                logging.warning(f"Conexión perdida (SQLSTATE: {ex.args[0]}). Reconectando y reintentando el query...")
+                stale, pooled = pooled, None
+                pooled = self._pool.replace(stale)
+                return work(pooled)
         except pyodbc.Error as ex:
+            discard = True
             sqlstate = ex.args[0]
-            logging.error(f"Error al ejecutar query (SQLSTATE: {sqlstate}): {ex} - Query: {query}")
+            logging.error(f"Error al ejecutar query (SQLSTATE: {sqlstate}): {ex} - Query: {query.sql} - Parámetros: {query.params}")
             raise RuntimeError(f"Error al ejecutar el query: {ex}") from ex
         except Exception as e:
-            logging.error(f"Error inesperado al ejecutar query: {e} - Query: {query}")
+            discard = True
+            logging.error(f"Error inesperado al ejecutar query: {e} - Query: {query.sql} - Parámetros: {query.params}")
             raise e
         finally:
-            if conn:
-                conn.close()
-                logging.debug("Conexión a la base de datos cerrada.")
+            if pooled is not None:
+                self._pool.release(pooled, discard=discard)
+
+    def execute_query(self, query: QueryLike) -> List[Dict]:
+        """
+        Ejecuta un query SQL SELECT y devuelve los resultados como una lista de diccionarios.
+        Cada diccionario representa una fila y mapea nombres de columna a valores.
+        """
+        query = as_query(query)
+        results = self._run(query, lambda pooled: self._fetch_all(pooled, query))
+        logging.debug(f"Query ejecutado exitosamente. Se encontraron {len(results)} filas.")
         return results
 
+    def iter_query(self, query: QueryLike, chunk_size: Optional[int] = None) -> Iterator[Dict]:
+        """
+        Ejecuta un query SQL SELECT y produce las filas como diccionarios de forma perezosa,
+        leyendo del servidor en bloques de `chunk_size` filas (cursor.fetchmany).
+        """
+        columns = None
+        with closing(self.iter_rows(query, chunk_size)) as rows:
+            for row in rows:
+                if columns is None:
+                    columns = [column[0] for column in row.cursor_description]
+                yield dict(zip(columns, row))
+
+    @property
+    def fetch_chunk_size(self) -> int:
+        return self._fetch_chunk_size
+
+    def iter_rows(self, query: QueryLike, chunk_size: Optional[int] = None) -> Iterator[Any]:
+        """
+        Ejecuta un query SQL SELECT y produce los objetos pyodbc.Row tal cual, sin convertirlos
+        a diccionarios (cada Row expone `cursor_description` para resolver las columnas).
+        Lee del servidor en bloques de `chunk_size` filas (cursor.fetchmany).
+        La conexión se devuelve al pool cuando el generador se agota o se cierra.
+        Solo se reconecta si el enlace se pierde antes de producir la primera fila.
+        """
+        query = as_query(query)
+        chunk_size = chunk_size or self._fetch_chunk_size
+        pooled = self._pool.acquire()
+        cursor = None
+        discard = False
+        exhausted = False # Solo un cursor leído hasta el final puede reutilizarse
+        try:
+            with span("db.execute", streaming=True):
+                try:
+                    cursor = self._cursor(pooled, query)
+                    self._execute(cursor, query)
+                except pyodbc.Error as ex:
+                    if not self._is_connection_lost(ex):
+                        raise
+                    logging.warning(f"Conexión perdida (SQLSTATE: {ex.args[0]}). Reconectando y reintentando el query...")
+                    stale, pooled, cursor = pooled, None, None
+                    pooled = self._pool.replace(stale)
+                    cursor = self._cursor(pooled, query)
+                    self._execute(cursor, query)
+
+            logging.debug(f"Query ejecutado (streaming, bloques de {chunk_size}): {query.sql[:100]}...")
+            row_count = 0
+            # Las filas se leen al ritmo del consumidor: solo se acumula el tiempo dentro de
+            # fetchmany, de modo que el procesamiento en Python queda fuera de db.fetch
+            fetch_seconds = 0.0
+            chunks = 0
+            try:
+                while True:
+                    started = time.perf_counter()
+                    rows = cursor.fetchmany(chunk_size)
+                    fetch_seconds += time.perf_counter() - started
+                    if not rows:
+                        exhausted = True
+                        break
+                    chunks += 1
+                    row_count += len(rows)
+                    yield from rows
+            finally:
+                record_span("db.fetch", fetch_seconds, rows=row_count, chunks=chunks, streaming=True)
+            logging.debug(f"Query ejecutado exitosamente. Se leyeron {row_count} filas.")
+        except pyodbc.Error as ex:
+            discard = True
+            sqlstate = ex.args[0]
+            logging.error(f"Error al ejecutar query (SQLSTATE: {sqlstate}): {ex} - Query: {query.sql} - Parámetros: {query.params}")
+            raise RuntimeError(f"Error al ejecutar el query: {ex}") from ex
+        except Exception as e:
+            discard = True
+            logging.error(f"Error inesperado al ejecutar query: {e} - Query: {query.sql} - Parámetros: {query.params}")
+            raise e
+        finally:
+            if cursor is not None:
+                try:
+                    self._release_cursor(pooled, query, cursor, exhausted and not discard)
+                except pyodbc.Error:
+                    discard = True
+            if pooled is not None:
+                self._pool.release(pooled, discard=discard)
+
+    def execute_batch(self, queries: List[QueryLike]) -> List[List[Dict]]:
+        """
+        Ejecuta varios SELECT en un único lote (un solo viaje de red) y recorre
+        los conjuntos de resultados con cursor.nextset().
+        Retorna un conjunto de resultados por query, en el mismo orden.
+        """
+        batch = join_batch(queries)
+        result_sets = self._run(batch, lambda pooled: self._fetch_result_sets(pooled, batch))
+        if len(result_sets) != len(queries):
+            raise RuntimeError(
+                f"El lote devolvió {len(result_sets)} conjuntos de resultados, se esperaban {len(queries)}."
+            )
+        logging.debug(f"Lote ejecutado exitosamente. Filas por conjunto: {[len(rs) for rs in result_sets]}.")
+        return result_sets
+
 # Ejemplo de uso (para pruebas, puedes eliminarlo después)
 if __name__ == "__main__":
     # NOTA: Para que este ejemplo funcione, necesitas:
@@ -86,6 +320,10 @@ if __name__ == "__main__":
         else:
             print("No se encontraron resultados para el query de prueba.")
 
+        # Segunda ejecución: debería reutilizar la conexión (hits=1)
+        executor.execute_query(test_query)
+        print(f"Estadísticas del pool: {executor.pool_stats().as_dict()}")
+
         # Prueba con un query inválido para ver el manejo de errores
         # print("\n--- Probando manejo de errores con query inválido ---")
         # executor.execute_query("SELECT * FROM NonExistentTable")
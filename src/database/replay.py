@@ -0,0 +1,311 @@
+import base64
+import gzip
+import hashlib
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, Deque, Dict, Iterator, List, Optional, Sequence, Tuple
+from ..core.interfaces import IDatabaseExecutor
+from ..utils import tracing
+from ..utils.sql import Query, QueryLike, as_query
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Formato de captura: gzip de líneas JSON.
+#   {"type": "header", "version": 1, "started_at": ...}
+#   {"type": "query", "id": ..., "sql": ..., "params": [...]}   (cada texto y parámetros se guardan una sola vez;
+#                                                                 "params" se omite si el query no tiene)
+#   {"type": "result", "query_id": ..., "kind": "query"|"batch", "cycle_id": ..., "t": ..., "elapsed": ...,
+#    "result_sets": [{"columns": [...], "rows": [[...], ...]}, ...], "complete": true}
+# `t` es el inicio del query en segundos desde el comienzo de la grabación y `elapsed`
+# su latencia (hasta la primera fila en streaming). Los tipos que JSON no soporta
+# (fechas, Decimal, bytes) se codifican como {"$dt": ...}, {"$dec": ...}, etc.
+CAPTURE_FORMAT_VERSION = 1
+
+def _encode_value(value: Any):
+    if isinstance(value, datetime):
+        return {"$dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"$d": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"$dec": str(value)}
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return {"$b": base64.b64encode(bytes(value)).decode("ascii")}
+    if isinstance(value, timedelta):
+        return {"$td": value.total_seconds()}
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    raise TypeError(f"Tipo no soportado en la captura: {type(value).__name__}")
+
+_DECODERS = {
+    "$dt": datetime.fromisoformat,
+    "$d": date.fromisoformat,
+    "$dec": Decimal,
+    "$b": base64.b64decode,
+    "$td": lambda seconds: timedelta(seconds=seconds),
+}
+
+def _decode_object(obj: dict):
+    if len(obj) == 1:
+        key, value = next(iter(obj.items()))
+        decoder = _DECODERS.get(key)
+        if decoder is not None:
+            return decoder(value)
+    return obj
+
+def _encode_params(params: Sequence[Any]) -> str:
+    return json.dumps(list(params), ensure_ascii=False, separators=(",", ":"), default=_encode_value)
+
+def query_id(query: QueryLike) -> str:
+    """
+    Identificador estable de un query: su texto (ignora espacios al inicio y al final) y sus
+    parámetros. Sin parámetros coincide con el de las capturas grabadas antes de existir estos.
+    """
+    query = as_query(query)
+    key = query.sql.strip()
+    if query.params:
+        key += "\0" + _encode_params(query.params)
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+def _batch_query(queries: List[QueryLike]) -> Query:
+    """Clave de un lote en la captura: los textos unidos con ';' y los parámetros en orden."""
+    queries = [as_query(query) for query in queries]
+    return Query(";\n".join(query.sql for query in queries),
+                 tuple(param for query in queries for param in query.params))
+
+def _row_columns(row: Any) -> List[str]:
+    if isinstance(row, dict):
+        return list(row.keys())
+    description = getattr(row, "cursor_description", None)
+    if description is None:
+        raise TypeError(f"No se pueden resolver las columnas de una fila de tipo '{type(row).__name__}'.")
+    return [column[0] for column in description]
+
+def _result_set(rows: Sequence[Any]) -> dict:
+    if not rows:
+        return {"columns": [], "rows": []}
+    columns = _row_columns(rows[0])
+    if isinstance(rows[0], dict):
+        return {"columns": columns, "rows": [[row.get(column) for column in columns] for row in rows]}
+    return {"columns": columns, "rows": [list(row) for row in rows]}
+
+class RecordingExecutor(IDatabaseExecutor):
+    """
+    Decorador de IDatabaseExecutor que graba el resultado de cada query (con su momento,
+    latencia y el ciclo de monitoreo en que ocurrió) en un archivo de captura comprimido,
+    sin alterar lo que recibe el monitor. La captura se reproduce con ReplayExecutor.
+
+    Cada resultado se escribe (y se vacía a disco) al terminar de leerse, así que la captura
+    sirve aunque el proceso se detenga a mitad de la ejecución. En streaming, las filas de
+    un query se acumulan en memoria hasta que termina.
+    """
+    def __init__(self, inner: IDatabaseExecutor, path: str):
+        self._inner = inner
+        self._path = path
+        self._lock = threading.Lock()
+        self._known_queries = set()
+        self._started = time.monotonic()
+        self._file = gzip.open(path, "wt", encoding="utf-8")
+        self._write({"type": "header", "version": CAPTURE_FORMAT_VERSION,
+                     "started_at": datetime.now().isoformat(timespec="seconds")})
+        self._captures = 0
+        logging.info(f"Grabando los resultados de la base de datos en '{path}'.")
+
+    def __getattr__(self, name):
+        # Delegar el resto (ej. pool_stats del executor real)
+        return getattr(self._inner, name)
+
+    @property
+    def fetch_chunk_size(self) -> int:
+        return self._inner.fetch_chunk_size
+
+    def _write(self, record: dict):
+        self._file.write(json.dumps(record, ensure_ascii=False, separators=(",", ":"), default=_encode_value))
+        self._file.write("\n")
+
+    def _record(self, query: QueryLike, kind: str, started: float, elapsed: float, result_sets: List[dict],
+                complete: bool = True):
+        query = as_query(query)
+        qid = query_id(query)
+        with self._lock:
+            if self._file is None:
+                return
+            try:
+                if qid not in self._known_queries:
+                    record = {"type": "query", "id": qid, "sql": query.sql}
+                    if query.params:
+                        record["params"] = list(query.params)
+                    self._write(record)
+                    self._known_queries.add(qid)
+                self._write({
+                    "type": "result", "query_id": qid, "kind": kind, "cycle_id": tracing.current_cycle_id(),
+                    "t": round(started - self._started, 6), "elapsed": round(elapsed, 6),
+                    "result_sets": result_sets, "complete": complete,
+                })
+                self._file.flush()
+                self._captures += 1
+            except (OSError, TypeError, ValueError) as e:
+                logging.error(f"No se pudo grabar el resultado del query en '{self._path}': {e}")
+
+    def execute_query(self, query: QueryLike) -> List[Dict]:
+        started = time.monotonic()
+        rows = self._inner.execute_query(query)
+        self._record(query, "query", started, time.monotonic() - started, [_result_set(rows)])
+        return rows
+
+    def iter_query(self, query: QueryLike, chunk_size: Optional[int] = None) -> Iterator[Dict]:
+        columns = None
+        for row in self.iter_rows(query, chunk_size):
+            if columns is None:
+                columns = _row_columns(row)
+            yield row if isinstance(row, dict) else dict(zip(columns, row))
+
+    def iter_rows(self, query: QueryLike, chunk_size: Optional[int] = None) -> Iterator[Any]:
+        started = time.monotonic()
+        first_row_at = None
+        rows: List[Any] = []
+        complete = False
+        inner = self._inner.iter_rows(query, chunk_size)
+        try:
+            for row in inner:
+                if first_row_at is None:
+                    first_row_at = time.monotonic()
+                rows.append(row)
+                yield row
+            complete = True
+        finally:
+            close = getattr(inner, "close", None)
+            if close is not None:
+                close()
+            # Un query que falló no se graba: al reproducir, su ausencia se reporta como error
+            if complete or rows:
+                latency = (first_row_at if first_row_at is not None else time.monotonic()) - started
+                self._record(query, "query", started, latency, [_result_set(rows)], complete)
+
+    def execute_batch(self, queries: List[QueryLike]) -> List[List[Dict]]:
+        started = time.monotonic()
+        result_sets = self._inner.execute_batch(queries)
+        self._record(_batch_query(queries), "batch", started, time.monotonic() - started,
+                     [_result_set(rows) for rows in result_sets])
+        return result_sets
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        logging.info(f"Captura cerrada: {self._captures} resultado(s) grabados en '{self._path}'.")
+        self._inner.close()
+
+class ReplayExhausted(RuntimeError):
+    """No quedan resultados grabados para el query solicitado."""
+
+class _Capture:
+    __slots__ = ("kind", "cycle_id", "t", "elapsed", "result_sets")
+
+    def __init__(self, record: dict):
+        self.kind = record["kind"]
+        self.cycle_id = record.get("cycle_id")
+        self.t = record["t"]
+        self.elapsed = record["elapsed"]
+        self.result_sets = [(tuple(rs["columns"]), rs["rows"]) for rs in record["result_sets"]]
+
+class ReplayExecutor(IDatabaseExecutor):
+    """
+    Executor que sirve los resultados de una captura de RecordingExecutor, sin driver ODBC
+    ni SQL Server. Cada query recibe, en orden, los resultados grabados para ese mismo texto
+    y los mismos parámetros.
+
+    `speed` controla el ritmo: 1.0 reproduce a velocidad real (respeta el momento y la
+    latencia de cada query grabado), 2.0 al doble, y 0 tan rápido como sea posible.
+    Las filas se producen como tuplas con `cursor_description`, igual que pyodbc.Row.
+    """
+    def __init__(self, path: str, speed: float = 1.0):
+        if speed < 0:
+            raise ValueError("La velocidad de reproducción no puede ser negativa.")
+        self._path = path
+        self._speed = speed
+        self._lock = threading.Lock()
+        self._queues: Dict[str, Deque[_Capture]] = {}
+        self._row_types: Dict[Tuple[str, ...], type] = {}
+        self._origin: Optional[float] = None
+        self._served = 0
+        self._total = 0
+        self._cycles = set()
+        self._load()
+
+    def _load(self):
+        with gzip.open(self._path, "rt", encoding="utf-8") as f:
+            for number, line in enumerate(f, 1):
+                record = json.loads(line, object_hook=_decode_object)
+                record_type = record.get("type")
+                if record_type == "header":
+                    if record.get("version") != CAPTURE_FORMAT_VERSION:
+                        raise ValueError(f"Versión de captura no soportada en '{self._path}': {record.get('version')}")
+                elif record_type == "result":
+                    self._queues.setdefault(record["query_id"], deque()).append(_Capture(record))
+                    self._cycles.add(record.get("cycle_id"))
+                    self._total += 1
+                elif record_type != "query":
+                    raise ValueError(f"Registro desconocido en la línea {number} de '{self._path}': {record_type!r}")
+        logging.info(f"Captura '{self._path}' cargada: {self._total} resultado(s) de {len(self._cycles)} ciclo(s).")
+
+    @property
+    def served(self) -> int:
+        """Resultados servidos hasta ahora."""
+        return self._served
+
+    def pending(self) -> int:
+        """Resultados grabados que aún no se han servido."""
+        with self._lock:
+            return self._total - self._served
+
+    def _row_type(self, columns: Tuple[str, ...]) -> type:
+        row_type = self._row_types.get(columns)
+        if row_type is None:
+            description = tuple((name, None, None, None, None, None, True) for name in columns)
+            row_type = self._row_types[columns] = type("ReplayRow", (tuple,), {"__slots__": (), "cursor_description": description})
+        return row_type
+
+    def _next(self, query: QueryLike, kind: str) -> _Capture:
+        query = as_query(query)
+        with self._lock:
+            queue = self._queues.get(query_id(query))
+            if not queue:
+                raise ReplayExhausted(f"No hay resultados grabados (o ya se sirvieron todos) para el query: "
+                                      f"{query.sql.strip()[:100]}... - Parámetros: {query.params}")
+            capture = queue.popleft()
+            if capture.kind != kind:
+                raise ReplayExhausted(f"El resultado grabado es de tipo '{capture.kind}', se pidió '{kind}'.")
+            self._served += 1
+            if self._origin is None:
+                self._origin = time.monotonic() - capture.t / self._speed if self._speed else 0.0
+        self._wait(capture)
+        return capture
+
+    def _wait(self, capture: _Capture):
+        """A velocidad real, espera el momento en que se ejecutó el query y su latencia."""
+        if not self._speed:
+            return
+        delay = self._origin + (capture.t + capture.elapsed) / self._speed - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def execute_query(self, query: QueryLike) -> List[Dict]:
+        columns, rows = self._next(query, "query").result_sets[0]
+        return [dict(zip(columns, row)) for row in rows]
+
+    def iter_rows(self, query: QueryLike, chunk_size: Optional[int] = None) -> Iterator[Any]:
+        columns, rows = self._next(query, "query").result_sets[0]
+        row_type = self._row_type(columns)
+        for row in rows:
+            yield row_type(row)
+
+    def execute_batch(self, queries: List[QueryLike]) -> List[List[Dict]]:
+        capture = self._next(_batch_query(queries), "batch")
+        return [[dict(zip(columns, row)) for row in rows] for columns, rows in capture.result_sets]
@@ -1,33 +1,70 @@
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
-@dataclass
 class Task:
     """
     Representa una tarea monitoreada, abarcando campos comunes y específicos
     de ambos tipos de queries ("Mandado a Someter" y "Proceso Activo").
     Los campos que no aplican a ambos queries se marcan como Optional.
+
+    Usa __slots__ (sin __dict__ por instancia) para que cada tarea ocupe el mínimo
+    de memoria; se construye con los mismos argumentos que la dataclass original.
     """
-    # Campos comunes o variantes similares
-    task_id: str                   # Corresponde a AgentSchedNum (Mandado) o SysTaskNum (Proceso Activo)
-    task_description: str          # Corresponde a TaskDesc (Mandado) o TaskDescription (Proceso Activo)
-    start_time: datetime           # Corresponde a SubmittedOn (Mandado) o StartedOn (Proceso Activo)
-    submit_user: str               # Corresponde a SubmitUser en ambos
-
-    # Campos específicos de "Mandado a Someter"
-    sched_desc: Optional[str] = None       # SchedDesc
-    task_type: Optional[str] = None        # TaskType (también en Proceso Activo, pero con diferente contexto)
-    run_procedure: Optional[str] = None    # RunProcedure
-    param_maint_program: Optional[str] = None # ParamMaintProgram
-
-    # Campos específicos de "Proceso Activo"
-    function_id: Optional[str] = None      # 'Function' (derivado de ParamCharacter/ParamMaintProgram)
-    duration_minutes: Optional[int] = None # Duracion (DATEDIFF)
-    last_activity_on: Optional[datetime] = None # LastActivityOn
-    progress_percent: Optional[float] = None # ProgressPercent
-    task_status: Optional[str] = None      # TaskStatus
-    activity_msg: Optional[str] = None     # ActivityMsg
+    __slots__ = (
+        # Campos comunes o variantes similares
+        "task_id",             # Corresponde a AgentSchedNum (Mandado) o SysTaskNum (Proceso Activo)
+        "task_description",    # Corresponde a TaskDesc (Mandado) o TaskDescription (Proceso Activo)
+        "start_time",          # Corresponde a SubmittedOn (Mandado) o StartedOn (Proceso Activo)
+        "submit_user",         # Corresponde a SubmitUser en ambos
+        # Campos específicos de "Mandado a Someter"
+        "sched_desc",          # SchedDesc
+        "task_type",           # TaskType (también en Proceso Activo, pero con diferente contexto)
+        "run_procedure",       # RunProcedure
+        "param_maint_program", # ParamMaintProgram
+        # Campos específicos de "Proceso Activo"
+        "function_id",         # 'Function' (derivado de ParamCharacter/ParamMaintProgram)
+        "duration_minutes",    # Duracion (DATEDIFF)
+        "last_activity_on",    # LastActivityOn
+        "progress_percent",    # ProgressPercent
+        "task_status",         # TaskStatus
+        "activity_msg",        # ActivityMsg
+    )
+
+    def __init__(self, task_id: str, task_description: str, start_time: datetime, submit_user: str,
+                 sched_desc: Optional[str] = None, task_type: Optional[str] = None,
+                 run_procedure: Optional[str] = None, param_maint_program: Optional[str] = None,
+                 function_id: Optional[str] = None, duration_minutes: Optional[int] = None,
+                 last_activity_on: Optional[datetime] = None, progress_percent: Optional[float] = None,
+                 task_status: Optional[str] = None, activity_msg: Optional[str] = None):
+        self.task_id = task_id
+        self.task_description = task_description
+        self.start_time = start_time
+        self.submit_user = submit_user
+        self.sched_desc = sched_desc
+        self.task_type = task_type
+        self.run_procedure = run_procedure
+        self.param_maint_program = param_maint_program
+        self.function_id = function_id
+        self.duration_minutes = duration_minutes
+        self.last_activity_on = last_activity_on
+        self.progress_percent = progress_percent
+        self.task_status = task_status
+        self.activity_msg = activity_msg
+
+    def _astuple(self) -> tuple:
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self._astuple() == other._astuple()
+
+    __hash__ = None  # Mutable, igual que la dataclass original
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{self.__class__.__name__}({fields})"
 
     def __str__(self):
         # Una representación amigable para logs o notificaciones
@@ -48,4 +85,6 @@ class TaskStatistics:
     category_name: str
     total_tasks: int
     over_limit: bool # Indica si el total_tasks excede el límite configurado (ej. 100)
-    longest_running_task: Optional[Task] = None # La tarea con mayor tiempo de ejecución en esta categoría
\ No newline at end of file
+    longest_running_task: Optional[Task] = None # La tarea con mayor tiempo de ejecución en esta categoría
+    tasks: Optional[List[Task]] = None # Detalle de todas las tareas; solo se llena si algún observador lo requiere
+    instance_name: Optional[str] = None # Base de datos de origen con varias instancias ([Instance.<nombre>])
\ No newline at end of file
@@ -0,0 +1,114 @@
+import logging
+import threading
+import time
+from typing import List
+from ..core.interfaces import ITaskObserver
+from ..core.history_store import CategorySample, HistoryStore, TaskSample
+from ..models import Task, TaskStatistics
+from ..utils.config_manager import ConfigManager
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+class HistoryRecorder(ITaskObserver):
+    """
+    Implementación de ITaskObserver que registra las estadísticas de cada ciclo en un
+    HistoryStore (total por categoría y, opcionalmente, la duración de cada tarea activa).
+
+    Las muestras se acumulan en memoria y se escriben por lotes cada `flush_interval_seconds`
+    o al reunir `batch_size` muestras; `close()` escribe lo pendiente. Si la escritura falla,
+    el lote vuelve a la cola y se reintenta en el siguiente flush; mientras tanto se conservan
+    como máximo `max_pending_samples` muestras de cada tipo (se descartan las más antiguas).
+    La compactación por retención se ejecuta como máximo una vez por `compact_interval_seconds`.
+    """
+    def __init__(self, store: HistoryStore):
+        config_manager = ConfigManager()
+        self._store = store
+        self._record_tasks = config_manager.get_bool("History", "record_tasks", True)
+        self._batch_size = config_manager.get_int("History", "batch_size", 500)
+        self._flush_interval_seconds = config_manager.get_float("History", "flush_interval_seconds", 60)
+        self._compact_interval_seconds = config_manager.get_float("History", "compact_interval_seconds", 3600)
+        self._max_pending_samples = max(self._batch_size,
+                                        config_manager.get_int("History", "max_pending_samples", 50000))
+        self._category_samples: List[CategorySample] = []
+        self._task_samples: List[TaskSample] = []
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._last_compact = None
+        logging.info("History Recorder inicializado.")
+
+    @property
+    def requires_task_detail(self) -> bool:
+        # Las duraciones por tarea necesitan el recorrido completo (desactiva el modo resumen)
+        return self._record_tasks
+
+    @property
+    def receives_every_cycle(self) -> bool:
+        return True
+
+    def update(self, statistics: TaskStatistics):
+        """Acumula las muestras del ciclo y escribe el lote si corresponde."""
+        ts = int(time.time())
+        longest = statistics.longest_running_task
+        with self._lock:
+            self._category_samples.append(CategorySample(
+                ts, statistics.category_name, statistics.total_tasks, statistics.over_limit,
+                longest.duration_minutes if longest is not None else None
+            ))
+            if self._record_tasks and statistics.tasks:
+                self._task_samples.extend(
+                    TaskSample(ts, statistics.category_name, task.task_id, task.function_id or "", task.duration_minutes)
+                    for task in statistics.tasks if task.duration_minutes is not None
+                )
+            pending = len(self._category_samples) + len(self._task_samples)
+            due = time.monotonic() - self._last_flush >= self._flush_interval_seconds
+        if pending >= self._batch_size or due:
+            self.flush()
+
+    def notify_long_running_task(self, task: Task, category: str):
+        # Las duraciones ya se registran en cada ciclo con update()
+        pass
+
+    def flush(self):
+        """Escribe las muestras pendientes en un único lote y compacta si corresponde."""
+        with self._lock:
+            category_samples, self._category_samples = self._category_samples, []
+            task_samples, self._task_samples = self._task_samples, []
+            self._last_flush = time.monotonic()
+        try:
+            self._store.write(category_samples, task_samples)
+        except Exception as e:
+            dropped = self._requeue(category_samples, task_samples)
+            logging.error(f"Error al escribir {len(category_samples) + len(task_samples)} muestra(s) en el histórico; "
+                          f"se reintentará en el siguiente lote: {e}")
+            if dropped:
+                logging.warning(f"Histórico sin escribir por encima de {self._max_pending_samples} muestras: "
+                                f"se descartaron las {dropped} más antiguas.")
+            return
+        now = time.monotonic()
+        if self._last_compact is None or now - self._last_compact >= self._compact_interval_seconds:
+            self._last_compact = now
+            try:
+                self._store.compact()
+            except Exception as e:
+                logging.error(f"Error al compactar el histórico: {e}")
+
+    def _requeue(self, category_samples: List[CategorySample], task_samples: List[TaskSample]) -> int:
+        """
+        Devuelve un lote no escrito al inicio de las listas pendientes (antes de las muestras
+        que llegaron durante la escritura) y las recorta a `max_pending_samples`.
+        Retorna cuántas muestras se descartaron.
+        """
+        dropped = 0
+        with self._lock:
+            self._category_samples[:0] = category_samples
+            self._task_samples[:0] = task_samples
+            for samples in (self._category_samples, self._task_samples):
+                excess = len(samples) - self._max_pending_samples
+                if excess > 0:
+                    del samples[:excess]
+                    dropped += excess
+        return dropped
+
+    def close(self):
+        self.flush()
+        self._store.close()
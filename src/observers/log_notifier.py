@@ -0,0 +1,30 @@
+import logging
+from ..core.interfaces import ITaskObserver
+from ..models import Task, TaskStatistics
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+class LogNotifier(ITaskObserver):
+    """
+    Implementación de ITaskObserver que solo registra las notificaciones en el log.
+    Se usa al reproducir una captura (--replay) para probar la lógica de alertas sin
+    enviar mensajes a Slack.
+    """
+    def update(self, statistics: TaskStatistics):
+        level = logging.WARNING if statistics.over_limit else logging.INFO
+        longest = statistics.longest_running_task
+        longest_text = f" Tarea destacada: {longest.task_description} ({longest.task_id})." if longest is not None else ""
+        logging.log(level, f"[Notificación] '{statistics.category_name}': {statistics.total_tasks} tarea(s)"
+                           f"{' (límite excedido)' if statistics.over_limit else ''}.{longest_text}")
+
+    def notify_long_running_task(self, task: Task, category: str):
+        logging.warning(f"[Notificación] Tarea de larga duración en '{category}': {task.task_description} "
+                        f"({task.task_id}), {task.duration_minutes} min.")
+
+    def notify_task_anomaly(self, task: Task, category: str, description: str):
+        logging.warning(f"[Notificación] Duración atípica en '{category}': {task.task_description} "
+                        f"({task.task_id}). {description}")
+
+    def notify_stalled_task(self, task: Task, category: str, description: str):
+        logging.warning(f"[Notificación] Tarea estancada en '{category}': {task.task_description} "
+                        f"({task.task_id}). {description}")
@@ -0,0 +1,114 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import NamedTuple, Optional
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+class OutboxMessage(NamedTuple):
+    """Mensaje pendiente de entrega, tal como se guardó en el outbox."""
+    message_id: int
+    payload: dict
+    description: str
+    attempts: int
+    created_at: float
+
+class SQLiteOutbox:
+    """
+    Bandeja de salida persistente (SQLite) para las notificaciones.
+
+    Cada mensaje se guarda en disco antes de intentar enviarlo y solo se borra cuando
+    el destino confirma la entrega, de modo que los mensajes pendientes sobreviven a
+    un reinicio o a una caída del proceso y se reenvían en la siguiente ejecución.
+
+    `claim()` reserva el siguiente mensaje vencido durante `lease_seconds`: si el
+    proceso muere a mitad del envío, la reserva expira y el mensaje vuelve a quedar
+    disponible (entrega "al menos una vez").
+    """
+    def __init__(self, path: str, lease_seconds: float = 60):
+        self._path = path
+        self._lease_seconds = lease_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS outbox ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " payload TEXT NOT NULL,"
+            " description TEXT NOT NULL,"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " next_attempt_at REAL NOT NULL,"
+            " created_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_outbox_next_attempt ON outbox (next_attempt_at, id)")
+
+    def enqueue(self, payload: dict, description: str) -> int:
+        """Guarda un mensaje para su entrega inmediata. Retorna su id."""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO outbox (payload, description, next_attempt_at, created_at) VALUES (?, ?, ?, ?)",
+                (json.dumps(payload), description, now, now)
+            )
+            return cursor.lastrowid
+
+    def claim(self) -> Optional[OutboxMessage]:
+        """
+        Reserva y retorna el mensaje vencido más antiguo, o None si no hay ninguno.
+        Los mensajes se entregan en orden de llegada entre los que ya vencieron.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT id, payload, description, attempts, created_at FROM outbox"
+                    " WHERE next_attempt_at <= ? ORDER BY id LIMIT 1", (now,)
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE outbox SET next_attempt_at = ? WHERE id = ?", (now + self._lease_seconds, row[0])
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        return OutboxMessage(row[0], json.loads(row[1]), row[2], row[3], row[4])
+
+    def complete(self, message_id: int):
+        """Borra un mensaje entregado (o descartado definitivamente)."""
+        with self._lock:
+            self._conn.execute("DELETE FROM outbox WHERE id = ?", (message_id,))
+
+    def reschedule(self, message_id: int, delay_seconds: float):
+        """Registra un intento fallido y programa el siguiente dentro de `delay_seconds`."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE outbox SET attempts = attempts + 1, next_attempt_at = ? WHERE id = ?",
+                (time.time() + delay_seconds, message_id)
+            )
+
+    def release(self, message_id: int):
+        """Libera la reserva de un mensaje sin contarla como intento (ej. al cerrar)."""
+        with self._lock:
+            self._conn.execute("UPDATE outbox SET next_attempt_at = ? WHERE id = ?", (time.time(), message_id))
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+    def seconds_until_next(self) -> Optional[float]:
+        """Segundos hasta que venza el próximo mensaje (0 si ya hay uno vencido), o None si está vacío."""
+        with self._lock:
+            row = self._conn.execute("SELECT MIN(next_attempt_at) FROM outbox").fetchone()
+        if row[0] is None:
+            return None
+        return max(0.0, row[0] - time.time())
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
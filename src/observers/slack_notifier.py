@@ -1,32 +1,243 @@
-import requests
 import json
 import logging
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
 from typing import Optional
 from ..core.interfaces import ITaskObserver
+from ..core.metrics import MonitorMetrics
 from ..models import Task, TaskStatistics
 from ..utils.config_manager import ConfigManager # Para obtener la URL del webhook
+from ..utils.rate_limiter import TokenBucket
+from ..utils.tracing import span
+from .outbox import OutboxMessage, SQLiteOutbox
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+METRICS_CHANNEL = "slack" # Etiqueta `channel` de las métricas de entrega
+
 class SlackNotifier(ITaskObserver):
     """
     Implementación de ITaskObserver que envía notificaciones a un canal de Slack
     usando un webhook.
+
+    El envío no bloquea el ciclo de monitoreo: cada mensaje se guarda primero en un outbox
+    persistente (SQLite) y un hilo en segundo plano lo entrega usando una sesión HTTP
+    persistente (keep-alive) con timeouts explícitos. La entrega respeta un límite de tasa
+    (token bucket), el encabezado Retry-After de Slack y reintenta los errores 429/5xx y de
+    red con backoff exponencial y jitter. Los mensajes que no se alcanzaron a entregar
+    (cierre o caída del proceso) se reenvían en la siguiente ejecución.
+
+    Con métricas habilitadas (ver `attach_metrics`) registra la latencia y el resultado de
+    cada intento de entrega, los reintentos, los descartes y los mensajes en el outbox.
     """
     def __init__(self):
-        self.webhook_url = ConfigManager().get_setting("Slack", "webhook_url")
+        config_manager = ConfigManager()
+        self.webhook_url = config_manager.get_setting("Slack", "webhook_url")
         if not self.webhook_url:
             logging.warning("URL de webhook de Slack no configurada. Las notificaciones a Slack no funcionarán.")
+        self._timeout = (
+            config_manager.get_float("Slack", "connect_timeout_seconds", 3.05),
+            config_manager.get_float("Slack", "read_timeout_seconds", 10)
+        )
+        self._shutdown_timeout_seconds = config_manager.get_float("Slack", "shutdown_timeout_seconds", 15)
+        self._max_pending = config_manager.get_int("Slack", "outbox_max_messages", 1000)
+        self._retry_base_seconds = config_manager.get_float("Slack", "retry_base_seconds", 2)
+        self._retry_max_seconds = config_manager.get_float("Slack", "retry_max_seconds", 300)
+        self._max_attempts = config_manager.get_int("Slack", "max_delivery_attempts", 0)
+        self._rate_limiter = TokenBucket(
+            config_manager.get_float("Slack", "rate_limit_per_second", 1),
+            config_manager.get_float("Slack", "rate_limit_burst", 3)
+        )
+        try:
+            outbox_path = config_manager.get_setting("Slack", "outbox_path")
+        except KeyError:
+            outbox_path = "slack_outbox.db"
+        self._outbox = SQLiteOutbox(outbox_path, lease_seconds=sum(self._timeout) + 30)
+        self._session = None # Se crea con el primer envío: un ciclo sin mensajes no importa requests
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+        self._wakeup = threading.Event()   # Hay mensajes nuevos en el outbox
+        self._stopping = threading.Event() # close() pidió detener el hilo
+        self._progress = threading.Condition() # Se notifica tras cada intento de entrega
+        self._metrics: Optional[MonitorMetrics] = None
         logging.info("Slack Notifier inicializado.")
 
-    def _send_slack_message(self, message: str, title: Optional[str] = None):
-        """
-        Método interno para enviar un mensaje JSON al webhook de Slack.
-        """
+        pending = self._outbox.pending_count()
+        if pending and self.webhook_url:
+            logging.info(f"Reenviando {pending} mensaje(s) de Slack pendientes de una ejecución anterior.")
+            self._ensure_worker()
+
+    def attach_metrics(self, metrics: MonitorMetrics):
+        if self._metrics is metrics:
+            return # Ya registrado por otro monitor (varias instancias)
+        self._metrics = metrics
+        metrics.watch_outbox(METRICS_CHANNEL, self._outbox.pending_count)
+
+    def _record_attempt(self, started: float, outcome: str):
+        if self._metrics is not None:
+            self._metrics.observe_delivery(METRICS_CHANNEL, time.perf_counter() - started, outcome)
+
+    def _record_dropped(self):
+        if self._metrics is not None:
+            self._metrics.delivery_dropped(METRICS_CHANNEL)
+
+    def _ensure_worker(self):
+        # El hilo se inicia con el primer mensaje para no crearlo si nunca se notifica nada
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run_worker, name="slack-notifier", daemon=True)
+                self._worker.start()
+
+    def _run_worker(self):
+        """Hilo en segundo plano: entrega los mensajes vencidos del outbox de uno en uno."""
+        while not self._stopping.is_set():
+            try:
+                self._wakeup.clear()
+                message = self._outbox.claim()
+                if message is None:
+                    # Nada vencido: esperar un mensaje nuevo o el próximo reintento programado
+                    delay = self._outbox.seconds_until_next()
+                    self._wakeup.wait(self._retry_max_seconds if delay is None else delay)
+                    continue
+                if not self._rate_limiter.acquire(stop_event=self._stopping):
+                    self._outbox.release(message.message_id)
+                    return
+                self._deliver(message)
+            except Exception as e:
+                logging.error(f"Error inesperado en el hilo de envío a Slack: {e}")
+                self._stopping.wait(1)
+            finally:
+                with self._progress:
+                    self._progress.notify_all()
+
+    def _backoff_seconds(self, attempts: int) -> float:
+        """Backoff exponencial con jitter: entre la mitad y el total de base * 2^(intentos - 1)."""
+        delay = min(self._retry_max_seconds, self._retry_base_seconds * (2 ** min(attempts - 1, 30)))
+        return random.uniform(delay / 2, delay)
+
+    @staticmethod
+    def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+        """Interpreta Retry-After, en segundos o como fecha HTTP. Retorna None si no es válido."""
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+
+    def _retry_later(self, message: OutboxMessage, reason: str, retry_after: Optional[float] = None):
+        attempts = message.attempts + 1
+        if self._max_attempts and attempts >= self._max_attempts:
+            logging.error(f"Se descarta {message.description.lower()} para Slack tras {attempts} intentos: {reason}")
+            self._outbox.complete(message.message_id)
+            self._record_dropped()
+            return
+        delay = retry_after if retry_after is not None else self._backoff_seconds(attempts)
+        logging.warning(f"Error al enviar {message.description.lower()} a Slack ({reason}). "
+                        f"Reintento {attempts} en {delay:.1f}s.")
+        self._outbox.reschedule(message.message_id, delay)
+        if self._metrics is not None:
+            self._metrics.delivery_retried(METRICS_CHANNEL)
+
+    def _get_session(self):
+        """Sesión HTTP persistente (keep-alive); solo la usa el hilo de entrega."""
+        if self._session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            self._session = requests.Session()
+            self._session.headers.update({'Content-Type': 'application/json'})
+            self._session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=2))
+        return self._session
+
+    def _deliver(self, message: OutboxMessage):
+        """Envía un mensaje del outbox al webhook (solo desde el hilo en segundo plano)."""
+        import requests # Se carga con el primer envío (ver _get_session)
+        session = self._get_session()
+        started = time.perf_counter()
+        try:
+            # Corre en el hilo de entrega, fuera del ciclo: el span no lleva identificador de ciclo
+            with span("slack.deliver", attempt=message.attempts + 1) as deliver_span:
+                response = session.post(self.webhook_url, data=json.dumps(message.payload), timeout=self._timeout)
+                deliver_span.set(http_status=response.status_code)
+        except requests.exceptions.RequestException as e:
+            self._record_attempt(started, "timeout" if isinstance(e, requests.exceptions.Timeout) else "network_error")
+            self._retry_later(message, str(e))
+            return
+        status = response.status_code
+        if status < 400:
+            self._record_attempt(started, "sent")
+            self._outbox.complete(message.message_id)
+            logging.info(f"{message.description} enviado a Slack con éxito. Status: {status}")
+        elif status == 429 or status >= 500:
+            self._record_attempt(started, "rate_limited" if status == 429 else "server_error")
+            retry_after = self._parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is not None:
+                # El límite de Slack es por webhook: se pausan todos los envíos, no solo este mensaje
+                self._rate_limiter.pause(retry_after)
+            self._retry_later(message, f"HTTP {status}", retry_after)
+        else:
+            # Otros 4xx (webhook inválido o revocado, payload rechazado) no se resuelven reintentando
+            self._record_attempt(started, "rejected")
+            logging.error(f"Slack rechazó {message.description.lower()} (HTTP {status}): {response.text}. Se descarta.")
+            self._outbox.complete(message.message_id)
+            self._record_dropped()
+
+    def _enqueue(self, payload: dict, description: str):
+        """Guarda el mensaje en el outbox sin esperar su entrega."""
         if not self.webhook_url:
             logging.error("No se puede enviar el mensaje a Slack: URL de webhook no configurada.")
             return
+        if self._max_pending and self._outbox.pending_count() >= self._max_pending:
+            logging.error(f"Outbox de Slack lleno ({self._max_pending} mensajes pendientes). Se descarta: {description}.")
+            self._record_dropped()
+            return
+        self._outbox.enqueue(payload, description)
+        self._ensure_worker()
+        self._wakeup.set()
 
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Espera a que el outbox quede vacío (mensajes entregados o descartados).
+        Retorna False si quedaron mensajes pendientes tras `timeout` segundos.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._progress:
+            while self._outbox.pending_count():
+                if self._worker is None or not self._worker.is_alive():
+                    return False
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._progress.wait(1 if remaining is None else min(remaining, 1))
+        return True
+
+    def close(self):
+        """
+        Entrega los mensajes pendientes (hasta `shutdown_timeout_seconds`) y libera la sesión HTTP.
+        Lo que quede en el outbox se reenvía en la siguiente ejecución.
+        """
+        if self._worker is not None and self._worker.is_alive():
+            if not self.flush(self._shutdown_timeout_seconds):
+                logging.warning(f"Quedaron {self._outbox.pending_count()} mensaje(s) de Slack sin enviar tras "
+                                f"{self._shutdown_timeout_seconds}s; se reenviarán en la próxima ejecución.")
+            self._stopping.set()
+            self._wakeup.set()
+            self._worker.join(sum(self._timeout) + 1)
+        if self._worker is None or not self._worker.is_alive():
+            self._outbox.close()
+        if self._session is not None:
+            self._session.close()
+
+    def _send_slack_message(self, message: str, title: Optional[str] = None):
+        """
+        Método interno para encolar un mensaje JSON hacia el webhook de Slack.
+        """
         payload = {
             "text": title if title else message,
             "attachments": [
@@ -36,16 +247,7 @@ class SlackNotifier(ITaskObserver):
                 }
             ]
         }
-
-        try:
-            response = requests.post(self.webhook_url, data=json.dumps(payload),
-                                     headers={'Content-Type': 'application/json'})
-            response.raise_for_status() # Lanza una excepción para errores HTTP (4xx o 5xx)
-            logging.info(f"Mensaje enviado a Slack con éxito. Status: {response.status_code}")
-        except requests.exceptions.RequestException as e:
-            logging.error(f"Error al enviar mensaje a Slack: {e}. Respuesta: {getattr(e.response, 'text', 'N/A')}")
-        except Exception as e:
-            logging.error(f"Error inesperado al preparar/enviar mensaje a Slack: {e}")
+        self._enqueue(payload, "Mensaje")
 
     def update(self, statistics: TaskStatistics):
         """
@@ -58,7 +260,7 @@ class SlackNotifier(ITaskObserver):
         ]
 
         if statistics.over_limit:
-            message_parts.append(f"🚨 ¡ADVERTENCIA! El límite de {ConfigManager().get_setting('Monitoring', 'max_tasks_limit')} tareas ha sido *EXCEDIDO*.")
+            message_parts.append(f"🚨 ¡ADVERTENCIA! El límite de {ConfigManager.monitoring().max_tasks_limit} tareas ha sido *EXCEDIDO*.")
             title = f"🚨 ALERTA: Límite de Tareas Excedido - {statistics.category_name}"
             color = "#FF0000" # Rojo para advertencias
         else:
@@ -82,19 +284,7 @@ class SlackNotifier(ITaskObserver):
                 }
             ]
         }
-        if not self.webhook_url: # En este caso, ya no usamos _send_slack_message directamente
-            logging.error("No se puede enviar el mensaje a Slack: URL de webhook no configurada.")
-            return
-
-        try:
-            response = requests.post(self.webhook_url, data=json.dumps(payload),
-                                     headers={'Content-Type': 'application/json'})
-            response.raise_for_status()
-            logging.info(f"Reporte/Alerta enviado a Slack con éxito. Status: {response.status_code}")
-        except requests.exceptions.RequestException as e:
-            logging.error(f"Error al enviar reporte/alerta a Slack: {e}. Respuesta: {getattr(e.response, 'text', 'N/A')}")
-        except Exception as e:
-            logging.error(f"Error inesperado al preparar/enviar reporte/alerta a Slack: {e}")
+        self._enqueue(payload, "Reporte/Alerta")
 
 
     def notify_long_running_task(self, task: Task, category: str):
@@ -111,6 +301,31 @@ class SlackNotifier(ITaskObserver):
         )
         self._send_slack_message(message, title=title)
 
+    def notify_task_anomaly(self, task: Task, category: str, description: str):
+        """
+        Notifica una tarea cuya duración es atípica comparada con las ejecuciones
+        anteriores de la misma función.
+        """
+        title = f"📈 ALERTA: Duración Atípica Detectada ({category})"
+        message = (
+            f"La siguiente tarea está tardando mucho más de lo normal para su función:\n"
+            f"```\n{str(task)}\n```"
+            f"\n{description}"
+        )
+        self._send_slack_message(message, title=title)
+
+    def notify_stalled_task(self, task: Task, category: str, description: str):
+        """
+        Notifica una tarea activa que no avanza: su progreso y su última actividad
+        no cambian desde hace varios ciclos.
+        """
+        title = f"🧊 ALERTA: Tarea Estancada Detectada ({category})"
+        message = (
+            f"La siguiente tarea sigue activa pero no registra avance:\n"
+            f"```\n{str(task)}\n```"
+            f"\n{description}"
+        )
+        self._send_slack_message(message, title=title)
 
 # Ejemplo de uso (para pruebas, puedes eliminarlo después)
 if __name__ == "__main__":
@@ -161,6 +376,9 @@ if __name__ == "__main__":
         print("\n--- Enviando reporte de tareas normal ---")
         notifier.update(stats_normal)
 
+        # Los envíos son asíncronos: esperar a que se entreguen antes de salir
+        notifier.close()
+
 
     except Exception as e:
         print(f"Ocurrió un error al probar SlackNotifier: {e}")
\ No newline at end of file
@@ -1,24 +1,27 @@
-from typing import List, Dict, Optional
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 from datetime import datetime
 from ..core.interfaces import ITaskProcessingStrategy
 from ..models import Task, TaskStatistics
 from ..utils.config_manager import ConfigManager 
+from ..utils.row_mapping import ColumnMap
+from ..utils.sql import Query
+from .dimensions import SCHEDULES, AGENT_TASK_FUNCTIONS, TASK_FUNCTIONS, first_value, row_chunks
+from .filters import TaskColumns, filter_predicates
 import logging
 
 class ActiveProcessStrategy(ITaskProcessingStrategy):
     """
     Estrategia para procesar tareas de la categoría "Proceso Activo".
     """
+    accepts_native_rows = True # Lee las columnas con ColumnMap
+
     @property
     def category_name(self) -> str:
         return "Proceso Activo"
 
-    def get_tasks_query(self) -> str:
-        """
-        Retorna el query SQL para obtener las tareas "Proceso Activo".
-        """
-        return """
-        SELECT
+    # Partes del query, compartidas por el query completo, el de resumen y el incremental
+    _SELECT_COLUMNS = """
             t.SysTaskNum,
             t.TaskDescription,
             ISNULL(IIF(prm.ParamCharacter IS NULL, tprm.ParamCharacter, prm.ParamCharacter), '') AS [Function], -- Alias para 'function_id'
@@ -30,56 +33,247 @@ class ActiveProcessStrategy(ITaskProcessingStrategy):
             sc.SchedDesc,
             t.SubmitUser,
             t.TaskStatus,
-            t.ActivityMsg
+            t.ActivityMsg"""
+    _FROM = """
         FROM ice.SysTask t
         LEFT JOIN Ice.SysAgentSched sc ON t.AgentSchedNum = sc.AgentSchedNum
         LEFT JOIN Ice.SysAgentTaskParam prm ON t.AgentSchedNum = prm.AgentSchedNum AND prm.ParamName = 'FunctionId'
-        LEFT JOIN Ice.SysTaskParam tprm ON t.SysTaskNum = tprm.SysTaskNum AND tprm.ParamName = 'FunctionId'
-        WHERE TaskStatus = 'ACTIVE'
+        LEFT JOIN Ice.SysTaskParam tprm ON t.SysTaskNum = tprm.SysTaskNum AND tprm.ParamName = 'FunctionId'"""
+    _WHERE = """
+        WHERE t.TaskStatus = 'ACTIVE'"""
+    # Columnas sobre las que se aplican los filtros de [Filters]
+    _FILTER_COLUMNS = TaskColumns(start="t.StartedOn", task_type="t.TaskType", user="t.SubmitUser")
+    # Con la caché de tablas de consulta: solo Ice.SysTask, con la clave de la programación
+    _BASE_SELECT_COLUMNS = """
+            t.SysTaskNum,
+            t.AgentSchedNum,
+            t.TaskDescription,
+            t.TaskType,
+            DATEDIFF(MINUTE, DATEADD(HOUR,-6, StartedOn), CURRENT_TIMESTAMP) AS Duracion,
+            DATEADD(HOUR,-6, StartedOn) AS StartedOn,
+            DATEADD(HOUR, -6, LastActivityOn) AS LastActivityOn,
+            t.ProgressPercent,
+            t.SubmitUser,
+            t.TaskStatus,
+            t.ActivityMsg"""
+    _BASE_COLUMNS = ('SysTaskNum', 'AgentSchedNum', 'TaskDescription', 'TaskType', 'Duracion', 'StartedOn',
+                     'LastActivityOn', 'ProgressPercent', 'SubmitUser', 'TaskStatus', 'ActivityMsg')
+
+    def _filters(self, include_duration: bool = True) -> Tuple[str, Tuple[Any, ...]]:
+        return filter_predicates(ConfigManager.task_filters(), self._FILTER_COLUMNS, include_duration)
+
+    def _tasks_select(self) -> Query:
+        filters, params = self._filters()
+        return Query("\n        SELECT" + self._SELECT_COLUMNS + self._FROM + self._WHERE + filters, params)
+
+    def get_tasks_query(self) -> Query:
+        """
+        Retorna el query SQL para obtener las tareas "Proceso Activo".
+        """
+        select = self._tasks_select()
+        return Query(select.sql + """
         ORDER BY t.SysTaskNum
+        """, select.params)
+
+    def get_base_tasks_query(self) -> Query:
+        """Retorna el query de las tareas "Proceso Activo" sin JOIN a las tablas de consulta."""
+        filters, params = self._filters()
+        return Query("\n        SELECT" + self._BASE_SELECT_COLUMNS + """
+        FROM ice.SysTask t""" + self._WHERE + filters + """
+        ORDER BY t.SysTaskNum
+        """, params)
+
+    def resolve_dimensions(self, raw_rows: Iterable[Any],
+                           lookup: Callable[[Any, Iterable[Any]], Dict[int, List[dict]]],
+                           chunk_size: int = 500) -> Iterator[dict]:
+        """
+        Agrega SchedDesc y Function a las filas del query base, por bloques de `chunk_size`
+        filas. Function replica el query original: el parámetro FunctionId de la programación
+        o, si no tiene, el de la tarea.
         """
+        for rows in row_chunks(raw_rows, self._BASE_COLUMNS, chunk_size):
+            sched_nums = [row['AgentSchedNum'] for row in rows]
+            schedules = lookup(SCHEDULES, sched_nums)
+            agent_functions = lookup(AGENT_TASK_FUNCTIONS, sched_nums)
+            task_functions = lookup(TASK_FUNCTIONS, [row['SysTaskNum'] for row in rows])
+            for row in rows:
+                function_id = first_value(agent_functions, row['AgentSchedNum'], 'ParamCharacter')
+                if function_id is None:
+                    function_id = first_value(task_functions, row['SysTaskNum'], 'ParamCharacter')
+                row['Function'] = function_id or ''
+                row['SchedDesc'] = first_value(schedules, row['AgentSchedNum'], 'SchedDesc')
+            yield from rows
 
-    def process_raw_tasks(self, raw_tasks_data: List[Dict]) -> TaskStatistics:
+    def get_summary_query(self) -> Query:
+        """
+        Retorna el query de resumen: una sola fila con el total de tareas (TotalTasks)
+        y las columnas de la tarea de mayor duración, calculados en SQL.
+        El orden replica el desempate del recorrido completo (primera por SysTaskNum)
+        y deja al final las duraciones NULL, que el recorrido completo ignora.
+        """
+        select = self._tasks_select()
+        return Query(f"""
+        WITH tareas AS ({select.sql}
+        )
+        SELECT TOP 1 COUNT(*) OVER () AS TotalTasks, tareas.*
+        FROM tareas
+        ORDER BY CASE WHEN tareas.Duracion IS NULL THEN 1 ELSE 0 END, tareas.Duracion DESC, tareas.SysTaskNum
+        """, select.params)
+
+    def get_delta_query(self, watermark: Optional[datetime]) -> Query:
+        """
+        Retorna el query del modo incremental. La marca de agua es el mayor
+        LastActivityOn/StartedOn (sin ajuste horario) ya leído. Las filas modificadas
+        que dejaron de estar activas también se retornan, para podarlas del índice.
+        De [Filters] solo se aplican los tipos y usuarios: una tarea que alcanza la duración
+        mínima sin actividad nueva no volvería a leerse hasta la siguiente resincronización.
+        La duración mínima se aplica al calcular las estadísticas (ver
+        `get_min_duration_keys_query`).
+        """
+        filters, filter_params = self._filters(include_duration=False)
+        if watermark is None:
+            where, params = self._WHERE + filters, filter_params
+        else:
+            if not isinstance(watermark, datetime):
+                raise TypeError(f"Marca de agua inválida para 'Proceso Activo': {watermark!r}")
+            # Como texto, el servidor lo convierte al tipo de la columna (como el literal anterior):
+            # un datetime2 de pyodbc no siempre es igual al datetime redondeado a 1/300 s
+            literal = watermark.isoformat(timespec='milliseconds')
+            where = """
+        WHERE (t.LastActivityOn >= ? OR t.StartedOn >= ?)""" + filters
+            params = (literal, literal) + filter_params
+        return Query("\n        SELECT" + self._SELECT_COLUMNS + """,
+            IIF(t.LastActivityOn > t.StartedOn, t.LastActivityOn, t.StartedOn) AS Watermark"""
+                     + self._FROM + where + """
+        ORDER BY t.SysTaskNum
+        """, params)
+
+    def get_active_keys_query(self) -> Query:
+        filters, params = self._filters(include_duration=False)
+        return Query("""
+        SELECT t.SysTaskNum AS TaskKey
+        FROM ice.SysTask t""" + self._WHERE + filters + """
+        """, params)
+
+    def get_min_duration_keys_query(self) -> Optional[Query]:
+        if not ConfigManager.task_filters().min_duration_minutes:
+            return None
+        filters, params = self._filters()
+        return Query("""
+        SELECT t.SysTaskNum AS TaskKey
+        FROM ice.SysTask t""" + self._WHERE + filters + """
+        """, params)
+
+    def read_delta_rows(self, raw_rows: Iterable[Any]) -> Iterator[Tuple[str, Optional[Task], Any]]:
+        columns: Optional[ColumnMap] = None
+        for row in raw_rows:
+            try:
+                if columns is None:
+                    columns = ColumnMap.from_row(row, self._COLUMNS + ('Watermark',))
+                key = str(columns.get(row, 'SysTaskNum'))
+                watermark = columns.get(row, 'Watermark')
+                if columns.get(row, 'TaskStatus') != 'ACTIVE':
+                    yield key, None, watermark
+                else:
+                    yield key, self._build_task(row, columns), watermark
+            except Exception as e:
+                logging.warning(f"Error al procesar fila de tarea 'Proceso Activo': {row}. Error: {e}")
+                continue
+
+    def delta_rank(self, task: Task) -> Optional[float]:
+        # Inicio efectivo en minutos: la tarea que empezó antes es la de mayor duración
+        if task.duration_minutes is None:
+            return None
+        return time.time() / 60 - task.duration_minutes
+
+    # Columnas del query que se mapean a Task
+    _COLUMNS = ('SysTaskNum', 'TaskDescription', 'Function', 'TaskType', 'Duracion', 'StartedOn',
+                'LastActivityOn', 'ProgressPercent', 'SchedDesc', 'SubmitUser', 'TaskStatus', 'ActivityMsg')
+
+    def _build_task(self, row: Any, columns: ColumnMap) -> Task:
+        """Construye la Task completa de una fila, leyendo las columnas por índice."""
+        progress_percent = columns.get(row, 'ProgressPercent')
+        return Task(
+            task_id=str(columns.get(row, 'SysTaskNum')),
+            task_description=columns.get(row, 'TaskDescription'),
+            start_time=columns.get(row, 'StartedOn'), # Ya viene ajustado en el query
+            submit_user=columns.get(row, 'SubmitUser'),
+            function_id=columns.get(row, 'Function'),
+            task_type=columns.get(row, 'TaskType'),
+            duration_minutes=columns.get(row, 'Duracion'),
+            last_activity_on=columns.get(row, 'LastActivityOn'),
+            progress_percent=float(progress_percent) if progress_percent is not None else None,
+            sched_desc=columns.get(row, 'SchedDesc'),
+            task_status=columns.get(row, 'TaskStatus'),
+            activity_msg=columns.get(row, 'ActivityMsg')
+        )
+
+    def _build_statistics(self, total_tasks: int, longest_running_task: Optional[Task],
+                          tasks: Optional[List[Task]] = None) -> TaskStatistics:
+        max_tasks_limit = ConfigManager.monitoring().max_tasks_limit
+        return TaskStatistics(
+            category_name=self.category_name,
+            total_tasks=total_tasks,
+            over_limit=total_tasks > max_tasks_limit,
+            longest_running_task=longest_running_task,
+            tasks=tasks
+        )
+
+    def process_raw_tasks(self, raw_tasks_data: Iterable[Any], include_tasks: bool = False) -> TaskStatistics:
         """
         Procesa los datos brutos de las tareas y calcula las estadísticas.
         Identifica la tarea con mayor duración.
+        Solo se construye la Task completa de la fila ganadora (o de todas si `include_tasks`);
+        el resto de filas únicamente se cuenta y se compara por su columna 'Duracion'.
         """
-        tasks: List[Task] = []
-        longest_running_task: Optional[Task] = None
-        max_tasks_limit = int(ConfigManager().get_setting("Monitoring", "max_tasks_limit"))
+        # Solo se conserva el conteo y la fila destacada: la memoria no crece con el número de filas
+        tasks: Optional[List[Task]] = [] if include_tasks else None
+        total_tasks = 0
+        longest_row = None
+        longest_duration = None
+        columns: Optional[ColumnMap] = None
+        duration_key = None
 
         for row in raw_tasks_data:
             try:
-                task = Task(
-                    task_id=str(row.get('SysTaskNum')),
-                    task_description=row.get('TaskDescription'),
-                    start_time=row.get('StartedOn'), # Ya viene ajustado en el query
-                    submit_user=row.get('SubmitUser'),
-                    function_id=row.get('Function'),
-                    task_type=row.get('TaskType'),
-                    duration_minutes=row.get('Duracion'),
-                    last_activity_on=row.get('LastActivityOn'),
-                    progress_percent=float(row['ProgressPercent']) if row.get('ProgressPercent') is not None else None,
-                    sched_desc=row.get('SchedDesc'),
-                    task_status=row.get('TaskStatus'),
-                    activity_msg=row.get('ActivityMsg')
-                )
-                tasks.append(task)
+                if columns is None:
+                    # Las posiciones de las columnas se resuelven una sola vez por query
+                    columns = ColumnMap.from_row(row, self._COLUMNS)
+                    duration_key = columns.key('Duracion')
+                if tasks is not None:
+                    tasks.append(self._build_task(row, columns))
+                total_tasks += 1
 
                 # Determinar la tarea de mayor duración
-                if task.duration_minutes is not None: # Solo si la duración es un valor válido
-                    if longest_running_task is None or task.duration_minutes > longest_running_task.duration_minutes:
-                        longest_running_task = task
+                duration = row[duration_key] if duration_key is not None else None
+                if duration is not None: # Solo si la duración es un valor válido
+                    if longest_duration is None or duration > longest_duration:
+                        longest_duration = duration
+                        longest_row = row
             except Exception as e:
                 logging.warning(f"Error al procesar fila de tarea 'Proceso Activo': {row}. Error: {e}")
                 continue
 
-        total_tasks = len(tasks)
-        over_limit = total_tasks > max_tasks_limit
+        longest_running_task: Optional[Task] = None
+        if longest_row is not None:
+            try:
+                longest_running_task = self._build_task(longest_row, columns)
+            except Exception as e:
+                logging.warning(f"Error al procesar fila de tarea 'Proceso Activo': {longest_row}. Error: {e}")
 
-        return TaskStatistics(
-            category_name=self.category_name,
-            total_tasks=total_tasks,
-            over_limit=over_limit,
-            longest_running_task=longest_running_task
-        )
\ No newline at end of file
+        return self._build_statistics(total_tasks, longest_running_task, tasks)
+
+    def process_summary(self, raw_summary_data: Iterable[Any]) -> TaskStatistics:
+        """
+        Procesa el resultado de `get_summary_query` (cero o una fila).
+        Produce las mismas estadísticas que el recorrido completo.
+        """
+        total_tasks = 0
+        longest_running_task: Optional[Task] = None
+        for row in raw_summary_data:
+            columns = ColumnMap.from_row(row, self._COLUMNS + ('TotalTasks',))
+            total_tasks = int(columns.get(row, 'TotalTasks'))
+            if columns.get(row, 'Duracion') is not None:
+                longest_running_task = self._build_task(row, columns)
+            break
+        return self._build_statistics(total_tasks, longest_running_task)
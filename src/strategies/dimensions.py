@@ -0,0 +1,54 @@
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+from ..core.dimension_cache import Dimension
+from ..utils.row_mapping import ColumnMap
+
+# Tablas de consulta de Epicor que los queries principales unían con LEFT JOIN en cada ciclo.
+# Sus filas casi no cambian una vez creada la tarea: con [Monitoring] dimension_cache se leen
+# por clave desde DimensionCache (ver ITaskProcessingStrategy.resolve_dimensions).
+
+SCHEDULES = Dimension("Ice.SysAgentSched", """
+        SELECT sc.AgentSchedNum AS DimKey, sc.AgentID, sc.SchedDesc
+        FROM Ice.SysAgentSched sc
+        WHERE sc.AgentSchedNum IN ({keys})
+        """)
+
+AGENT_TASK_FUNCTIONS = Dimension("Ice.SysAgentTaskParam", """
+        SELECT prm.AgentSchedNum AS DimKey, prm.ParamCharacter
+        FROM Ice.SysAgentTaskParam prm
+        WHERE prm.ParamName = 'FunctionId' AND prm.AgentSchedNum IN ({keys})
+        """)
+
+TASK_FUNCTIONS = Dimension("Ice.SysTaskParam", """
+        SELECT tprm.SysTaskNum AS DimKey, tprm.ParamCharacter
+        FROM Ice.SysTaskParam tprm
+        WHERE tprm.ParamName = 'FunctionId' AND tprm.SysTaskNum IN ({keys})
+        """)
+
+def rows_for(rows_by_key: Dict[int, List[dict]], key: Any) -> List[dict]:
+    """Filas de la tabla de consulta para la clave (vacío si la clave es None o no tiene filas)."""
+    if key is None:
+        return []
+    return rows_by_key.get(int(key), [])
+
+def first_value(rows_by_key: Dict[int, List[dict]], key: Any, column: str) -> Optional[Any]:
+    """Valor de `column` en la primera fila de la clave, o None como en un LEFT JOIN sin coincidencia."""
+    rows = rows_for(rows_by_key, key)
+    return rows[0][column] if rows else None
+
+def row_chunks(raw_rows: Iterable[Any], column_names: Sequence[str], chunk_size: int) -> Iterator[List[dict]]:
+    """
+    Lee las filas del query base como diccionarios en bloques de hasta `chunk_size` filas,
+    para resolver las claves de cada bloque juntas sin materializar el resultado completo.
+    """
+    chunk_size = max(1, chunk_size)
+    chunk: List[dict] = []
+    columns: Optional[ColumnMap] = None
+    for row in raw_rows:
+        if columns is None:
+            columns = ColumnMap.from_row(row, column_names)
+        chunk.append({name: columns.get(row, name) for name in column_names})
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
@@ -0,0 +1,51 @@
+from typing import Any, List, NamedTuple, Optional, Tuple
+from ..utils.config_manager import TaskFilters
+from ..utils.sql import padded_in_list
+
+class TaskColumns(NamedTuple):
+    """Columnas (sin ajuste horario) sobre las que una estrategia aplica los filtros de [Filters]."""
+    start: str
+    task_type: str
+    user: str
+
+def filter_predicates(filters: TaskFilters, columns: TaskColumns,
+                      include_duration: bool = True) -> Tuple[str, Tuple[Any, ...]]:
+    """
+    Retorna las condiciones de [Filters] para agregar a un WHERE (cada una empieza con
+    "AND") y sus parámetros, en orden. Sin filtros retorna ("", ()).
+
+    Las condiciones comparan la columna tal cual contra una expresión constante, para que
+    SQL Server pueda usar sus índices: la duración mínima no se calcula por fila con
+    DATEDIFF sino como "inicio <= ahora - N minutos" (en la hora del servidor, +6h).
+    Con `include_duration` False se omite la duración mínima (ver modo incremental).
+    """
+    predicates: List[str] = []
+    params: List[Any] = []
+    if include_duration and filters.min_duration_minutes:
+        predicates.append(f"{columns.start} <= DATEADD(MINUTE, -?, DATEADD(HOUR, 6, CURRENT_TIMESTAMP))")
+        params.append(filters.min_duration_minutes)
+    for column, values, operator in ((columns.task_type, filters.include_task_types, "IN"),
+                                     (columns.task_type, filters.exclude_task_types, "NOT IN"),
+                                     (columns.user, filters.include_users, "IN"),
+                                     (columns.user, filters.exclude_users, "NOT IN")):
+        if values:
+            marks, values = padded_in_list(values)
+            predicates.append(f"{column} {operator} ({marks})")
+            params.extend(values)
+    sql = "".join(f"\n          AND {predicate}" for predicate in predicates)
+    return sql, tuple(params)
+
+def describe_filters(filters: Optional[TaskFilters]) -> str:
+    """Resumen de los filtros activos para los logs (ej. "duración >= 10 min, usuarios excluidos: 2")."""
+    if filters is None or not filters.enabled:
+        return "sin filtros"
+    parts = []
+    if filters.min_duration_minutes:
+        parts.append(f"duración >= {filters.min_duration_minutes} min")
+    for label, values in (("tipos incluidos", filters.include_task_types),
+                          ("tipos excluidos", filters.exclude_task_types),
+                          ("usuarios incluidos", filters.include_users),
+                          ("usuarios excluidos", filters.exclude_users)):
+        if values:
+            parts.append(f"{label}: {len(values)}")
+    return ", ".join(parts)
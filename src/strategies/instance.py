@@ -0,0 +1,74 @@
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from ..core.interfaces import ITaskProcessingStrategy, process_raw_tasks
+from ..models import Task, TaskStatistics
+from ..utils.sql import QueryLike
+
+class InstanceStrategy(ITaskProcessingStrategy):
+    """
+    Decorador de una estrategia para el monitoreo de varias bases de datos: delega los
+    queries y el procesamiento en la estrategia original y etiqueta la categoría con el
+    nombre de la instancia (ej. "[PROD] Proceso Activo").
+
+    Como el monitor usa el nombre de la categoría como clave, la deduplicación de alertas,
+    el índice incremental, el histórico, las líneas base, las métricas y los mensajes de
+    Slack quedan separados por instancia sin cambios en esos componentes.
+    """
+    def __init__(self, inner: ITaskProcessingStrategy, instance_name: str):
+        self._inner = inner
+        self._instance_name = instance_name
+        self._category_name = f"[{instance_name}] {inner.category_name}"
+
+    @property
+    def category_name(self) -> str:
+        return self._category_name
+
+    @property
+    def instance_name(self) -> Optional[str]:
+        return self._instance_name
+
+    @property
+    def accepts_native_rows(self) -> bool:
+        return self._inner.accepts_native_rows
+
+    def _tag(self, statistics: TaskStatistics) -> TaskStatistics:
+        statistics.category_name = self._category_name
+        statistics.instance_name = self._instance_name
+        return statistics
+
+    def get_tasks_query(self) -> QueryLike:
+        return self._inner.get_tasks_query()
+
+    def process_raw_tasks(self, raw_tasks_data: Iterable[Any], include_tasks: bool = False) -> TaskStatistics:
+        return self._tag(process_raw_tasks(self._inner, raw_tasks_data, include_tasks))
+
+    def get_summary_query(self) -> Optional[QueryLike]:
+        return self._inner.get_summary_query()
+
+    def process_summary(self, raw_summary_data: Iterable[Any]) -> TaskStatistics:
+        return self._tag(self._inner.process_summary(raw_summary_data))
+
+    def get_base_tasks_query(self) -> Optional[QueryLike]:
+        return self._inner.get_base_tasks_query()
+
+    def resolve_dimensions(self, raw_rows: Iterable[Any],
+                           lookup: Callable[[Any, Iterable[Any]], Dict[int, List[dict]]],
+                           chunk_size: int = 500) -> Iterator[dict]:
+        return self._inner.resolve_dimensions(raw_rows, lookup, chunk_size)
+
+    def get_delta_query(self, watermark: Any) -> Optional[QueryLike]:
+        return self._inner.get_delta_query(watermark)
+
+    def get_active_keys_query(self) -> Optional[QueryLike]:
+        return self._inner.get_active_keys_query()
+
+    def get_min_duration_keys_query(self) -> Optional[QueryLike]:
+        return self._inner.get_min_duration_keys_query()
+
+    def read_delta_rows(self, raw_rows: Iterable[Any]) -> Iterator[Tuple[str, Optional[Task], Any]]:
+        return self._inner.read_delta_rows(raw_rows)
+
+    def read_active_keys(self, raw_rows: Iterable[Any]) -> Set[str]:
+        return self._inner.read_active_keys(raw_rows)
+
+    def delta_rank(self, task: Task) -> Optional[Any]:
+        return self._inner.delta_rank(task)
@@ -1,24 +1,26 @@
-from typing import List, Dict, Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 from datetime import datetime
 from ..core.interfaces import ITaskProcessingStrategy
 from ..models import Task, TaskStatistics
 from ..utils.config_manager import ConfigManager #
+from ..utils.row_mapping import ColumnMap
+from ..utils.sql import Query
+from .dimensions import row_chunks
+from .filters import TaskColumns, filter_predicates
 import logging 
 
 class SubmittedTaskStrategy(ITaskProcessingStrategy):
     """
     Estrategia para procesar tareas de la categoría "Mandado a Someter".
     """
+    accepts_native_rows = True # Lee las columnas con ColumnMap
+
     @property
     def category_name(self) -> str:
         return "Mandado a Someter"
 
-    def get_tasks_query(self) -> str:
-        """
-        Retorna el query SQL para obtener las tareas "Mandado a Someter".
-        """
-        return """
-        SELECT
+    # Partes del query, compartidas por el query completo, el de resumen y el incremental
+    _SELECT_COLUMNS = """
             t.AgentSchedNum,
             s.SchedDesc,
             t.TaskDesc,
@@ -26,52 +28,221 @@ class SubmittedTaskStrategy(ITaskProcessingStrategy):
             t.RunProcedure,
             DATEADD(HOUR,-6, SubmittedOn) AS SubmittedOn, -- Alias para mapear a 'start_time'
             t.SubmitUser,
-            t.ParamMaintProgram
+            t.ParamMaintProgram"""
+    _FROM = """
         FROM ice.SysAgentTask t
-        LEFT JOIN Ice.SysAgentSched s ON t.AgentID = s.AgentID AND t.AgentSchedNum = s.AgentSchedNum
-        WHERE s.SchedDesc = 'Immediate Run Request'
+        LEFT JOIN Ice.SysAgentSched s ON t.AgentID = s.AgentID AND t.AgentSchedNum = s.AgentSchedNum"""
+    _IMMEDIATE_RUN_REQUEST = 'Immediate Run Request'
+    _WHERE = f"""
+        WHERE s.SchedDesc = '{_IMMEDIATE_RUN_REQUEST}'"""
+    # Mismo filtro como semi-join: no trae columnas de Ice.SysAgentSched ni repite filas de la tarea
+    _BASE_WHERE = f"""
+        WHERE EXISTS (
+            SELECT 1 FROM Ice.SysAgentSched s
+            WHERE s.AgentID = t.AgentID AND s.AgentSchedNum = t.AgentSchedNum
+              AND s.SchedDesc = '{_IMMEDIATE_RUN_REQUEST}')"""
+    # Columnas sobre las que se aplican los filtros de [Filters] (la duración es la espera desde SubmittedOn)
+    _FILTER_COLUMNS = TaskColumns(start="t.SubmittedOn", task_type="t.TaskType", user="t.SubmitUser")
+    # Con la caché de tablas de consulta: solo las columnas de Ice.SysAgentTask
+    _BASE_SELECT_COLUMNS = """
+            t.AgentSchedNum,
+            t.TaskDesc,
+            t.TaskType,
+            t.RunProcedure,
+            DATEADD(HOUR,-6, SubmittedOn) AS SubmittedOn,
+            t.SubmitUser,
+            t.ParamMaintProgram"""
+    _BASE_COLUMNS = ('AgentSchedNum', 'TaskDesc', 'TaskType', 'RunProcedure',
+                     'SubmittedOn', 'SubmitUser', 'ParamMaintProgram')
+
+    def _filters(self, include_duration: bool = True) -> Tuple[str, Tuple[Any, ...]]:
+        return filter_predicates(ConfigManager.task_filters(), self._FILTER_COLUMNS, include_duration)
+
+    def _tasks_select(self) -> Query:
+        filters, params = self._filters()
+        return Query("\n        SELECT" + self._SELECT_COLUMNS + self._FROM + self._WHERE + filters, params)
+
+    def get_tasks_query(self) -> Query:
+        """
+        Retorna el query SQL para obtener las tareas "Mandado a Someter".
+        """
+        select = self._tasks_select()
+        return Query(select.sql + """
         ORDER BY t.AgentSchedNum
+        """, select.params)
+
+    def get_base_tasks_query(self) -> Query:
+        """
+        Retorna el query de las tareas "Mandado a Someter" sin JOIN a Ice.SysAgentSched.
+        El filtro por SchedDesc (misma programación y mismo agente, como el JOIN original)
+        se aplica en SQL con EXISTS: el servidor descarta las programaciones recurrentes
+        en lugar de enviarlas, y las filas no llevan columnas de Ice.SysAgentSched.
+        """
+        filters, params = self._filters()
+        return Query("\n        SELECT" + self._BASE_SELECT_COLUMNS + """
+        FROM ice.SysAgentTask t""" + self._BASE_WHERE + filters + """
+        ORDER BY t.AgentSchedNum
+        """, params)
+
+    def resolve_dimensions(self, raw_rows: Iterable[Any],
+                           lookup: Callable[[Any, Iterable[Any]], Dict[int, List[dict]]],
+                           chunk_size: int = 500) -> Iterator[dict]:
+        """
+        Agrega SchedDesc a las filas del query base, por bloques de `chunk_size` filas.
+        El query base ya conserva solo las solicitudes 'Immediate Run Request', así que no
+        hace falta consultar Ice.SysAgentSched.
         """
+        for rows in row_chunks(raw_rows, self._BASE_COLUMNS, chunk_size):
+            for row in rows:
+                row['SchedDesc'] = self._IMMEDIATE_RUN_REQUEST
+            yield from rows
 
-    def process_raw_tasks(self, raw_tasks_data: List[Dict]) -> TaskStatistics:
+    def get_summary_query(self) -> Query:
+        """
+        Retorna el query de resumen: una sola fila con el total de tareas (TotalTasks)
+        y las columnas de la tarea más antigua (MIN(SubmittedOn)), calculados en SQL.
+        El orden replica el desempate del recorrido completo (primera por AgentSchedNum)
+        y deja al final los SubmittedOn NULL, que el recorrido completo ignora.
+        """
+        select = self._tasks_select()
+        return Query(f"""
+        WITH tareas AS ({select.sql}
+        )
+        SELECT TOP 1 COUNT(*) OVER () AS TotalTasks, tareas.*
+        FROM tareas
+        ORDER BY CASE WHEN tareas.SubmittedOn IS NULL THEN 1 ELSE 0 END, tareas.SubmittedOn, tareas.AgentSchedNum
+        """, select.params)
+
+    def get_delta_query(self, watermark: Optional[int]) -> Query:
+        """
+        Retorna el query del modo incremental. La marca de agua es el mayor AgentSchedNum
+        ya leído: las solicitudes nuevas siempre tienen un número mayor. Las que ya se
+        ejecutaron desaparecen de la tabla y se podan con `get_active_keys_query`.
+        De [Filters] solo se aplican los tipos y usuarios: una solicitud ya leída no vuelve a
+        leerse, así que la espera mínima no se alcanzaría hasta la siguiente resincronización.
+        La espera mínima se aplica al calcular las estadísticas (ver `get_min_duration_keys_query`).
+        """
+        filters, params = self._filters(include_duration=False)
+        where = self._WHERE + filters
+        if watermark is not None:
+            where += """
+          AND t.AgentSchedNum > ?"""
+            params += (int(watermark),)
+        return Query("\n        SELECT" + self._SELECT_COLUMNS + """,
+            t.AgentSchedNum AS Watermark""" + self._FROM + where + """
+        ORDER BY t.AgentSchedNum
+        """, params)
+
+    def get_active_keys_query(self) -> Query:
+        filters, params = self._filters(include_duration=False)
+        return Query("\n        SELECT t.AgentSchedNum AS TaskKey" + self._FROM + self._WHERE + filters + "\n        ", params)
+
+    def get_min_duration_keys_query(self) -> Optional[Query]:
+        if not ConfigManager.task_filters().min_duration_minutes:
+            return None
+        filters, params = self._filters()
+        return Query("\n        SELECT t.AgentSchedNum AS TaskKey" + self._FROM + self._WHERE + filters + "\n        ", params)
+
+    def read_delta_rows(self, raw_rows: Iterable[Any]) -> Iterator[Tuple[str, Optional[Task], Any]]:
+        columns: Optional[ColumnMap] = None
+        for row in raw_rows:
+            try:
+                if columns is None:
+                    columns = ColumnMap.from_row(row, self._COLUMNS + ('Watermark',))
+                yield str(columns.get(row, 'AgentSchedNum')), self._build_task(row, columns), columns.get(row, 'Watermark')
+            except Exception as e:
+                logging.warning(f"Error al procesar fila de tarea 'Mandado a Someter': {row}. Error: {e}")
+                continue
+
+    def delta_rank(self, task: Task) -> Optional[datetime]:
+        # La solicitud más antigua (menor SubmittedOn) es la destacada
+        return task.start_time
+
+    # Columnas del query que se mapean a Task
+    _COLUMNS = ('AgentSchedNum', 'SchedDesc', 'TaskDesc', 'TaskType', 'RunProcedure',
+                'SubmittedOn', 'SubmitUser', 'ParamMaintProgram')
+
+    def _build_task(self, row: Any, columns: ColumnMap) -> Task:
+        """Construye la Task completa de una fila, leyendo las columnas por índice."""
+        # Mapeo cuidadoso de columnas a atributos de Task
+        return Task(
+            task_id=str(columns.get(row, 'AgentSchedNum')),
+            task_description=columns.get(row, 'TaskDesc'),
+            start_time=columns.get(row, 'SubmittedOn'), # Ya viene ajustado en el query
+            submit_user=columns.get(row, 'SubmitUser'),
+            sched_desc=columns.get(row, 'SchedDesc'),
+            task_type=columns.get(row, 'TaskType'),
+            run_procedure=columns.get(row, 'RunProcedure'),
+            param_maint_program=columns.get(row, 'ParamMaintProgram')
+            # Otros campos de Task se dejarán como None por defecto
+        )
+
+    def _build_statistics(self, total_tasks: int, longest_running_task: Optional[Task],
+                          tasks: Optional[List[Task]] = None) -> TaskStatistics:
+        max_tasks_limit = ConfigManager.monitoring().max_tasks_limit
+        return TaskStatistics(
+            category_name=self.category_name,
+            total_tasks=total_tasks,
+            over_limit=total_tasks > max_tasks_limit,
+            longest_running_task=longest_running_task,
+            tasks=tasks
+        )
+
+    def process_raw_tasks(self, raw_tasks_data: Iterable[Any], include_tasks: bool = False) -> TaskStatistics:
         """
         Procesa los datos brutos de las tareas y calcula las estadísticas.
         Identifica la tarea más antigua basada en 'SubmittedOn'.
+        Solo se construye la Task completa de la fila ganadora (o de todas si `include_tasks`);
+        el resto de filas únicamente se cuenta y se compara por su columna 'SubmittedOn'.
         """
-        tasks: List[Task] = []
-        longest_running_task: Optional[Task] = None
-        max_tasks_limit = int(ConfigManager().get_setting("Monitoring", "max_tasks_limit"))
+        # Solo se conserva el conteo y la fila destacada: la memoria no crece con el número de filas
+        tasks: Optional[List[Task]] = [] if include_tasks else None
+        total_tasks = 0
+        oldest_row = None
+        oldest_start = None
+        columns: Optional[ColumnMap] = None
+        start_key = None
 
-        # Convertir los datos brutos del diccionario a objetos Task
         for row in raw_tasks_data:
             try:
-                # Mapeo cuidadoso de columnas a atributos de Task
-                task = Task(
-                    task_id=str(row.get('AgentSchedNum')),
-                    task_description=row.get('TaskDesc'),
-                    start_time=row.get('SubmittedOn'), # Ya viene ajustado en el query
-                    submit_user=row.get('SubmitUser'),
-                    sched_desc=row.get('SchedDesc'),
-                    task_type=row.get('TaskType'),
-                    run_procedure=row.get('RunProcedure'),
-                    param_maint_program=row.get('ParamMaintProgram')
-                    # Otros campos de Task se dejarán como None por defecto
-                )
-                tasks.append(task)
+                if columns is None:
+                    # Las posiciones de las columnas se resuelven una sola vez por query
+                    columns = ColumnMap.from_row(row, self._COLUMNS)
+                    start_key = columns.key('SubmittedOn')
+                if tasks is not None:
+                    tasks.append(self._build_task(row, columns))
+                total_tasks += 1
 
                 # Determinar la tarea más antigua (tiempo de inicio más temprano)
-                if longest_running_task is None or task.start_time < longest_running_task.start_time:
-                    longest_running_task = task
+                start_time = row[start_key] if start_key is not None else None
+                if start_time is not None:
+                    if oldest_start is None or start_time < oldest_start:
+                        oldest_start = start_time
+                        oldest_row = row
             except Exception as e:
                 logging.warning(f"Error al procesar fila de tarea 'Mandado a Someter': {row}. Error: {e}")
                 continue
 
-        total_tasks = len(tasks)
-        over_limit = total_tasks > max_tasks_limit
+        longest_running_task: Optional[Task] = None
+        if oldest_row is not None:
+            try:
+                longest_running_task = self._build_task(oldest_row, columns)
+            except Exception as e:
+                logging.warning(f"Error al procesar fila de tarea 'Mandado a Someter': {oldest_row}. Error: {e}")
 
-        return TaskStatistics(
-            category_name=self.category_name,
-            total_tasks=total_tasks,
-            over_limit=over_limit,
-            longest_running_task=longest_running_task
-        )
\ No newline at end of file
+        return self._build_statistics(total_tasks, longest_running_task, tasks)
+
+    def process_summary(self, raw_summary_data: Iterable[Any]) -> TaskStatistics:
+        """
+        Procesa el resultado de `get_summary_query` (cero o una fila).
+        Produce las mismas estadísticas que el recorrido completo.
+        """
+        total_tasks = 0
+        longest_running_task: Optional[Task] = None
+        for row in raw_summary_data:
+            columns = ColumnMap.from_row(row, self._COLUMNS + ('TotalTasks',))
+            total_tasks = int(columns.get(row, 'TotalTasks'))
+            if columns.get(row, 'SubmittedOn') is not None:
+                longest_running_task = self._build_task(row, columns)
+            break
+        return self._build_statistics(total_tasks, longest_running_task)
@@ -1,15 +1,240 @@
 import configparser
+import logging
 import os
+import threading
+from dataclasses import dataclass, field, replace
+from types import MappingProxyType
+from typing import List, Mapping, Optional, Tuple
 from .encryption import EncryptionUtil # Importa la utilidad de cifrado
 
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+SECRET_KEYS = frozenset({"database_connection_string"}) # Claves que se guardan cifradas en el INI
+DEFAULT_CHECK_INTERVAL_SECONDS = 60.0
+INSTANCE_SECTION_PREFIX = "Instance." # Secciones [Instance.<nombre>]: una base de datos Epicor monitoreada cada una
+
+def _parse_bool(section: str, key: str, value: str) -> bool:
+    value = value.strip().lower()
+    if value in ('1', 'true', 'yes', 'on', 'si', 'sí'):
+        return True
+    if value in ('0', 'false', 'no', 'off'):
+        return False
+    raise ValueError(f"Valor booleano inválido para '{section}.{key}': '{value}'")
+
+@dataclass(frozen=True)
+class MonitoringSettings:
+    """Valores de [Monitoring] ya convertidos a su tipo (duraciones en segundos o minutos)."""
+    max_tasks_limit: int
+    check_interval_seconds: float = DEFAULT_CHECK_INTERVAL_SECONDS
+    long_running_task_threshold_minutes: int = 0
+    long_running_top_n: int = 5
+    parallel_strategies: bool = False
+    max_parallel_strategies: int = 4
+    strategy_timeout_seconds: float = 120.0
+    batch_queries: bool = False
+    summary_mode: bool = True
+    incremental_mode: bool = False
+    full_resync_cycles: int = 60
+    dimension_cache: bool = False
+    dimension_cache_ttl_minutes: float = 60
+    dimension_cache_max_entries: int = 10000
+    adaptive_polling: bool = False
+    min_interval_seconds: float = 5.0
+    max_interval_seconds: float = 300.0
+    backoff_factor: float = 2.0
+    pressure_ratio: float = 0.8
+
+@dataclass(frozen=True)
+class TaskFilters:
+    """
+    Valores de [Filters]: condiciones que las estrategias agregan al WHERE de sus queries,
+    para que SQL Server descarte las tareas en lugar de enviarlas y procesarlas aquí.
+    Las listas vacías no filtran; los nombres no distinguen mayúsculas (collation del servidor).
+    """
+    min_duration_minutes: int = 0
+    include_task_types: Tuple[str, ...] = ()
+    exclude_task_types: Tuple[str, ...] = ()
+    include_users: Tuple[str, ...] = ()
+    exclude_users: Tuple[str, ...] = ()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.min_duration_minutes or self.include_task_types or self.exclude_task_types
+                    or self.include_users or self.exclude_users)
+
+@dataclass(frozen=True)
+class InstanceSettings:
+    """
+    Una base de datos Epicor definida en una sección [Instance.<nombre>]. La sección contiene
+    su propia `database_connection_string` (cifrada) y, opcionalmente, los valores del pool
+    de [Database] que se quieran sobrescribir para esa instancia.
+    """
+    name: str
+    section: str
+    strategies: Optional[Tuple[str, ...]] = None # None: las estrategias de [Plugins]
+    timeout_seconds: float = 120.0
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """
+    Vista inmutable de config.ini en un instante dado.
+
+    Se construye una sola vez por versión del archivo: los valores de [Monitoring] se
+    convierten a su tipo al cargar y los secretos se descifran una única vez y quedan
+    en memoria. Los demás valores se leen con los mismos métodos tipados de ConfigManager.
+    """
+    version: int
+    mtime: float
+    sections: Mapping[str, Mapping[str, str]]
+    monitoring: Optional[MonitoringSettings]
+    filters: TaskFilters = field(default_factory=TaskFilters)
+    # Secretos descifrados por (sección, clave): cada instancia tiene su propia cadena de conexión
+    secrets: Mapping[Tuple[str, str], str] = field(default_factory=dict, repr=False)
+    secret_errors: Mapping[Tuple[str, str], str] = field(default_factory=dict, repr=False)
+
+    def get_setting(self, section: str, key: str) -> str:
+        if section not in self.sections:
+            raise KeyError(f"Sección '{section}' no encontrada en el archivo de configuración.")
+        if key not in self.sections[section]:
+            raise KeyError(f"Clave '{key}' no encontrada en la sección '{section}'.")
+        if key in SECRET_KEYS:
+            if (section, key) in self.secret_errors:
+                raise ValueError(f"No se pudo descifrar la cadena de conexión de [{section}]: "
+                                 f"{self.secret_errors[(section, key)]}")
+            return self.secrets[(section, key)]
+        return self.sections[section][key]
+
+    def get_int(self, section: str, key: str, default: Optional[int] = None) -> int:
+        try:
+            return int(self.get_setting(section, key))
+        except KeyError:
+            if default is None:
+                raise
+            return default
+
+    def get_float(self, section: str, key: str, default: Optional[float] = None) -> float:
+        try:
+            return float(self.get_setting(section, key))
+        except KeyError:
+            if default is None:
+                raise
+            return default
+
+    def get_bool(self, section: str, key: str, default: Optional[bool] = None) -> bool:
+        try:
+            value = self.get_setting(section, key)
+        except KeyError:
+            if default is None:
+                raise
+            return default
+        return _parse_bool(section, key, value)
+
+    def get_list(self, section: str, key: str, default: Optional[List[str]] = None) -> List[str]:
+        """Lista separada por comas (ej. "submitted, active"); se ignoran los elementos vacíos."""
+        try:
+            value = self.get_setting(section, key)
+        except KeyError:
+            if default is None:
+                raise
+            return list(default)
+        return [part.strip() for part in value.split(",") if part.strip()]
+
+    def instances(self) -> List[InstanceSettings]:
+        """Retorna las instancias [Instance.<nombre>] en el orden del archivo (vacío si no hay ninguna)."""
+        instances = []
+        for section in self.sections:
+            if not section.startswith(INSTANCE_SECTION_PREFIX):
+                continue
+            name = section[len(INSTANCE_SECTION_PREFIX):].strip()
+            if not name:
+                raise ValueError(f"La sección [{section}] no indica el nombre de la instancia.")
+            defaults = InstanceSettings(name=name, section=section)
+            strategies = defaults.strategies
+            if "strategies" in self.sections[section]:
+                strategies = tuple(self.get_list(section, "strategies"))
+                if not strategies:
+                    raise ValueError(f"La instancia [{section}] no tiene estrategias configuradas.")
+            instances.append(InstanceSettings(
+                name=name,
+                section=section,
+                strategies=strategies,
+                timeout_seconds=self.get_float(section, "timeout_seconds", defaults.timeout_seconds),
+            ))
+        return instances
+
+def _parse_monitoring(snapshot: ConfigSnapshot) -> Optional[MonitoringSettings]:
+    """Convierte [Monitoring] a MonitoringSettings; None si la sección no existe."""
+    if "Monitoring" not in snapshot.sections:
+        return None
+    section = "Monitoring"
+    defaults = MonitoringSettings(max_tasks_limit=0)
+    try:
+        check_interval_seconds = snapshot.get_float(section, "check_interval_seconds")
+    except KeyError:
+        try:
+            check_interval_seconds = snapshot.get_float(section, "check_interval_minutes") * 60
+        except KeyError:
+            check_interval_seconds = defaults.check_interval_seconds
+    return MonitoringSettings(
+        max_tasks_limit=snapshot.get_int(section, "max_tasks_limit"),
+        check_interval_seconds=check_interval_seconds,
+        long_running_task_threshold_minutes=snapshot.get_int(
+            section, "long_running_task_threshold_minutes", defaults.long_running_task_threshold_minutes),
+        long_running_top_n=snapshot.get_int(section, "long_running_top_n", defaults.long_running_top_n),
+        parallel_strategies=snapshot.get_bool(section, "parallel_strategies", defaults.parallel_strategies),
+        max_parallel_strategies=snapshot.get_int(section, "max_parallel_strategies", defaults.max_parallel_strategies),
+        strategy_timeout_seconds=snapshot.get_float(section, "strategy_timeout_seconds", defaults.strategy_timeout_seconds),
+        batch_queries=snapshot.get_bool(section, "batch_queries", defaults.batch_queries),
+        summary_mode=snapshot.get_bool(section, "summary_mode", defaults.summary_mode),
+        incremental_mode=snapshot.get_bool(section, "incremental_mode", defaults.incremental_mode),
+        full_resync_cycles=snapshot.get_int(section, "full_resync_cycles", defaults.full_resync_cycles),
+        dimension_cache=snapshot.get_bool(section, "dimension_cache", defaults.dimension_cache),
+        dimension_cache_ttl_minutes=snapshot.get_float(section, "dimension_cache_ttl_minutes",
+                                                       defaults.dimension_cache_ttl_minutes),
+        dimension_cache_max_entries=snapshot.get_int(section, "dimension_cache_max_entries",
+                                                     defaults.dimension_cache_max_entries),
+        adaptive_polling=snapshot.get_bool(section, "adaptive_polling", defaults.adaptive_polling),
+        min_interval_seconds=snapshot.get_float(section, "min_interval_seconds", defaults.min_interval_seconds),
+        max_interval_seconds=snapshot.get_float(section, "max_interval_seconds", defaults.max_interval_seconds),
+        backoff_factor=snapshot.get_float(section, "backoff_factor", defaults.backoff_factor),
+        pressure_ratio=snapshot.get_float(section, "pressure_ratio", defaults.pressure_ratio),
+    )
+
+# Valores por lista de [Filters]: cada lista va a un IN (...) con un parámetro por valor
+MAX_FILTER_VALUES = 500
+
+def _parse_filters(snapshot: ConfigSnapshot) -> TaskFilters:
+    """Convierte [Filters] a TaskFilters; sin la sección no se filtra nada."""
+    section = "Filters"
+    if section not in snapshot.sections:
+        return TaskFilters()
+    lists = {}
+    for key in ("include_task_types", "exclude_task_types", "include_users", "exclude_users"):
+        values = tuple(snapshot.get_list(section, key, []))
+        if len(values) > MAX_FILTER_VALUES:
+            raise ValueError(f"'{section}.{key}' admite hasta {MAX_FILTER_VALUES} valores ({len(values)} configurados).")
+        lists[key] = values
+    min_duration_minutes = snapshot.get_int(section, "min_duration_minutes", 0)
+    if min_duration_minutes < 0:
+        raise ValueError(f"'{section}.min_duration_minutes' no puede ser negativo: {min_duration_minutes}")
+    return TaskFilters(min_duration_minutes=min_duration_minutes, **lists)
+
 class ConfigManager:
     """
     Gestiona la carga de configuración desde un archivo INI,
     incluyendo el descifrado de la cadena de conexión.
+
+    La configuración vigente es un ConfigSnapshot inmutable. `reload_if_changed()`
+    compara la fecha de modificación del archivo y, si cambió, construye un snapshot
+    nuevo y lo reemplaza de forma atómica: los lectores ven la versión anterior o la
+    nueva completa, nunca una mezcla. Si el archivo nuevo es inválido se conserva el
+    snapshot anterior.
     """
     _instance = None
     _config = None
+    _snapshot: Optional[ConfigSnapshot] = None
     _config_path = 'config.ini' # Ruta por defecto, ajusta si es necesario
+    _reload_lock = threading.Lock()
 
     def __new__(cls):
         if cls._instance is None:
@@ -17,33 +242,146 @@ class ConfigManager:
             cls._load_config()
         return cls._instance
 
+    @classmethod
+    def _build_snapshot(cls, parser: configparser.ConfigParser, mtime: float) -> ConfigSnapshot:
+        previous = cls._snapshot
+        sections = MappingProxyType({
+            name: MappingProxyType(dict(parser[name])) for name in parser.sections()
+        })
+        secrets, secret_errors = {}, {}
+        for name, values in sections.items():
+            for key in SECRET_KEYS.intersection(values):
+                # Si el valor cifrado no cambió, se reutiliza el texto ya descifrado
+                if (previous is not None and (name, key) in previous.secrets
+                        and previous.sections.get(name, {}).get(key) == values[key]):
+                    secrets[(name, key)] = previous.secrets[(name, key)]
+                    continue
+                if not values[key].strip():
+                    secret_errors[(name, key)] = "el valor está vacío"
+                    continue
+                if not EncryptionUtil.is_encrypted(values[key]):
+                    # Texto plano: no se carga cryptography. Se admite, pero expone las credenciales
+                    logging.warning(f"'{key}' de [{name}] no está cifrada; se usa tal cual. "
+                                    "Cífrala con src/utils/encryption.py para no guardar credenciales en texto plano.")
+                    secrets[(name, key)] = values[key].strip()
+                    continue
+                try:
+                    secrets[(name, key)] = EncryptionUtil.decrypt(values[key].encode('utf-8'))
+                except Exception as e:
+                    secret_errors[(name, key)] = str(e)
+        snapshot = ConfigSnapshot(
+            version=(previous.version + 1) if previous is not None else 1,
+            mtime=mtime,
+            sections=sections,
+            monitoring=None,
+            secrets=MappingProxyType(secrets),
+            secret_errors=MappingProxyType(secret_errors),
+        )
+        return replace(snapshot, monitoring=_parse_monitoring(snapshot), filters=_parse_filters(snapshot))
+
     @classmethod
     def _load_config(cls):
-        cls._config = configparser.ConfigParser()
+        # Permite comentarios al final de la línea (ej. "max_tasks_limit = 3 # comentario")
+        parser = configparser.ConfigParser(inline_comment_prefixes=('#', ';'))
         if not os.path.exists(cls._config_path):
             raise FileNotFoundError(f"El archivo de configuración '{cls._config_path}' no se encontró.")
-        cls._config.read(cls._config_path)
+        mtime = os.stat(cls._config_path).st_mtime
+        parser.read(cls._config_path)
+        snapshot = cls._build_snapshot(parser, mtime)
+        # Reemplazo atómico: una sola asignación de referencia
+        cls._config = parser
+        cls._snapshot = snapshot
+
+    @classmethod
+    def snapshot(cls) -> ConfigSnapshot:
+        """Retorna el snapshot de configuración vigente (sin leer el archivo)."""
+        snapshot = cls._snapshot
+        if snapshot is None:
+            cls._load_config() # Asegura que la configuración esté cargada
+            snapshot = cls._snapshot
+        return snapshot
+
+    @classmethod
+    def reload_if_changed(cls) -> bool:
+        """
+        Recarga la configuración si el archivo cambió desde la última carga (por mtime).
+        Retorna True si se instaló un snapshot nuevo.
+        """
+        current = cls.snapshot()
+        try:
+            mtime = os.stat(cls._config_path).st_mtime
+        except OSError as e:
+            logging.error(f"No se pudo verificar el archivo de configuración '{cls._config_path}': {e}")
+            return False
+        if mtime == current.mtime:
+            return False
+        with cls._reload_lock:
+            if cls._snapshot is not current: # Otro hilo ya recargó
+                return False
+            try:
+                cls._load_config()
+            except Exception as e:
+                logging.error(f"Configuración inválida en '{cls._config_path}'; se mantiene la anterior: {e}")
+                # Evita reintentar en cada llamada hasta que el archivo vuelva a cambiar
+                cls._snapshot = replace(current, mtime=mtime)
+                return False
+        logging.info(f"Configuración recargada desde '{cls._config_path}' (versión {cls._snapshot.version}).")
+        return True
+
+    @classmethod
+    def monitoring(cls) -> MonitoringSettings:
+        """Retorna los valores tipados de [Monitoring] del snapshot vigente."""
+        settings = cls.snapshot().monitoring
+        if settings is None:
+            raise KeyError("Sección 'Monitoring' no encontrada en el archivo de configuración.")
+        return settings
+
+    @classmethod
+    def task_filters(cls) -> TaskFilters:
+        """Retorna los filtros tipados de [Filters] del snapshot vigente (sin filtros si no existe)."""
+        return cls.snapshot().filters
+
+    @classmethod
+    def instances(cls) -> List[InstanceSettings]:
+        """Retorna las bases de datos de las secciones [Instance.<nombre>] (vacío en modo de una sola base)."""
+        return cls.snapshot().instances()
+
+    @classmethod
+    def get_list(cls, section: str, key: str, default: Optional[List[str]] = None) -> List[str]:
+        """
+        Obtiene una lista de valores separados por comas.
+        Si la clave no existe y se indicó un valor por defecto, lo retorna.
+        """
+        return cls.snapshot().get_list(section, key, default)
 
     @classmethod
     def get_setting(cls, section: str, key: str) -> str:
         """
         Obtiene un valor de configuración.
-        Si es la cadena de conexión, la descifra.
+        Si es la cadena de conexión, retorna el valor ya descifrado.
         """
-        if cls._config is None:
-            cls._load_config() # Asegura que la configuración esté cargada
+        return cls.snapshot().get_setting(section, key)
 
-        if section not in cls._config:
-            raise KeyError(f"Sección '{section}' no encontrada en el archivo de configuración.")
-        if key not in cls._config[section]:
-            raise KeyError(f"Clave '{key}' no encontrada en la sección '{section}'.")
+    @classmethod
+    def get_int(cls, section: str, key: str, default: Optional[int] = None) -> int:
+        """
+        Obtiene un valor entero de configuración.
+        Si la clave no existe y se indicó un valor por defecto, lo retorna.
+        """
+        return cls.snapshot().get_int(section, key, default)
 
-        value = cls._config[section][key]
+    @classmethod
+    def get_float(cls, section: str, key: str, default: Optional[float] = None) -> float:
+        """
+        Obtiene un valor numérico (float) de configuración.
+        Si la clave no existe y se indicó un valor por defecto, lo retorna.
+        """
+        return cls.snapshot().get_float(section, key, default)
 
-        # Si la clave es la cadena de conexión, intenta descifrarla
-        if key == "database_connection_string":
-            try:
-                return EncryptionUtil.decrypt(value.encode('utf-8'))
-            except Exception as e:
-                raise ValueError(f"No se pudo descifrar la cadena de conexión: {e}")
-        return value
\ No newline at end of file
+    @classmethod
+    def get_bool(cls, section: str, key: str, default: Optional[bool] = None) -> bool:
+        """
+        Obtiene un valor booleano de configuración (true/false, yes/no, on/off, 1/0).
+        Si la clave no existe y se indicó un valor por defecto, lo retorna.
+        """
+        return cls.snapshot().get_bool(section, key, default)
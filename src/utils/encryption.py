@@ -1,19 +1,30 @@
-from cryptography.fernet import Fernet
 import os
-from dotenv import load_dotenv
+import re
 
-load_dotenv() # Carga las variables de entorno del archivo .env
+# Un token Fernet es base64 (URL-safe) y comienza con el byte de versión 0x80 seguido de la
+# marca de tiempo, así que su texto empieza con "gAAAAA". Una cadena ODBC nunca coincide (lleva ';' y '=').
+_FERNET_TOKEN = re.compile(r"gAAAAA[A-Za-z0-9_\-]+={0,2}")
 
 class EncryptionUtil:
     """
     Utilidad para cifrar y descifrar cadenas de texto usando Fernet.
-    La clave de cifrado se carga desde las variables de entorno.
+    La clave de cifrado se carga desde las variables de entorno (o del archivo .env).
+    cryptography y python-dotenv se importan al cifrar o descifrar por primera vez:
+    una configuración sin valores cifrados no los carga.
     """
     _fernet = None
 
+    @staticmethod
+    def is_encrypted(value: str) -> bool:
+        """Indica si el valor tiene la forma de un token Fernet (y por lo tanto debe descifrarse)."""
+        return _FERNET_TOKEN.fullmatch(value.strip()) is not None
+
     @classmethod
     def _get_fernet_instance(cls):
         if cls._fernet is None:
+            from cryptography.fernet import Fernet
+            from dotenv import load_dotenv
+            load_dotenv() # Carga las variables de entorno del archivo .env
             key = os.getenv("ENCRYPTION_KEY")
             if not key:
                 raise ValueError("ENCRYPTION_KEY no está configurada en las variables de entorno.")
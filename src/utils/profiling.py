@@ -0,0 +1,47 @@
+import cProfile
+import functools
+import io
+import logging
+import pstats
+from typing import Callable, TypeVar
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+T = TypeVar("T")
+
+def profile_call(func: Callable[[], T], path: str, sort: str = "cumulative", limit: int = 40) -> T:
+    """
+    Ejecuta `func` bajo cProfile y guarda el perfil en `path` (formato pstats, para
+    `python -m pstats` o visores como snakeviz) y un resumen legible en `path`.txt
+    con las `limit` funciones de mayor tiempo acumulado.
+    El perfil se guarda aunque `func` falle. cProfile solo mide el hilo que llama a `func`.
+    """
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func)
+    finally:
+        try:
+            profiler.dump_stats(path)
+            report = io.StringIO()
+            pstats.Stats(profiler, stream=report).strip_dirs().sort_stats(sort).print_stats(limit)
+            with open(f"{path}.txt", "w", encoding="utf-8") as f:
+                f.write(report.getvalue())
+            logging.info(f"Perfil del ciclo guardado en '{path}' (resumen en '{path}.txt').")
+        except OSError as e:
+            logging.error(f"No se pudo guardar el perfil en '{path}': {e}")
+
+def profile_first_call(func: Callable[..., T], path: str) -> Callable[..., T]:
+    """
+    Envuelve `func` para perfilar solo su primera ejecución (ej. el primer ciclo del modo residente).
+    Los argumentos se pasan tal cual (ej. las categorías de AdaptivePollingScheduler).
+    """
+    profiled = False
+
+    def wrapper(*args, **kwargs) -> T:
+        nonlocal profiled
+        if profiled:
+            return func(*args, **kwargs)
+        profiled = True
+        return profile_call(functools.partial(func, *args, **kwargs), path)
+
+    return wrapper
@@ -0,0 +1,67 @@
+import threading
+import time
+from typing import Optional
+
+class TokenBucket:
+    """
+    Limitador de tasa de tipo "token bucket", seguro para uso desde varios hilos.
+    Permite ráfagas de hasta `capacity` operaciones y un promedio de
+    `rate_per_second` operaciones por segundo.
+    """
+    def __init__(self, rate_per_second: float, capacity: float = 1):
+        if rate_per_second <= 0 or capacity < 1:
+            raise ValueError("La tasa debe ser mayor que cero y la capacidad al menos 1.")
+        self._rate = rate_per_second
+        self._capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self._capacity, self._tokens + (now - self._updated_at) * self._rate)
+        self._updated_at = now
+
+    def pause(self, seconds: float):
+        """Detiene la entrega de tokens durante `seconds` (ej. ante un Retry-After del servidor)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            # Al reanudar se permite un único envío de prueba, sin la ráfaga acumulada
+            self._tokens = min(self._tokens, 1)
+            self._updated_at = self._paused_until
+
+    def try_acquire(self) -> float:
+        """
+        Intenta tomar un token. Retorna 0 si lo obtuvo; en otro caso, los segundos
+        que faltan para que haya uno disponible.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if now < self._paused_until:
+                return self._paused_until - now
+            self._refill(now)
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self._rate
+
+    def acquire(self, timeout: Optional[float] = None, stop_event: Optional[threading.Event] = None) -> bool:
+        """
+        Espera hasta obtener un token. Retorna False si se agotó `timeout`
+        o si se activó `stop_event` mientras esperaba.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait_seconds = self.try_acquire()
+            if wait_seconds == 0:
+                return True
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait_seconds = min(wait_seconds, remaining)
+            if stop_event is not None:
+                if stop_event.wait(wait_seconds):
+                    return False
+            else:
+                time.sleep(wait_seconds)
@@ -0,0 +1,42 @@
+from collections.abc import Mapping
+from typing import Any, Dict, Iterable, Optional, Sequence
+
+class ColumnMap:
+    """
+    Resuelve una sola vez por query la posición de cada columna, para leer las filas
+    por índice (row[i]) en lugar de construir un diccionario por fila.
+
+    Acepta tanto filas de pyodbc (pyodbc.Row, que expone `cursor_description`) como
+    diccionarios (ej. el camino por lotes o executors alternativos): en ese caso la
+    "posición" es el propio nombre de la columna, y row[clave] funciona igual.
+    Una columna ausente se resuelve como None y se lee como None.
+    """
+    __slots__ = ("_keys",)
+
+    def __init__(self, keys: Dict[str, Any]):
+        self._keys = keys
+
+    @classmethod
+    def from_columns(cls, columns: Sequence[str], names: Iterable[str]) -> "ColumnMap":
+        """Construye el mapa a partir de la lista de nombres de columna del cursor."""
+        positions = {column: index for index, column in enumerate(columns)}
+        return cls({name: positions.get(name) for name in names})
+
+    @classmethod
+    def from_row(cls, row: Any, names: Iterable[str]) -> "ColumnMap":
+        """Construye el mapa a partir de la primera fila de un resultado."""
+        if isinstance(row, Mapping):
+            return cls({name: (name if name in row else None) for name in names})
+        description = getattr(row, "cursor_description", None)
+        if description is None:
+            raise TypeError(f"No se pueden resolver las columnas de una fila de tipo '{type(row).__name__}'.")
+        return cls.from_columns([column[0] for column in description], names)
+
+    def key(self, name: str) -> Optional[Any]:
+        """Retorna el índice (o la clave) de la columna, o None si no está en el resultado."""
+        return self._keys.get(name)
+
+    def get(self, row: Any, name: str) -> Any:
+        """Lee una columna de la fila; retorna None si la columna no está en el resultado."""
+        key = self._keys.get(name)
+        return None if key is None else row[key]
@@ -0,0 +1,56 @@
+from typing import Any, Iterable, List, NamedTuple, Sequence, Tuple, Union
+
+class Query(NamedTuple):
+    """
+    Un query con marcadores '?' y sus parámetros, en orden.
+
+    Los valores que cambian entre ciclos (marcas de agua, claves, filtros de [Filters]) viajan
+    como parámetros y no dentro del texto: el texto de cada query es siempre el mismo, así que
+    PyODBCExecutor reutiliza la sentencia preparada y SQL Server, el plan de ejecución.
+    Las constantes fijas (ej. TaskStatus = 'ACTIVE') quedan en el texto: no cambian el plan y
+    permiten a SQL Server usar índices filtrados por esos valores.
+    """
+    sql: str
+    params: Tuple[Any, ...] = ()
+
+QueryLike = Union[str, Query]
+
+def as_query(query: QueryLike) -> Query:
+    """Normaliza un query: el texto sin parámetros se acepta tal cual."""
+    if isinstance(query, Query):
+        return query
+    return Query(query)
+
+def placeholders(count: int) -> str:
+    """Marcadores para una lista IN (...), ej. placeholders(3) == "?, ?, ?"."""
+    return ", ".join("?" * count)
+
+# Tamaños de las listas IN (...): se completan hasta el siguiente tamaño repitiendo el último
+# valor, para que las listas de distinto largo compartan unos pocos textos (y planes)
+IN_LIST_SIZES = (1, 8, 32, 128, 500)
+
+def padded_in_list(values: Sequence[Any]) -> Tuple[str, Tuple[Any, ...]]:
+    """
+    Retorna los marcadores y los parámetros de una lista IN (...) de hasta 500 valores,
+    completada hasta un tamaño de IN_LIST_SIZES.
+    """
+    if not values:
+        raise ValueError("La lista IN (...) no puede estar vacía.")
+    size = next((size for size in IN_LIST_SIZES if size >= len(values)), None)
+    if size is None:
+        raise ValueError(f"La lista IN (...) admite hasta {IN_LIST_SIZES[-1]} valores.")
+    padded = tuple(values) + (values[-1],) * (size - len(values))
+    return placeholders(size), padded
+
+def join_batch(queries: Iterable[QueryLike]) -> Query:
+    """
+    Une varios SELECT en un único lote: los textos se separan con ';' y los parámetros
+    se concatenan en el mismo orden que sus marcadores.
+    """
+    statements: List[str] = []
+    params: List[Any] = []
+    for query in map(as_query, queries):
+        statements.append(query.sql.strip().rstrip(";"))
+        params.extend(query.params)
+    # SET NOCOUNT ON evita los conjuntos de "filas afectadas" entre los SELECT
+    return Query("SET NOCOUNT ON;\n" + ";\n".join(statements) + ";", tuple(params))
@@ -0,0 +1,132 @@
+import itertools
+import json
+import logging
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Iterator, Optional
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+SPAN_LOGGER_NAME = "epicor_monitor.spans"
+
+# Logger dedicado: cada registro es una línea JSON (sin el prefijo del log general)
+_span_logger = logging.getLogger(SPAN_LOGGER_NAME)
+_span_logger.propagate = False
+_enabled = False
+_span_ids = itertools.count(1)
+
+# Ciclo y span en curso. Las variables de contexto siguen al código que se ejecuta, incluidos
+# los hilos del modo paralelo (el monitor les copia el contexto al enviarles la estrategia).
+_cycle_id: ContextVar[Optional[str]] = ContextVar("epicor_monitor_cycle_id", default=None)
+_current_span: ContextVar[Optional["Span"]] = ContextVar("epicor_monitor_span", default=None)
+
+def configure(enabled: bool, path: Optional[str] = None):
+    """
+    Habilita o deshabilita la emisión de spans. Con `path` los registros JSON se escriben
+    en ese archivo (una línea por span); sin él, en stderr.
+    """
+    global _enabled
+    for handler in list(_span_logger.handlers):
+        _span_logger.removeHandler(handler)
+        handler.close()
+    _enabled = enabled
+    if not enabled:
+        return
+    handler = logging.FileHandler(path, encoding="utf-8") if path else logging.StreamHandler(sys.stderr)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    _span_logger.addHandler(handler)
+    _span_logger.setLevel(logging.INFO)
+    logging.info(f"Trazas de tiempos habilitadas ({path or 'stderr'}).")
+
+def is_enabled() -> bool:
+    return _enabled
+
+def current_cycle_id() -> Optional[str]:
+    return _cycle_id.get()
+
+@contextmanager
+def cycle(cycle_id: Optional[str] = None) -> Iterator[str]:
+    """Asigna un identificador al ciclo de monitoreo; todos los spans del bloque lo incluyen."""
+    cycle_id = cycle_id or uuid.uuid4().hex[:12]
+    token = _cycle_id.set(cycle_id)
+    try:
+        yield cycle_id
+    finally:
+        _cycle_id.reset(token)
+
+def _emit(name: str, span_id: int, parent: Optional["Span"], seconds: float, status: str, attributes: dict):
+    record = {
+        "ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+        "cycle_id": _cycle_id.get(),
+        "span": name,
+        "span_id": span_id,
+        "parent_id": parent.span_id if parent is not None else None,
+        "duration_ms": round(seconds * 1000, 3),
+        "status": status,
+        "thread": threading.current_thread().name,
+    }
+    record.update(attributes)
+    _span_logger.info(json.dumps(record, ensure_ascii=False, default=str))
+
+class Span:
+    """Mide un bloque `with` y lo emite como registro JSON al salir. `set()` agrega atributos."""
+    __slots__ = ("name", "span_id", "attributes", "_parent", "_started", "_token")
+
+    def __init__(self, name: str, attributes: dict):
+        self.name = name
+        self.span_id = next(_span_ids)
+        self.attributes = attributes
+        self._parent = None
+        self._started = 0.0
+        self._token = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def __enter__(self) -> "Span":
+        self._parent = _current_span.get()
+        self._token = _current_span.set(self)
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self._started
+        _current_span.reset(self._token)
+        if exc_type is not None:
+            self.attributes["error"] = exc_type.__name__
+        _emit(self.name, self.span_id, self._parent, seconds, "error" if exc_type is not None else "ok", self.attributes)
+        return False
+
+class _NullSpan:
+    """Span inactivo: sin trazas habilitadas, medir un bloque no cuesta más que un `with` vacío."""
+    __slots__ = ()
+
+    def set(self, **attributes):
+        pass
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+def span(name: str, **attributes):
+    """
+    Retorna un context manager que mide el bloque como un span.
+    Ejemplo: with span("db.execute") as s: ...; s.set(rows=10)
+    """
+    if not _enabled:
+        return _NULL_SPAN
+    return Span(name, attributes)
+
+def record_span(name: str, seconds: float, **attributes):
+    """Emite un span cuya duración se midió aparte (ej. tiempo acumulado en varios fetchmany)."""
+    if _enabled:
+        _emit(name, next(_span_ids), _current_span.get(), seconds, "ok", attributes)
@@ -0,0 +1,143 @@
+"""
+Utilidades compartidas por las pruebas: una configuración temporal para ConfigManager y
+un executor sobre SQLite que ejecuta los queries T-SQL de las estrategias.
+"""
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+from src.core.interfaces import IDatabaseExecutor
+from src.utils.config_manager import ConfigManager
+from src.utils.sql import QueryLike, as_query
+
+@contextmanager
+def temporary_config(text: str):
+    """
+    Instala `text` como config.ini de ConfigManager mientras dura el bloque y restaura
+    después la configuración anterior. Produce la ruta del archivo temporal.
+    """
+    saved = (ConfigManager._instance, ConfigManager._config, ConfigManager._snapshot, ConfigManager._config_path)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "config.ini")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        ConfigManager._instance = ConfigManager._config = ConfigManager._snapshot = None
+        ConfigManager._config_path = path
+        try:
+            yield path
+        finally:
+            (ConfigManager._instance, ConfigManager._config, ConfigManager._snapshot,
+             ConfigManager._config_path) = saved
+
+# --- SQLite como sustituto local de SQL Server ---
+
+# Tablas de Epicor que leen las estrategias (sin el esquema Ice., que SQLite no tiene)
+EPICOR_SCHEMA = """
+CREATE TABLE SysTask (
+    SysTaskNum INTEGER PRIMARY KEY, AgentSchedNum INTEGER, TaskDescription TEXT, TaskType TEXT,
+    StartedOn TEXT, LastActivityOn TEXT, ProgressPercent REAL, SubmitUser TEXT, TaskStatus TEXT,
+    ActivityMsg TEXT);
+CREATE TABLE SysAgentTask (
+    AgentID TEXT, AgentSchedNum INTEGER PRIMARY KEY, TaskDesc TEXT, TaskType TEXT, RunProcedure TEXT,
+    SubmittedOn TEXT, SubmitUser TEXT, ParamMaintProgram TEXT);
+CREATE TABLE SysAgentSched (AgentID TEXT, AgentSchedNum INTEGER, SchedDesc TEXT);
+CREATE TABLE SysAgentTaskParam (AgentSchedNum INTEGER, ParamName TEXT, ParamCharacter TEXT);
+CREATE TABLE SysTaskParam (SysTaskNum INTEGER, ParamName TEXT, ParamCharacter TEXT);
+"""
+
+_UNITS = {"SECOND": timedelta(seconds=1), "MINUTE": timedelta(minutes=1),
+          "HOUR": timedelta(hours=1), "DAY": timedelta(days=1)}
+_DATETIME_TEXT = re.compile(r"^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}")
+
+def _text(value: datetime) -> str:
+    # Milisegundos siempre presentes: el texto se compara en el mismo orden que las fechas
+    return value.isoformat(timespec="milliseconds")
+
+def _parse(value: Optional[str]) -> Optional[datetime]:
+    return None if value is None else datetime.fromisoformat(value)
+
+def _truncate(value: datetime, unit: str) -> datetime:
+    """Trunca al inicio de la unidad: DATEDIFF de SQL Server cuenta los límites cruzados."""
+    return datetime.min + ((value - datetime.min) // _UNITS[unit]) * _UNITS[unit]
+
+def _dateadd(unit: str, amount: float, value: Optional[str]) -> Optional[str]:
+    if amount is None or value is None:
+        return None
+    return _text(_parse(value) + amount * _UNITS[unit])
+
+def _datediff(unit: str, start: Optional[str], end: Optional[str]) -> Optional[int]:
+    if start is None or end is None:
+        return None
+    return (_truncate(_parse(end), unit) - _truncate(_parse(start), unit)) // _UNITS[unit]
+
+def _encode(value: Any) -> Any:
+    return _text(value) if isinstance(value, datetime) else value
+
+def _decode(value: Any) -> Any:
+    if isinstance(value, str) and _DATETIME_TEXT.match(value):
+        return datetime.fromisoformat(value)
+    return value
+
+def translate(sql: str) -> str:
+    """Traduce el T-SQL de las estrategias al dialecto de SQLite."""
+    sql = re.sub(r"\b[Ii]ce\.", "", sql)
+    sql = re.sub(r"\b(DATEADD|DATEDIFF)\(\s*(\w+)\s*,", r"\1('\2',", sql)
+    sql = sql.replace("CURRENT_TIMESTAMP", "SERVER_NOW()").replace("ISNULL(", "IFNULL(")
+    top = re.search(r"\bSELECT TOP (\d+)\b", sql)
+    if top:
+        sql = sql[:top.start()] + "SELECT" + sql[top.end():]
+        sql = sql.rstrip().rstrip(";") + f"\nLIMIT {top.group(1)}"
+    return sql
+
+class SQLiteExecutor(IDatabaseExecutor):
+    """
+    IDatabaseExecutor sobre una base SQLite en memoria con las tablas de Epicor, para
+    ejecutar los mismos queries (con sus parámetros) que PyODBCExecutor envía a SQL Server.
+    Las fechas se guardan como texto ISO y se devuelven como datetime. `now` es la hora del
+    servidor (CURRENT_TIMESTAMP, hora local) y `delay_seconds` retrasa cada query (instancia lenta).
+    """
+    def __init__(self, now: datetime = datetime(2024, 1, 1, 12, 0), delay_seconds: float = 0.0):
+        self.now = now
+        self.delay_seconds = delay_seconds
+        self.queries: List[str] = []
+        self.closed = False
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(":memory:", check_same_thread=False)
+        self._connection.create_function("DATEADD", 3, _dateadd)
+        self._connection.create_function("DATEDIFF", 3, _datediff)
+        self._connection.create_function("SERVER_NOW", 0, lambda: _text(self.now))
+        self._connection.executescript(EPICOR_SCHEMA)
+
+    def insert(self, table: str, rows: Iterable[Dict[str, Any]]):
+        """Inserta filas (diccionarios columna -> valor) en una tabla de Epicor."""
+        with self._lock:
+            for row in rows:
+                columns = list(row)
+                self._connection.execute(
+                    f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                    [_encode(row[column]) for column in columns])
+            self._connection.commit()
+
+    def modify(self, sql: str, params: Iterable[Any] = ()):
+        """Ejecuta un UPDATE/DELETE sobre las tablas (simula cambios en Epicor entre ciclos)."""
+        with self._lock:
+            self._connection.execute(sql, [_encode(param) for param in params])
+            self._connection.commit()
+
+    def execute_query(self, query: QueryLike) -> List[dict]:
+        query = as_query(query)
+        if self.delay_seconds:
+            threading.Event().wait(self.delay_seconds)
+        with self._lock:
+            self.queries.append(query.sql)
+            cursor = self._connection.execute(translate(query.sql), [_encode(param) for param in query.params])
+            columns = [column[0] for column in cursor.description]
+            return [{column: _decode(value) for column, value in zip(columns, row)} for row in cursor.fetchall()]
+
+    def close(self):
+        self.closed = True
+        self._connection.close()
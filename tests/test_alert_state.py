@@ -0,0 +1,102 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+from src.core.alert_state import AlertStateTracker, InMemoryStateStore, SQLiteStateStore
+from src.models import Task, TaskStatistics
+
+def task(task_id: str) -> Task:
+    return Task(task_id=task_id, task_description=f"Tarea {task_id}", start_time=None, submit_user="epicor",
+                duration_minutes=90)
+
+def statistics(over_limit: bool = False, longest: str = None) -> TaskStatistics:
+    return TaskStatistics(category_name="Proceso Activo", total_tasks=5, over_limit=over_limit,
+                          longest_running_task=task(longest) if longest else None)
+
+class AlertStateTrackerTests:
+    """Casos comunes a ambos almacenes; cada subclase define `make_store`."""
+    def make_store(self):
+        raise NotImplementedError
+
+    def setUp(self):
+        self.store = self.make_store()
+        self.addCleanup(self.store.close)
+        self.now = 1000.0
+        clock = mock.patch("src.core.alert_state.time.time", side_effect=lambda: self.now)
+        clock.start()
+        self.addCleanup(clock.stop)
+        self.tracker = AlertStateTracker(self.store, renotify_minutes=60)
+
+    def test_repeated_statistics_are_notified_once(self):
+        self.assertTrue(self.tracker.should_notify_statistics(statistics(longest="1")))
+        self.assertFalse(self.tracker.should_notify_statistics(statistics(longest="1")))
+
+    def test_statistics_transitions_are_notified(self):
+        self.tracker.should_notify_statistics(statistics(longest="1"))
+        self.assertTrue(self.tracker.should_notify_statistics(statistics(over_limit=True, longest="1")))
+        self.assertTrue(self.tracker.should_notify_statistics(statistics(over_limit=True, longest="2")))
+        self.assertTrue(self.tracker.should_notify_statistics(statistics(over_limit=False, longest="2")))
+
+    def test_missing_longest_task_is_not_a_transition(self):
+        self.tracker.should_notify_statistics(statistics(longest="1"))
+        self.assertFalse(self.tracker.should_notify_statistics(statistics()))
+        # La tarea anterior sigue registrada: reaparecer no vuelve a notificar
+        self.assertFalse(self.tracker.should_notify_statistics(statistics(longest="1")))
+
+    def test_unchanged_statistics_are_renotified_after_interval(self):
+        self.tracker.should_notify_statistics(statistics(over_limit=True))
+        self.now += 59 * 60
+        self.assertFalse(self.tracker.should_notify_statistics(statistics(over_limit=True)))
+        self.now += 60
+        self.assertTrue(self.tracker.should_notify_statistics(statistics(over_limit=True)))
+        # El recordatorio reinicia el intervalo
+        self.now += 60
+        self.assertFalse(self.tracker.should_notify_statistics(statistics(over_limit=True)))
+
+    def test_zero_renotify_never_repeats(self):
+        tracker = AlertStateTracker(self.store, renotify_minutes=0)
+        self.assertTrue(tracker.should_notify_task("Proceso Activo", task("1")))
+        self.now += 365 * 24 * 3600
+        self.assertFalse(tracker.should_notify_task("Proceso Activo", task("1")))
+
+    def test_task_is_notified_once_and_renotified_after_interval(self):
+        self.assertTrue(self.tracker.should_notify_task("Proceso Activo", task("1")))
+        self.assertFalse(self.tracker.should_notify_task("Proceso Activo", task("1")))
+        # La misma tarea en otra categoría es otra alerta
+        self.assertTrue(self.tracker.should_notify_task("Mandado a Someter", task("1")))
+        self.now += 60 * 60
+        self.assertTrue(self.tracker.should_notify_task("Proceso Activo", task("1")))
+
+    def test_retain_forgets_tasks_below_threshold(self):
+        for task_id in ("1", "2"):
+            self.tracker.should_notify_task("Proceso Activo", task(task_id))
+        self.tracker.should_notify_task("Mandado a Someter", task("3"))
+        self.tracker.retain_tasks("Proceso Activo", ["2"])
+        self.assertTrue(self.tracker.should_notify_task("Proceso Activo", task("1")))
+        self.assertFalse(self.tracker.should_notify_task("Proceso Activo", task("2")))
+        # Las tareas de otras categorías no se tocan
+        self.assertFalse(self.tracker.should_notify_task("Mandado a Someter", task("3")))
+
+class InMemoryAlertStateTest(AlertStateTrackerTests, unittest.TestCase):
+    def make_store(self):
+        return InMemoryStateStore()
+
+class SQLiteAlertStateTest(AlertStateTrackerTests, unittest.TestCase):
+    def make_store(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "state.db")
+        return SQLiteStateStore(self.path)
+
+    def test_state_survives_reopening(self):
+        self.assertTrue(self.tracker.should_notify_statistics(statistics(over_limit=True, longest="1")))
+        self.assertTrue(self.tracker.should_notify_task("Proceso Activo", task("1")))
+        self.store.close()
+        self.store = SQLiteStateStore(self.path)
+        tracker = AlertStateTracker(self.store, renotify_minutes=60)
+        self.assertFalse(tracker.should_notify_statistics(statistics(over_limit=True, longest="1")))
+        self.assertFalse(tracker.should_notify_task("Proceso Activo", task("1")))
+        self.store.close()
+
+if __name__ == "__main__":
+    unittest.main()
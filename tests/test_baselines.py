@@ -0,0 +1,216 @@
+import math
+import random
+import statistics as exact
+import unittest
+from src.core.alert_state import InMemoryStateStore
+from src.core.baselines import BaselineEngine, DurationBaseline, QuantileSketch, RunningStats
+from src.models import Task
+
+def task(task_id: str, duration, function_id: str = "Erp.Rpt.Aging") -> Task:
+    return Task(task_id=task_id, task_description=f"Tarea {task_id}", start_time=None, submit_user="epicor",
+                function_id=function_id, duration_minutes=duration)
+
+class RunningStatsTest(unittest.TestCase):
+    def test_matches_exact_mean_and_variance(self):
+        values = [random.Random(1).uniform(0, 500) for _ in range(1000)]
+        stats = RunningStats()
+        for value in values:
+            stats.add(value)
+        self.assertEqual(stats.count, 1000)
+        self.assertAlmostEqual(stats.mean, exact.mean(values), places=9)
+        self.assertAlmostEqual(stats.variance, exact.variance(values), places=6)
+        self.assertAlmostEqual(stats.stddev, exact.stdev(values), places=9)
+
+    def test_single_value_has_no_variance(self):
+        stats = RunningStats()
+        stats.add(42)
+        self.assertEqual((stats.mean, stats.variance), (42, 0.0))
+
+    def test_merge_equals_sequential(self):
+        generator = random.Random(2)
+        values = [generator.gauss(60, 15) for _ in range(500)]
+        left, right, full = RunningStats(), RunningStats(), RunningStats()
+        for value in values[:120]:
+            left.add(value)
+        for value in values[120:]:
+            right.add(value)
+        for value in values:
+            full.add(value)
+        left.merge(right)
+        self.assertEqual(left.count, full.count)
+        self.assertAlmostEqual(left.mean, full.mean, places=9)
+        self.assertAlmostEqual(left.m2, full.m2, places=6)
+
+    def test_merge_with_empty(self):
+        stats = RunningStats()
+        stats.add(10)
+        stats.add(20)
+        stats.merge(RunningStats())
+        self.assertEqual((stats.count, stats.mean), (2, 15))
+        empty = RunningStats()
+        empty.merge(stats)
+        self.assertEqual((empty.count, empty.mean, empty.m2), (2, 15, 50))
+
+class QuantileSketchTest(unittest.TestCase):
+    def assert_relative_error(self, sketch: QuantileSketch, values, quantiles=(0.01, 0.25, 0.5, 0.9, 0.95, 0.99, 1.0)):
+        ordered = sorted(values)
+        for q in quantiles:
+            expected = ordered[math.floor(q * (len(ordered) - 1))]
+            estimate = sketch.quantile(q)
+            self.assertLessEqual(abs(estimate - expected) / expected, sketch.relative_accuracy + 1e-9,
+                                 f"q={q}: {estimate} frente a {expected}")
+
+    def test_rejects_invalid_accuracy(self):
+        for accuracy in (0, 1, -0.1):
+            with self.assertRaises(ValueError):
+                QuantileSketch(accuracy)
+
+    def test_empty_sketch(self):
+        self.assertIsNone(QuantileSketch().quantile(0.5))
+
+    def test_relative_accuracy(self):
+        generator = random.Random(3)
+        values = [generator.lognormvariate(3, 1.2) for _ in range(5000)]
+        sketch = QuantileSketch(relative_accuracy=0.01)
+        for value in values:
+            sketch.add(value)
+        self.assert_relative_error(sketch, values)
+
+    def test_zero_and_negative_values(self):
+        sketch = QuantileSketch()
+        for value in (0, -1, 0, 10, 20):
+            sketch.add(value)
+        self.assertEqual(sketch.zero_count, 3)
+        self.assertEqual(sketch.quantile(0.25), 0.0)
+        self.assertAlmostEqual(sketch.quantile(1.0), 20, delta=20 * 0.01)
+
+    def test_merge_equals_single_sketch(self):
+        values = [float(value) for value in range(1, 2001)]
+        left, right, full = QuantileSketch(), QuantileSketch(), QuantileSketch()
+        for value in values:
+            (left if value % 3 else right).add(value)
+            full.add(value)
+        left.merge(right)
+        self.assertEqual(left.count, full.count)
+        self.assertEqual(left.bins, full.bins)
+        self.assert_relative_error(left, values)
+
+    def test_collapse_keeps_high_quantiles(self):
+        values = [float(value) for value in range(1, 10001)]
+        sketch = QuantileSketch(relative_accuracy=0.01, max_bins=64)
+        for value in values:
+            sketch.add(value)
+        self.assertLessEqual(len(sketch.bins), 64)
+        self.assertEqual(sum(sketch.bins.values()), len(values))
+        # Se colapsan los buckets bajos: las colas altas conservan la precisión
+        self.assert_relative_error(sketch, values, quantiles=(0.95, 0.99, 1.0))
+        self.assertGreater(sketch.quantile(0.01), values[99])
+
+    def test_merge_respects_max_bins(self):
+        left, right = QuantileSketch(max_bins=16), QuantileSketch(max_bins=16)
+        for value in range(1, 100):
+            left.add(value)
+            right.add(value * 100)
+        left.merge(right)
+        self.assertLessEqual(len(left.bins), 16)
+        self.assertEqual(left.count, 198)
+
+    def test_baseline_state_round_trip(self):
+        baseline = DurationBaseline()
+        for value in (0, 5, 10, 12, 300):
+            baseline.add(value)
+        restored = DurationBaseline.from_state(baseline.to_state())
+        self.assertEqual((restored.stats.count, restored.stats.mean, restored.stats.m2),
+                         (baseline.stats.count, baseline.stats.mean, baseline.stats.m2))
+        self.assertEqual(restored.sketch.bins, baseline.sketch.bins)
+        self.assertEqual(restored.sketch.quantile(0.99), baseline.sketch.quantile(0.99))
+
+class BaselineEngineTest(unittest.TestCase):
+    CATEGORY = "Proceso Activo"
+
+    def setUp(self):
+        self.store = InMemoryStateStore()
+
+    def make_engine(self, **kwargs) -> BaselineEngine:
+        options = dict(min_samples=5, quantile=0.99, z_threshold=3.0, min_excess_minutes=10)
+        options.update(kwargs)
+        return BaselineEngine(self.store, **options)
+
+    def finish(self, engine: BaselineEngine, durations, function_id: str = "Erp.Rpt.Aging", prefix: str = "t"):
+        """Cada duración es una ejecución que se ve activa un ciclo y termina en el siguiente."""
+        for number, duration in enumerate(durations):
+            engine.observe(self.CATEGORY, [task(f"{prefix}{number}", duration, function_id)])
+        engine.observe(self.CATEGORY, [])
+
+    def baseline(self, engine: BaselineEngine, function_id: str = "Erp.Rpt.Aging") -> DurationBaseline:
+        return engine._baselines.get(f"{self.CATEGORY}|{function_id}")
+
+    def test_task_is_observed_once_when_it_finishes(self):
+        engine = self.make_engine()
+        for duration in (10, 20, 30):
+            engine.observe(self.CATEGORY, [task("1", duration)])
+        self.assertIsNone(self.baseline(engine)) # Sigue activa: aún no aporta
+        engine.observe(self.CATEGORY, [])
+        baseline = self.baseline(engine)
+        self.assertEqual(baseline.stats.count, 1)
+        self.assertEqual(baseline.stats.mean, 30) # Su última duración observada
+
+    def test_tasks_without_duration_are_ignored(self):
+        engine = self.make_engine()
+        engine.observe(self.CATEGORY, [task("1", None)])
+        engine.observe(self.CATEGORY, [])
+        self.assertIsNone(self.baseline(engine))
+
+    def test_baseline_key_falls_back_to_description(self):
+        self.assertEqual(BaselineEngine.baseline_key(self.CATEGORY, task("7", 5, function_id=None)),
+                         f"{self.CATEGORY}|Tarea 7")
+
+    def test_anomaly_requires_samples_quantile_and_z_score(self):
+        engine = self.make_engine()
+        self.finish(engine, [10, 11, 12, 9, 10])
+        self.assertEqual(engine.observe(self.CATEGORY, [task("x", 100)])[0].task.task_id, "x")
+        engine = self.make_engine(min_samples=10)
+        self.assertEqual(engine.observe(self.CATEGORY, [task("x", 100)]), [])
+        # Por encima del P99 pero sin superar el margen mínimo
+        self.assertEqual(self.make_engine().observe(self.CATEGORY, [task("x", 20)]), [])
+
+    def test_anomaly_description(self):
+        engine = self.make_engine()
+        self.finish(engine, [10, 11, 12, 9, 10])
+        [anomaly] = engine.observe(self.CATEGORY, [task("x", 100)])
+        self.assertEqual(anomaly.samples, 5)
+        self.assertAlmostEqual(anomaly.mean, 10.4)
+        self.assertIn("5 ejecuciones", anomaly.describe())
+
+    def test_least_recently_used_baseline_is_evicted(self):
+        engine = self.make_engine(max_baselines=2)
+        self.finish(engine, [10], function_id="A", prefix="a")
+        self.finish(engine, [10], function_id="B", prefix="b")
+        self.finish(engine, [10], function_id="A", prefix="a2") # A pasa a ser la más reciente
+        self.finish(engine, [10], function_id="C", prefix="c")
+        self.assertEqual(list(engine._baselines), [f"{self.CATEGORY}|A", f"{self.CATEGORY}|C"])
+        self.assertIsNone(self.store.get(f"baseline:{self.CATEGORY}|B"))
+
+    def test_state_is_reloaded(self):
+        engine = self.make_engine()
+        self.finish(engine, [10, 11, 12, 9, 10])
+        engine.observe(self.CATEGORY, [task("activa", 15)])
+
+        reloaded = self.make_engine()
+        self.assertEqual(self.baseline(reloaded).stats.count, 5)
+        self.assertEqual(reloaded.observe(self.CATEGORY, [task("x", 100)])[0].samples, 5)
+        # La tarea activa antes de recargar se cuenta al terminar
+        self.assertEqual(self.baseline(reloaded).stats.count, 6)
+
+    def test_reload_discards_invalid_state_and_applies_limit(self):
+        engine = self.make_engine()
+        for function_id in ("A", "B", "C"):
+            self.finish(engine, [10], function_id=function_id, prefix=function_id)
+        self.store.set(f"baseline:{self.CATEGORY}|rota", {"count": 1})
+        with self.assertLogs(level="WARNING"):
+            reloaded = self.make_engine(max_baselines=2)
+        self.assertEqual(len(reloaded._baselines), 2)
+        self.assertNotIn(f"{self.CATEGORY}|rota", reloaded._baselines)
+
+if __name__ == "__main__":
+    unittest.main()
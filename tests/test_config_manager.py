@@ -0,0 +1,91 @@
+import os
+import threading
+import unittest
+from src.utils.config_manager import ConfigManager
+from tests.support import temporary_config
+
+CONFIG = """
+[Monitoring]
+max_tasks_limit = {limit}
+check_interval_seconds = {limit}
+"""
+
+class ReloadIfChangedTest(unittest.TestCase):
+    def setUp(self):
+        config = temporary_config(CONFIG.format(limit=10))
+        self.path = config.__enter__()
+        self.addCleanup(config.__exit__, None, None, None)
+        self.mtime = os.stat(self.path).st_mtime
+
+    def rewrite(self, text: str):
+        """Reescribe config.ini con una fecha de modificación posterior (la resolución del mtime varía)."""
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(text)
+        self.mtime += 10
+        os.utime(self.path, (self.mtime, self.mtime))
+
+    def test_unchanged_file_keeps_snapshot(self):
+        snapshot = ConfigManager.snapshot()
+        self.assertFalse(ConfigManager.reload_if_changed())
+        self.assertIs(ConfigManager.snapshot(), snapshot)
+
+    def test_changed_file_installs_new_snapshot(self):
+        previous = ConfigManager.snapshot()
+        self.rewrite(CONFIG.format(limit=25))
+        self.assertTrue(ConfigManager.reload_if_changed())
+        current = ConfigManager.snapshot()
+        self.assertEqual(current.version, previous.version + 1)
+        self.assertEqual(ConfigManager.monitoring().max_tasks_limit, 25)
+        # Quien conserva el snapshot anterior sigue viendo la versión completa anterior
+        self.assertEqual(previous.monitoring.max_tasks_limit, 10)
+        self.assertEqual(previous.get_int("Monitoring", "max_tasks_limit"), 10)
+        self.assertFalse(ConfigManager.reload_if_changed())
+
+    def test_invalid_file_keeps_previous_snapshot_until_next_change(self):
+        previous = ConfigManager.snapshot()
+        self.rewrite(CONFIG.format(limit="muchas"))
+        with self.assertLogs(level="ERROR"):
+            self.assertFalse(ConfigManager.reload_if_changed())
+        self.assertEqual(ConfigManager.monitoring().max_tasks_limit, 10)
+        self.assertEqual(ConfigManager.snapshot().version, previous.version)
+        # No se reintenta en cada llamada mientras el archivo no cambie
+        self.assertFalse(ConfigManager.reload_if_changed())
+        self.rewrite(CONFIG.format(limit=30))
+        self.assertTrue(ConfigManager.reload_if_changed())
+        self.assertEqual(ConfigManager.monitoring().max_tasks_limit, 30)
+
+    def test_missing_file_keeps_snapshot(self):
+        snapshot = ConfigManager.snapshot()
+        os.remove(self.path)
+        with self.assertLogs(level="ERROR"):
+            self.assertFalse(ConfigManager.reload_if_changed())
+        self.assertIs(ConfigManager.snapshot(), snapshot)
+
+    def test_readers_never_see_a_mixed_snapshot(self):
+        ConfigManager.snapshot()
+        stop = threading.Event()
+        mixed = []
+
+        def read():
+            while not stop.is_set():
+                snapshot = ConfigManager.snapshot()
+                monitoring = snapshot.monitoring
+                if monitoring.max_tasks_limit != monitoring.check_interval_seconds:
+                    mixed.append(snapshot.version)
+
+        readers = [threading.Thread(target=read) for _ in range(4)]
+        for reader in readers:
+            reader.start()
+        try:
+            for limit in range(11, 61):
+                self.rewrite(CONFIG.format(limit=limit))
+                self.assertTrue(ConfigManager.reload_if_changed())
+        finally:
+            stop.set()
+            for reader in readers:
+                reader.join()
+        self.assertEqual(mixed, [])
+        self.assertEqual(ConfigManager.monitoring().max_tasks_limit, 60)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,159 @@
+import threading
+import time
+import unittest
+from src.database.connection_pool import ConnectionPool
+
+class FakeConnection:
+    """Conexión DB-API mínima: cuenta los pings de validación y puede fallar a pedido."""
+    def __init__(self, number: int):
+        self.number = number
+        self.closed = False
+        self.broken = False
+        self.pings = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def close(self):
+        self.closed = True
+
+class FakeCursor:
+    def __init__(self, connection: FakeConnection):
+        self._connection = connection
+
+    def execute(self, query):
+        self._connection.pings += 1
+        if self._connection.broken:
+            raise RuntimeError("enlace caído")
+
+    def fetchall(self):
+        return [(1,)]
+
+    def close(self):
+        pass
+
+class ConnectionPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.connections = []
+
+    def connect(self) -> FakeConnection:
+        connection = FakeConnection(len(self.connections) + 1)
+        self.connections.append(connection)
+        return connection
+
+    def make_pool(self, **kwargs) -> ConnectionPool:
+        return ConnectionPool(self.connect, **kwargs)
+
+    def test_reuses_released_connection(self):
+        pool = self.make_pool(max_size=2)
+        first = pool.acquire()
+        pool.release(first)
+        second = pool.acquire()
+        self.assertIs(first, second)
+        self.assertEqual(len(self.connections), 1)
+        stats = pool.stats()
+        self.assertEqual((stats.misses, stats.hits), (1, 1))
+
+    def test_recycles_connection_past_max_lifetime(self):
+        pool = self.make_pool(max_lifetime_seconds=0.05, idle_timeout_seconds=0)
+        pooled = pool.acquire()
+        time.sleep(0.1)
+        pool.release(pooled) # Vencida al devolverla: se cierra en lugar de quedar libre
+        self.assertTrue(pooled.connection.closed)
+        self.assertIsNot(pool.acquire().connection, pooled.connection)
+        self.assertEqual(pool.stats().recycled, 1)
+
+    def test_recycles_idle_connection_on_acquire(self):
+        pool = self.make_pool(max_lifetime_seconds=0, idle_timeout_seconds=0.05)
+        pool.release(pool.acquire())
+        time.sleep(0.1)
+        pooled = pool.acquire()
+        self.assertEqual(pooled.connection.number, 2)
+        self.assertTrue(self.connections[0].closed)
+        self.assertEqual(pool.stats().recycled, 1)
+
+    def test_validates_only_after_validation_interval(self):
+        pool = self.make_pool(validation_interval_seconds=0.05)
+        pool.release(pool.acquire())
+        pool.release(pool.acquire())
+        self.assertEqual(self.connections[0].pings, 0)
+        time.sleep(0.1)
+        pool.release(pool.acquire())
+        self.assertEqual(self.connections[0].pings, 1)
+
+    def test_replaces_connection_that_fails_validation(self):
+        pool = self.make_pool(validation_interval_seconds=0)
+        pooled = pool.acquire()
+        pool.release(pooled)
+        pooled.connection.broken = True
+        replacement = pool.acquire()
+        self.assertEqual(replacement.connection.number, 2)
+        self.assertTrue(self.connections[0].closed)
+        self.assertEqual(pool.stats().reconnects, 1)
+
+    def test_replace_keeps_pool_slot(self):
+        pool = self.make_pool(max_size=1, acquire_timeout_seconds=0.05)
+        pooled = pool.acquire()
+        replacement = pool.replace(pooled)
+        self.assertTrue(pooled.connection.closed)
+        self.assertEqual(pool.stats().reconnects, 1)
+        # El cupo sigue ocupado por la conexión nueva
+        with self.assertRaises(ConnectionError):
+            pool.acquire()
+        pool.release(replacement)
+        self.assertIs(pool.acquire(), replacement)
+
+    def test_waits_for_release_when_full(self):
+        pool = self.make_pool(max_size=1, acquire_timeout_seconds=2)
+        pooled = pool.acquire()
+        timer = threading.Timer(0.05, pool.release, args=(pooled,))
+        timer.start()
+        try:
+            self.assertIs(pool.acquire(), pooled)
+        finally:
+            timer.join()
+        self.assertEqual(pool.stats().waits, 1)
+        self.assertEqual(len(self.connections), 1)
+
+    def test_acquire_times_out_when_full(self):
+        pool = self.make_pool(max_size=1, acquire_timeout_seconds=0.05)
+        pool.acquire()
+        with self.assertRaises(ConnectionError):
+            pool.acquire()
+        self.assertEqual(pool.stats().waits, 1)
+
+    def test_failed_connect_frees_slot(self):
+        attempts = []
+
+        def connect():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise RuntimeError("login fallido")
+            return FakeConnection(len(attempts))
+
+        pool = ConnectionPool(connect, max_size=1, acquire_timeout_seconds=0.05)
+        with self.assertRaises(RuntimeError):
+            pool.acquire()
+        self.assertEqual(pool.acquire().connection.number, 2)
+
+    def test_context_manager_discards_connection_on_error(self):
+        pool = self.make_pool()
+        with self.assertRaises(ValueError):
+            with pool.connection() as pooled:
+                raise ValueError("query inválido")
+        self.assertTrue(pooled.connection.closed)
+        self.assertEqual(pool.acquire().connection.number, 2)
+
+    def test_close_closes_idle_connections_and_rejects_acquire(self):
+        pool = self.make_pool()
+        pooled = pool.acquire()
+        pooled.statements["SELECT ?"] = object()
+        pool.release(pooled)
+        pool.close()
+        self.assertTrue(pooled.connection.closed)
+        self.assertFalse(pooled.statements)
+        with self.assertRaises(ConnectionError):
+            pool.acquire()
+
+if __name__ == "__main__":
+    unittest.main()
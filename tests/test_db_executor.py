@@ -0,0 +1,130 @@
+import unittest
+from src.utils.sql import Query
+from tests.support import temporary_config
+
+try:
+    from src.database.db_executor import PyODBCExecutor
+except ImportError: # pyodbc necesita el driver manager de ODBC (libodbc) instalado
+    PyODBCExecutor = None
+
+CONFIG = """
+[Database]
+database_connection_string = DRIVER={{ODBC Driver 17 for SQL Server}};SERVER=prueba
+pool_size = 1
+statement_cache_size = {cache_size}
+"""
+
+class FakeConnection:
+    """Conexión DB-API mínima: registra los cursores que crea."""
+    def __init__(self):
+        self.cursors = []
+
+    def cursor(self):
+        cursor = FakeCursor()
+        self.cursors.append(cursor)
+        return cursor
+
+    def close(self):
+        pass
+
+class FakeCursor:
+    description = (("Valor",),)
+
+    def __init__(self):
+        self.executed = []
+        self.closed = False
+        self._rows = []
+
+    def execute(self, sql, params=()):
+        self.executed.append(sql)
+        self._rows = [(1,), (2,), (3,)]
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    def fetchmany(self, size):
+        rows, self._rows = self._rows[:size], self._rows[size:]
+        return rows
+
+    def close(self):
+        self.closed = True
+
+def query(name: str) -> Query:
+    return Query(f"SELECT Valor FROM {name} WHERE Estado = ?", ("ACTIVE",))
+
+@unittest.skipIf(PyODBCExecutor is None, "pyodbc no está disponible")
+class StatementCacheTest(unittest.TestCase):
+    """Cursores preparados por texto de query en cada conexión del pool (LRU de `statement_cache_size`)."""
+    def make_executor(self, cache_size: int = 2):
+        config = temporary_config(CONFIG.format(cache_size=cache_size))
+        config.__enter__()
+        self.addCleanup(config.__exit__, None, None, None)
+        self.connection = FakeConnection()
+        test = self
+
+        class Executor(PyODBCExecutor):
+            def _get_connection(self):
+                return test.connection
+
+        with self.assertLogs(level="WARNING"): # Cadena de conexión sin cifrar
+            executor = Executor()
+        self.addCleanup(executor.close)
+        return executor
+
+    def cached_statements(self, executor):
+        pooled = executor._pool.acquire()
+        try:
+            return list(pooled.statements)
+        finally:
+            executor._pool.release(pooled)
+
+    def test_parameterized_query_reuses_its_cursor(self):
+        executor = self.make_executor()
+        self.assertEqual(len(executor.execute_query(query("A"))), 3)
+        self.assertEqual(len(executor.execute_query(query("A"))), 3)
+        self.assertEqual(len(self.connection.cursors), 1)
+        self.assertEqual(self.connection.cursors[0].executed, [query("A").sql] * 2)
+        stats = executor.pool_stats()
+        self.assertEqual((stats.statement_misses, stats.statement_hits), (1, 1))
+
+    def test_queries_without_parameters_are_not_cached(self):
+        executor = self.make_executor()
+        executor.execute_query("SELECT 1")
+        executor.execute_query("SELECT 1")
+        self.assertEqual(len(self.connection.cursors), 2)
+        self.assertTrue(all(cursor.closed for cursor in self.connection.cursors))
+        self.assertEqual(self.cached_statements(executor), [])
+
+    def test_least_recently_used_cursor_is_closed(self):
+        executor = self.make_executor(cache_size=2)
+        for name in ("A", "B", "A", "C"):
+            executor.execute_query(query(name))
+        # B fue el menos usado recientemente: su cursor se cierra al entrar C
+        self.assertEqual(self.cached_statements(executor), [query("A").sql, query("C").sql])
+        first_a, b, c = self.connection.cursors
+        self.assertTrue(b.closed)
+        self.assertFalse(first_a.closed or c.closed)
+        executor.execute_query(query("B"))
+        self.assertEqual(len(self.connection.cursors), 4) # B vuelve a prepararse
+
+    def test_partially_read_stream_closes_its_cursor(self):
+        executor = self.make_executor()
+        rows = executor.iter_rows(query("A"), chunk_size=1)
+        next(rows)
+        rows.close()
+        self.assertTrue(self.connection.cursors[0].closed)
+        self.assertEqual(self.cached_statements(executor), [])
+        # Leído completo, el cursor queda guardado
+        self.assertEqual(len(list(executor.iter_rows(query("A"), chunk_size=2))), 3)
+        self.assertEqual(self.cached_statements(executor), [query("A").sql])
+
+    def test_cache_disabled(self):
+        executor = self.make_executor(cache_size=0)
+        executor.execute_query(query("A"))
+        executor.execute_query(query("A"))
+        self.assertEqual(len(self.connection.cursors), 2)
+        self.assertEqual(self.cached_statements(executor), [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+from datetime import datetime, timedelta
+from src.core.dimension_cache import DimensionCache
+from src.strategies.active_processes import ActiveProcessStrategy
+from src.strategies.submitted_tasks import SubmittedTaskStrategy
+from tests.support import SQLiteExecutor, temporary_config
+
+CONFIG = """
+[Monitoring]
+max_tasks_limit = 2
+"""
+
+NOW = datetime(2024, 1, 1, 12, 0)
+
+def started(minutes_ago: int) -> datetime:
+    return NOW + timedelta(hours=6) - timedelta(minutes=minutes_ago)
+
+def active_task(number: int, minutes_ago: int, sched: int = 0) -> dict:
+    return dict(SysTaskNum=number, AgentSchedNum=sched, TaskDescription=f"Tarea {number}", TaskType="Process",
+                StartedOn=started(minutes_ago), LastActivityOn=started(0), ProgressPercent=10,
+                SubmitUser="epicor", TaskStatus="ACTIVE", ActivityMsg=None)
+
+def submitted_task(number: int, minutes_ago: int, agent: str = "SystemTaskAgent") -> dict:
+    return dict(AgentID=agent, AgentSchedNum=number, TaskDesc=f"Solicitud {number}", TaskType="Report",
+                RunProcedure="Erp.Rpt.Test", SubmittedOn=started(minutes_ago), SubmitUser="epicor",
+                ParamMaintProgram=None)
+
+def schedule(number: int, agent: str = "SystemTaskAgent", desc: str = "Immediate Run Request") -> dict:
+    return dict(AgentID=agent, AgentSchedNum=number, SchedDesc=desc)
+
+class DimensionResolutionTest(unittest.TestCase):
+    """
+    El query base más `resolve_dimensions` (con la caché de tablas de consulta) debe
+    producir las mismas tareas que el query completo con JOIN, resolviendo por bloques.
+    """
+    def setUp(self):
+        config = temporary_config(CONFIG)
+        config.__enter__()
+        self.addCleanup(config.__exit__, None, None, None)
+        self.executor = SQLiteExecutor(now=NOW)
+        self.addCleanup(self.executor.close)
+        self.cache = DimensionCache()
+        self.lookups = []
+
+    def lookup(self, dimension, keys):
+        keys = list(keys)
+        self.lookups.append((dimension.name, keys))
+        return self.cache.lookup(self.executor, dimension, keys)[0]
+
+    def assert_same_tasks(self, strategy, chunk_size: int):
+        full = strategy.process_raw_tasks(self.executor.execute_query(strategy.get_tasks_query()), include_tasks=True)
+        rows = strategy.resolve_dimensions(iter(self.executor.execute_query(strategy.get_base_tasks_query())),
+                                           self.lookup, chunk_size)
+        cached = strategy.process_raw_tasks(rows, include_tasks=True)
+        self.assertEqual(cached.tasks, full.tasks)
+        self.assertEqual(cached.total_tasks, full.total_tasks)
+        self.assertEqual(cached.longest_running_task, full.longest_running_task)
+        return cached
+
+    def test_active_processes_resolved_in_chunks(self):
+        self.executor.insert("SysTask", [active_task(number, 10 * number, sched=number % 3) for number in range(1, 8)])
+        self.executor.insert("SysAgentSched", [schedule(1), schedule(2, desc="Nightly")])
+        self.executor.insert("SysAgentTaskParam", [dict(AgentSchedNum=1, ParamName="FunctionId", ParamCharacter="Erp.Rpt.A")])
+        self.executor.insert("SysTaskParam", [dict(SysTaskNum=5, ParamName="FunctionId", ParamCharacter="Erp.Proc.B")])
+        statistics = self.assert_same_tasks(ActiveProcessStrategy(), chunk_size=3)
+        self.assertEqual(statistics.total_tasks, 7)
+        # 7 filas en bloques de 3: tres bloques, cada uno con sus tres tablas de consulta
+        self.assertEqual(len(self.lookups), 9)
+        self.assertEqual(self.lookups[-1], ("Ice.SysTaskParam", [7])) # Último bloque: solo la tarea 7
+
+    def test_resolve_dimensions_is_lazy(self):
+        self.executor.insert("SysTask", [active_task(number, number) for number in range(1, 6)])
+        read = []
+
+        def rows():
+            for row in self.executor.execute_query(ActiveProcessStrategy().get_base_tasks_query()):
+                read.append(row["SysTaskNum"])
+                yield row
+
+        resolved = ActiveProcessStrategy().resolve_dimensions(rows(), self.lookup, 2)
+        self.assertEqual(next(resolved)["SysTaskNum"], 1)
+        self.assertEqual(read, [1, 2]) # Solo se leyó el primer bloque
+        self.assertEqual([row["SysTaskNum"] for row in resolved], [2, 3, 4, 5])
+
+    def test_submitted_tasks_filtered_in_sql(self):
+        self.executor.insert("SysAgentTask", [
+            submitted_task(10, 5), submitted_task(11, 20), submitted_task(12, 60),
+            submitted_task(13, 90, agent="OtroAgente"), submitted_task(14, 30),
+        ])
+        self.executor.insert("SysAgentSched", [
+            schedule(10), schedule(11), schedule(12, desc="Nightly"),
+            schedule(13),                       # Mismo número, otro agente: no coincide
+            schedule(14), schedule(14, agent="OtroAgente"),
+        ])
+        base_rows = self.executor.execute_query(SubmittedTaskStrategy().get_base_tasks_query())
+        self.assertEqual([row["AgentSchedNum"] for row in base_rows], [10, 11, 14])
+        statistics = self.assert_same_tasks(SubmittedTaskStrategy(), chunk_size=2)
+        self.assertEqual(statistics.total_tasks, 3)
+        self.assertEqual(statistics.longest_running_task.task_id, "14")
+        self.assertEqual(self.lookups, []) # El filtro ya se aplicó en SQL: no hace falta la programación
+
+if __name__ == "__main__":
+    unittest.main()
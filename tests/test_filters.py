@@ -0,0 +1,142 @@
+import time
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+from src.core.monitor import TaskMonitorService
+from src.strategies.active_processes import ActiveProcessStrategy
+from src.strategies.filters import TaskColumns, describe_filters, filter_predicates
+from src.strategies.submitted_tasks import SubmittedTaskStrategy
+from src.utils.config_manager import MAX_FILTER_VALUES, ConfigManager, TaskFilters
+from tests.support import SQLiteExecutor, temporary_config
+
+COLUMNS = TaskColumns(start="t.StartedOn", task_type="t.TaskType", user="t.SubmitUser")
+
+class FilterPredicatesTest(unittest.TestCase):
+    def test_without_filters(self):
+        self.assertEqual(filter_predicates(TaskFilters(), COLUMNS), ("", ()))
+        self.assertEqual(describe_filters(TaskFilters()), "sin filtros")
+
+    def test_predicates_and_parameters_in_order(self):
+        filters = TaskFilters(min_duration_minutes=15, include_task_types=("Process", "Report"),
+                              exclude_users=("manager",))
+        sql, params = filter_predicates(filters, COLUMNS)
+        self.assertEqual(sql.split("\n          AND ")[1:], [
+            "t.StartedOn <= DATEADD(MINUTE, -?, DATEADD(HOUR, 6, CURRENT_TIMESTAMP))",
+            "t.TaskType IN (?, ?, ?, ?, ?, ?, ?, ?)",
+            "t.SubmitUser NOT IN (?)",
+        ])
+        # La lista IN se completa hasta 8 valores repitiendo el último (mismo texto, mismo plan)
+        self.assertEqual(params, (15, "Process", "Report") + ("Report",) * 6 + ("manager",))
+        self.assertEqual(sql.count("?"), len(params))
+        self.assertEqual(describe_filters(filters), "duración >= 15 min, tipos incluidos: 2, usuarios excluidos: 1")
+
+    def test_without_duration(self):
+        filters = TaskFilters(min_duration_minutes=15, exclude_task_types=("Process",))
+        sql, params = filter_predicates(filters, COLUMNS, include_duration=False)
+        self.assertNotIn("DATEADD", sql)
+        self.assertEqual(params, ("Process",))
+        self.assertEqual(filter_predicates(TaskFilters(min_duration_minutes=15), COLUMNS, include_duration=False), ("", ()))
+
+class ParseFiltersTest(unittest.TestCase):
+    def load(self, text: str) -> TaskFilters:
+        config = temporary_config("[Monitoring]\nmax_tasks_limit = 10\n" + text)
+        config.__enter__()
+        self.addCleanup(config.__exit__, None, None, None)
+        return ConfigManager.task_filters()
+
+    def test_without_section(self):
+        filters = self.load("")
+        self.assertEqual(filters, TaskFilters())
+        self.assertFalse(filters.enabled)
+
+    def test_values(self):
+        filters = self.load("[Filters]\nmin_duration_minutes = 5\ninclude_task_types = Process, ,Report\n"
+                            "exclude_users = manager\n")
+        self.assertEqual(filters, TaskFilters(min_duration_minutes=5, include_task_types=("Process", "Report"),
+                                              exclude_users=("manager",)))
+        self.assertTrue(filters.enabled)
+
+    def test_list_limit(self):
+        users = ", ".join(f"u{number}" for number in range(MAX_FILTER_VALUES))
+        self.assertEqual(len(self.load(f"[Filters]\ninclude_users = {users}\n").include_users), MAX_FILTER_VALUES)
+        with self.assertRaises(ValueError):
+            self.load(f"[Filters]\ninclude_users = {users}, otro\n")
+
+    def test_negative_min_duration(self):
+        with self.assertRaises(ValueError):
+            self.load("[Filters]\nmin_duration_minutes = -1\n")
+
+CONFIG = """
+[Monitoring]
+max_tasks_limit = 2
+incremental_mode = {incremental}
+
+[Filters]
+min_duration_minutes = 30
+exclude_users = manager
+"""
+
+# Hora local del servidor (CURRENT_TIMESTAMP); las fechas de Epicor se guardan 6 horas adelantadas
+NOW = datetime(2024, 1, 1, 12, 0)
+
+def started(minutes_ago: int) -> datetime:
+    return NOW + timedelta(hours=6) - timedelta(minutes=minutes_ago)
+
+def active_task(number: int, minutes_ago: int, user: str = "epicor") -> dict:
+    return dict(SysTaskNum=number, AgentSchedNum=0, TaskDescription=f"Tarea {number}", TaskType="Process",
+                StartedOn=started(minutes_ago), LastActivityOn=started(minutes_ago), ProgressPercent=10,
+                SubmitUser=user, TaskStatus="ACTIVE", ActivityMsg=None)
+
+def submitted_task(number: int, minutes_ago: int, user: str = "epicor") -> dict:
+    return dict(AgentID="SystemTaskAgent", AgentSchedNum=number, TaskDesc=f"Solicitud {number}", TaskType="Report",
+                RunProcedure="Erp.Rpt.Test", SubmittedOn=started(minutes_ago), SubmitUser=user,
+                ParamMaintProgram=None)
+
+class IncrementalFiltersTest(unittest.TestCase):
+    """Con [Filters], el modo incremental debe reportar lo mismo que el recorrido completo."""
+    def setUp(self):
+        self.executor = SQLiteExecutor(now=NOW)
+        self.addCleanup(self.executor.close)
+        self.executor.insert("SysTask", [active_task(1, 90), active_task(2, 45), active_task(3, 10),
+                                         active_task(4, 25), active_task(5, 120, user="manager")])
+        self.executor.insert("SysAgentTask", [submitted_task(10, 60), submitted_task(11, 5),
+                                              submitted_task(12, 20), submitted_task(13, 40, user="manager")])
+        self.executor.insert("SysAgentSched", [dict(AgentID="SystemTaskAgent", AgentSchedNum=number,
+                                                    SchedDesc="Immediate Run Request") for number in range(10, 14)])
+
+    def monitor(self, incremental: bool) -> TaskMonitorService:
+        config = temporary_config(CONFIG.format(incremental=str(incremental).lower()))
+        config.__enter__()
+        self.addCleanup(config.__exit__, None, None, None)
+        monitor = TaskMonitorService(self.executor, [ActiveProcessStrategy(), SubmittedTaskStrategy()])
+        self.addCleanup(monitor.shutdown)
+        return monitor
+
+    def assert_same_statistics(self, full, incremental):
+        for name in ("Proceso Activo", "Mandado a Someter"):
+            self.assertEqual(incremental[name].total_tasks, full[name].total_tasks, name)
+            self.assertEqual(incremental[name].over_limit, full[name].over_limit, name)
+            self.assertEqual(incremental[name].longest_running_task, full[name].longest_running_task, name)
+
+    def test_min_duration_applies_in_incremental_mode(self):
+        full = self.monitor(incremental=False).run_monitoring()
+        incremental_monitor = self.monitor(incremental=True)
+        incremental = incremental_monitor.run_monitoring()
+        self.assertEqual(full["Proceso Activo"].total_tasks, 2)
+        self.assertEqual(full["Mandado a Someter"].total_tasks, 1)
+        self.assertEqual(full["Mandado a Someter"].longest_running_task.task_id, "10")
+        self.assert_same_statistics(full, incremental)
+
+        # Sin cambios en la base de datos, el paso del tiempo hace que más tareas alcancen la duración mínima
+        self.executor.now = NOW + timedelta(minutes=12)
+        # El índice envejece las duraciones con el reloj monotónico: avanza lo mismo que el del servidor
+        with mock.patch("src.core.task_index.time.monotonic", return_value=time.monotonic() + 12 * 60):
+            incremental = incremental_monitor.run_monitoring()
+        full = self.monitor(incremental=False).run_monitoring()
+        self.assertEqual(full["Proceso Activo"].total_tasks, 3)
+        self.assertEqual(full["Mandado a Someter"].total_tasks, 2)
+        self.assertTrue(full["Proceso Activo"].over_limit)
+        self.assert_same_statistics(full, incremental)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+from src.models import Task, TaskStatistics
+from src.observers.history_recorder import HistoryRecorder
+from tests.support import temporary_config
+
+CONFIG = """
+[History]
+batch_size = 1000
+flush_interval_seconds = 3600
+max_pending_samples = {max_pending}
+"""
+
+class FlakyStore:
+    """HistoryStore mínimo: guarda los lotes escritos y falla mientras `failing` sea True."""
+    def __init__(self):
+        self.failing = False
+        self.batches = []
+
+    def write(self, category_samples, task_samples):
+        if self.failing:
+            raise OSError("disco lleno")
+        self.batches.append((list(category_samples), list(task_samples)))
+
+    def compact(self):
+        pass
+
+    def close(self):
+        pass
+
+def statistics(total: int) -> TaskStatistics:
+    tasks = [Task(task_id=str(number), task_description="Tarea", start_time=None, submit_user="epicor",
+                  duration_minutes=number) for number in range(total)]
+    return TaskStatistics(category_name="Proceso Activo", total_tasks=total, over_limit=False, tasks=tasks)
+
+class HistoryRecorderTest(unittest.TestCase):
+    def make_recorder(self, max_pending: int = 50000) -> HistoryRecorder:
+        config = temporary_config(CONFIG.format(max_pending=max_pending))
+        config.__enter__()
+        self.addCleanup(config.__exit__, None, None, None)
+        self.store = FlakyStore()
+        return HistoryRecorder(self.store)
+
+    def test_failed_batch_is_retried_in_order(self):
+        recorder = self.make_recorder()
+        recorder.update(statistics(1))
+        self.store.failing = True
+        with self.assertLogs(level="ERROR"):
+            recorder.flush()
+        recorder.update(statistics(2))
+        self.store.failing = False
+        recorder.flush()
+        [(category_samples, task_samples)] = self.store.batches
+        self.assertEqual([sample.total_tasks for sample in category_samples], [1, 2])
+        self.assertEqual([sample.task_id for sample in task_samples], ["0", "0", "1"])
+
+    def test_pending_samples_are_capped_while_store_fails(self):
+        recorder = self.make_recorder(max_pending=1000)
+        self.store.failing = True
+        with self.assertLogs(level="WARNING"):
+            for _ in range(4):
+                recorder.update(statistics(400))
+                recorder.flush()
+        self.store.failing = False
+        recorder.flush()
+        [(category_samples, task_samples)] = self.store.batches
+        self.assertEqual(len(category_samples), 4)
+        # Se conservan las muestras más recientes
+        self.assertEqual(len(task_samples), 1000)
+        self.assertEqual(task_samples[-1].task_id, "399")
+        self.assertEqual(task_samples[0].task_id, "200")
+
+if __name__ == "__main__":
+    unittest.main()
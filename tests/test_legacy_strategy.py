@@ -0,0 +1,82 @@
+import unittest
+from datetime import datetime, timedelta
+from src.core.interfaces import ITaskObserver, ITaskProcessingStrategy
+from src.core.monitor import TaskMonitorService
+from src.models import Task, TaskStatistics
+from src.strategies.instance import InstanceStrategy
+from tests.support import SQLiteExecutor, temporary_config
+
+CONFIG = """
+[Monitoring]
+max_tasks_limit = 10
+"""
+
+NOW = datetime(2024, 1, 1, 12, 0)
+
+def active_row(number: int, started_minutes_ago: int) -> dict:
+    started = NOW + timedelta(hours=6) - timedelta(minutes=started_minutes_ago)
+    return dict(SysTaskNum=number, AgentSchedNum=0, TaskDescription=f"Tarea {number}", TaskType="Process",
+                StartedOn=started, LastActivityOn=started, ProgressPercent=0, SubmitUser="epicor",
+                TaskStatus="ACTIVE", ActivityMsg=None)
+
+class LegacyStrategy(ITaskProcessingStrategy):
+    """Estrategia externa escrita antes de `include_tasks`: solo recibe las filas."""
+    @property
+    def category_name(self) -> str:
+        return "Legado"
+
+    def get_tasks_query(self) -> str:
+        return "SELECT SysTaskNum FROM Ice.SysTask WHERE TaskStatus = 'ACTIVE'"
+
+    def process_raw_tasks(self, raw_tasks_data):
+        total = sum(1 for row in raw_tasks_data if row["SysTaskNum"] is not None)
+        return TaskStatistics(category_name=self.category_name, total_tasks=total, over_limit=False)
+
+class DetailObserver(ITaskObserver):
+    """Observador que pide el detalle de tareas: el monitor procesa con `include_tasks`."""
+    def __init__(self):
+        self.statistics = []
+
+    @property
+    def requires_task_detail(self) -> bool:
+        return True
+
+    def update(self, statistics: TaskStatistics):
+        self.statistics.append(statistics)
+
+    def notify_long_running_task(self, task: Task, category: str):
+        pass
+
+class LegacyStrategyTest(unittest.TestCase):
+    def setUp(self):
+        config = temporary_config(CONFIG)
+        config.__enter__()
+        self.addCleanup(config.__exit__, None, None, None)
+        self.executor = SQLiteExecutor(now=NOW)
+        self.executor.insert("SysTask", [active_row(1, 30), active_row(2, 90)])
+        self.addCleanup(self.executor.close)
+
+    def run_cycle(self, strategy, detail: bool):
+        monitor = TaskMonitorService(self.executor, [strategy])
+        self.addCleanup(monitor.shutdown)
+        observer = DetailObserver() if detail else None
+        if observer is not None:
+            monitor.add_observer(observer)
+        return monitor.run_monitoring(), observer
+
+    def test_legacy_signature_without_task_detail(self):
+        statistics, _ = self.run_cycle(LegacyStrategy(), detail=False)
+        self.assertEqual(statistics["Legado"].total_tasks, 2)
+
+    def test_legacy_signature_with_task_detail(self):
+        statistics, observer = self.run_cycle(LegacyStrategy(), detail=True)
+        self.assertEqual(statistics["Legado"].total_tasks, 2)
+        self.assertIsNone(statistics["Legado"].tasks) # La estrategia no entrega el detalle
+        self.assertEqual([s.total_tasks for s in observer.statistics], [2])
+
+    def test_legacy_strategy_wrapped_for_an_instance(self):
+        statistics, _ = self.run_cycle(InstanceStrategy(LegacyStrategy(), "PROD"), detail=True)
+        self.assertEqual(statistics["[PROD] Legado"].total_tasks, 2)
+
+if __name__ == "__main__":
+    unittest.main()
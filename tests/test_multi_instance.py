@@ -0,0 +1,113 @@
+import time
+import unittest
+from datetime import datetime, timedelta
+from src.core.interfaces import ITaskObserver
+from src.core.multi_instance import MonitoredInstance, MultiInstanceMonitor
+from src.models import Task, TaskStatistics
+from src.strategies.active_processes import ActiveProcessStrategy
+from tests.support import SQLiteExecutor, temporary_config
+
+CONFIG = """
+[Monitoring]
+max_tasks_limit = 1
+long_running_task_threshold_minutes = 60
+"""
+
+NOW = datetime(2024, 1, 1, 12, 0)
+
+def active_row(number: int, started_minutes_ago: int) -> dict:
+    started = NOW + timedelta(hours=6) - timedelta(minutes=started_minutes_ago)
+    return dict(SysTaskNum=number, AgentSchedNum=0, TaskDescription=f"Tarea {number}", TaskType="Process",
+                StartedOn=started, LastActivityOn=started, ProgressPercent=0, SubmitUser="epicor",
+                TaskStatus="ACTIVE", ActivityMsg=None)
+
+class RecordingObserver(ITaskObserver):
+    def __init__(self):
+        self.statistics = []
+        self.alerts = []
+
+    def update(self, statistics: TaskStatistics):
+        self.statistics.append(statistics)
+
+    def notify_long_running_task(self, task: Task, category: str):
+        self.alerts.append((category, task.task_id))
+
+class MultiInstanceMonitorTest(unittest.TestCase):
+    """Varias instancias, cada una con su propio executor SQLite."""
+    def setUp(self):
+        config = temporary_config(CONFIG)
+        config.__enter__()
+        self.addCleanup(config.__exit__, None, None, None)
+
+    def make_executor(self, rows, delay_seconds: float = 0.0) -> SQLiteExecutor:
+        executor = SQLiteExecutor(now=NOW, delay_seconds=delay_seconds)
+        executor.insert("SysTask", rows)
+        self.addCleanup(executor.close)
+        return executor
+
+    def make_monitor(self, instances) -> MultiInstanceMonitor:
+        monitor = MultiInstanceMonitor(instances)
+        self.addCleanup(monitor.shutdown)
+        self.observer = RecordingObserver()
+        monitor.add_observer(self.observer)
+        return monitor
+
+    def test_each_instance_uses_its_own_executor(self):
+        prod = self.make_executor([active_row(1, 90), active_row(2, 10)])
+        test = self.make_executor([active_row(1, 30)])
+        monitor = self.make_monitor([
+            MonitoredInstance("PROD", prod, [ActiveProcessStrategy()]),
+            MonitoredInstance("TEST", test, [ActiveProcessStrategy()]),
+        ])
+        self.assertEqual(monitor.category_names, ["[PROD] Proceso Activo", "[TEST] Proceso Activo"])
+        statistics = monitor.run_monitoring()
+        self.assertEqual(statistics["[PROD] Proceso Activo"].total_tasks, 2)
+        self.assertEqual(statistics["[TEST] Proceso Activo"].total_tasks, 1)
+        self.assertTrue(prod.queries)
+        self.assertTrue(test.queries)
+
+    def test_statistics_and_alerts_carry_instance_name(self):
+        # La misma tarea (SysTaskNum 1) supera el umbral en ambas bases: son dos alertas distintas
+        prod = self.make_executor([active_row(1, 90)])
+        test = self.make_executor([active_row(1, 120), active_row(2, 5)])
+        monitor = self.make_monitor([
+            MonitoredInstance("PROD", prod, [ActiveProcessStrategy()]),
+            MonitoredInstance("TEST", test, [ActiveProcessStrategy()]),
+        ])
+        statistics = monitor.run_monitoring()
+        self.assertEqual({name: s.instance_name for name, s in statistics.items()},
+                         {"[PROD] Proceso Activo": "PROD", "[TEST] Proceso Activo": "TEST"})
+        self.assertEqual(sorted((s.instance_name, s.category_name) for s in self.observer.statistics),
+                         [("PROD", "[PROD] Proceso Activo"), ("TEST", "[TEST] Proceso Activo")])
+        self.assertEqual(sorted(self.observer.alerts),
+                         [("[PROD] Proceso Activo", "1"), ("[TEST] Proceso Activo", "1")])
+
+    def test_slow_instance_times_out_without_delaying_the_others(self):
+        slow = self.make_executor([active_row(1, 90)], delay_seconds=1.5)
+        fast = self.make_executor([active_row(1, 30)])
+        monitor = self.make_monitor([
+            MonitoredInstance("SLOW", slow, [ActiveProcessStrategy()], timeout_seconds=0.2),
+            MonitoredInstance("FAST", fast, [ActiveProcessStrategy()], timeout_seconds=5),
+        ])
+        self.addCleanup(time.sleep, 1.5) # Deja terminar el query lento antes de cerrar su executor
+        started = time.monotonic()
+        with self.assertLogs(level="ERROR") as logs:
+            statistics = monitor.run_monitoring()
+        self.assertLess(time.monotonic() - started, 1.2)
+        self.assertEqual(list(statistics), ["[FAST] Proceso Activo"])
+        self.assertTrue(any("SLOW" in line and "Tiempo de espera" in line for line in logs.output))
+
+        # En el ciclo siguiente la instancia lenta sigue en ejecución: se omite y no se solapa
+        with self.assertLogs(level="WARNING") as logs:
+            statistics = monitor.run_monitoring()
+        self.assertEqual(list(statistics), ["[FAST] Proceso Activo"])
+        self.assertTrue(any("SLOW" in line and "sigue en ejecución" in line for line in logs.output))
+
+    def test_rejects_duplicate_instance_names(self):
+        executor = self.make_executor([])
+        with self.assertRaises(ValueError):
+            MultiInstanceMonitor([MonitoredInstance("PROD", executor, [ActiveProcessStrategy()]),
+                                  MonitoredInstance("PROD", executor, [ActiveProcessStrategy()])])
+
+if __name__ == "__main__":
+    unittest.main()
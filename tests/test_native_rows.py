@@ -0,0 +1,86 @@
+import unittest
+from collections.abc import Mapping
+from datetime import datetime, timedelta
+from src.core.monitor import TaskMonitorService
+from src.strategies.active_processes import ActiveProcessStrategy
+from src.strategies.instance import InstanceStrategy
+from tests.support import SQLiteExecutor, temporary_config
+
+CONFIG = """
+[Monitoring]
+max_tasks_limit = 10
+summary_mode = false
+"""
+
+NOW = datetime(2024, 1, 1, 12, 0)
+
+def active_row(number: int, started_minutes_ago: int) -> dict:
+    started = NOW + timedelta(hours=6) - timedelta(minutes=started_minutes_ago)
+    return dict(SysTaskNum=number, AgentSchedNum=0, TaskDescription=f"Tarea {number}", TaskType="Process",
+                StartedOn=started, LastActivityOn=started, ProgressPercent=0, SubmitUser="epicor",
+                TaskStatus="ACTIVE", ActivityMsg=None)
+
+class NativeRowExecutor(SQLiteExecutor):
+    """Produce en `iter_rows` tuplas con `cursor_description`, como pyodbc.Row."""
+    def iter_rows(self, query, chunk_size=None):
+        for row in self.execute_query(query):
+            columns = list(row)
+            row_type = type("NativeRow", (tuple,), {"cursor_description": [(column,) for column in columns]})
+            yield row_type(row[column] for column in columns)
+
+class RecordingStrategy(ActiveProcessStrategy):
+    """Registra el tipo de las filas recibidas."""
+    def __init__(self):
+        self.row_types = []
+
+    def process_raw_tasks(self, raw_tasks_data, include_tasks: bool = False):
+        rows = list(raw_tasks_data)
+        self.row_types.extend(type(row) for row in rows)
+        return super().process_raw_tasks(rows, include_tasks=include_tasks)
+
+class DictOnlyStrategy(RecordingStrategy):
+    """Estrategia externa que solo sabe leer diccionarios."""
+    accepts_native_rows = False
+
+    def process_raw_tasks(self, raw_tasks_data, include_tasks: bool = False):
+        rows = list(raw_tasks_data)
+        for row in rows:
+            row["SysTaskNum"] # Falla con filas nativas
+        return super().process_raw_tasks(rows, include_tasks=include_tasks)
+
+class NativeRowsTest(unittest.TestCase):
+    def setUp(self):
+        config = temporary_config(CONFIG)
+        config.__enter__()
+        self.addCleanup(config.__exit__, None, None, None)
+        self.executor = NativeRowExecutor(now=NOW)
+        self.executor.insert("SysTask", [active_row(1, 30), active_row(2, 90)])
+        self.addCleanup(self.executor.close)
+
+    def run_cycle(self, strategy):
+        monitor = TaskMonitorService(self.executor, [strategy])
+        self.addCleanup(monitor.shutdown)
+        return monitor.run_monitoring()
+
+    def test_builtin_strategies_receive_native_rows(self):
+        strategy = RecordingStrategy()
+        statistics = self.run_cycle(strategy)
+        self.assertEqual(statistics["Proceso Activo"].total_tasks, 2)
+        self.assertTrue(strategy.row_types)
+        self.assertFalse(any(issubclass(row_type, Mapping) for row_type in strategy.row_types))
+
+    def test_other_strategies_receive_dicts(self):
+        strategy = DictOnlyStrategy()
+        statistics = self.run_cycle(strategy)
+        self.assertEqual(statistics["Proceso Activo"].total_tasks, 2)
+        self.assertTrue(all(row_type is dict for row_type in strategy.row_types))
+
+    def test_instance_strategy_delegates_the_choice(self):
+        self.assertTrue(InstanceStrategy(ActiveProcessStrategy(), "PROD").accepts_native_rows)
+        strategy = DictOnlyStrategy()
+        statistics = self.run_cycle(InstanceStrategy(strategy, "PROD"))
+        self.assertEqual(statistics["[PROD] Proceso Activo"].total_tasks, 2)
+        self.assertTrue(all(row_type is dict for row_type in strategy.row_types))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,168 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from email.utils import formatdate
+from unittest import mock
+from src.observers.outbox import SQLiteOutbox
+from src.observers.slack_notifier import SlackNotifier
+from src.utils.rate_limiter import TokenBucket
+from tests.support import temporary_config
+
+class SQLiteOutboxTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "outbox.db")
+
+    def open(self, lease_seconds: float = 60) -> SQLiteOutbox:
+        outbox = SQLiteOutbox(self.path, lease_seconds=lease_seconds)
+        self.addCleanup(outbox.close)
+        return outbox
+
+    def test_claims_in_arrival_order_and_hides_claimed_messages(self):
+        outbox = self.open()
+        first = outbox.enqueue({"text": "uno"}, "Mensaje")
+        second = outbox.enqueue({"text": "dos"}, "Mensaje")
+        message = outbox.claim()
+        self.assertEqual((message.message_id, message.payload, message.attempts), (first, {"text": "uno"}, 0))
+        self.assertEqual(outbox.claim().message_id, second)
+        self.assertIsNone(outbox.claim())
+        self.assertEqual(outbox.pending_count(), 2) # Reservados, pero no entregados
+
+    def test_complete_removes_message(self):
+        outbox = self.open()
+        outbox.enqueue({"text": "uno"}, "Mensaje")
+        outbox.complete(outbox.claim().message_id)
+        self.assertEqual(outbox.pending_count(), 0)
+        self.assertIsNone(outbox.seconds_until_next())
+
+    def test_pending_messages_survive_reopening(self):
+        outbox = self.open()
+        outbox.enqueue({"text": "uno"}, "Reporte/Alerta")
+        outbox.close()
+        reopened = self.open()
+        message = reopened.claim()
+        self.assertEqual((message.payload, message.description), ({"text": "uno"}, "Reporte/Alerta"))
+
+    def test_expired_lease_makes_message_available_again(self):
+        outbox = self.open(lease_seconds=0.05)
+        message_id = outbox.enqueue({"text": "uno"}, "Mensaje")
+        outbox.claim() # El proceso "muere" sin completar ni reprogramar
+        self.assertIsNone(outbox.claim())
+        time.sleep(0.1)
+        self.assertEqual(outbox.claim().message_id, message_id)
+
+    def test_reschedule_counts_attempt_and_delays_message(self):
+        outbox = self.open()
+        message_id = outbox.enqueue({"text": "uno"}, "Mensaje")
+        outbox.reschedule(outbox.claim().message_id, 0.1)
+        self.assertIsNone(outbox.claim())
+        self.assertGreater(outbox.seconds_until_next(), 0)
+        time.sleep(0.15)
+        self.assertEqual(outbox.seconds_until_next(), 0)
+        message = outbox.claim()
+        self.assertEqual((message.message_id, message.attempts), (message_id, 1))
+
+    def test_release_returns_message_without_counting_attempt(self):
+        outbox = self.open()
+        outbox.enqueue({"text": "uno"}, "Mensaje")
+        outbox.release(outbox.claim().message_id)
+        self.assertEqual(outbox.claim().attempts, 0)
+
+class TokenBucketTest(unittest.TestCase):
+    def setUp(self):
+        self.now = 100.0
+        clock = mock.patch("src.utils.rate_limiter.time.monotonic", side_effect=lambda: self.now)
+        clock.start()
+        self.addCleanup(clock.stop)
+
+    def test_rejects_invalid_parameters(self):
+        with self.assertRaises(ValueError):
+            TokenBucket(0)
+        with self.assertRaises(ValueError):
+            TokenBucket(1, capacity=0.5)
+
+    def test_allows_burst_then_refills_at_rate(self):
+        bucket = TokenBucket(2, capacity=3)
+        self.assertEqual([bucket.try_acquire() for _ in range(3)], [0, 0, 0])
+        self.assertAlmostEqual(bucket.try_acquire(), 0.5)
+        self.now += 0.5
+        self.assertEqual(bucket.try_acquire(), 0)
+        # La recarga no supera la capacidad
+        self.now += 60
+        self.assertEqual([bucket.try_acquire() for _ in range(3)], [0, 0, 0])
+        self.assertGreater(bucket.try_acquire(), 0)
+
+    def test_pause_blocks_and_resumes_with_single_token(self):
+        bucket = TokenBucket(1, capacity=3)
+        bucket.pause(10)
+        self.assertAlmostEqual(bucket.try_acquire(), 10)
+        self.now += 10
+        self.assertEqual(bucket.try_acquire(), 0)
+        self.assertAlmostEqual(bucket.try_acquire(), 1)
+
+    def test_shorter_pause_does_not_shorten_current_one(self):
+        bucket = TokenBucket(1)
+        bucket.pause(10)
+        bucket.pause(2)
+        self.assertAlmostEqual(bucket.try_acquire(), 10)
+
+class TokenBucketWaitTest(unittest.TestCase):
+    """acquire() con el reloj real: espera, timeout y cancelación."""
+    def test_acquire_waits_for_token(self):
+        bucket = TokenBucket(20, capacity=1)
+        bucket.try_acquire()
+        started = time.monotonic()
+        self.assertTrue(bucket.acquire(timeout=1))
+        self.assertGreaterEqual(time.monotonic() - started, 0.04)
+
+    def test_acquire_times_out(self):
+        bucket = TokenBucket(1, capacity=1)
+        bucket.try_acquire()
+        self.assertFalse(bucket.acquire(timeout=0.05))
+
+    def test_acquire_stops_with_event(self):
+        bucket = TokenBucket(1, capacity=1)
+        bucket.pause(30)
+        stop = threading.Event()
+        threading.Timer(0.05, stop.set).start()
+        started = time.monotonic()
+        self.assertFalse(bucket.acquire(stop_event=stop))
+        self.assertLess(time.monotonic() - started, 5)
+
+CONFIG = """
+[Slack]
+webhook_url = http://127.0.0.1:9/hook
+outbox_path = {outbox_path}
+retry_base_seconds = 2
+retry_max_seconds = 60
+"""
+
+class SlackBackoffTest(unittest.TestCase):
+    """Backoff y Retry-After del notificador (sin enviar nada: no hay mensajes en el outbox)."""
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        config = temporary_config(CONFIG.format(outbox_path=os.path.join(directory.name, "outbox.db")))
+        config.__enter__()
+        self.addCleanup(config.__exit__, None, None, None)
+        self.notifier = SlackNotifier()
+        self.addCleanup(self.notifier.close)
+
+    def test_backoff_doubles_with_jitter_up_to_maximum(self):
+        for attempts, ceiling in ((1, 2), (2, 4), (3, 8), (5, 32), (6, 60), (50, 60)):
+            delays = [self.notifier._backoff_seconds(attempts) for _ in range(50)]
+            self.assertTrue(all(ceiling / 2 <= delay <= ceiling for delay in delays), (attempts, delays))
+
+    def test_parse_retry_after(self):
+        self.assertEqual(SlackNotifier._parse_retry_after("30"), 30)
+        self.assertEqual(SlackNotifier._parse_retry_after("-5"), 0)
+        self.assertIsNone(SlackNotifier._parse_retry_after(None))
+        self.assertIsNone(SlackNotifier._parse_retry_after("pronto"))
+        seconds = SlackNotifier._parse_retry_after(formatdate(time.time() + 120, usegmt=True))
+        self.assertAlmostEqual(seconds, 120, delta=2)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import threading
+import time
+import unittest
+from datetime import datetime, timedelta
+from src.core.monitor import TaskMonitorService
+from src.strategies.active_processes import ActiveProcessStrategy
+from tests.support import SQLiteExecutor, temporary_config
+
+CONFIG = """
+[Monitoring]
+max_tasks_limit = 10
+parallel_strategies = true
+max_parallel_strategies = {workers}
+strategy_timeout_seconds = 0.3
+summary_mode = false
+"""
+
+NOW = datetime(2024, 1, 1, 12, 0)
+
+def active_row(number: int, started_minutes_ago: int) -> dict:
+    started = NOW + timedelta(hours=6) - timedelta(minutes=started_minutes_ago)
+    return dict(SysTaskNum=number, AgentSchedNum=0, TaskDescription=f"Tarea {number}", TaskType="Process",
+                StartedOn=started, LastActivityOn=started, ProgressPercent=0, SubmitUser="epicor",
+                TaskStatus="ACTIVE", ActivityMsg=None)
+
+class BlockingStrategy(ActiveProcessStrategy):
+    """Proceso Activo con otro nombre; si `blocked`, procesa solo cuando se libera `release`."""
+    def __init__(self, name: str, release: threading.Event, blocked: bool = False):
+        self._name = name
+        self._release = release
+        self._blocked = blocked
+        self.calls = 0
+
+    @property
+    def category_name(self) -> str:
+        return self._name
+
+    def process_raw_tasks(self, raw_tasks_data, include_tasks: bool = False):
+        self.calls += 1
+        if self._blocked:
+            self._release.wait(5)
+        statistics = super().process_raw_tasks(raw_tasks_data, include_tasks=include_tasks)
+        statistics.category_name = self._name
+        return statistics
+
+class ParallelStrategiesTest(unittest.TestCase):
+    def make_monitor(self, workers: int, strategies) -> TaskMonitorService:
+        config = temporary_config(CONFIG.format(workers=workers))
+        config.__enter__()
+        self.addCleanup(config.__exit__, None, None, None)
+        executor = SQLiteExecutor(now=NOW)
+        executor.insert("SysTask", [active_row(1, 30), active_row(2, 90)])
+        self.addCleanup(executor.close)
+        monitor = TaskMonitorService(executor, strategies)
+        self.addCleanup(monitor.shutdown)
+        # Se ejecuta primero: libera las estrategias bloqueadas y les deja terminar
+        self.addCleanup(time.sleep, 0.2)
+        self.addCleanup(self.release.set)
+        return monitor
+
+    def setUp(self):
+        self.release = threading.Event()
+
+    def test_all_strategies_finish_in_parallel(self):
+        strategies = [BlockingStrategy("A", self.release), BlockingStrategy("B", self.release)]
+        statistics = self.make_monitor(2, strategies).run_monitoring()
+        self.assertEqual({name: s.total_tasks for name, s in statistics.items()}, {"A": 2, "B": 2})
+
+    def test_running_strategy_times_out_and_is_skipped_next_cycle(self):
+        slow = BlockingStrategy("Lenta", self.release, blocked=True)
+        fast = BlockingStrategy("Rápida", self.release)
+        monitor = self.make_monitor(2, [slow, fast])
+        started = time.monotonic()
+        with self.assertLogs(level="ERROR") as logs:
+            statistics = monitor.run_monitoring()
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertEqual(list(statistics), ["Rápida"])
+        self.assertTrue(any("'Lenta'" in line and "Tiempo de espera" in line for line in logs.output))
+
+        with self.assertLogs(level="WARNING") as logs:
+            statistics = monitor.run_monitoring()
+        self.assertEqual(list(statistics), ["Rápida"])
+        self.assertTrue(any("'Lenta'" in line and "sigue en ejecución" in line for line in logs.output))
+        self.assertEqual(slow.calls, 1) # No se solapó consigo misma
+
+    def test_queued_strategy_is_cancelled_at_its_deadline(self):
+        # Un solo hilo: la segunda estrategia queda en la cola detrás de la bloqueada
+        slow = BlockingStrategy("Lenta", self.release, blocked=True)
+        queued = BlockingStrategy("En cola", self.release)
+        monitor = self.make_monitor(1, [slow, queued])
+        started = time.monotonic()
+        with self.assertLogs(level="ERROR") as logs:
+            statistics = monitor.run_monitoring()
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertEqual(statistics, {})
+        self.assertTrue(any("'En cola'" in line and "antes de iniciar" in line for line in logs.output))
+
+        # La cancelada no quedó en la cola: al liberarse la lenta no se ejecuta en segundo plano
+        self.release.set()
+        time.sleep(0.2)
+        self.assertEqual(queued.calls, 0)
+        statistics = monitor.run_monitoring()
+        self.assertEqual(sorted(statistics), ["En cola", "Lenta"])
+        self.assertEqual(queued.calls, 1)
+
+if __name__ == "__main__":
+    unittest.main()
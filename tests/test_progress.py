@@ -0,0 +1,116 @@
+import unittest
+from datetime import datetime, timedelta
+from src.core.alert_state import InMemoryStateStore
+from src.core.progress import ProgressTracker
+from src.models import Task
+
+STARTED = datetime(2024, 1, 1, 8, 0)
+
+def task(task_id: str, progress=None, activity_minutes=None, message: str = None) -> Task:
+    last_activity = STARTED + timedelta(minutes=activity_minutes) if activity_minutes is not None else None
+    return Task(task_id=task_id, task_description=f"Tarea {task_id}", start_time=STARTED, submit_user="epicor",
+                last_activity_on=last_activity, progress_percent=progress, activity_msg=message)
+
+class ProgressTrackerTest(unittest.TestCase):
+    CATEGORY = "Proceso Activo"
+
+    def setUp(self):
+        self.store = InMemoryStateStore()
+
+    def make_tracker(self, **kwargs) -> ProgressTracker:
+        options = dict(stall_cycles=3, min_stall_minutes=10, window_samples=4)
+        options.update(kwargs)
+        return ProgressTracker(self.store, **options)
+
+    def observe(self, tracker: ProgressTracker, minute: float, *tasks):
+        """Un ciclo en el minuto indicado; retorna las estimaciones por tarea."""
+        estimates = tracker.observe(self.CATEGORY, tasks, now=1000.0 + minute * 60)
+        return {estimate.task.task_id: estimate for estimate in estimates}
+
+    def test_rejects_invalid_stall_cycles(self):
+        with self.assertRaises(ValueError):
+            self.make_tracker(stall_cycles=0)
+
+    def test_stall_requires_cycles_and_minutes(self):
+        tracker = self.make_tracker()
+        estimates = [self.observe(tracker, minute, task("1", 42, activity_minutes=5))["1"]
+                     for minute in (0, 1, 2, 3, 4, 10, 11)]
+        self.assertEqual([estimate.unchanged_cycles for estimate in estimates], [0, 1, 2, 3, 4, 5, 6])
+        # A los 3 ciclos sin cambios aún no pasaron 10 minutos: no está estancada hasta el minuto 10
+        self.assertEqual([estimate.stalled for estimate in estimates], [False, False, False, False, False, True, True])
+        self.assertEqual(estimates[-1].unchanged_minutes, 11)
+
+    def test_minutes_alone_are_not_enough(self):
+        tracker = self.make_tracker()
+        estimates = [self.observe(tracker, minute, task("1", 42))["1"] for minute in (0, 30, 60)]
+        self.assertFalse(estimates[-1].stalled) # 60 minutos, pero solo 2 ciclos sin cambios
+        self.assertTrue(self.observe(tracker, 90, task("1", 42))["1"].stalled)
+
+    def test_progress_or_activity_change_resets_stall(self):
+        tracker = self.make_tracker(stall_cycles=1, min_stall_minutes=0)
+        self.observe(tracker, 0, task("1", 42, activity_minutes=5))
+        self.assertTrue(self.observe(tracker, 1, task("1", 42, activity_minutes=5))["1"].stalled)
+        self.assertFalse(self.observe(tracker, 2, task("1", 43, activity_minutes=5))["1"].stalled)
+        self.assertTrue(self.observe(tracker, 3, task("1", 43, activity_minutes=5))["1"].stalled)
+        # Con el mismo progreso, una actividad nueva también cuenta como avance
+        self.assertFalse(self.observe(tracker, 4, task("1", 43, activity_minutes=9))["1"].stalled)
+
+    def test_rate_and_eta_over_the_window(self):
+        tracker = self.make_tracker(window_samples=3)
+        self.observe(tracker, 0, task("1", 10))
+        first = self.observe(tracker, 0, task("1", 10))["1"]
+        self.assertIsNone(first.rate_per_minute) # Sin tiempo transcurrido entre lecturas
+        self.observe(tracker, 10, task("1", 30))
+        estimate = self.observe(tracker, 20, task("1", 60))["1"]
+        # Ventana de 3 lecturas: de 10% (minuto 0) a 60% (minuto 20)
+        self.assertAlmostEqual(estimate.rate_per_minute, 2.5)
+        self.assertAlmostEqual(estimate.eta_minutes, 16)
+        # La lectura más antigua sale de la ventana: de 30% (minuto 10) a 70% (minuto 30)
+        estimate = self.observe(tracker, 30, task("1", 70))["1"]
+        self.assertAlmostEqual(estimate.rate_per_minute, 2.0)
+        self.assertAlmostEqual(estimate.eta_minutes, 15)
+
+    def test_no_eta_without_progress(self):
+        tracker = self.make_tracker()
+        self.observe(tracker, 0, task("1", 50))
+        estimate = self.observe(tracker, 5, task("1", 50))["1"]
+        self.assertEqual(estimate.rate_per_minute, 0)
+        self.assertIsNone(estimate.eta_minutes)
+        self.observe(tracker, 0, task("2", activity_minutes=1))
+        estimate = self.observe(tracker, 5, task("2", activity_minutes=2))["2"]
+        self.assertIsNone(estimate.rate_per_minute) # Solo actividad: sin lecturas de progreso
+        self.assertIsNone(estimate.eta_minutes)
+
+    def test_tasks_without_progress_or_activity_are_not_tracked(self):
+        tracker = self.make_tracker()
+        self.assertEqual(self.observe(tracker, 0, task("1")), {})
+        self.assertIsNone(self.store.get(f"progress:{self.CATEGORY}"))
+
+    def test_max_tasks_cap(self):
+        tracker = self.make_tracker(max_tasks=2)
+        with self.assertLogs(level="WARNING"):
+            estimates = self.observe(tracker, 0, task("1", 10), task("2", 10), task("3", 10))
+        self.assertEqual(sorted(estimates), ["1", "2"])
+        self.assertEqual(sorted(self.store.get(f"progress:{self.CATEGORY}")), ["1", "2"])
+
+    def test_finished_tasks_are_forgotten(self):
+        tracker = self.make_tracker()
+        self.observe(tracker, 0, task("1", 10), task("2", 10))
+        self.observe(tracker, 1, task("2", 10))
+        self.assertEqual(sorted(self.store.get(f"progress:{self.CATEGORY}")), ["2"])
+        # Si vuelve a aparecer, empieza de cero
+        self.assertEqual(self.observe(tracker, 2, task("1", 10))["1"].unchanged_cycles, 0)
+        self.observe(tracker, 3)
+        self.assertEqual(self.store.get(f"progress:{self.CATEGORY}"), {})
+
+    def test_state_survives_a_new_tracker(self):
+        self.observe(self.make_tracker(), 0, task("1", 42))
+        self.observe(self.make_tracker(), 5, task("1", 42))
+        self.observe(self.make_tracker(), 10, task("1", 42))
+        estimate = self.observe(self.make_tracker(), 15, task("1", 42, message="Esperando bloqueo"))["1"]
+        self.assertTrue(estimate.stalled)
+        self.assertIn("42%", estimate.describe())
+        self.assertIn("Esperando bloqueo", estimate.describe())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from decimal import Decimal
+from src.core.monitor import TaskMonitorService
+from src.database.replay import RecordingExecutor, ReplayExecutor, ReplayExhausted, query_id
+from src.strategies.active_processes import ActiveProcessStrategy
+from src.utils.row_mapping import ColumnMap
+from src.utils.sql import Query
+from tests.support import SQLiteExecutor, temporary_config
+
+CONFIG = """
+[Monitoring]
+max_tasks_limit = 1
+summary_mode = false
+"""
+
+NOW = datetime(2024, 1, 1, 12, 0)
+
+def active_row(number: int, started_minutes_ago: int, message=None) -> dict:
+    started = NOW + timedelta(hours=6) - timedelta(minutes=started_minutes_ago)
+    return dict(SysTaskNum=number, AgentSchedNum=0, TaskDescription=f"Tarea {number}", TaskType="Process",
+                StartedOn=started, LastActivityOn=started, ProgressPercent=12.5, SubmitUser="epicor",
+                TaskStatus="ACTIVE", ActivityMsg=message)
+
+class DecimalExecutor(SQLiteExecutor):
+    """Como pyodbc con columnas NUMERIC: ProgressPercent llega como Decimal."""
+    def execute_query(self, query):
+        rows = super().execute_query(query)
+        for row in rows:
+            if isinstance(row.get("ProgressPercent"), float):
+                row["ProgressPercent"] = Decimal(str(row["ProgressPercent"]))
+        return rows
+
+TASKS = Query("SELECT SysTaskNum, StartedOn, ProgressPercent, ActivityMsg FROM Ice.SysTask "
+              "WHERE TaskStatus = ? ORDER BY SysTaskNum", ("ACTIVE",))
+
+class ReplayRoundTripTest(unittest.TestCase):
+    def setUp(self):
+        config = temporary_config(CONFIG)
+        config.__enter__()
+        self.addCleanup(config.__exit__, None, None, None)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "captura.jsonl.gz")
+        self.database = DecimalExecutor(now=NOW)
+        self.database.insert("SysTask", [active_row(1, 90, message=b"\x00\xffbinario"), active_row(2, 10)])
+        self.recorder = RecordingExecutor(self.database, self.path)
+        self.addCleanup(self.recorder.close) # Cierra también la base SQLite
+
+    def replay(self) -> ReplayExecutor:
+        self.recorder.close()
+        return ReplayExecutor(self.path, speed=0)
+
+    def test_typed_values_survive_the_capture(self):
+        recorded = self.recorder.execute_query(TASKS)
+        replayed = self.replay().execute_query(TASKS)
+        self.assertEqual(replayed, recorded)
+        first = replayed[0]
+        self.assertIsInstance(first["StartedOn"], datetime)
+        self.assertEqual(first["ProgressPercent"], Decimal("12.5"))
+        self.assertIsInstance(first["ProgressPercent"], Decimal)
+        self.assertEqual(first["ActivityMsg"], b"\x00\xffbinario")
+
+    def test_streamed_rows_replay_as_native_rows(self):
+        recorded = list(self.recorder.iter_rows(TASKS))
+        rows = list(self.replay().iter_rows(TASKS))
+        self.assertEqual(len(rows), 2)
+        self.assertIsInstance(rows[0], tuple)
+        columns = ColumnMap.from_row(rows[0], ("SysTaskNum", "ActivityMsg"))
+        self.assertEqual([columns.get(row, "SysTaskNum") for row in rows], [row["SysTaskNum"] for row in recorded])
+        self.assertEqual(columns.get(rows[0], "ActivityMsg"), b"\x00\xffbinario")
+
+    def test_query_id_includes_parameters(self):
+        completed = Query(TASKS.sql, ("COMPLETE",))
+        self.assertNotEqual(query_id(TASKS), query_id(completed))
+        self.assertEqual(query_id(TASKS), query_id(Query("  " + TASKS.sql + "\n", ("ACTIVE",))))
+        self.assertEqual(query_id("SELECT 1"), query_id(Query("SELECT 1")))
+
+        self.database.modify("UPDATE SysTask SET TaskStatus = 'COMPLETE' WHERE SysTaskNum = 2")
+        self.recorder.execute_query(TASKS)
+        self.recorder.execute_query(completed)
+        replay = self.replay()
+        # Cada combinación de texto y parámetros recibe sus propios resultados
+        self.assertEqual([row["SysTaskNum"] for row in replay.execute_query(completed)], [2])
+        self.assertEqual([row["SysTaskNum"] for row in replay.execute_query(TASKS)], [1])
+
+    def test_results_are_served_in_recorded_order(self):
+        self.recorder.execute_query(TASKS)
+        self.database.modify("DELETE FROM SysTask WHERE SysTaskNum = 1")
+        self.recorder.execute_query(TASKS)
+        replay = self.replay()
+        self.assertEqual(replay.pending(), 2)
+        self.assertEqual(len(replay.execute_query(TASKS)), 2)
+        self.assertEqual(len(replay.execute_query(TASKS)), 1)
+        self.assertEqual(replay.pending(), 0)
+        with self.assertRaises(ReplayExhausted):
+            replay.execute_query(TASKS)
+
+    def test_batches(self):
+        count = Query("SELECT COUNT(*) AS Total FROM Ice.SysTask WHERE TaskStatus = ?", ("ACTIVE",))
+        recorded = self.recorder.execute_batch([TASKS, count])
+        replayed = self.replay().execute_batch([TASKS, count])
+        self.assertEqual(replayed, recorded)
+        self.assertEqual(replayed[1], [{"Total": 2}])
+
+    def test_kind_mismatch_raises(self):
+        # Un lote de un solo query tiene la misma clave que el query, pero no el mismo tipo
+        self.recorder.execute_query(TASKS)
+        with self.assertRaises(ReplayExhausted):
+            self.replay().execute_batch([TASKS])
+
+    def test_monitor_cycle_replays_identically(self):
+        strategy = ActiveProcessStrategy()
+        monitor = TaskMonitorService(self.recorder, [strategy])
+        recorded = monitor.run_monitoring()[strategy.category_name]
+        monitor.shutdown()
+
+        replay = self.replay()
+        monitor = TaskMonitorService(replay, [strategy])
+        self.addCleanup(monitor.shutdown)
+        replayed = monitor.run_monitoring()[strategy.category_name]
+        self.assertEqual(replay.pending(), 0)
+        self.assertEqual((replayed.total_tasks, replayed.over_limit), (recorded.total_tasks, recorded.over_limit))
+        self.assertEqual(replayed.longest_running_task, recorded.longest_running_task)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,214 @@
+import os
+import signal
+import threading
+import time
+import unittest
+from src.core.scheduler import AdaptiveIntervalPolicy, AdaptivePollingScheduler, PollingScheduler
+from src.core.thresholds import ThresholdIndex
+from src.models import Task, TaskStatistics
+from tests.support import temporary_config
+
+def task(task_id: str, duration) -> Task:
+    return Task(task_id=task_id, task_description=f"Tarea {task_id}", start_time=None, submit_user="epicor",
+                task_type="Report", duration_minutes=duration)
+
+def statistics(total: int, over_limit: bool = False, longest: Task = None, tasks=None) -> TaskStatistics:
+    return TaskStatistics(category_name="Proceso Activo", total_tasks=total, over_limit=over_limit,
+                          longest_running_task=longest, tasks=tasks)
+
+class PollingSchedulerTest(unittest.TestCase):
+    def test_rejects_non_positive_interval(self):
+        with self.assertRaises(ValueError):
+            PollingScheduler(lambda: None, 0)
+
+    def test_run_once_skips_while_previous_cycle_runs(self):
+        entered, release = threading.Event(), threading.Event()
+
+        def cycle():
+            entered.set()
+            release.wait(5)
+
+        scheduler = PollingScheduler(cycle, 60)
+        worker = threading.Thread(target=scheduler.run_once)
+        worker.start()
+        try:
+            self.assertTrue(entered.wait(5))
+            with self.assertLogs(level="WARNING"):
+                self.assertFalse(scheduler.run_once())
+        finally:
+            release.set()
+            worker.join()
+        self.assertTrue(scheduler.run_once())
+
+    def test_late_cycle_does_not_pile_up(self):
+        starts = []
+
+        def cycle():
+            starts.append(time.monotonic())
+            if len(starts) == 1:
+                time.sleep(0.35) # Más de tres intervalos
+        scheduler = PollingScheduler(cycle, 0.1)
+        with self.assertLogs(level="WARNING"):
+            scheduler.run_forever(max_cycles=4)
+        gaps = [later - earlier for earlier, later in zip(starts, starts[1:])]
+        # Tras el ciclo atrasado, el siguiente empieza enseguida y luego se respeta el intervalo
+        self.assertLess(gaps[0], 0.45)
+        self.assertGreaterEqual(gaps[1], 0.09)
+        self.assertGreaterEqual(gaps[2], 0.09)
+
+    def test_failed_cycle_does_not_stop_scheduler(self):
+        calls = []
+
+        def cycle():
+            calls.append(1)
+            raise RuntimeError("query fallido")
+
+        with self.assertLogs(level="ERROR"):
+            PollingScheduler(cycle, 0.01).run_forever(max_cycles=3)
+        self.assertEqual(len(calls), 3)
+
+    def test_stop_interrupts_wait(self):
+        scheduler = PollingScheduler(lambda: None, 60)
+        timer = threading.Timer(0.05, scheduler.stop)
+        timer.start()
+        started = time.monotonic()
+        scheduler.run_forever()
+        timer.join()
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertTrue(scheduler.is_stopped())
+
+    def test_sigterm_stops_after_current_cycle(self):
+        previous = {signum: signal.getsignal(signum) for signum in (signal.SIGTERM, signal.SIGINT)}
+        for signum, handler in previous.items():
+            self.addCleanup(signal.signal, signum, handler)
+        calls = []
+
+        def cycle():
+            calls.append(1)
+            os.kill(os.getpid(), signal.SIGTERM)
+
+        scheduler = PollingScheduler(cycle, 60)
+        scheduler.install_signal_handlers()
+        scheduler.run_forever()
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(scheduler.is_stopped())
+
+class AdaptiveIntervalPolicyTest(unittest.TestCase):
+    def make_policy(self, **kwargs) -> AdaptiveIntervalPolicy:
+        options = dict(base_seconds=60, min_seconds=5, max_seconds=300, backoff_factor=2, pressure_ratio=0.8,
+                       max_tasks_limit=100)
+        options.update(kwargs)
+        return AdaptiveIntervalPolicy(**options)
+
+    def test_rejects_invalid_bounds(self):
+        with self.assertRaises(ValueError):
+            self.make_policy(min_seconds=0)
+        with self.assertRaises(ValueError):
+            self.make_policy(min_seconds=60, max_seconds=30)
+
+    def test_base_interval_is_clamped_to_bounds(self):
+        self.assertEqual(self.make_policy(base_seconds=1).base_seconds, 5)
+        self.assertEqual(self.make_policy(base_seconds=3600).base_seconds, 300)
+
+    def test_base_interval_without_statistics_or_pressure(self):
+        policy = self.make_policy()
+        self.assertEqual(policy.next_interval(5, None)[0], 60) # El query falló: vuelve al intervalo base
+        self.assertEqual(policy.next_interval(240, statistics(10))[0], 60)
+
+    def test_pressure_near_task_limit(self):
+        policy = self.make_policy()
+        self.assertEqual(policy.next_interval(60, statistics(79))[0], 60)
+        self.assertEqual(policy.next_interval(60, statistics(80))[0], 5)
+        self.assertEqual(policy.next_interval(60, statistics(150, over_limit=True))[0], 5)
+        # Sin límite configurado solo cuenta over_limit
+        self.assertEqual(self.make_policy(max_tasks_limit=0).next_interval(60, statistics(1000))[0], 60)
+
+    def test_pressure_near_duration_threshold(self):
+        policy = self.make_policy(thresholds=ThresholdIndex(dimensions=[("task_type", {"Report": 100})]))
+        self.assertEqual(policy.next_interval(60, statistics(1, longest=task("1", 79)))[0], 60)
+        self.assertEqual(policy.next_interval(60, statistics(1, longest=task("1", 80)))[0], 5)
+        # Con el detalle de tareas se evalúan todas, no solo la destacada
+        tasks = [task("1", 10), task("2", 95)]
+        self.assertEqual(policy.next_interval(60, statistics(2, longest=tasks[0], tasks=tasks))[0], 5)
+
+    def test_backoff_while_empty_up_to_maximum(self):
+        policy = self.make_policy()
+        interval = None
+        intervals = []
+        for _ in range(5):
+            interval, reason = policy.next_interval(interval, statistics(0))
+            intervals.append(interval)
+        self.assertEqual(intervals, [120, 240, 300, 300, 300])
+        self.assertEqual(reason, "sin tareas")
+        # La primera tarea devuelve la categoría al intervalo base
+        self.assertEqual(policy.next_interval(interval, statistics(1))[0], 60)
+
+    def test_backoff_starts_from_base_after_pressure(self):
+        policy = self.make_policy()
+        self.assertEqual(policy.next_interval(5, statistics(0))[0], 120)
+
+    def test_backoff_factor_below_one_does_not_shrink(self):
+        policy = self.make_policy(backoff_factor=0.5)
+        self.assertEqual(policy.next_interval(60, statistics(0))[0], 60)
+
+    def test_from_config(self):
+        with temporary_config("""
+[Monitoring]
+max_tasks_limit = 10
+check_interval_seconds = 30
+min_interval_seconds = 10
+max_interval_seconds = 90
+backoff_factor = 3
+long_running_task_threshold_minutes = 60
+"""):
+            policy = AdaptiveIntervalPolicy.from_config()
+            self.assertEqual((policy.base_seconds, policy.min_seconds, policy.max_seconds), (30, 10, 90))
+            self.assertEqual(policy.next_interval(None, statistics(0))[0], 90)
+            self.assertEqual(policy.next_interval(None, statistics(8))[0], 10)
+            self.assertEqual(policy.next_interval(None, statistics(1, longest=task("1", 50)))[0], 10)
+
+class AdaptivePollingSchedulerTest(unittest.TestCase):
+    def test_categories_follow_their_own_intervals(self):
+        policy = AdaptiveIntervalPolicy(base_seconds=0.05, min_seconds=0.01, max_seconds=0.2, max_tasks_limit=10)
+        calls = []
+
+        def cycle(categories):
+            calls.append(sorted(categories))
+            return {"vacía": statistics(0), "llena": statistics(10, over_limit=True)}
+
+        scheduler = AdaptivePollingScheduler(cycle, ["vacía", "llena"], lambda: policy, coalesce_seconds=0)
+        scheduler.run_forever(max_cycles=6)
+        self.assertEqual(calls[0], ["llena", "vacía"])
+        self.assertEqual(scheduler.intervals()["llena"], 0.01)
+        self.assertGreater(scheduler.intervals()["vacía"], 0.05)
+        # La categoría bajo presión se consulta más veces que la vacía
+        self.assertGreater(sum("llena" in call for call in calls), sum("vacía" in call for call in calls))
+
+    def test_policy_rebuilt_only_when_version_changes(self):
+        version = [1]
+        built = []
+
+        def factory():
+            built.append(version[0])
+            return AdaptiveIntervalPolicy(base_seconds=0.01, min_seconds=0.01, max_seconds=0.01)
+
+        scheduler = AdaptivePollingScheduler(lambda categories: {}, ["A"], factory, coalesce_seconds=0,
+                                             policy_version=lambda: version[0])
+        scheduler.run_forever(max_cycles=3)
+        self.assertEqual(built, [1]) # Solo la construcción inicial
+        version[0] = 2
+        scheduler.run_forever(max_cycles=3)
+        self.assertEqual(built, [1, 2])
+
+    def test_policy_rebuilt_every_cycle_without_version(self):
+        built = []
+
+        def factory():
+            built.append(1)
+            return AdaptiveIntervalPolicy(base_seconds=0.01, min_seconds=0.01, max_seconds=0.01)
+
+        AdaptivePollingScheduler(lambda categories: {}, ["A"], factory, coalesce_seconds=0).run_forever(max_cycles=3)
+        self.assertEqual(len(built), 4)
+
+if __name__ == "__main__":
+    unittest.main()
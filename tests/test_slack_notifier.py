@@ -0,0 +1,203 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+import requests
+from src.core.metrics import MetricsRegistry, MonitorMetrics
+from src.core.monitor import TaskMonitorService
+from src.models import TaskStatistics
+from src.observers.slack_notifier import SlackNotifier
+from tests.support import SQLiteExecutor, temporary_config
+
+class WebhookServer(ThreadingHTTPServer):
+    """
+    Webhook de Slack local. `responses` es la lista de respuestas a dar en orden, como
+    tuplas (status, encabezados, segundos de espera); agotada la lista responde 200.
+    """
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), WebhookHandler)
+        self.responses = []
+        self.received = []
+        self.lock = threading.Lock()
+        self.delivered = threading.Condition(self.lock)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/hook"
+
+    def next_response(self, payload: dict):
+        with self.lock:
+            response = self.responses.pop(0) if self.responses else (200, {}, 0)
+            self.received.append((response[0], payload))
+            self.delivered.notify_all()
+            return response
+
+    def wait_for(self, count: int, timeout: float = 5) -> bool:
+        """Espera a que lleguen `count` peticiones."""
+        with self.delivered:
+            return self.delivered.wait_for(lambda: len(self.received) >= count, timeout)
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        status, headers, delay = self.server.next_response(payload)
+        if delay:
+            time.sleep(delay)
+        try:
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"ok")
+        except (BrokenPipeError, ConnectionResetError):
+            pass # El cliente abandonó la petición por su timeout de lectura
+
+    def log_message(self, format, *args):
+        pass
+
+CONFIG = """
+[Slack]
+webhook_url = {url}
+outbox_path = {outbox_path}
+connect_timeout_seconds = 0.5
+read_timeout_seconds = {read_timeout}
+shutdown_timeout_seconds = 2
+retry_base_seconds = 0.05
+retry_max_seconds = 0.2
+rate_limit_per_second = 100
+rate_limit_burst = 10
+
+[Monitoring]
+max_tasks_limit = 10
+"""
+
+def statistics(name: str = "Proceso Activo") -> TaskStatistics:
+    return TaskStatistics(category_name=name, total_tasks=3, over_limit=False)
+
+class SlackNotifierTest(unittest.TestCase):
+    """Entrega del outbox de Slack contra un webhook HTTP local."""
+    def setUp(self):
+        self.server = WebhookServer()
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.outbox_path = os.path.join(directory.name, "outbox.db")
+
+    def make_notifier(self, read_timeout: float = 2) -> SlackNotifier:
+        config = temporary_config(CONFIG.format(url=self.server.url, outbox_path=self.outbox_path,
+                                                read_timeout=read_timeout))
+        config.__enter__()
+        self.addCleanup(config.__exit__, None, None, None)
+        notifier = SlackNotifier()
+        self.addCleanup(notifier.close)
+        return notifier
+
+    def test_update_does_not_wait_for_slow_endpoint(self):
+        self.server.responses = [(200, {}, 1)]
+        notifier = self.make_notifier()
+        started = time.monotonic()
+        notifier.update(statistics())
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertTrue(notifier.flush(5))
+        self.assertEqual(len(self.server.received), 1)
+        self.assertIn("Proceso Activo", self.server.received[0][1]["text"])
+
+    def test_applies_connect_and_read_timeouts(self):
+        # La primera respuesta tarda más que el timeout de lectura: se abandona y se reintenta
+        self.server.responses = [(200, {}, 1)]
+        notifier = self.make_notifier(read_timeout=0.2)
+        post = requests.Session.post
+        with mock.patch.object(requests.Session, "post", autospec=True, side_effect=post) as spy:
+            notifier.update(statistics())
+            self.assertTrue(notifier.flush(5))
+        self.assertEqual(len(self.server.received), 2)
+        self.assertEqual(spy.call_count, 2)
+        self.assertEqual(spy.call_args.kwargs["timeout"], (0.5, 0.2))
+
+    def test_retries_rate_limit_respecting_retry_after(self):
+        self.server.responses = [(429, {"Retry-After": "0.3"}, 0)]
+        notifier = self.make_notifier()
+        started = time.monotonic()
+        notifier.update(statistics())
+        self.assertTrue(notifier.flush(5))
+        self.assertGreaterEqual(time.monotonic() - started, 0.3)
+        self.assertEqual([status for status, _ in self.server.received], [429, 200])
+
+    def test_retries_server_errors(self):
+        self.server.responses = [(500, {}, 0), (503, {}, 0)]
+        notifier = self.make_notifier()
+        notifier.update(statistics())
+        self.assertTrue(notifier.flush(5))
+        self.assertEqual([status for status, _ in self.server.received], [500, 503, 200])
+
+    def test_does_not_retry_other_client_errors(self):
+        self.server.responses = [(404, {}, 0)]
+        notifier = self.make_notifier()
+        notifier.update(statistics())
+        self.assertTrue(notifier.flush(5))
+        self.assertEqual(len(self.server.received), 1)
+
+    def test_close_flushes_pending_messages(self):
+        self.server.responses = [(200, {}, 0.1)] * 3
+        notifier = self.make_notifier()
+        for name in ("A", "B", "C"):
+            notifier.update(statistics(name))
+        notifier.close()
+        self.assertEqual([payload["text"][-1] for _, payload in self.server.received], ["A", "B", "C"])
+
+    def test_close_gives_up_after_shutdown_timeout_and_keeps_messages(self):
+        self.server.responses = [(500, {}, 0)] * 1000
+        notifier = self.make_notifier()
+        notifier.update(statistics())
+        self.assertTrue(self.server.wait_for(1))
+        started = time.monotonic()
+        notifier.close()
+        # shutdown_timeout_seconds = 2, más la espera del hilo de entrega
+        self.assertLess(time.monotonic() - started, 4)
+
+        # El mensaje quedó en el outbox y se reenvía en la siguiente ejecución
+        self.server.responses = []
+        notifier = self.make_notifier()
+        self.assertTrue(notifier.flush(5))
+        self.assertEqual(self.server.received[-1][0], 200)
+
+    def test_records_delivery_metrics(self):
+        # 429, 500, timeout de lectura y entrega; luego un mensaje rechazado (404)
+        self.server.responses = [(429, {"Retry-After": "0.05"}, 0), (500, {}, 0), (200, {}, 1), (200, {}, 0), (404, {}, 0)]
+        notifier = self.make_notifier(read_timeout=0.3)
+        registry = MetricsRegistry()
+        metrics = MonitorMetrics(registry)
+        executor = SQLiteExecutor()
+        self.addCleanup(executor.close)
+        monitor = TaskMonitorService(executor, [], metrics=metrics)
+        monitor.add_observer(notifier) # El monitor le entrega sus métricas
+        notifier.attach_metrics(metrics) # Idempotente: no duplica el recolector del outbox
+        notifier.update(statistics())
+        self.assertTrue(notifier.flush(5))
+        notifier.update(statistics())
+        self.assertTrue(notifier.flush(5))
+
+        registry.publish()
+        samples = dict(line.rsplit(" ", 1) for line in registry.snapshot().decode().splitlines()
+                       if not line.startswith("#"))
+        for outcome, count in (("rate_limited", 1), ("server_error", 1), ("timeout", 1), ("sent", 1), ("rejected", 1)):
+            self.assertEqual(samples[f'epicor_monitor_delivery_attempts_total{{channel="slack",outcome="{outcome}"}}'],
+                             str(count), outcome)
+        self.assertEqual(samples['epicor_monitor_delivery_duration_seconds_count{channel="slack"}'], "5")
+        self.assertEqual(samples['epicor_monitor_delivery_retries_total{channel="slack"}'], "3")
+        self.assertEqual(samples['epicor_monitor_delivery_dropped_total{channel="slack"}'], "1")
+        self.assertEqual(samples['epicor_monitor_outbox_messages{channel="slack"}'], "0")
+        self.assertEqual(len(registry._collectors), 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import unittest
+from datetime import datetime, timedelta
+from src.strategies.active_processes import ActiveProcessStrategy
+from src.strategies.submitted_tasks import SubmittedTaskStrategy
+from tests.support import SQLiteExecutor, temporary_config
+
+CONFIG = """
+[Monitoring]
+max_tasks_limit = 2
+"""
+
+# Hora local del servidor (CURRENT_TIMESTAMP); las fechas de Epicor se guardan 6 horas adelantadas
+NOW = datetime(2024, 1, 1, 12, 0)
+
+def started(minutes_ago: int) -> datetime:
+    return NOW + timedelta(hours=6) - timedelta(minutes=minutes_ago)
+
+def active_task(number: int, minutes_ago, status: str = "ACTIVE", sched: int = 0) -> dict:
+    return dict(SysTaskNum=number, AgentSchedNum=sched, TaskDescription=f"Tarea {number}", TaskType="Process",
+                StartedOn=None if minutes_ago is None else started(minutes_ago),
+                LastActivityOn=None if minutes_ago is None else started(0),
+                ProgressPercent=10, SubmitUser="epicor", TaskStatus=status, ActivityMsg=None)
+
+def submitted_task(number: int, minutes_ago, agent: str = "SystemTaskAgent") -> dict:
+    return dict(AgentID=agent, AgentSchedNum=number, TaskDesc=f"Solicitud {number}", TaskType="Report",
+                RunProcedure="Erp.Rpt.Test", SubmittedOn=None if minutes_ago is None else started(minutes_ago),
+                SubmitUser="epicor", ParamMaintProgram=None)
+
+def immediate(number: int, agent: str = "SystemTaskAgent", desc: str = "Immediate Run Request") -> dict:
+    return dict(AgentID=agent, AgentSchedNum=number, SchedDesc=desc)
+
+class SummaryModeTest(unittest.TestCase):
+    """
+    El query de resumen (conteo y tarea destacada en SQL) debe producir las mismas
+    TaskStatistics que el recorrido completo, sobre los mismos datos.
+    """
+    def setUp(self):
+        self._config = temporary_config(CONFIG)
+        self._config.__enter__()
+        self.addCleanup(self._config.__exit__, None, None, None)
+        self.executor = SQLiteExecutor(now=NOW)
+        self.addCleanup(self.executor.close)
+
+    def assert_same_statistics(self, strategy):
+        full = strategy.process_raw_tasks(self.executor.execute_query(strategy.get_tasks_query()))
+        summary = strategy.process_summary(self.executor.execute_query(strategy.get_summary_query()))
+        self.assertEqual(summary.total_tasks, full.total_tasks)
+        self.assertEqual(summary.over_limit, full.over_limit)
+        self.assertEqual(summary.longest_running_task, full.longest_running_task)
+        return full
+
+    def test_active_processes(self):
+        self.executor.insert("SysTask", [
+            active_task(1, 30),
+            active_task(2, 90, sched=7),
+            active_task(3, None),               # Sin StartedOn: Duracion NULL, no compite
+            active_task(4, 90),                 # Empata con la 2: gana el menor SysTaskNum
+            active_task(5, 500, status="COMPLETE"),
+        ])
+        self.executor.insert("SysAgentTaskParam", [dict(AgentSchedNum=7, ParamName="FunctionId", ParamCharacter="Erp.Rpt.X")])
+        statistics = self.assert_same_statistics(ActiveProcessStrategy())
+        self.assertEqual(statistics.total_tasks, 4)
+        self.assertTrue(statistics.over_limit)
+        self.assertEqual(statistics.longest_running_task.task_id, "2")
+        self.assertEqual(statistics.longest_running_task.duration_minutes, 90)
+        self.assertEqual(statistics.longest_running_task.function_id, "Erp.Rpt.X")
+
+    def test_active_processes_with_only_null_durations(self):
+        self.executor.insert("SysTask", [active_task(1, None), active_task(2, None)])
+        statistics = self.assert_same_statistics(ActiveProcessStrategy())
+        self.assertEqual(statistics.total_tasks, 2)
+        self.assertIsNone(statistics.longest_running_task)
+
+    def test_active_processes_without_rows(self):
+        self.executor.insert("SysTask", [active_task(1, 30, status="COMPLETE")])
+        statistics = self.assert_same_statistics(ActiveProcessStrategy())
+        self.assertEqual(statistics.total_tasks, 0)
+        self.assertFalse(statistics.over_limit)
+        self.assertIsNone(statistics.longest_running_task)
+
+    def test_submitted_tasks(self):
+        self.executor.insert("SysAgentTask", [
+            submitted_task(10, 5),
+            submitted_task(11, 20),
+            submitted_task(12, None),           # Sin SubmittedOn: no compite
+            submitted_task(13, 20),             # Empata con la 11: gana el menor AgentSchedNum
+            submitted_task(14, 60),             # Programación recurrente: no se cuenta
+            submitted_task(15, 90, agent="OtroAgente"),
+        ])
+        self.executor.insert("SysAgentSched", [
+            immediate(10), immediate(11), immediate(12), immediate(13),
+            immediate(14, desc="Nightly"),
+            immediate(15),                      # Mismo número, otro agente: no coincide
+        ])
+        statistics = self.assert_same_statistics(SubmittedTaskStrategy())
+        self.assertEqual(statistics.total_tasks, 4)
+        self.assertTrue(statistics.over_limit)
+        self.assertEqual(statistics.longest_running_task.task_id, "11")
+
+    def test_submitted_tasks_with_only_null_dates(self):
+        self.executor.insert("SysAgentTask", [submitted_task(10, None)])
+        self.executor.insert("SysAgentSched", [immediate(10)])
+        statistics = self.assert_same_statistics(SubmittedTaskStrategy())
+        self.assertEqual(statistics.total_tasks, 1)
+        self.assertFalse(statistics.over_limit)
+        self.assertIsNone(statistics.longest_running_task)
+
+    def test_submitted_tasks_without_rows(self):
+        statistics = self.assert_same_statistics(SubmittedTaskStrategy())
+        self.assertEqual(statistics.total_tasks, 0)
+        self.assertIsNone(statistics.longest_running_task)
+
+if __name__ == "__main__":
+    unittest.main()
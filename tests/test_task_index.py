@@ -0,0 +1,172 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+from src.core.monitor import TaskMonitorService
+from src.core.task_index import ActiveTaskIndex
+from src.models import Task
+from src.strategies.active_processes import ActiveProcessStrategy
+from tests.support import SQLiteExecutor, temporary_config
+
+def task(key: str, duration) -> Task:
+    return Task(task_id=key, task_description=f"Tarea {key}", start_time=None, submit_user="epicor",
+                duration_minutes=duration)
+
+def by_longest_duration(task: Task):
+    return None if task.duration_minutes is None else -task.duration_minutes
+
+class ActiveTaskIndexTest(unittest.TestCase):
+    def test_watermark_only_moves_forward(self):
+        index = ActiveTaskIndex(by_longest_duration)
+        index.advance_watermark(5)
+        index.advance_watermark(None)
+        index.advance_watermark(3)
+        self.assertEqual(index.watermark, 5)
+        index.advance_watermark(8)
+        self.assertEqual(index.watermark, 8)
+
+    def test_longest_follows_updates_and_removals(self):
+        index = ActiveTaskIndex(by_longest_duration)
+        index.upsert("1", task("1", 10))
+        index.upsert("2", task("2", 30))
+        index.upsert("3", task("3", None)) # Sin duración: se cuenta pero no compite
+        self.assertEqual(len(index), 3)
+        self.assertEqual(index.longest().task_id, "2")
+        index.upsert("1", task("1", 50)) # La entrada anterior de "1" queda obsoleta en el heap
+        self.assertEqual(index.longest().task_id, "1")
+        index.remove("1")
+        self.assertEqual(index.longest().task_id, "2")
+        index.upsert("2", task("2", None))
+        self.assertIsNone(index.longest())
+        self.assertEqual(len(index), 2)
+
+    def test_longest_and_tasks_restricted_to_keys(self):
+        index = ActiveTaskIndex(by_longest_duration)
+        for key, duration in (("1", 50), ("2", 30), ("3", None), ("4", 30)):
+            index.upsert(key, task(key, duration))
+        self.assertEqual(index.longest({"2", "3", "4"}).task_id, "2") # Empate: la primera insertada
+        self.assertIsNone(index.longest({"3", "desconocida"}))
+        self.assertIsNone(index.longest(set()))
+        self.assertEqual([t.task_id for t in index.tasks({"1", "3", "desconocida"})], ["1", "3"])
+        self.assertEqual(index.longest().task_id, "1") # Sin claves se sigue usando el heap
+
+    def test_heap_is_compacted_after_many_updates(self):
+        index = ActiveTaskIndex(by_longest_duration)
+        for duration in range(1000):
+            index.upsert("1", task("1", duration))
+        self.assertLessEqual(len(index._heap), 2 * len(index) + 65)
+        self.assertEqual(index.longest().duration_minutes, 999)
+
+    def test_retain_prunes_finished_and_reports_unknown_keys(self):
+        index = ActiveTaskIndex(by_longest_duration)
+        for key in ("1", "2", "3"):
+            index.upsert(key, task(key, int(key)))
+        unknown = index.retain({"2", "3", "4"})
+        self.assertEqual(unknown, {"4"})
+        self.assertEqual(sorted(index.keys()), ["2", "3"])
+        self.assertEqual(index.longest().task_id, "3")
+
+    def test_reset_clears_tasks_and_watermark(self):
+        index = ActiveTaskIndex(by_longest_duration)
+        index.upsert("1", task("1", 10))
+        index.advance_watermark(10)
+        index.cycles_since_resync = 7
+        index.reset()
+        self.assertEqual(len(index), 0)
+        self.assertIsNone(index.watermark)
+        self.assertIsNone(index.longest())
+        self.assertEqual(index.cycles_since_resync, 0)
+        self.assertFalse(index.needs_resync)
+
+    def test_durations_age_with_elapsed_time(self):
+        index = ActiveTaskIndex(by_longest_duration)
+        with mock.patch("src.core.task_index.time.monotonic", return_value=1000.0):
+            index.upsert("1", task("1", 10))
+        with mock.patch("src.core.task_index.time.monotonic", return_value=1000.0 + 5 * 60 + 30):
+            self.assertEqual(index.longest().duration_minutes, 15)
+            self.assertEqual([t.duration_minutes for t in index.tasks()], [15])
+        self.assertEqual(index._tasks["1"].duration_minutes, 10) # La tarea guardada no se modifica
+
+CONFIG = """
+[Monitoring]
+max_tasks_limit = 10
+incremental_mode = true
+full_resync_cycles = 4
+"""
+
+NOW = datetime(2024, 1, 1, 12, 0)
+
+def server_time(minutes_ago: int) -> datetime:
+    return NOW + timedelta(hours=6) - timedelta(minutes=minutes_ago)
+
+def active_row(number: int, started_minutes_ago: int, activity_minutes_ago: int, status: str = "ACTIVE") -> dict:
+    return dict(SysTaskNum=number, AgentSchedNum=0, TaskDescription=f"Tarea {number}", TaskType="Process",
+                StartedOn=server_time(started_minutes_ago), LastActivityOn=server_time(activity_minutes_ago),
+                ProgressPercent=0, SubmitUser="epicor", TaskStatus=status, ActivityMsg=None)
+
+class IncrementalMonitorTest(unittest.TestCase):
+    """El índice incremental del monitor sobre SQLite: marca de agua, poda y resincronización."""
+    def setUp(self):
+        config = temporary_config(CONFIG)
+        config.__enter__()
+        self.addCleanup(config.__exit__, None, None, None)
+        self.executor = SQLiteExecutor(now=NOW)
+        self.strategy = ActiveProcessStrategy()
+        self.monitor = TaskMonitorService(self.executor, [self.strategy])
+        self.addCleanup(self.monitor.shutdown)
+
+    def run_cycle(self):
+        self.executor.queries.clear()
+        return self.monitor.run_monitoring()[self.strategy.category_name]
+
+    def resynced(self) -> bool:
+        return not any("LastActivityOn >= ?" in sql for sql in self.executor.queries)
+
+    def full_reads(self) -> int:
+        """Queries del ciclo que leen todas las tareas activas (resincronización)."""
+        full_query = self.strategy.get_delta_query(None)
+        return sum(sql == full_query.sql for sql in self.executor.queries)
+
+    def test_watermark_pruning_and_resync(self):
+        self.executor.insert("SysTask", [active_row(1, 60, 30), active_row(2, 20, 10)])
+        statistics = self.run_cycle()
+        self.assertTrue(self.resynced())
+        self.assertEqual(statistics.total_tasks, 2)
+        self.assertEqual(statistics.longest_running_task.task_id, "1")
+
+        # Una tarea nueva y otra que terminó después de la marca de agua
+        self.executor.insert("SysTask", [active_row(3, 5, 5)])
+        self.executor.modify("UPDATE SysTask SET TaskStatus = 'COMPLETE', LastActivityOn = ? WHERE SysTaskNum = 1",
+                             [server_time(1)])
+        statistics = self.run_cycle()
+        self.assertFalse(self.resynced())
+        self.assertEqual(statistics.total_tasks, 2)
+        self.assertEqual(statistics.longest_running_task.task_id, "2")
+
+        # Una tarea que desaparece sin cambiar su actividad se poda con el query de claves
+        self.executor.modify("DELETE FROM SysTask WHERE SysTaskNum = 2")
+        statistics = self.run_cycle()
+        self.assertEqual(statistics.total_tasks, 1)
+        self.assertEqual(statistics.longest_running_task.task_id, "3")
+
+        # Una tarea activa por debajo de la marca de agua obliga a resincronizar en el mismo ciclo
+        self.executor.insert("SysTask", [active_row(4, 120, 90)])
+        statistics = self.run_cycle()
+        self.assertEqual(self.full_reads(), 1)
+        self.assertEqual(statistics.total_tasks, 2)
+        self.assertEqual(statistics.longest_running_task.task_id, "4")
+        # El ciclo siguiente vuelve a ser incremental
+        statistics = self.run_cycle()
+        self.assertFalse(self.resynced())
+        self.assertEqual(statistics.total_tasks, 2)
+
+    def test_full_resync_every_configured_cycles(self):
+        self.executor.insert("SysTask", [active_row(1, 60, 30)])
+        resyncs = []
+        for _ in range(9):
+            self.run_cycle()
+            resyncs.append(self.resynced())
+        # Resincronización inicial y luego tras cada 4 ciclos incrementales
+        self.assertEqual(resyncs, [True, False, False, False, False, True, False, False, False])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+from src.core.thresholds import ThresholdIndex
+from src.models import Task
+from src.utils.config_manager import ConfigManager
+from tests.support import temporary_config
+
+def task(task_id: str, duration, function_id: str = None, sched_desc: str = None, task_type: str = None) -> Task:
+    return Task(task_id=task_id, task_description=f"Tarea {task_id}", start_time=None, submit_user="epicor",
+                sched_desc=sched_desc, task_type=task_type, function_id=function_id, duration_minutes=duration)
+
+CONFIG = """
+[Monitoring]
+max_tasks_limit = 10
+long_running_task_threshold_minutes = 60
+
+[Thresholds.function_id]
+Erp.Rpt.Aging = 240
+Erp.Rpt.* = 120
+Erp.Rpt.Stock* = 180
+Erp.Proc.Mrp = 0
+
+[Thresholds.sched_desc]
+Nightly = 300
+
+[Thresholds.task_type]
+Report = 90
+"""
+
+class ThresholdIndexTest(unittest.TestCase):
+    def setUp(self):
+        config = temporary_config(CONFIG)
+        config.__enter__()
+        self.addCleanup(config.__exit__, None, None, None)
+        self.index = ThresholdIndex.from_snapshot(ConfigManager.snapshot())
+
+    def test_precedence_function_then_sched_desc_then_task_type(self):
+        self.assertEqual(self.index.threshold_for(
+            task("1", 0, function_id="Erp.Rpt.Aging", sched_desc="Nightly", task_type="Report")), 240)
+        self.assertEqual(self.index.threshold_for(
+            task("2", 0, function_id="Erp.Otro", sched_desc="Nightly", task_type="Report")), 300)
+        self.assertEqual(self.index.threshold_for(task("3", 0, task_type="Report")), 90)
+        self.assertEqual(self.index.threshold_for(task("4", 0, task_type="Process")), 60)
+
+    def test_exact_match_wins_and_longest_prefix_wins(self):
+        self.assertEqual(self.index.threshold_for(task("1", 0, function_id="Erp.Rpt.Aging")), 240)
+        self.assertEqual(self.index.threshold_for(task("2", 0, function_id="Erp.Rpt.StockStatus")), 180)
+        self.assertEqual(self.index.threshold_for(task("3", 0, function_id="Erp.Rpt.Other")), 120)
+        # El prefijo no coincide con un valor más corto que él
+        self.assertEqual(self.index.threshold_for(task("4", 0, function_id="Erp.Rp")), 60)
+
+    def test_lookup_ignores_case_and_spaces(self):
+        self.assertEqual(self.index.threshold_for(task("1", 0, function_id=" erp.rpt.AGING ")), 240)
+        self.assertEqual(self.index.threshold_for(task("2", 0, sched_desc="NIGHTLY")), 300)
+
+    def test_zero_threshold_excludes_task(self):
+        excluded = task("1", 1000, function_id="Erp.Proc.Mrp", task_type="Report")
+        self.assertIsNone(self.index.threshold_for(excluded))
+        self.assertEqual(self.index.offenders([excluded]), ([], []))
+        self.assertEqual(self.index.max_ratio([excluded]), 0.0)
+
+    def test_without_thresholds_is_disabled(self):
+        index = ThresholdIndex()
+        self.assertFalse(index.enabled)
+        self.assertIsNone(index.threshold_for(task("1", 1000, function_id="Erp.Rpt.Aging")))
+        self.assertTrue(ThresholdIndex(dimensions=[("task_type", {"Report": 5})]).enabled)
+        self.assertFalse(ThresholdIndex(dimensions=[("task_type", {})]).enabled)
+
+    def test_max_ratio(self):
+        tasks = [task("1", 30), task("2", 180, function_id="Erp.Rpt.X"), task("3", None)]
+        self.assertEqual(self.index.max_ratio(tasks), 1.5)
+        self.assertEqual(self.index.max_ratio([]), 0.0)
+
+    def test_offenders_sorted_by_excess_with_top_n(self):
+        tasks = [
+            task("1", 70),                              # 10 sobre 60
+            task("2", 200, function_id="Erp.Rpt.X"),    # 80 sobre 120
+            task("3", 60),                              # En el umbral: no lo supera
+            task("4", None),
+            task("5", 100, task_type="Report"),         # 10 sobre 90: empata con la 1
+            task("6", 400, sched_desc="Nightly"),       # 100 sobre 300
+        ]
+        worst, offender_ids = self.index.offenders(tasks)
+        self.assertEqual([t.task_id for t in worst], ["6", "2", "1", "5"]) # Empate: la primera en llegar
+        self.assertEqual(sorted(offender_ids), ["1", "2", "5", "6"])
+        worst, offender_ids = self.index.offenders(tasks, top_n=2)
+        self.assertEqual([t.task_id for t in worst], ["6", "2"])
+        self.assertEqual(sorted(offender_ids), ["1", "2", "5", "6"]) # Todas, aunque solo se retornen 2
+
+    def test_top_n_matches_full_sort(self):
+        tasks = [task(str(number), 61 + (number * 37) % 50) for number in range(200)]
+        worst, _ = self.index.offenders(tasks)
+        for top_n in (1, 5, 50, 500):
+            self.assertEqual(self.index.offenders(tasks, top_n=top_n)[0], worst[:top_n])
+
+if __name__ == "__main__":
+    unittest.main()